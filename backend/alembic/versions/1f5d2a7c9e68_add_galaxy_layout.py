@@ -0,0 +1,32 @@
+"""add_galaxy_layout
+
+Revision ID: 1f5d2a7c9e68
+Revises: e7a93d0c5f14
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1f5d2a7c9e68"
+down_revision: Union[str, None] = "e7a93d0c5f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("knowledge_nodes", sa.Column("x", sa.Float(), nullable=True))
+    op.add_column("knowledge_nodes", sa.Column("y", sa.Float(), nullable=True))
+    op.add_column("knowledge_nodes", sa.Column("cluster_id", sa.Integer(), nullable=True))
+    op.add_column("knowledge_nodes", sa.Column("lod_level", sa.Integer(), nullable=False, server_default=sa.text("3")))
+
+
+def downgrade() -> None:
+    op.drop_column("knowledge_nodes", "lod_level")
+    op.drop_column("knowledge_nodes", "cluster_id")
+    op.drop_column("knowledge_nodes", "y")
+    op.drop_column("knowledge_nodes", "x")
@@ -0,0 +1,51 @@
+"""add_fsrs_memory_state
+
+Revision ID: 5b8e1c9d7a20
+Revises: 923a2f6344c7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e1c9d7a20"
+down_revision: Union[str, None] = "923a2f6344c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("user_vocabulary", sa.Column("stability", sa.Float(), nullable=True))
+    op.add_column("user_vocabulary", sa.Column("difficulty", sa.Float(), nullable=True))
+    op.add_column("user_vocabulary", sa.Column("last_review_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("user_vocabulary", sa.Column("reps", sa.Integer(), nullable=False, server_default=sa.text("0")))
+    op.add_column("user_vocabulary", sa.Column("lapses", sa.Integer(), nullable=False, server_default=sa.text("0")))
+
+    op.create_table(
+        "vocab_scheduler_params",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("weights_json", sa.JSON(), nullable=False),
+        sa.Column("desired_retention", sa.Float(), nullable=False),
+        sa.Column("n_reviews", sa.Integer(), nullable=False),
+        sa.Column("log_loss", sa.Float(), nullable=True),
+        sa.Column("optimized_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_vocab_scheduler_params_user_id"), "vocab_scheduler_params", ["user_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_vocab_scheduler_params_user_id"), table_name="vocab_scheduler_params")
+    op.drop_table("vocab_scheduler_params")
+
+    op.drop_column("user_vocabulary", "lapses")
+    op.drop_column("user_vocabulary", "reps")
+    op.drop_column("user_vocabulary", "last_review_at")
+    op.drop_column("user_vocabulary", "difficulty")
+    op.drop_column("user_vocabulary", "stability")
@@ -0,0 +1,36 @@
+"""unique_knowledge_edges
+
+Revision ID: 8a4c6e1f3b27
+Revises: 1f5d2a7c9e68
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4c6e1f3b27"
+down_revision: Union[str, None] = "1f5d2a7c9e68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 先删掉重复边，每组 (source, target, relation) 保留 id 最小的一条
+    op.execute(sa.text(
+        "DELETE FROM knowledge_edges WHERE id NOT IN ("
+        "SELECT MIN(id) FROM knowledge_edges GROUP BY source_node_id, target_node_id, relation_type)"
+    ))
+    with op.batch_alter_table("knowledge_edges") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_knowledge_edges_source_target_relation",
+            ["source_node_id", "target_node_id", "relation_type"],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("knowledge_edges") as batch_op:
+        batch_op.drop_constraint("uq_knowledge_edges_source_target_relation", type_="unique")
@@ -0,0 +1,56 @@
+"""add_irt_tables
+
+Revision ID: 923a2f6344c7
+Revises: 9d2c7af0b4f1
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "923a2f6344c7"
+down_revision: Union[str, None] = "9d2c7af0b4f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "irt_item_parameters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("bank", sa.String(length=20), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("a", sa.Float(), nullable=False),
+        sa.Column("b", sa.Float(), nullable=False),
+        sa.Column("c", sa.Float(), nullable=False),
+        sa.Column("n_responses", sa.Integer(), nullable=False),
+        sa.Column("calibrated_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("bank", "item_id", name="uq_irt_item_parameters_bank_item"),
+    )
+
+    op.create_table(
+        "user_abilities",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("bank", sa.String(length=20), nullable=False),
+        sa.Column("theta", sa.Float(), nullable=False),
+        sa.Column("se", sa.Float(), nullable=False),
+        sa.Column("n_responses", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "bank", name="uq_user_abilities_user_bank"),
+    )
+    op.create_index(op.f("ix_user_abilities_user_id"), "user_abilities", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_user_abilities_user_id"), table_name="user_abilities")
+    op.drop_table("user_abilities")
+
+    op.drop_table("irt_item_parameters")
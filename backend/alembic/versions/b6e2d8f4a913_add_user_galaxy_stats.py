@@ -0,0 +1,43 @@
+"""add_user_galaxy_stats
+
+Revision ID: b6e2d8f4a913
+Revises: 8a4c6e1f3b27
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e2d8f4a913"
+down_revision: Union[str, None] = "8a4c6e1f3b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_galaxy_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("seen_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("familiar_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("mastered_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # 从已有的 user_node_status 回填计数
+    op.execute(sa.text(
+        "INSERT INTO user_galaxy_stats (user_id, seen_count, familiar_count, mastered_count) "
+        "SELECT user_id, "
+        "SUM(CASE WHEN status = 'seen' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'familiar' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN status = 'mastered' THEN 1 ELSE 0 END) "
+        "FROM user_node_status GROUP BY user_id"
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table("user_galaxy_stats")
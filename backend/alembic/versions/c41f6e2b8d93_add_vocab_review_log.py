@@ -0,0 +1,44 @@
+"""add_vocab_review_log
+
+Revision ID: c41f6e2b8d93
+Revises: 5b8e1c9d7a20
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f6e2b8d93"
+down_revision: Union[str, None] = "5b8e1c9d7a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "vocab_review_log",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("word_id", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("elapsed_days", sa.Float(), nullable=False),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.Column("scheduled_days", sa.Float(), nullable=False),
+        sa.Column("stability", sa.Float(), nullable=False),
+        sa.Column("reviewed_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["word_id"], ["user_vocabulary.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_vocab_review_log_user_id"), "vocab_review_log", ["user_id"], unique=False)
+    op.create_index(op.f("ix_vocab_review_log_word_id"), "vocab_review_log", ["word_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_vocab_review_log_word_id"), table_name="vocab_review_log")
+    op.drop_index(op.f("ix_vocab_review_log_user_id"), table_name="vocab_review_log")
+    op.drop_table("vocab_review_log")
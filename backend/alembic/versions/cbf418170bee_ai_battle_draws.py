@@ -0,0 +1,58 @@
+"""ai_battle_draws
+
+Revision ID: cbf418170bee
+Revises: d3f9a1c6e254
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cbf418170bee"
+down_revision: Union[str, None] = "d3f9a1c6e254"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 与 app.services.arena.AI_WINNER_ID 一致
+AI_WINNER_ID = 0
+BATCH = 5000
+
+
+def upgrade() -> None:
+    # 旧数据里 AI 对战平局记为 player1 获胜、AI 获胜记为 None；按回合总分重写为
+    # 胜 player1_id / 负 AI_WINNER_ID / 平 None
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, player1_id, rounds_json FROM battle_sessions "
+                "WHERE player2_id IS NULL AND status = 'finished' AND id > :last ORDER BY id LIMIT :n"
+            ),
+            {"last": last_id, "n": BATCH},
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for battle_id, player1_id, rounds_json in rows:
+            data = json.loads(rounds_json) if isinstance(rounds_json, str) else rounds_json or {}
+            rounds = data.get("rounds", [])
+            p1 = sum(r.get("p1_score", 0) or 0 for r in rounds)
+            p2 = sum(r.get("p2_score", 0) or 0 for r in rounds)
+            winner = None if p1 == p2 else (player1_id if p1 > p2 else AI_WINNER_ID)
+            updates.append({"id": battle_id, "winner": winner})
+        conn.execute(sa.text("UPDATE battle_sessions SET winner_id = :winner WHERE id = :id"), updates)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.execute(sa.text(
+        "UPDATE battle_sessions SET winner_id = player1_id "
+        "WHERE player2_id IS NULL AND status = 'finished' AND winner_id IS NULL"
+    ))
+    op.execute(sa.text(f"UPDATE battle_sessions SET winner_id = NULL WHERE winner_id = {AI_WINNER_ID}"))
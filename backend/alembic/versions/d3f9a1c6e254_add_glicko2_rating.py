@@ -0,0 +1,32 @@
+"""add_glicko2_rating
+
+Revision ID: d3f9a1c6e254
+Revises: b6e2d8f4a913
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3f9a1c6e254"
+down_revision: Union[str, None] = "b6e2d8f4a913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("player_ratings", sa.Column("rd", sa.Float(), nullable=False, server_default=sa.text("350.0")))
+    op.add_column("player_ratings", sa.Column("volatility", sa.Float(), nullable=False, server_default=sa.text("0.06")))
+    op.add_column("player_ratings", sa.Column("recomputed_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f("ix_player_ratings_rating"), "player_ratings", ["rating"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_player_ratings_rating"), table_name="player_ratings")
+    op.drop_column("player_ratings", "recomputed_at")
+    op.drop_column("player_ratings", "volatility")
+    op.drop_column("player_ratings", "rd")
@@ -0,0 +1,36 @@
+"""add_vocab_due_at
+
+Revision ID: e7a93d0c5f14
+Revises: c41f6e2b8d93
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a93d0c5f14"
+down_revision: Union[str, None] = "c41f6e2b8d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_vocabulary",
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("'1970-01-01 00:00:00'")),
+    )
+    op.execute("UPDATE user_vocabulary SET due_at = next_review_at WHERE next_review_at IS NOT NULL")
+    op.create_index(
+        "ix_user_vocabulary_due", "user_vocabulary", ["user_id", "due_at"], unique=False,
+        postgresql_where=sa.text("status != 'mastered'"),
+        sqlite_where=sa.text("status != 'mastered'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_vocabulary_due", table_name="user_vocabulary")
+    op.drop_column("user_vocabulary", "due_at")
@@ -4,11 +4,28 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:///./smart_english.db"
     redis_url: str = "redis://localhost:6379/0"
+    pubsub_backend: str = "memory"  # memory / redis（多 worker 部署时用 redis）
+    cognitive_log_mode: str = "durable"  # durable / buffered / sync，见 app.services.cognitive_log
+    cognitive_log_flush_ms: int = 200
+    rate_limit_per_minute: int = 60  # 每个 IP 每分钟请求数，0 关闭（单机压测时）
     jwt_secret: str = "change-me"
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 60 * 24 * 7  # 7 days
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.5-flash"
+    # OpenAI 兼容接口地址；压测时指向本地模拟服务（tests/load/llm_mock.py）
+    llm_base_url: str = "https://generativelanguage.googleapis.com/v1beta/openai"
+    llm_max_retries: int = 1  # 连接错误和 429/5xx 的重试次数，0 不重试
+    # 慢请求采集（app.services.profiler），阈值为 0 时关闭
+    slow_request_ms: int = 2000
+    slow_request_sample_ms: int = 10
+    slow_request_dir: str = "./slow_requests"
+    slow_request_keep: int = 100
+    # /metrics 访问控制：默认只允许白名单 IP 或携带 Bearer metrics_token 的抓取方，
+    # metrics_public=True 时不做限制（仅限内网部署）
+    metrics_public: bool = False
+    metrics_token: str = ""
+    metrics_allow_ips: list[str] = ["127.0.0.1", "::1"]
     cors_origins: list[str] = [
         "http://localhost:3000",
         "http://127.0.0.1:3000",
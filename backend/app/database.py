@@ -1,10 +1,27 @@
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
 from app.config import settings
+from app.utils import json_codec
 
-engine = create_async_engine(settings.database_url, echo=False)
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    json_serializer=json_codec.dumps,
+    json_deserializer=json_codec.loads,
+)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+def upsert_insert(db: AsyncSession, table):
+    """当前连接方言的 INSERT 构造，支持 on_conflict_do_nothing / on_conflict_do_update（PostgreSQL 与 SQLite）。"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"不支持的数据库方言: {dialect}")
@@ -1,9 +1,14 @@
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from app.config import settings
+from app.database import async_session, engine
 from app.middleware.security import SecurityHeadersMiddleware, RateLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
 from app.routers import auth, chat, practice, writing, reading, vocabulary, stats
 from app.routers import upload, screenshot, clinic
 from app.routers import story, knowledge
@@ -15,12 +20,44 @@ from app.routers import textbook
 from app.routers import grammar
 from app.routers import admin
 from app.routers import notifications
+from app.routers import metrics as metrics_router
+from app.services import knowledge_graph, pubsub, arena_live, cognitive_log, metrics, profiler
 
-app = FastAPI(title="Smart English API", version="0.1.0")
+metrics.instrument_engine(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 预加载知识图谱拓扑，首个星系请求不用等待建索引
+    try:
+        async with async_session() as db:
+            await knowledge_graph.load_graph(db)
+    except Exception:
+        # 表尚未创建等情况下由首次请求再加载
+        logging.getLogger(__name__).warning("knowledge graph preload failed", exc_info=True)
+    metrics.start_loop_monitor()
+    profiler.start()
+    await pubsub.start_broker()
+    await arena_live.start_hub()
+    yield
+    await arena_live.stop_hub()
+    await pubsub.stop_broker()
+    await cognitive_log.stop_buffer()
+    await metrics.stop_loop_monitor()
+    profiler.stop()
+
+
+app = FastAPI(
+    title="Smart English API",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # Security middleware
 app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RateLimitMiddleware, max_requests=60, window_seconds=60)
+if settings.rate_limit_per_minute > 0:
+    app.add_middleware(RateLimitMiddleware, max_requests=settings.rate_limit_per_minute, window_seconds=60)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,7 +65,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Chat-Session-Id"],
 )
+# 最外层：计时包含其他中间件（限流、CORS）的开销
+app.add_middleware(MetricsMiddleware)
 
 # Static files for uploads
 uploads_dir = Path(__file__).resolve().parent.parent / "uploads"
@@ -56,6 +96,7 @@ app.include_router(textbook.router)
 app.include_router(grammar.router)
 app.include_router(admin.router)
 app.include_router(notifications.router)
+app.include_router(metrics_router.router)
 
 
 @app.get("/")
@@ -0,0 +1,75 @@
+"""请求指标中间件 — 按路由模板统计总耗时、数据库耗时、LLM 耗时和排队时间。
+
+纯 ASGI 实现（不走 BaseHTTPMiddleware），不包装响应体，对流式响应只多一层 send 回调。
+总耗时到响应体发送完为止，SSE 流式接口包含整个流的时长。
+排队时间取反向代理写入的 X-Request-Start 头（t=秒 / 毫秒 / 微秒时间戳），没有该头时不记录。
+同时负责慢请求采集的开始和结束（app.services.profiler）。
+"""
+
+import time
+from app.services import metrics, profiler
+
+# /metrics 自身不计入
+_SKIP_PATHS = {"/metrics"}
+
+
+def _request_start(headers: list[tuple[bytes, bytes]]) -> float | None:
+    for name, value in headers:
+        if name == b"x-request-start":
+            raw = value.decode("latin-1").strip().removeprefix("t=")
+            try:
+                stamp = float(raw)
+            except ValueError:
+                return None
+            # nginx $msec 为秒，其他代理常用毫秒或微秒
+            if stamp > 1e14:
+                stamp /= 1e6
+            elif stamp > 1e11:
+                stamp /= 1e3
+            return stamp
+    return None
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in _SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        arrived = _request_start(scope.get("headers") or [])
+        queue_wait = max(time.time() - arrived, 0.0) if arrived is not None else None
+        timings = metrics.start_request()
+        capture = profiler.begin(scope, timings)
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # 按路由模板聚合（/exam/mock/result/{mock_id}），未匹配的请求归到一起，避免标签爆炸
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            duration = time.perf_counter() - started
+            metrics.HTTP_REQUESTS.inc(method=method, route=path, status=status)
+            metrics.HTTP_DURATION.observe(duration, method=method, route=path)
+            metrics.HTTP_DB.observe(timings.db, method=method, route=path)
+            metrics.HTTP_LLM.observe(timings.llm, method=method, route=path)
+            if queue_wait is not None:
+                metrics.HTTP_QUEUE.observe(queue_wait, method=method, route=path)
+            if capture is not None:
+                await profiler.finish(capture, path, status, duration, streaming)
@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Integer, String, ForeignKey, DateTime, JSON, func
+from sqlalchemy import Integer, Float, String, ForeignKey, DateTime, JSON, func
 from sqlalchemy.orm import Mapped, mapped_column
 from app.models import Base
 
@@ -24,8 +24,13 @@ class PlayerRating(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True, index=True)
-    rating: Mapped[int] = mapped_column(Integer, default=1000)
+    rating: Mapped[int] = mapped_column(Integer, default=1000, index=True)
+    # Glicko-2 评分偏差与波动率（见 app.services.glicko2）
+    rd: Mapped[float] = mapped_column(Float, default=350.0)
+    volatility: Mapped[float] = mapped_column(Float, default=0.06)
     tier: Mapped[str] = mapped_column(String(20), default="bronze")  # bronze/silver/gold/diamond/champion
     wins: Mapped[int] = mapped_column(Integer, default=0)
     losses: Mapped[int] = mapped_column(Integer, default=0)
     season: Mapped[int] = mapped_column(Integer, default=1)
+    # 最近一次离线重算时间（python -m app.utils.rating_recompute）
+    recomputed_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,41 @@
+"""IRT 题目参数与学生能力值。"""
+
+import datetime
+from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.models import Base
+
+
+class ItemParameter(Base):
+    """离线标定得到的题目参数。bank 区分题库：practice → questions，exam → exam_questions。"""
+
+    __tablename__ = "irt_item_parameters"
+    __table_args__ = (UniqueConstraint("bank", "item_id", name="uq_irt_item_parameters_bank_item"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    bank: Mapped[str] = mapped_column(String(20))  # practice / exam
+    item_id: Mapped[int] = mapped_column(Integer)
+    a: Mapped[float] = mapped_column(Float, default=1.0)  # 区分度
+    b: Mapped[float] = mapped_column(Float, default=0.0)  # 难度
+    c: Mapped[float] = mapped_column(Float, default=0.0)  # 猜测参数
+    n_responses: Mapped[int] = mapped_column(Integer, default=0)
+    calibrated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class UserAbility(Base):
+    """学生在某个题库上的能力估计（θ 及其标准误），每次作答在线更新。"""
+
+    __tablename__ = "user_abilities"
+    __table_args__ = (UniqueConstraint("user_id", "bank", name="uq_user_abilities_user_bank"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    bank: Mapped[str] = mapped_column(String(20))
+    theta: Mapped[float] = mapped_column(Float, default=0.0)
+    se: Mapped[float] = mapped_column(Float, default=1.0)
+    n_responses: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Integer, String, ForeignKey, DateTime, Text, JSON, Float, func
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Text, JSON, Float, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 from app.models import Base
 
@@ -15,10 +15,18 @@ class KnowledgeNode(Base):
     cefr_level: Mapped[str] = mapped_column(String(5), default="A1")
     frequency_rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
     example_sentence: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # 星系布局（离线任务 python -m app.utils.galaxy_layout 生成）
+    x: Mapped[float | None] = mapped_column(Float, nullable=True)
+    y: Mapped[float | None] = mapped_column(Float, nullable=True)
+    cluster_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    lod_level: Mapped[int] = mapped_column(Integer, default=3)  # 0 = 缩到最小也显示，数字越大越晚显示
 
 
 class KnowledgeEdge(Base):
     __tablename__ = "knowledge_edges"
+    __table_args__ = (
+        UniqueConstraint("source_node_id", "target_node_id", "relation_type", name="uq_knowledge_edges_source_target_relation"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     source_node_id: Mapped[int] = mapped_column(ForeignKey("knowledge_nodes.id"), index=True)
@@ -36,3 +44,13 @@ class UserNodeStatus(Base):
     status: Mapped[str] = mapped_column(String(20), default="undiscovered")  # undiscovered/seen/familiar/mastered
     encounter_count: Mapped[int] = mapped_column(Integer, default=0)
     last_seen: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class UserGalaxyStats(Base):
+    """每个用户各状态的节点数，由 update_node_status 在状态变化时增减。"""
+    __tablename__ = "user_galaxy_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    seen_count: Mapped[int] = mapped_column(Integer, default=0)
+    familiar_count: Mapped[int] = mapped_column(Integer, default=0)
+    mastered_count: Mapped[int] = mapped_column(Integer, default=0)
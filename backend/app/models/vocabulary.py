@@ -1,11 +1,23 @@
 import datetime
-from sqlalchemy import String, Text, ForeignKey, DateTime, func
+from sqlalchemy import String, Text, Float, Integer, JSON, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.models import Base
 
 
+# 从未复习过的新词的 due_at：排在所有到期词之前
+NEW_WORD_DUE_AT = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
 class UserVocabulary(Base):
     __tablename__ = "user_vocabulary"
+    __table_args__ = (
+        # 复习队列：只索引未掌握的词，到期查询和计数都走这个部分索引
+        Index(
+            "ix_user_vocabulary_due", "user_id", "due_at",
+            postgresql_where=text("status != 'mastered'"),
+            sqlite_where=text("status != 'mastered'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
@@ -15,6 +27,52 @@ class UserVocabulary(Base):
     next_review_at: Mapped[datetime.datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+    # 复习队列排序键，非空；新词为 NEW_WORD_DUE_AT，复习后与 next_review_at 相同
+    due_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), default=NEW_WORD_DUE_AT
+    )
+    # FSRS 记忆状态，未复习过的新词为 NULL
+    stability: Mapped[float | None] = mapped_column(Float, nullable=True)  # 稳定性（天）
+    difficulty: Mapped[float | None] = mapped_column(Float, nullable=True)  # 难度 1-10
+    last_review_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    reps: Mapped[int] = mapped_column(Integer, default=0)
+    lapses: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime.datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+
+
+class VocabReviewLog(Base):
+    """单词复习流水（只追加），用于拟合个人 FSRS 参数和复盘。"""
+
+    __tablename__ = "vocab_review_log"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    word_id: Mapped[int] = mapped_column(ForeignKey("user_vocabulary.id"), index=True)
+    rating: Mapped[int] = mapped_column(Integer)  # 1=忘记 2=模糊 3=认识 4=很熟
+    elapsed_days: Mapped[float] = mapped_column(Float, default=0.0)  # 距上次复习天数，首次为 0
+    latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 从看到卡片到作答
+    scheduled_days: Mapped[float] = mapped_column(Float)  # 本次复习后排定的间隔
+    stability: Mapped[float] = mapped_column(Float)  # 复习后的稳定性
+    reviewed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class VocabSchedulerParams(Base):
+    """用户个人的 FSRS 参数，由复习记录离线拟合；没有记录时使用默认参数。"""
+
+    __tablename__ = "vocab_scheduler_params"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True, index=True)
+    weights_json: Mapped[list] = mapped_column(JSON)
+    desired_retention: Mapped[float] = mapped_column(Float, default=0.9)
+    n_reviews: Mapped[int] = mapped_column(Integer, default=0)
+    log_loss: Mapped[float | None] = mapped_column(Float, nullable=True)
+    optimized_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -1,6 +1,7 @@
 """管理后台路由 - 内容管理。"""
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,6 +11,7 @@ from app.models.user import User
 from app.models.textbook import TextbookVersion, TextbookUnit
 from app.models.grammar import GrammarTopic, GrammarExercise
 from app.models.reading import ReadingMaterial
+from app.services import profiler
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -189,3 +191,20 @@ async def delete_reading(
     await db.delete(mat)
     await db.commit()
     return {"deleted": True}
+
+
+# ---- Slow Request Profiles ----
+
+@router.get("/slow-requests")
+def list_slow_requests(user: User = Depends(require_admin)):
+    """最近超过阈值的请求（见 app.services.profiler），新的在前。"""
+    return profiler.list_profiles()
+
+
+@router.get("/slow-requests/{profile_id}")
+def download_slow_request(profile_id: str, user: User = Depends(require_admin)):
+    """下载单个慢请求的采集包：栈采样、SQL 语句和 LLM 调用。"""
+    path = profiler.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(404, "采集记录不存在")
+    return FileResponse(path, media_type="application/json", filename=f"slow-request-{profile_id}.json")
@@ -1,10 +1,14 @@
 """英语对战竞技场路由。"""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, async_session
 from app.routers.auth import get_current_user
 from app.models.user import User
+from app.services.auth import decode_token
+from app.services.arena_live import get_hub, user_channel
+from app.services.pubsub import get_broker
+from app.utils import json_codec
 from app.schemas.arena import BattleRequest
 from app.services.arena import (
     create_battle, process_round, get_or_create_rating,
@@ -68,7 +72,7 @@ async def rating(
 ):
     r = await get_or_create_rating(user.id, db)
     await db.commit()
-    return {"rating": r.rating, "tier": r.tier, "wins": r.wins, "losses": r.losses, "season": r.season}
+    return {"rating": r.rating, "rd": round(r.rd), "tier": r.tier, "wins": r.wins, "losses": r.losses, "season": r.season}
 
 
 @router.get("/history")
@@ -77,3 +81,65 @@ async def history(
     db: AsyncSession = Depends(get_db),
 ):
     return await get_battle_history(user.id, db)
+
+
+@router.websocket("/ws")
+async def live_arena(websocket: WebSocket, token: str = Query(...)):
+    """实时对战通道（浏览器 WebSocket 无法带 Authorization 头，令牌放在查询参数里）。
+
+    客户端消息：
+    - {"type": "queue", "mode": "word_chain"}  加入匹配队列
+    - {"type": "cancel"}                       退出队列
+    - {"type": "submit", "battle": key, "round": n, "text": "..."}  提交本回合作答
+    - {"type": "ping"}
+    服务端推送 queued / matched / round_start / opponent_submitted / round_result / battle_end 等事件。
+    """
+    user_id = decode_token(token)
+    async with async_session() as db:
+        user = await db.get(User, user_id) if user_id is not None else None
+        if user is None:
+            await websocket.close(code=4401)
+            return
+
+    await websocket.accept()
+    hub = get_hub()
+    battles: set[str] = set()
+
+    async def forward(message: dict):
+        if message.get("type") == "matched":
+            battles.add(message["battle"])
+        elif message.get("type") in ("battle_end", "battle_aborted"):
+            battles.discard(message["battle"])
+        await websocket.send_text(json_codec.dumps(message))
+
+    sub = await get_broker().subscribe(user_channel(user.id), forward)
+    try:
+        while True:
+            try:
+                msg = json_codec.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_text(json_codec.dumps({"type": "error", "detail": "消息格式错误"}))
+                continue
+            kind = msg.get("type") if isinstance(msg, dict) else None
+            if kind == "queue":
+                if msg.get("mode") not in BATTLE_MODES:
+                    await websocket.send_text(json_codec.dumps({"type": "error", "detail": "无效的对战模式"}))
+                    continue
+                # 连接期间可能打完了几局，每次排队都按当前评分分桶
+                async with async_session() as db:
+                    rating = (await get_or_create_rating(user.id, db)).rating
+                    await db.commit()
+                await hub.enqueue(user.id, msg["mode"], rating)
+            elif kind == "cancel":
+                await hub.cancel(user.id)
+            elif kind == "submit" and msg.get("battle") in battles:
+                await hub.submit(user.id, msg["battle"], str(msg.get("text", "")), msg.get("round"))
+            elif kind == "ping":
+                await websocket.send_text(json_codec.dumps({"type": "pong"}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await sub.close()
+        await hub.cancel(user.id)
+        for key in battles:
+            await hub.leave_battle(user.id, key)
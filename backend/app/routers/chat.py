@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.database import get_db
 from sse_starlette.sse import EventSourceResponse
 from app.routers.auth import get_current_user
@@ -7,44 +8,53 @@ from app.models.user import User
 from app.schemas.chat import ChatRequest, CognitiveDemoRequest
 from app.services.llm import chat_stream
 from app.services.cognitive_demo import run_cognitive_demo
+from app.services.chat_context import build_context, schedule_fold, with_summary
+from app.services import cognitive_log, prompts
+from app.utils.sse_stream import coalesce, start_pump
 from app.services.cognitive_orchestrator import (
     decide_guidance,
+    find_session,
     get_or_create_session,
-    log_user_turn,
-    log_assistant_turn,
-    log_reflection,
-    log_tqi_metric,
+    reflection_values,
+    tqi_values,
+    turn_values,
 )
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-SYSTEM_PROMPTS = {
+# 响应头里返回会话 id，客户端下一轮带上 session_id 即可延续服务端保存的上下文
+SESSION_HEADER = "X-Chat-Session-Id"
+
+_PERSONAS = {
     "free": """你是一位专业的 AI 英语导师，面向中国 K12 学生。
 - 根据学生年级调整语言难度
 - 采用苏格拉底式引导教学，不直接给答案
-- 支持中英双语讲解
-- 学生当前年级：{grade}，CEFR 等级：{cefr_level}""",
+- 支持中英双语讲解""",
 
     "grammar": """你是一位专业的英语语法诊所医生，面向中国 K12 学生。
 - 专注于语法纠错和解释
 - 当学生输入英文句子时，分析其中的语法错误并给出修改建议
 - 用简洁清晰的方式解释语法规则，配合例句
-- 支持中英双语讲解
-- 学生当前年级：{grade}，CEFR 等级：{cefr_level}""",
+- 支持中英双语讲解""",
 
     "speaking": """你是一位英语口语场景模拟教练，面向中国 K12 学生。
 - 与学生进行角色扮演对话练习（餐厅点餐、机场出行、面试、购物等场景）
 - 先询问学生想练习什么场景，然后进入角色
 - 在对话中自然地纠正学生的表达
-- 鼓励学生多说，给出地道的表达建议
-- 学生当前年级：{grade}，CEFR 等级：{cefr_level}""",
+- 鼓励学生多说，给出地道的表达建议""",
 
     "explain": """你是一位英语题目讲解专家，面向中国 K12 学生。
 - 当学生粘贴题目时，给出详细的解题思路和答案解析
 - 分析每个选项为什么对或错
 - 总结涉及的知识点和解题技巧
-- 支持中英双语讲解
-- 学生当前年级：{grade}，CEFR 等级：{cefr_level}""",
+- 支持中英双语讲解""",
+}
+
+
+# 角色设定在前（按模式固定），学生信息在后
+SYSTEM_PROMPTS = {
+    mode: prompts.register(f"chat.{mode}", persona, "\n- 学生当前年级：{grade}，CEFR 等级：{cefr_level}")
+    for mode, persona in _PERSONAS.items()
 }
 
 
@@ -83,95 +93,103 @@ async def send_message(
         allow_direct_answer=bool(getattr(req, "allow_direct_answer", False)),
     )
 
-    # 重要操作：先把用户输入与反思轨迹写入认知日志，便于后续统计认知增益。
-    session = await get_or_create_session(
-        user_id=user.id,
-        db=db,
-        module="chat",
-        guidance_mode=guidance_level,
-        session_id=getattr(req, "session_id", None),
-    )
-
-    # 先落用户输入与反思轨迹
-    user_turn = await log_user_turn(
-        session_id=session.id,
-        content=req.message,
-        stage=decision.stage,
-        db=db,
-        turn_index=len(req.history) + 1,
-        mirror_level=decision.mirror_level,
-        zpd_band=decision.zpd_band,
-        hint_used=hint_budget <= 0,
-    )
-    await log_reflection(
-        user_id=user.id,
-        session_id=session.id,
-        reflection_text=reflection_text,
-        quality_score=decision.tqi_score,
-        turn_id=user_turn.id,
-        db=db,
-    )
-    await log_tqi_metric(
-        user_id=user.id,
-        session_id=session.id,
-        tqi_score=decision.tqi_score,
-        mirror_level=decision.mirror_level,
-        details_json={
-            "module": "chat",
-            "stage": decision.stage,
-            "zpd_band": decision.zpd_band,
-            "guidance_level": guidance_level,
-            "should_divert": decision.should_divert,
-        },
-        db=db,
-    )
-
-    if decision.should_divert and decision.diversion_message:
-        await log_assistant_turn(
-            session_id=session.id,
-            content=decision.diversion_message,
-            stage="query",
-            db=db,
-            turn_index=len(req.history) + 2,
+    # 已有会话只读取会话和历史；新会话等模型请求发出之后再创建
+    session_id = getattr(req, "session_id", None)
+    session = await find_session(user.id, session_id, db) if session_id else None
+    # 历史以服务端记录为准：滚动摘要 + 最近消息
+    context = await build_context(session, db)
+
+    upstream = None
+    if not (decision.should_divert and decision.diversion_message):
+        template = SYSTEM_PROMPTS.get(mode, SYSTEM_PROMPTS["free"])
+        system = template.render(grade=user.grade, cefr_level=user.cefr_level)
+        # 按变化频率排列：会话摘要在前，每轮都变的引导指令放最后
+        system = f"{with_summary(system, context)}\n\n{decision.prompt_suffix}"
+        messages = [*context.messages, {"role": "user", "content": req.message}]
+        # 先发出模型请求，日志写入与之并行，首个 token 不等日志 I/O
+        upstream = start_pump(chat_stream(messages, system_prompt=system))
+
+    try:
+        # 重要操作：把用户输入与反思轨迹写入认知日志，便于后续统计认知增益。
+        if session is None:
+            session = await get_or_create_session(
+                user_id=user.id,
+                db=db,
+                module="chat",
+                guidance_mode=guidance_level,
+            )
+            if settings.cognitive_log_mode != "sync":
+                # 缓冲在独立会话里写入 turn，会话行要先提交
+                await db.commit()
+        headers = {SESSION_HEADER: str(session.id)}
+
+        user_turn = turn_values(
+            session.id, req.message, decision.stage, "user",
+            turn_index=context.next_turn_index,
             mirror_level=decision.mirror_level,
             zpd_band=decision.zpd_band,
+            hint_used=hint_budget <= 0,
+        )
+        reflection = reflection_values(user.id, session.id, reflection_text, quality_score=decision.tqi_score)
+        metric = tqi_values(
+            user.id, session.id, decision.tqi_score, decision.mirror_level,
+            details_json={
+                "module": "chat",
+                "stage": decision.stage,
+                "zpd_band": decision.zpd_band,
+                "guidance_level": guidance_level,
+                "should_divert": decision.should_divert,
+            },
         )
+    except BaseException:
+        if upstream:
+            upstream[0].cancel()
+        raise
+
+    if upstream is None:
+        assistant_turn = turn_values(
+            session.id, decision.diversion_message, "query", "assistant",
+            turn_index=context.next_turn_index + 1,
+            mirror_level=decision.mirror_level,
+            zpd_band=decision.zpd_band,
+        )
+        pending = await cognitive_log.record(db, [user_turn, assistant_turn], reflection, metric)
         await db.commit()
+        await cognitive_log.wait_durable(pending)
+        schedule_fold(session.id, context)
 
         async def divert_generator():
             if await request.is_disconnected():
                 return
             yield {"data": decision.diversion_message}
 
-        return EventSourceResponse(divert_generator())
+        return EventSourceResponse(divert_generator(), headers=headers)
 
-    template = SYSTEM_PROMPTS.get(mode, SYSTEM_PROMPTS["free"])
-    system = template.format(grade=user.grade, cefr_level=user.cefr_level)
-    system = f"{system}\n\n{decision.prompt_suffix}"
-    messages = [{"role": m.role, "content": m.content} for m in req.history]
-    messages.append({"role": "user", "content": req.message})
+    pending = await cognitive_log.record(db, [user_turn], reflection, metric)
+    task, queue = upstream
 
     async def event_generator():
         assistant_parts: list[str] = []
         try:
-            async for chunk in chat_stream(messages, system_prompt=system):
-                if await request.is_disconnected():
-                    break
+            # 小块按时间/字节合并后推送，断开检查走定时器；断开或结束时取消上游请求
+            async for chunk in coalesce(task, queue, request):
                 assistant_parts.append(chunk)
                 yield {"data": chunk}
         finally:
+            task.cancel()
             full_text = "".join(assistant_parts).strip()
+            done = None
             if full_text:
                 # 重要操作：将完整回复落库，保证会话和认知轨迹闭环。
-                await log_assistant_turn(
-                    session_id=session.id,
-                    content=full_text,
-                    stage="refine",
-                    db=db,
-                    turn_index=len(req.history) + 2,
+                done = await cognitive_log.record(db, [turn_values(
+                    session.id, full_text, "refine", "assistant",
+                    turn_index=context.next_turn_index + 1,
                     mirror_level=decision.mirror_level,
                     zpd_band=decision.zpd_band,
-                )
+                )])
             await db.commit()
+            await cognitive_log.wait_durable(pending, done)
+            schedule_fold(session.id, context, 2 if full_text else 1)
+
+    return EventSourceResponse(event_generator(), headers=headers)
 
-    return EventSourceResponse(event_generator())
@@ -1,10 +1,10 @@
 """考试冲刺系统路由。"""
 
-import json
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from sse_starlette.sse import EventSourceResponse
+from app.database import async_session, get_db
 from app.routers.auth import get_current_user
 from app.models.user import User
 from app.models.exam import ExamProfile, DiagnosticSession, ExamKnowledgePoint, KnowledgeMastery, MockExam
@@ -29,11 +29,12 @@ from app.services.exam_prediction import predict_score, get_prediction_history,
 from app.services.exam_flow import start_flow, submit_flow_answer, end_flow, get_flow_history
 from app.services.exam_time import calculate_time_budgets, record_time_data, get_time_history, analyze_time_patterns
 from app.services.exam_error_gene import analyze_error_genes, get_error_genes, generate_fix_drill, submit_fix_answer
-from app.services.exam_custom import generate_custom_quiz, submit_custom_quiz, get_custom_history
+from app.services.exam_custom import generate_custom_quiz, stream_custom_quiz, submit_custom_quiz, get_custom_history
 from app.services.exam_sprint_plan import get_or_generate_sprint_plan, complete_sprint_task
 from app.services.exam_replay import generate_replay_data
 from app.services.xp import award_xp
 from app.services.missions import update_mission_progress
+from app.utils import json_codec
 
 router = APIRouter(prefix="/exam", tags=["exam"])
 
@@ -114,7 +115,7 @@ async def get_dashboard(
     )
     recent_mocks = []
     for m in mock_result.scalars().all():
-        score_data = json.loads(m.score_json) if m.score_json else {}
+        score_data = json_codec.loads(m.score_json) if m.score_json else {}
         recent_mocks.append({
             "id": m.id,
             "total": score_data.get("total", 0),
@@ -179,10 +180,10 @@ async def diagnostic_result(
     return {
         "id": session.id,
         "status": session.status,
-        "questions_json": json.loads(session.questions_json) if session.questions_json else [],
-        "answers_json": json.loads(session.answers_json) if session.answers_json else [],
-        "result_json": json.loads(session.result_json) if session.result_json else None,
-        "ai_analysis_json": json.loads(session.ai_analysis_json) if session.ai_analysis_json else None,
+        "questions_json": json_codec.loads(session.questions_json) if session.questions_json else [],
+        "answers_json": json_codec.loads(session.answers_json) if session.answers_json else [],
+        "result_json": json_codec.loads(session.result_json) if session.result_json else None,
+        "ai_analysis_json": json_codec.loads(session.ai_analysis_json) if session.ai_analysis_json else None,
     }
 
 
@@ -370,8 +371,8 @@ async def mock_history(
     return [
         {
             "id": m.id, "exam_type": m.exam_type, "status": m.status,
-            "total_score": json.loads(m.score_json).get("total", 0) if m.score_json else None,
-            "max_score": json.loads(m.score_json).get("max", 150) if m.score_json else None,
+            "total_score": json_codec.loads(m.score_json).get("total", 0) if m.score_json else None,
+            "max_score": json_codec.loads(m.score_json).get("max", 150) if m.score_json else None,
             "started_at": m.started_at.isoformat() if m.started_at else "",
             "completed_at": m.completed_at.isoformat() if m.completed_at else None,
         }
@@ -447,8 +448,8 @@ async def weakness_detail(
         "id": bt.id, "knowledge_point_id": bt.knowledge_point_id,
         "name": kp.name if kp else "",
         "status": bt.status, "phase": bt.phase,
-        "micro_lesson_json": json.loads(bt.micro_lesson_json) if bt.micro_lesson_json else None,
-        "exercises_json": json.loads(bt.exercises_json) if bt.exercises_json else [],
+        "micro_lesson_json": json_codec.loads(bt.micro_lesson_json) if bt.micro_lesson_json else None,
+        "exercises_json": json_codec.loads(bt.exercises_json) if bt.exercises_json else [],
         "total_exercises": bt.total_exercises, "completed_exercises": bt.completed_exercises,
         "mastery_before": bt.mastery_before, "mastery_after": bt.mastery_after,
     }
@@ -495,7 +496,7 @@ def _profile_to_dict(p: ExamProfile) -> dict:
         "id": p.id, "exam_type": p.exam_type, "province": p.province,
         "target_score": p.target_score, "exam_date": p.exam_date,
         "current_estimated_score": p.current_estimated_score,
-        "plan_json": json.loads(p.plan_json) if p.plan_json else None,
+        "plan_json": json_codec.loads(p.plan_json) if p.plan_json else None,
     }
 
 
@@ -650,6 +651,24 @@ async def custom_generate(
     return result
 
 
+@router.post("/custom/generate/stream")
+async def custom_generate_stream(
+    req: CustomQuizGenerateRequest,
+    user: User = Depends(get_current_user),
+):
+    """流式版 /custom/generate：每道题生成完整即以 question 事件推送，全部落库后以 quiz 事件结束。"""
+    user_id = user.id
+
+    async def event_generator():
+        async with async_session() as db:
+            async for event in stream_custom_quiz(user_id, req.prompt, db):
+                if event["type"] == "quiz":
+                    await db.commit()
+                yield {"event": event.pop("type"), "data": json_codec.dumps(event)}
+
+    return EventSourceResponse(event_generator())
+
+
 @router.post("/custom/submit")
 async def custom_submit(
     req: CustomQuizSubmitRequest,
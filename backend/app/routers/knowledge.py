@@ -5,7 +5,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.routers.auth import get_current_user
 from app.models.user import User
-from app.services.knowledge import get_galaxy_view, get_node_detail, expand_node, update_node_status, get_galaxy_stats
+from app.services.knowledge import (
+    get_galaxy_view, get_node_detail, expand_node, update_node_status, get_galaxy_stats,
+    get_neighborhood, find_word_relation, get_galaxy_bounds,
+)
+from app.services.knowledge_graph import LOD_LEVELS
 from app.services.xp import award_xp
 from app.services.missions import update_mission_progress
 
@@ -14,12 +18,32 @@ router = APIRouter(prefix="/galaxy", tags=["galaxy"])
 
 @router.get("/view")
 async def view(
-    limit: int = Query(50, le=200),
+    limit: int = Query(50, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    min_x: float | None = None,
+    min_y: float | None = None,
+    max_x: float | None = None,
+    max_y: float | None = None,
+    lod: int = Query(LOD_LEVELS - 1, ge=0, le=LOD_LEVELS - 1),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    return await get_galaxy_view(user.id, db, limit, offset)
+    """不带视口参数时按词频分页；带 min_x/min_y/max_x/max_y 时返回视口内 LOD ≤ lod 的节点。"""
+    viewport = (min_x, min_y, max_x, max_y)
+    if all(v is None for v in viewport):
+        return await get_galaxy_view(user.id, db, min(limit, 200), offset)
+    if any(v is None for v in viewport) or min_x > max_x or min_y > max_y:
+        raise HTTPException(400, "视口参数不完整或范围无效")
+    return await get_galaxy_view(user.id, db, limit, bbox=viewport, lod=lod)
+
+
+@router.get("/bounds")
+async def bounds(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """布局坐标范围。"""
+    return await get_galaxy_bounds(db)
 
 
 @router.get("/node/{node_id}")
@@ -35,6 +59,35 @@ async def node_detail(
     return result
 
 
+@router.get("/node/{node_id}/neighborhood")
+async def neighborhood(
+    node_id: int,
+    hops: int = Query(2, ge=1, le=4),
+    limit: int = Query(100, ge=1, le=500),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """多跳邻域子图。"""
+    result = await get_neighborhood(node_id, hops, limit, db)
+    if "error" in result:
+        raise HTTPException(404, result["error"])
+    return result
+
+
+@router.get("/path")
+async def word_path(
+    source: str = Query(..., min_length=1, max_length=100),
+    target: str = Query(..., min_length=1, max_length=100),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """两个单词之间是怎么关联起来的。"""
+    result = await find_word_relation(source, target, db)
+    if "error" in result:
+        raise HTTPException(404, result["error"])
+    return result
+
+
 @router.post("/explore/{node_id}")
 async def explore(
     node_id: int,
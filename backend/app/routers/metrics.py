@@ -0,0 +1,49 @@
+"""指标路由 — Prometheus 抓取端点。"""
+
+import hmac
+import ipaddress
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.services import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+def _ip_allowed(host: str | None) -> bool:
+    """客户端 IP 是否落在 metrics_allow_ips（单个地址或 CIDR）内。"""
+    if not host:
+        return False
+    try:
+        addr = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    for entry in settings.metrics_allow_ips:
+        try:
+            if addr in ipaddress.ip_network(entry, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+async def require_scraper(request: Request):
+    """放行白名单 IP 或携带正确 Bearer token 的请求；其余一律 404，不暴露端点存在。"""
+    if settings.metrics_public:
+        return
+    if settings.metrics_token:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+            return
+    # 经反向代理转发的请求在本机看来都来自代理地址，不能凭 IP 白名单放行
+    forwarded = "x-forwarded-for" in request.headers or "forwarded" in request.headers
+    if not forwarded and _ip_allowed(request.client.host if request.client else None):
+        return
+    raise HTTPException(404, "Not Found")
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_scraper)])
+async def prometheus_metrics():
+    """Prometheus 文本格式的进程内指标，见 app.services.metrics。"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
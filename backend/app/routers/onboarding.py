@@ -8,11 +8,14 @@ from app.database import get_db
 from app.routers.auth import get_current_user
 from app.models.user import User
 from app.models.onboarding import OnboardingProfile
-from app.schemas.onboarding import AssessmentSubmit, GoalsSubmit
+from app.schemas.onboarding import AssessmentSubmit, GoalsSubmit, PlacementAnswer
+from app.services.adaptive import BANK_EXAM, record_responses
 from app.services.onboarding import (
     generate_assessment_questions,
     evaluate_assessment,
     recommend_learning_path,
+    start_placement,
+    answer_placement,
 )
 
 router = APIRouter(prefix="/onboarding", tags=["onboarding"])
@@ -72,11 +75,68 @@ async def onboarding_status(
     }
 
 
+def _apply_assessment_result(profile: OnboardingProfile, user: User, result: dict):
+    profile.assessment_score = result["score"]
+    profile.assessment_result_json = result
+
+    steps = list(profile.completed_steps_json or [])
+    if "assessment" not in steps:
+        steps.append("assessment")
+    profile.completed_steps_json = steps
+
+    # Update user CEFR level
+    user.cefr_level = result["cefr_level"]
+
+
+@router.post("/assessment/start")
+async def start_adaptive_assessment(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """开始自适应分级测评，返回第一题。"""
+    profile = await _get_or_create_profile(user.id, db)
+    state, payload = await start_placement(db)
+    if not payload["question"]:
+        raise HTTPException(status_code=503, detail="测评题库暂不可用")
+    profile.assessment_result_json = state
+    await db.commit()
+    return payload
+
+
+@router.post("/assessment/answer")
+async def answer_adaptive_assessment(
+    req: PlacementAnswer,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """提交一题；标准误达到目标后结束并返回 CEFR 等级。"""
+    profile = await _get_or_create_profile(user.id, db)
+    state, payload = await answer_placement(profile.assessment_result_json, req.item_id, req.answer, db)
+    if "error" in payload:
+        raise HTTPException(status_code=400, detail=payload["error"])
+
+    if payload["finished"]:
+        _apply_assessment_result(profile, user, state)
+        # 考试题库上的测评结果直接作为后续自适应练习的起点能力
+        if state["source"] == "exam":
+            await record_responses(
+                user.id, BANK_EXAM,
+                [(d["a"], d["b"], d["c"]) for d in state["details"]],
+                [d["is_correct"] for d in state["details"]],
+                db,
+            )
+    else:
+        profile.assessment_result_json = state
+
+    await db.commit()
+    return payload
+
+
 @router.get("/assessment")
 async def get_assessment(
     user: User = Depends(get_current_user),
 ):
-    """获取测评题目。"""
+    """获取固定测评题目（旧版客户端使用，新版走 /assessment/start）。"""
     return {"questions": generate_assessment_questions()}
 
 
@@ -89,16 +149,7 @@ async def submit_assessment(
     """提交测评答案。"""
     result = evaluate_assessment(req.answers)
     profile = await _get_or_create_profile(user.id, db)
-    profile.assessment_score = result["score"]
-    profile.assessment_result_json = result
-
-    steps = profile.completed_steps_json or []
-    if "assessment" not in steps:
-        steps.append("assessment")
-    profile.completed_steps_json = steps
-
-    # Update user CEFR level
-    user.cefr_level = result["cefr_level"]
+    _apply_assessment_result(profile, user, result)
 
     await db.commit()
     return result
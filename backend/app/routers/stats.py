@@ -13,6 +13,7 @@ from app.models.vocabulary import UserVocabulary
 from app.models.gamification import UserXP, Achievement, DailyMission
 from app.services.xp import get_or_create_xp, level_to_cefr, xp_for_level
 from app.services.missions import get_or_generate_missions
+from app.services.spaced_repetition import count_due_words
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
@@ -122,18 +123,8 @@ async def module_progress(
     db: AsyncSession = Depends(get_db),
 ):
     """Progress badges for sidebar."""
-    now = datetime.datetime.now(datetime.timezone.utc)
-
     # Due vocab count
-    result = await db.execute(
-        select(func.count()).select_from(UserVocabulary)
-        .where(
-            UserVocabulary.user_id == user.id,
-            (UserVocabulary.next_review_at <= now) | (UserVocabulary.next_review_at.is_(None)),
-            UserVocabulary.status != "mastered",
-        )
-    )
-    due_vocab = result.scalar() or 0
+    due_vocab = await count_due_words(user.id, db)
 
     # Today's practice
     today_start = datetime.datetime.combine(datetime.date.today(), datetime.time.min, tzinfo=datetime.timezone.utc)
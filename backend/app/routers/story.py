@@ -3,14 +3,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from sse_starlette.sse import EventSourceResponse
+from app.database import async_session, get_db
 from app.routers.auth import get_current_user
 from app.models.user import User
 from app.models.story import StoryTemplate, StorySession, StoryChapter
 from app.schemas.story import StoryStartRequest, StoryChoiceRequest, StoryChallengeSubmit
-from app.services.story import start_story, make_choice, submit_challenge
+from app.services.story import start_story, make_choice, stream_choice, submit_challenge, prefetch_choices
 from app.services.xp import award_xp
 from app.services.missions import update_mission_progress
+from app.utils import json_codec
 
 router = APIRouter(prefix="/story", tags=["story"])
 
@@ -83,6 +85,8 @@ async def get_session(
         select(StoryChapter).where(StoryChapter.session_id == session_id).order_by(StoryChapter.chapter_number)
     )
     chapters = ch_result.scalars().all()
+    # 继续阅读时预生成当前章各选项的后续
+    await prefetch_choices(session, template, chapters)
 
     return {
         "session": {
@@ -120,6 +124,28 @@ async def choice(
     return result
 
 
+@router.post("/choice/stream")
+async def choice_stream(
+    req: StoryChoiceRequest,
+    user: User = Depends(get_current_user),
+):
+    """流式版 /choice：SSE 先逐段推送 narrative，再推送 choices / challenge / learning_points，
+    章节落库后以 chapter 事件结束（内容同 /choice 的返回）。"""
+    user_id = user.id
+
+    async def event_generator():
+        # 响应开始流式输出后请求级会话已不可靠，生成器自己开会话
+        async with async_session() as db:
+            async for event in stream_choice(req.session_id, req.choice, user_id, db):
+                if event["type"] == "chapter":
+                    event["xp"] = await award_xp(user_id, "story_chapter", db)
+                    event["mission"] = await update_mission_progress(user_id, "story", db)
+                    await db.commit()
+                yield {"event": event.pop("type"), "data": json_codec.dumps(event)}
+
+    return EventSourceResponse(event_generator())
+
+
 @router.post("/challenge")
 async def challenge(
     req: StoryChallengeSubmit,
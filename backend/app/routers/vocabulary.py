@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.routers.auth import get_current_user
 from app.models.user import User
 from app.models.vocabulary import UserVocabulary
-from app.services.spaced_repetition import get_due_words, process_review
+from app.services.spaced_repetition import (
+    get_due_words,
+    process_review,
+    process_reviews,
+    forecast_due_counts,
+    invalidate_due_count,
+)
+from app.services import prompts
 from app.services.llm import chat_once
 
 router = APIRouter(prefix="/vocabulary", tags=["vocabulary"])
@@ -20,13 +29,24 @@ class AddWordRequest(BaseModel):
 class ReviewRequest(BaseModel):
     word_id: int
     feedback: str  # "known" | "fuzzy" | "forgot"
+    latency_ms: int | None = None
+    reviewed_at: datetime.datetime | None = None  # 客户端作答时间，批量提交时使用
+
+
+class BatchReviewRequest(BaseModel):
+    reviews: list[ReviewRequest] = Field(min_length=1, max_length=200)
+    sent_at: datetime.datetime | None = None  # 客户端提交时的时钟，用于校正时钟偏差
 
 
-WORD_DETAIL_PROMPT = """请为以下英语单词提供详细信息，适合中国中学生学习。
-单词：{word}
+WORD_DETAIL_PROMPT = prompts.register(
+    "vocabulary.word_detail",
+    """请为以下英语单词提供详细信息，适合中国中学生学习。
 
 请返回 JSON 格式：
-{{"phonetic": "音标", "pos": "词性", "definition_en": "英文释义", "definition_cn": "中文释义", "etymology": "词源简介（简短）", "collocations": ["常见搭配1", "常见搭配2", "常见搭配3"], "example_sentences": [{{"en": "英文例句", "cn": "中文翻译"}}], "synonyms": ["近义词1"], "antonyms": ["反义词1"], "word_family": ["相关词1"], "memory_tip": "记忆技巧"}}"""
+{{"phonetic": "音标", "pos": "词性", "definition_en": "英文释义", "definition_cn": "中文释义", "etymology": "词源简介（简短）", "collocations": ["常见搭配1", "常见搭配2", "常见搭配3"], "example_sentences": [{{"en": "英文例句", "cn": "中文翻译"}}], "synonyms": ["近义词1"], "antonyms": ["反义词1"], "word_family": ["相关词1"], "memory_tip": "记忆技巧"}}
+""",
+    "\n单词：{word}",
+)
 
 
 @router.get("/")
@@ -52,6 +72,7 @@ async def add_word(
     db.add(word)
     await db.commit()
     await db.refresh(word)
+    invalidate_due_count(user.id)
     return word
 
 
@@ -67,6 +88,16 @@ async def due_vocabulary(
     ]
 
 
+@router.get("/forecast")
+async def due_forecast(
+    days: int = Query(30, ge=1, le=365),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """未来 N 天每天待复习的单词数。"""
+    return await forecast_due_counts(user.id, days, db)
+
+
 @router.post("/review")
 async def review_word(
     req: ReviewRequest,
@@ -76,18 +107,38 @@ async def review_word(
     from app.services.xp import award_xp
     from app.services.missions import update_mission_progress
 
-    result = await process_review(req.word_id, user.id, req.feedback, db)
+    result = await process_review(req.word_id, user.id, req.feedback, db, req.latency_ms)
     xp_result = await award_xp(user.id, "vocab_review", db)
     mission_result = await update_mission_progress(user.id, "review", db)
     await db.commit()
     return {**result, "xp": xp_result, "mission": mission_result}
 
 
+@router.post("/review/batch")
+async def review_words_batch(
+    req: BatchReviewRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """提交一整轮复习：批量更新排程，XP 与每日任务只结算一次。"""
+    from app.services.xp import award_xp
+    from app.services.missions import update_mission_progress
+
+    result = await process_reviews(user.id, [r.model_dump() for r in req.reviews], db, sent_at=req.sent_at)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    reviewed = len(result["results"])
+    xp_result = await award_xp(user.id, "vocab_review", db, count=reviewed)
+    mission_result = await update_mission_progress(user.id, "review", db, amount=reviewed)
+    await db.commit()
+    return {"reviewed": reviewed, "results": result["results"], "xp": xp_result, "mission": mission_result}
+
+
 @router.get("/word-detail/{word}")
 async def word_detail(word: str):
     """获取单词详细信息（LLM 生成）。"""
     import json
-    prompt_text = WORD_DETAIL_PROMPT.format(word=word)
+    prompt_text = WORD_DETAIL_PROMPT.render(word=word)
     raw = await chat_once(
         [{"role": "user", "content": prompt_text}],
         system_prompt="你是一位英语词汇专家，请严格按照要求的 JSON 格式返回。",
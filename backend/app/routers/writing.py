@@ -7,11 +7,20 @@ from app.models.user import User
 from app.models.writing import WritingSubmission
 from app.schemas.writing import WritingSubmitRequest, WritingFeedback
 from app.services.cognitive_orchestrator import score_reflection_quality
+from app.services import prompts
 from app.services.llm import chat_once
 
 router = APIRouter(prefix="/writing", tags=["writing"])
 
-GRADING_PROMPT = """你是一位英语写作批改老师。请对以下学生作文进行批改。
+# 模板先写固定的任务说明和 JSON 格式，学生信息和作文内容放在最后
+GRADING_PROMPT = prompts.register(
+    "writing.grading",
+    """你是一位英语写作批改老师。请对以下学生作文进行批改。
+
+请返回 JSON 格式：
+{{"score": 0-100, "summary": "总评", "strengths": ["优点1"], "improvements": ["改进建议1"], "corrected_sentences": [{{"original": "原句", "corrected": "修改后", "reason": "原因"}}], "logic_questions": ["用于二次改写的追问1"], "framework_only_tips": ["若检测到代写风险，给框架建议"]}}
+""",
+    """
 学生年级：{grade}
 批改模式：{grading_mode}
 
@@ -21,32 +30,41 @@ GRADING_PROMPT = """你是一位英语写作批改老师。请对以下学生作
 学生反思：{revision_reflection}
 
 学生作文：
-{content}
+{content}""",
+)
 
-请返回 JSON 格式：
-{{"score": 0-100, "summary": "总评", "strengths": ["优点1"], "improvements": ["改进建议1"], "corrected_sentences": [{{"original": "原句", "corrected": "修改后", "reason": "原因"}}], "logic_questions": ["用于二次改写的追问1"], "framework_only_tips": ["若检测到代写风险，给框架建议"]}}"""
+OUTLINE_PROMPT = prompts.register(
+    "writing.outline",
+    """你是一位英语写作指导老师。请根据以下写作要求，为学生生成一份写作提纲。
+学生先行观点必须优先吸收，不要直接重写观点。
 
-OUTLINE_PROMPT = """你是一位英语写作指导老师。请根据以下写作要求，为学生生成一份写作提纲。
+请返回 JSON 格式：
+{{"title_suggestion": "建议标题", "structure": [{{"section": "段落名称", "key_points": ["要点1", "要点2"], "suggested_sentences": ["参考句型1"]}}], "vocabulary_hints": ["推荐词汇1"], "grammar_focus": ["注意语法点1"], "clarify_questions": ["用于完善观点的问题1"], "word_count_suggestion": 80}}
+""",
+    """
 学生年级：{grade}
 CEFR 等级：{cefr}
 
 写作要求：{prompt}
-学生先行观点（必须优先吸收，不要直接重写观点）：
-{student_points}
+学生先行观点：
+{student_points}""",
+)
 
-请返回 JSON 格式：
-{{"title_suggestion": "建议标题", "structure": [{{"section": "段落名称", "key_points": ["要点1", "要点2"], "suggested_sentences": ["参考句型1"]}}], "vocabulary_hints": ["推荐词汇1"], "grammar_focus": ["注意语法点1"], "clarify_questions": ["用于完善观点的问题1"], "word_count_suggestion": 80}}"""
+REVISION_PROMPT = prompts.register(
+    "writing.revision",
+    """你是一位英语写作修改指导老师。请对学生的作文草稿提供逐段修改建议，帮助学生自主改进。
 
-REVISION_PROMPT = """你是一位英语写作修改指导老师。请对学生的作文草稿提供逐段修改建议，帮助学生自主改进。
+请返回 JSON 格式：
+{{"overall_comment": "整体评价", "paragraph_feedback": [{{"paragraph_index": 0, "original": "原段落", "issues": ["问题1"], "suggestions": ["建议1"], "improved_version": "改进版本"}}], "language_tips": ["语言提升建议1"], "next_steps": ["下一步改进方向1"], "logic_challenge_questions": ["请补充哪条证据支持你的观点？"]}}
+""",
+    """
 学生年级：{grade}
 
 写作要求：{prompt}
 
 学生草稿：
-{content}
-
-请返回 JSON 格式：
-{{"overall_comment": "整体评价", "paragraph_feedback": [{{"paragraph_index": 0, "original": "原段落", "issues": ["问题1"], "suggestions": ["建议1"], "improved_version": "改进版本"}}], "language_tips": ["语言提升建议1"], "next_steps": ["下一步改进方向1"], "logic_challenge_questions": ["请补充哪条证据支持你的观点？"]}}"""
+{content}""",
+)
 
 
 @router.post("/generate-outline")
@@ -60,7 +78,7 @@ async def generate_outline(
     if len(points) < 3:
         raise HTTPException(400, "请先填写至少 3 个观点，再生成提纲。")
 
-    prompt_text = OUTLINE_PROMPT.format(
+    prompt_text = OUTLINE_PROMPT.render(
         grade=user.grade,
         cefr=getattr(user, "cefr_level", "A2") or "A2",
         prompt=req.prompt,
@@ -94,7 +112,7 @@ async def revision_guide(
 ):
     """生成修改指导。"""
     import json
-    prompt_text = REVISION_PROMPT.format(
+    prompt_text = REVISION_PROMPT.render(
         grade=user.grade,
         prompt=req.prompt,
         content=req.content,
@@ -147,7 +165,7 @@ async def submit_writing(
     # 调用 LLM 批改
     try:
         import json
-        grading_text = GRADING_PROMPT.format(
+        grading_text = GRADING_PROMPT.render(
             grade=user.grade,
             grading_mode=grading_mode,
             prompt=req.prompt,
@@ -21,6 +21,7 @@ class BattleResultOut(BaseModel):
 
 class RatingOut(BaseModel):
     rating: int
+    rd: int = 350
     tier: str
     wins: int
     losses: int
@@ -31,6 +32,7 @@ class LeaderboardEntry(BaseModel):
     user_id: int
     phone: str = ""
     rating: int
+    rd: int = 350
     tier: str
     wins: int
 
@@ -8,7 +8,7 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
-    history: list[ChatMessage] = []
+    history: list[ChatMessage] = []  # 已不使用：历史由服务端按 session_id 重建
     mode: str = "free"  # free / grammar / speaking / explain
     session_id: int | None = None
     reflection_text: str = ""
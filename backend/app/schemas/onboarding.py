@@ -5,6 +5,11 @@ class AssessmentSubmit(BaseModel):
     answers: list[dict]  # [{"question_index": 0, "answer": "B"}, ...]
 
 
+class PlacementAnswer(BaseModel):
+    item_id: int
+    answer: str  # 选项字母，如 "B"
+
+
 class GoalsSubmit(BaseModel):
     daily_goal_minutes: int = 30
     target_exam: str | None = None  # zhongkao/gaokao/none
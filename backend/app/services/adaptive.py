@@ -1,18 +1,216 @@
-"""自适应学习引擎 — 简单的能力评估 + 推题逻辑骨架。"""
+"""自适应学习引擎 — IRT 能力估计 + 最大信息量选题。
 
+数学部分见 app.services.irt；本模块负责把题库参数加载成内存数组、读写学生能力值。
+题目参数由离线任务（python -m app.utils.irt_calibration）标定，未标定的题目按
+难度等级给出先验参数，因此题库冷启动时也能正常选题。
+"""
 
-def estimate_ability(correct: int, total: int) -> float:
-    """简单能力估计 (0-100)，后续替换为 IRT 模型。"""
-    if total == 0:
-        return 50.0
-    return round((correct / total) * 100, 1)
+import time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import upsert_insert
+from app.models.exam import ExamQuestion
+from app.models.irt import ItemParameter, UserAbility
+from app.services import irt
 
+BANK_PRACTICE = "practice"
+BANK_EXAM = "exam"
 
-def recommend_difficulty(ability: float, recent_streak: int) -> int:
-    """根据能力值和连续答对/答错数推荐难度 (1-5)。"""
-    base = max(1, min(5, round(ability / 20)))
-    if recent_streak >= 3:
-        base = min(5, base + 1)
-    elif recent_streak <= -3:
-        base = max(1, base - 1)
-    return base
+# 选择题的默认猜测参数（四选一）
+MC_GUESSING = 0.25
+# 难度等级 1-5 与 b 的换算步长：difficulty 3 ↔ b=0
+DIFFICULTY_STEP = 0.8
+
+_BANK_TTL_SECONDS = 600
+_bank_cache: dict[tuple, tuple[float, "ItemBank"]] = {}
+
+
+def prior_item_params(difficulty: int | None, has_options: bool) -> tuple[float, float, float]:
+    """未标定题目的先验参数 (a, b, c)。"""
+    b = ((difficulty or 3) - 3) * DIFFICULTY_STEP
+    return 1.0, b, MC_GUESSING if has_options else 0.0
+
+
+def theta_to_difficulty(theta: float) -> int:
+    """能力值映射回 1-5 难度等级，用于前端展示。"""
+    return max(1, min(5, round(theta / DIFFICULTY_STEP + 3)))
+
+
+class ItemBank:
+    """一组题目参数的内存数组视图，选题全程不访问数据库。"""
+
+    def __init__(self, ids: np.ndarray, a: np.ndarray, b: np.ndarray, c: np.ndarray, groups: np.ndarray):
+        self.ids = ids
+        self.a = a
+        self.b = b
+        self.c = c
+        self.groups = groups  # 知识点 id，-1 表示无
+        self._pos = {int(item_id): i for i, item_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def params(self, item_id: int) -> tuple[float, float, float] | None:
+        i = self._pos.get(item_id)
+        if i is None:
+            return None
+        return float(self.a[i]), float(self.b[i]), float(self.c[i])
+
+    def select(
+        self,
+        theta: float,
+        k: int = 1,
+        exclude_ids=(),
+        group: int | None = None,
+        randomesque: int = 3,
+    ) -> list[int]:
+        """在 θ 处选信息量最大的 k 道题，返回题目 id。"""
+        if not len(self.ids):
+            return []
+        exclude = self._exclude_mask(exclude_ids)
+        if group is not None:
+            exclude |= self.groups != group
+        picked = irt.select_max_information(
+            theta, self.a, self.b, self.c, exclude=exclude, k=k, randomesque=randomesque,
+        )
+        return [int(self.ids[i]) for i in picked]
+
+    def max_information(self, theta: float, exclude_ids=()) -> float:
+        """剩余题目在 θ 处的最大信息量，题库用完时为 0。"""
+        if not len(self.ids):
+            return 0.0
+        info = irt.information(theta, self.a, self.b, self.c)
+        return float(np.where(self._exclude_mask(exclude_ids), 0.0, info).max())
+
+    def _exclude_mask(self, exclude_ids) -> np.ndarray:
+        exclude = np.zeros(len(self.ids), dtype=bool)
+        for item_id in exclude_ids:
+            i = self._pos.get(item_id)
+            if i is not None:
+                exclude[i] = True
+        return exclude
+
+
+def _build_bank(rows) -> ItemBank:
+    """rows: (id, difficulty, has_options, group, a, b, c)，a/b/c 为 None 时使用先验。"""
+    n = len(rows)
+    ids = np.empty(n, dtype=np.int64)
+    a = np.empty(n)
+    b = np.empty(n)
+    c = np.empty(n)
+    groups = np.full(n, -1, dtype=np.int64)
+    for i, (item_id, difficulty, has_options, group, pa, pb, pc) in enumerate(rows):
+        ids[i] = item_id
+        if pa is None:
+            a[i], b[i], c[i] = prior_item_params(difficulty, bool(has_options))
+        else:
+            a[i], b[i], c[i] = pa, pb, pc
+        if group is not None:
+            groups[i] = group
+    return ItemBank(ids, a, b, c, groups)
+
+
+async def _cached_bank(key: tuple, stmt, db: AsyncSession) -> ItemBank:
+    now = time.monotonic()
+    hit = _bank_cache.get(key)
+    if hit and now - hit[0] < _BANK_TTL_SECONDS:
+        return hit[1]
+    result = await db.execute(stmt)
+    bank = _build_bank(result.all())
+    _bank_cache[key] = (now, bank)
+    return bank
+
+
+def _exam_bank_stmt():
+    return (
+        select(
+            ExamQuestion.id,
+            ExamQuestion.difficulty,
+            ExamQuestion.options_json.isnot(None),
+            ExamQuestion.knowledge_point_id,
+            ItemParameter.a,
+            ItemParameter.b,
+            ItemParameter.c,
+        )
+        .outerjoin(
+            ItemParameter,
+            (ItemParameter.bank == BANK_EXAM) & (ItemParameter.item_id == ExamQuestion.id),
+        )
+    )
+
+
+async def get_exam_item_bank(exam_type: str, section: str, db: AsyncSession) -> ItemBank:
+    """某考试类型 + 题型下的考试题库（带 IRT 参数），进程内缓存。"""
+    stmt = _exam_bank_stmt().where(ExamQuestion.exam_type == exam_type, ExamQuestion.section == section)
+    return await _cached_bank((BANK_EXAM, exam_type, section), stmt, db)
+
+
+async def get_placement_item_bank(db: AsyncSession) -> ItemBank:
+    """分级测评题库：考试题库中不依赖篇章、可直接按选项判分的选择题。"""
+    stmt = _exam_bank_stmt().where(ExamQuestion.options_json.isnot(None), ExamQuestion.passage_text.is_(None))
+    return await _cached_bank((BANK_EXAM, "placement"), stmt, db)
+
+
+def invalidate_item_banks():
+    """标定完成或题库变更后清空缓存。"""
+    _bank_cache.clear()
+
+
+async def get_ability(user_id: int, bank: str, db: AsyncSession) -> tuple[float, float]:
+    """读取学生能力 (θ, se)，没有记录时返回先验 (0, 1)。"""
+    result = await db.execute(
+        select(UserAbility.theta, UserAbility.se)
+        .where(UserAbility.user_id == user_id, UserAbility.bank == bank)
+    )
+    row = result.first()
+    return (row[0], row[1]) if row else (0.0, 1.0)
+
+
+async def _get_or_create_ability(user_id: int, bank: str, db: AsyncSession) -> UserAbility:
+    """读取并锁定能力记录；没有时插入先验记录（并发插入靠 (user_id, bank) 唯一约束去重）。"""
+    stmt = (
+        select(UserAbility)
+        .where(UserAbility.user_id == user_id, UserAbility.bank == bank)
+        .with_for_update()
+    )
+    ability = (await db.execute(stmt)).scalar_one_or_none()
+    if ability is None:
+        await db.execute(
+            upsert_insert(db, UserAbility)
+            .values(user_id=user_id, bank=bank, theta=0.0, se=1.0, n_responses=0)
+            .on_conflict_do_nothing(index_elements=["user_id", "bank"])
+        )
+        ability = (await db.execute(stmt)).scalar_one()
+    return ability
+
+
+async def record_response(
+    user_id: int, bank: str, params: tuple[float, float, float], is_correct: bool, db: AsyncSession
+) -> UserAbility:
+    """单次作答后在线更新能力值（EAP，以当前估计加上能力漂移为先验）。"""
+    ability = await _get_or_create_ability(user_id, bank, db)
+    a, b, c = params
+    ability.theta, ability.se = irt.update_ability(ability.theta, ability.se, a, b, c, is_correct)
+    ability.n_responses += 1
+    return ability
+
+
+async def record_responses(
+    user_id: int,
+    bank: str,
+    params: list[tuple[float, float, float]],
+    correct: list[bool],
+    db: AsyncSession,
+) -> UserAbility:
+    """一批作答（如整张模考）一次性更新能力值。"""
+    ability = await _get_or_create_ability(user_id, bank, db)
+    if not params:
+        return ability
+    arr = np.asarray(params, dtype=np.float64)
+    ability.theta, ability.se = irt.estimate_eap(
+        arr[:, 0], arr[:, 1], arr[:, 2], np.asarray(correct, dtype=bool),
+        prior_mean=ability.theta, prior_sd=irt.drifted_prior_sd(ability.se, len(params)),
+    )
+    ability.n_responses += len(params)
+    return ability
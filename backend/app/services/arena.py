@@ -1,10 +1,20 @@
-"""对战竞技场服务 — 对战创建、回合处理、Elo评分。"""
+"""对战竞技场服务 — 对战创建、回合处理、Glicko-2 评分。
 
-from sqlalchemy import select, func
+AI 对战的回合流水线：
+- word_chain / spot_error 用本地规则评分（见 arena_rules），不调用 LLM
+- AI 下一回合的出招在本回合结束后立即后台预生成，玩家打字期间就绪
+- 其他模式下，预生成命中时只需一次评分调用，未命中时用一次“回应 + 评分”合并调用
+"""
+
+import asyncio
+import time
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
 from app.models.arena import BattleSession, PlayerRating
 from app.models.user import User
-from app.services.llm import chat_once_json
+from app.services import arena_rules, glicko2
+from app.services.llm import chat_once, chat_once_json
 
 JUDGE_SYSTEM = """你是英语对战裁判。根据对战模式和双方输入，评判得分。
 返回 JSON：
@@ -17,14 +27,34 @@ JUDGE_SYSTEM = """你是英语对战裁判。根据对战模式和双方输入
 - spot_error: 找错准确性+解释质量
 - translation: 翻译准确性+流畅度"""
 
+RESPOND_AND_JUDGE_SYSTEM = """你是英语对战中的 AI 对手兼裁判。先以玩家2的身份用英语回应玩家1（水平适中），再按评分标准给双方打分。
+返回 JSON：
+{"ai_response": "你的英语回应", "p1_score": 0-10, "p2_score": 0-10, "p1_feedback": "评语", "p2_feedback": "评语"}
+
+评分标准：
+- debate: 论点质量+语法+说服力
+- story_relay: 创意+连贯性+语法
+- translation: 翻译准确性+流畅度"""
+
+# 预生成的 AI 出招：(battle_id, 回合号) -> (创建时间 monotonic, 任务)
+_SPECULATION_TTL_SECONDS = 900
+_speculative_moves: dict[tuple[int, int], tuple[float, asyncio.Task]] = {}
+
+# round_seconds：实时对战每回合的作答时限
 BATTLE_MODES = {
-    "word_chain": {"name": "单词接龙", "description": "用上一个单词的最后一个字母开头接新单词", "rounds": 5},
-    "debate": {"name": "英语辩论", "description": "就给定话题用英语辩论", "rounds": 3},
-    "story_relay": {"name": "故事接力", "description": "轮流用英语续写故事", "rounds": 4},
-    "spot_error": {"name": "找错大师", "description": "找出句子中的语法错误", "rounds": 5},
-    "translation": {"name": "翻译对决", "description": "比拼中英翻译速度和准确性", "rounds": 5},
+    "word_chain": {"name": "单词接龙", "description": "用上一个单词的最后一个字母开头接新单词", "rounds": 5, "round_seconds": 20},
+    "debate": {"name": "英语辩论", "description": "就给定话题用英语辩论", "rounds": 3, "round_seconds": 90},
+    "story_relay": {"name": "故事接力", "description": "轮流用英语续写故事", "rounds": 4, "round_seconds": 90},
+    "spot_error": {"name": "找错大师", "description": "找出句子中的语法错误", "rounds": 5, "round_seconds": 30},
+    "translation": {"name": "翻译对决", "description": "比拼中英翻译速度和准确性", "rounds": 5, "round_seconds": 45},
 }
 
+# AI 对手的固定评分与评分偏差
+AI_RATING = 1000
+AI_RD = 50.0
+# AI 对战中 AI 获胜时记录的 winner_id（不是真实用户）；平局一律记 None
+AI_WINNER_ID = 0
+
 
 async def get_or_create_rating(user_id: int, db: AsyncSession) -> PlayerRating:
     result = await db.execute(select(PlayerRating).where(PlayerRating.user_id == user_id))
@@ -47,93 +77,241 @@ async def create_battle(mode: str, player1_id: int, db: AsyncSession) -> dict:
     )
     db.add(battle)
     await db.flush()
+    bank = await arena_rules.get_rule_bank(db)
+    challenge = arena_rules.round_challenge(mode, battle.id, 1, [], bank)
+    battle.rounds_json = {**battle.rounds_json, "challenge": challenge}
+    _speculate(battle.id, 1, mode, [], challenge, bank)
     return _format_battle(battle)
 
 
 async def process_round(battle_id: int, user_id: int, user_input: str, db: AsyncSession) -> dict:
-    """处理对战回合。"""
-    result = await db.execute(select(BattleSession).where(BattleSession.id == battle_id))
+    """处理对战回合。评分只在对战转入 finished 的那一回合更新一次。"""
+    # 行锁：同一对战的并发提交串行执行，最后一回合不会被重复结算
+    result = await db.execute(select(BattleSession).where(BattleSession.id == battle_id).with_for_update())
     battle = result.scalar_one_or_none()
     if not battle:
         return {"error": "对战不存在"}
+    # 只有本人、进行中的 AI 对战可以提交回合；实时对战的记录同表但 player2_id 非空
+    if battle.player1_id != user_id or battle.player2_id is not None:
+        return {"error": "对战不存在"}
+    if battle.status == "finished":
+        return {"error": "对战已结束"}
 
     rounds_data = battle.rounds_json or {"rounds": [], "current_round": 0, "max_rounds": 5}
     rounds = rounds_data.get("rounds", [])
     current = rounds_data.get("current_round", 0)
     max_rounds = rounds_data.get("max_rounds", 5)
 
-    # Generate AI opponent response
-    ai_input = await _generate_ai_response(battle.mode, rounds, user_input)
-
-    # Judge the round
-    try:
-        judge_prompt = (
-            f"对战模式：{battle.mode}\n回合 {current + 1}\n"
-            f"玩家1输入：{user_input}\n玩家2(AI)输入：{ai_input}"
-        )
-        scores = await chat_once_json(JUDGE_SYSTEM, judge_prompt)
-    except Exception:
-        scores = {"p1_score": 5, "p2_score": 5, "p1_feedback": "", "p2_feedback": ""}
-
-    round_result = {
-        "round": current + 1,
-        "p1_input": user_input, "p2_input": ai_input,
-        "p1_score": scores.get("p1_score", 5), "p2_score": scores.get("p2_score", 5),
-        "p1_feedback": scores.get("p1_feedback", ""), "p2_feedback": scores.get("p2_feedback", ""),
-    }
+    round_no = current + 1
+    bank = await arena_rules.get_rule_bank(db)
+    challenge = rounds_data.get("challenge") or arena_rules.round_challenge(battle.mode, battle.id, round_no, rounds, bank)
+
+    ai_input = await _take_speculation(battle.id, round_no)
+    if battle.mode in arena_rules.LOCAL_SCORED_MODES:
+        if ai_input is None:
+            ai_input = await _generate_ai_move(battle.id, round_no, battle.mode, rounds, challenge, bank)
+        round_result = await judge_round(battle.mode, round_no, user_input, ai_input, challenge, rounds, bank)
+    elif ai_input is not None:
+        round_result = await judge_round(battle.mode, round_no, user_input, ai_input)
+    else:
+        round_result = await _respond_and_judge(battle.mode, round_no, rounds, user_input)
     rounds.append(round_result)
     rounds_data["rounds"] = rounds
-    rounds_data["current_round"] = current + 1
+    rounds_data["current_round"] = round_no
+
+    # 玩家看本回合结果、构思下一回合时，AI 的下一步已经在生成
+    if round_no < max_rounds:
+        rounds_data["challenge"] = arena_rules.round_challenge(battle.mode, battle.id, round_no + 1, rounds, bank)
+        _speculate(battle.id, round_no + 1, battle.mode, rounds, rounds_data["challenge"], bank)
+    else:
+        rounds_data.pop("challenge", None)
 
     battle.rounds_json = rounds_data
+    flag_modified(battle, "rounds_json")
 
     # Check if battle is over
     if current + 1 >= max_rounds:
         p1_total = sum(r.get("p1_score", 0) for r in rounds)
         p2_total = sum(r.get("p2_score", 0) for r in rounds)
         battle.status = "finished"
-        battle.winner_id = battle.player1_id if p1_total >= p2_total else None
+        if p1_total != p2_total:
+            battle.winner_id = battle.player1_id if p1_total > p2_total else AI_WINNER_ID
+        else:
+            battle.winner_id = None
 
-        # Update ratings
-        await _update_ratings(battle.player1_id, p1_total > p2_total, db)
+        # Update ratings（与 rating_recompute 的计分一致：胜 1 / 平 0.5 / 负 0）
+        await _update_ratings(battle.player1_id, battle_score(battle.winner_id, battle.player1_id), db)
 
     await db.flush()
     return {**_format_battle(battle), "round_result": round_result}
 
 
-async def _generate_ai_response(mode: str, prev_rounds: list, user_input: str) -> str:
-    """生成AI对手的回应。"""
+def battle_score(winner_id: int | None, player1_id: int) -> float:
+    """player1 的对局得分：winner_id 为 None 是平局。"""
+    if winner_id is None:
+        return 0.5
+    return 1.0 if winner_id == player1_id else 0.0
+
+
+async def _generate_ai_move(
+    battle_id: int, round_no: int, mode: str, prev_rounds: list, challenge: dict | None, bank: arena_rules.RuleBank,
+) -> str:
+    """AI 对手第 round_no 回合的出招，只依赖此前的回合，可以提前生成。"""
+    if mode == "spot_error":
+        return arena_rules.ai_spot_error_answer(battle_id, round_no, bank.spot_error(challenge))
     try:
-        system = f"你是英语对战AI对手。模式：{mode}。请用英语回应，水平适中。只返回你的回应文本，不要JSON。"
         context = "\n".join([f"Round {r['round']}: P1={r['p1_input']}, P2={r['p2_input']}" for r in prev_rounds[-3:]])
-        prompt = f"之前回合：\n{context}\n\n对手刚说：{user_input}\n\n请回应："
-        from app.services.llm import chat_once
-        return await chat_once([{"role": "user", "content": prompt}], system)
+        if mode == "word_chain":
+            anchor = challenge.get("p2_anchor", "")
+            used = ", ".join(w for r in prev_rounds for w in (r["p1_input"], r["p2_input"]) if w)
+            system = "你是英语单词接龙的 AI 对手，水平适中。只返回一个英文单词，不要任何其他内容。"
+            prompt = f"上一个词：{anchor}\n请给出一个以字母 {anchor[-1:]} 开头的英文单词。不能使用：{used or '无'}"
+        else:
+            system = f"你是英语对战AI对手。模式：{mode}。请用英语回应，水平适中。只返回你的回应文本，不要JSON。"
+            last = prev_rounds[-1]["p1_input"] if prev_rounds else ""
+            prompt = f"之前回合：\n{context or '（第一回合）'}\n\n对手上回合说：{last or '（无）'}\n\n请给出你这一回合的发言："
+        return (await chat_once([{"role": "user", "content": prompt}], system)).strip()
+    except Exception:
+        return "" if mode == "word_chain" else "I think that's an interesting point."
+
+
+def _speculate(
+    battle_id: int, round_no: int, mode: str, prev_rounds: list, challenge: dict | None, bank: arena_rules.RuleBank,
+):
+    """后台预生成 AI 出招。"""
+    now = time.monotonic()
+    for key, (created, task) in list(_speculative_moves.items()):
+        if now - created > _SPECULATION_TTL_SECONDS:
+            task.cancel()
+            del _speculative_moves[key]
+    task = asyncio.create_task(_generate_ai_move(battle_id, round_no, mode, list(prev_rounds), challenge, bank))
+    _speculative_moves[(battle_id, round_no)] = (now, task)
+
+
+async def _take_speculation(battle_id: int, round_no: int) -> str | None:
+    """取出预生成的出招（还没生成完就等它）；没有预生成（如换了 worker）时返回 None。"""
+    entry = _speculative_moves.pop((battle_id, round_no), None)
+    if entry is None:
+        return None
+    try:
+        return await entry[1]
+    except Exception:
+        return None
+
+
+async def _respond_and_judge(mode: str, round_no: int, prev_rounds: list, user_input: str) -> dict:
+    """AI 回应与评分合并为一次调用。"""
+    context = "\n".join([f"Round {r['round']}: P1={r['p1_input']}, P2={r['p2_input']}" for r in prev_rounds[-3:]])
+    prompt = f"对战模式：{mode}\n回合 {round_no}\n之前回合：\n{context or '（无）'}\n\n玩家1输入：{user_input}"
+    try:
+        data = await chat_once_json(RESPOND_AND_JUDGE_SYSTEM, prompt)
     except Exception:
-        return "I think that's an interesting point."
+        data = {}
+    ai_input = str(data.get("ai_response") or "I think that's an interesting point.")
+    return {
+        "round": round_no,
+        "p1_input": user_input, "p2_input": ai_input,
+        "p1_score": data.get("p1_score", 5), "p2_score": data.get("p2_score", 5),
+        "p1_feedback": data.get("p1_feedback", ""), "p2_feedback": data.get("p2_feedback", ""),
+    }
+
+
+async def judge_round(
+    mode: str, round_no: int, p1_input: str, p2_input: str,
+    challenge: dict | None = None, prev_rounds: list | None = None, bank: arena_rules.RuleBank | None = None,
+) -> dict:
+    """评判一个回合，返回回合结果。未作答的一方记 0 分。
+
+    带题面的 word_chain / spot_error 回合按本地规则评分（bank 为 get_rule_bank 的词典和题库），不调用 LLM。
+    """
+    if challenge is not None and mode in arena_rules.LOCAL_SCORED_MODES:
+        scores = arena_rules.score_round_locally(
+            mode, challenge, prev_rounds or [], p1_input, p2_input, bank or arena_rules.RuleBank(),
+        )
+        return {"round": round_no, "p1_input": p1_input, "p2_input": p2_input, "challenge": challenge, **scores}
+
+    if not p1_input and not p2_input:
+        scores = {"p1_score": 0, "p2_score": 0}
+    else:
+        try:
+            judge_prompt = (
+                f"对战模式：{mode}\n回合 {round_no}\n"
+                f"玩家1输入：{p1_input or '（未作答）'}\n玩家2输入：{p2_input or '（未作答）'}"
+            )
+            scores = await chat_once_json(JUDGE_SYSTEM, judge_prompt)
+        except Exception:
+            scores = {"p1_score": 5, "p2_score": 5, "p1_feedback": "", "p2_feedback": ""}
+
+    return {
+        "round": round_no,
+        "p1_input": p1_input, "p2_input": p2_input,
+        "p1_score": scores.get("p1_score", 5) if p1_input else 0,
+        "p2_score": scores.get("p2_score", 5) if p2_input else 0,
+        "p1_feedback": scores.get("p1_feedback", ""), "p2_feedback": scores.get("p2_feedback", ""),
+    }
+
 
+async def _update_ratings(
+    user_id: int, score: float, db: AsyncSession,
+    opponent: tuple[float, float] = (AI_RATING, AI_RD),
+) -> PlayerRating:
+    """Glicko-2 在线增量更新。score: 1 胜 / 0.5 平 / 0 负；opponent 为对手赛前的 (rating, rd)。
 
-async def _update_ratings(user_id: int, won: bool, db: AsyncSession):
-    """Elo评分更新。"""
+    离线任务 app.utils.rating_recompute 会按评分周期从全部历史重算并覆盖这里的结果。
+    """
     rating = await get_or_create_rating(user_id, db)
-    K = 32
-    # Against AI baseline of 1000
-    expected = 1 / (1 + 10 ** ((1000 - rating.rating) / 400))
-    actual = 1.0 if won else 0.0
-    rating.rating = max(100, round(rating.rating + K * (actual - expected)))
+    r, rd, vol = glicko2.rate_single(rating.rating, rating.rd, rating.volatility, *opponent, score)
+    rating.rating = max(100, round(r))
+    rating.rd = round(rd, 2)
+    rating.volatility = vol
 
-    if won:
+    if score > 0.5:
         rating.wins += 1
-    else:
+    elif score < 0.5:
         rating.losses += 1
 
-    # Update tier
-    r = rating.rating
-    if r >= 2000: rating.tier = "champion"
-    elif r >= 1600: rating.tier = "diamond"
-    elif r >= 1300: rating.tier = "gold"
-    elif r >= 1100: rating.tier = "silver"
-    else: rating.tier = "bronze"
+    rating.tier = calculate_tier(rating.rating)
+    return rating
+
+
+async def finish_live_battle(
+    mode: str, player1_id: int, player2_id: int, rounds: list[dict], db: AsyncSession,
+    forfeit_id: int | None = None,
+) -> dict:
+    """实时对战结束时一次性落库：对战记录 + 双方评分。forfeit_id 为中途离开判负的玩家。"""
+    p1_total = sum(r.get("p1_score", 0) for r in rounds)
+    p2_total = sum(r.get("p2_score", 0) for r in rounds)
+    if forfeit_id is not None:
+        winner_id = player2_id if forfeit_id == player1_id else player1_id
+    elif p1_total != p2_total:
+        winner_id = player1_id if p1_total > p2_total else player2_id
+    else:
+        winner_id = None
+
+    battle = BattleSession(
+        mode=mode, player1_id=player1_id, player2_id=player2_id, status="finished",
+        rounds_json={
+            "rounds": rounds, "current_round": len(rounds),
+            "max_rounds": BATTLE_MODES[mode]["rounds"], "live": True, "forfeit_id": forfeit_id,
+        },
+        winner_id=winner_id,
+    )
+    db.add(battle)
+
+    # 双方都按赛前评分计算期望
+    r1 = await get_or_create_rating(player1_id, db)
+    r2 = await get_or_create_rating(player2_id, db)
+    before = {player1_id: (r1.rating, r1.rd), player2_id: (r2.rating, r2.rd)}
+    s1 = battle_score(winner_id, player1_id)
+    await _update_ratings(player1_id, s1, db, opponent=before[player2_id])
+    await _update_ratings(player2_id, 1.0 - s1, db, opponent=before[player1_id])
+    await db.flush()
+
+    return {
+        **_format_battle(battle),
+        "scores": {player1_id: p1_total, player2_id: p2_total},
+        "ratings": {uid: {"before": before[uid][0], "after": r.rating, "rd": r.rd, "tier": r.tier} for uid, r in ((player1_id, r1), (player2_id, r2))},
+    }
 
 
 def calculate_tier(rating: int) -> str:
@@ -145,6 +323,7 @@ def calculate_tier(rating: int) -> str:
 
 
 async def get_leaderboard(db: AsyncSession, limit: int = 20) -> list[dict]:
+    """排行榜直接读 player_ratings（离线重算 + 在线增量维护），走 rating 索引。"""
     result = await db.execute(
         select(PlayerRating, User.phone)
         .join(User, PlayerRating.user_id == User.id)
@@ -153,7 +332,7 @@ async def get_leaderboard(db: AsyncSession, limit: int = 20) -> list[dict]:
     )
     return [
         {"user_id": r.user_id, "phone": phone[:3] + "****" + phone[-4:] if len(phone) >= 7 else phone,
-         "rating": r.rating, "tier": r.tier, "wins": r.wins}
+         "rating": r.rating, "rd": round(r.rd), "tier": r.tier, "wins": r.wins}
         for r, phone in result.all()
     ]
 
@@ -0,0 +1,345 @@
+"""实时对战 — 按评分分桶的匹配队列与每场对战的异步状态机。
+
+消息经 app.services.pubsub 路由（多 worker 部署时走 Redis）：
+- arena:queue              匹配事件 join / leave / tick，每个 worker 维护同一份队列副本
+- arena:user:{user_id}     推给玩家的消息，持有该玩家 WebSocket 的 worker 负责转发
+- arena:battle:{key}       玩家提交的作答，运行该对战的 worker 负责处理
+
+匹配：评分每 RATING_BUCKET 分一个桶，等待越久可接受的桶范围越宽，双方范围互相覆盖才配对。
+各 worker 以相同顺序处理同一串队列事件，匹配只依赖事件携带的时间戳，因此各副本得到相同的配对；
+每一对由先入队玩家所在的 worker 运行。
+
+对战：每回合 round_open（倒计时）→ judging → 下一回合，全部回合结束后 finished，
+结果只在结束时写库一次（见 arena.finish_live_battle）。
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from app.database import async_session
+from app.services import arena, arena_rules
+from app.services.missions import update_mission_progress
+from app.services.pubsub import get_broker
+from app.services.xp import award_xp
+
+logger = logging.getLogger(__name__)
+
+QUEUE_CHANNEL = "arena:queue"
+RATING_BUCKET = 100
+# 每等待这么多秒，可匹配范围向两侧各扩一个桶
+WIDEN_EVERY_SECONDS = 5
+MAX_BUCKET_SPAN = 5
+QUEUE_TICK_SECONDS = 2
+QUEUE_TIMEOUT_SECONDS = 120
+# 配对成功到第一回合开始的间隔
+START_DELAY_SECONDS = 3
+MAX_INPUT_CHARS = 500
+
+
+def user_channel(user_id: int) -> str:
+    return f"arena:user:{user_id}"
+
+
+def battle_channel(key: str) -> str:
+    return f"arena:battle:{key}"
+
+
+@dataclass
+class QueueEntry:
+    user_id: int
+    mode: str
+    rating: int
+    joined_at: float
+    worker: str
+
+    @property
+    def bucket(self) -> int:
+        return self.rating // RATING_BUCKET
+
+    def span(self, now: float) -> int:
+        return min(int(max(now - self.joined_at, 0) // WIDEN_EVERY_SECONDS), MAX_BUCKET_SPAN)
+
+
+class Matchmaker:
+    """匹配队列。只由队列事件驱动，不读本地时钟。"""
+
+    def __init__(self):
+        self.entries: dict[int, QueueEntry] = {}
+        # (mode, bucket) -> {user_id: entry}，按入队顺序
+        self.buckets: dict[tuple[str, int], dict[int, QueueEntry]] = defaultdict(dict)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def join(self, entry: QueueEntry) -> tuple[QueueEntry, QueueEntry] | None:
+        self.leave(entry.user_id)
+        self.entries[entry.user_id] = entry
+        self.buckets[(entry.mode, entry.bucket)][entry.user_id] = entry
+        return self._match(entry, entry.joined_at)
+
+    def leave(self, user_id: int) -> QueueEntry | None:
+        entry = self.entries.pop(user_id, None)
+        if entry:
+            bucket = self.buckets[(entry.mode, entry.bucket)]
+            bucket.pop(user_id, None)
+            if not bucket:
+                del self.buckets[(entry.mode, entry.bucket)]
+        return entry
+
+    def tick(self, now: float) -> tuple[list[tuple[QueueEntry, QueueEntry]], list[QueueEntry]]:
+        """放宽等待者的范围后重新匹配；返回 (新配对, 超时出队的玩家)。"""
+        expired = [e for e in self.entries.values() if now - e.joined_at > QUEUE_TIMEOUT_SECONDS]
+        for e in expired:
+            self.leave(e.user_id)
+        pairs = []
+        for entry in sorted(self.entries.values(), key=lambda e: e.joined_at):
+            if entry.user_id in self.entries:
+                pair = self._match(entry, now)
+                if pair:
+                    pairs.append(pair)
+        return pairs, expired
+
+    def _match(self, entry: QueueEntry, now: float) -> tuple[QueueEntry, QueueEntry] | None:
+        span = entry.span(now)
+        best, best_key = None, None
+        for bucket in range(entry.bucket - span, entry.bucket + span + 1):
+            for other in self.buckets.get((entry.mode, bucket), {}).values():
+                if other.user_id == entry.user_id or abs(other.bucket - entry.bucket) > other.span(now):
+                    continue
+                key = (abs(other.rating - entry.rating), other.joined_at)
+                if best_key is None or key < best_key:
+                    best, best_key = other, key
+        if best is None:
+            return None
+        self.leave(entry.user_id)
+        self.leave(best.user_id)
+        return (best, entry) if best.joined_at <= entry.joined_at else (entry, best)
+
+
+class LiveBattle:
+    """一场实时对战。状态：matched → round_open ⇄ judging → finished / aborted。"""
+
+    def __init__(self, hub: "ArenaHub", key: str, mode: str, player1: QueueEntry, player2: QueueEntry):
+        self.hub = hub
+        self.key = key
+        self.mode = mode
+        self.players = (player1.user_id, player2.user_id)
+        self.ratings = {player1.user_id: player1.rating, player2.user_id: player2.rating}
+        self.state = "matched"
+        self.round_no = 0
+        self.rounds: list[dict] = []
+        self.inputs: dict[int, str] = {}
+        self.absent: set[int] = set()
+        self._round_done = asyncio.Event()
+
+    def opponent(self, user_id: int) -> int:
+        return self.players[1] if user_id == self.players[0] else self.players[0]
+
+    async def _send_both(self, message: dict):
+        for user_id in self.players:
+            await self.hub.send(user_id, message)
+
+    async def run(self):
+        broker = get_broker()
+        sub = await broker.subscribe(battle_channel(self.key), self.on_message)
+        config = arena.BATTLE_MODES[self.mode]
+        try:
+            for user_id in self.players:
+                opponent = self.opponent(user_id)
+                await self.hub.send(user_id, {
+                    "type": "matched", "battle": self.key, "mode": self.mode,
+                    "opponent": {"user_id": opponent, "rating": self.ratings[opponent]},
+                    "rounds": config["rounds"], "round_seconds": config["round_seconds"],
+                    "starts_in": START_DELAY_SECONDS,
+                })
+            await asyncio.sleep(START_DELAY_SECONDS)
+
+            forfeit_id = None
+            for round_no in range(1, config["rounds"] + 1):
+                forfeit_id = await self._play_round(round_no, config["round_seconds"])
+                if forfeit_id is not None:
+                    break
+
+            async with async_session() as db:
+                result = await arena.finish_live_battle(
+                    self.mode, *self.players, self.rounds, db, forfeit_id=forfeit_id,
+                )
+                if result["winner_id"] is not None:
+                    result["xp"] = await award_xp(result["winner_id"], "battle_win", db)
+                    await update_mission_progress(result["winner_id"], "arena", db)
+                await db.commit()
+            self.state = "finished"
+            await self._send_both({"type": "battle_end", "battle": self.key, "result": result})
+        except asyncio.CancelledError:
+            self.state = "aborted"
+            raise
+        except Exception:
+            logger.exception("live battle %s failed", self.key)
+            self.state = "aborted"
+            await self._send_both({"type": "battle_aborted", "battle": self.key})
+        finally:
+            await sub.close()
+            self.hub.battles.pop(self.key, None)
+
+    async def _play_round(self, round_no: int, seconds: int) -> int | None:
+        """进行一个回合；有玩家离开时返回其 user_id（判负）。"""
+        self.round_no = round_no
+        self.inputs = {}
+        self._round_done.clear()
+        self.state = "round_open"
+        async with async_session() as db:
+            bank = await arena_rules.get_rule_bank(db)
+        challenge = arena_rules.round_challenge(self.mode, self.key, round_no, self.rounds, bank)
+        await self._send_both({
+            "type": "round_start", "battle": self.key, "round": round_no,
+            "seconds": seconds, "deadline": time.time() + seconds,
+            "challenge": challenge,
+            "previous": self.rounds[-1] if self.rounds else None,
+        })
+        if not self._everyone_in():
+            try:
+                await asyncio.wait_for(self._round_done.wait(), seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        self.state = "judging"
+        p1, p2 = self.players
+        result = await arena.judge_round(
+            self.mode, round_no, self.inputs.get(p1, ""), self.inputs.get(p2, ""), challenge, self.rounds, bank,
+        )
+        self.rounds.append(result)
+        await self._send_both({"type": "round_result", "battle": self.key, "result": result})
+
+        # 离开且本回合未作答的玩家判负；双方都离开则按已有比分结算
+        gone = [u for u in self.players if u in self.absent and u not in self.inputs]
+        if len(gone) == 1:
+            return gone[0]
+        return None
+
+    def _everyone_in(self) -> bool:
+        return all(u in self.inputs or u in self.absent for u in self.players)
+
+    async def on_message(self, message: dict):
+        user_id = message.get("user_id")
+        if user_id not in self.players:
+            return
+        if message["type"] == "submit":
+            if self.state != "round_open" or message.get("round") not in (None, self.round_no) or user_id in self.inputs:
+                return
+            self.inputs[user_id] = str(message.get("text", ""))[:MAX_INPUT_CHARS].strip()
+            await self.hub.send(self.opponent(user_id), {"type": "opponent_submitted", "battle": self.key, "round": self.round_no})
+        elif message["type"] == "leave":
+            self.absent.add(user_id)
+            await self.hub.send(self.opponent(user_id), {"type": "opponent_left", "battle": self.key})
+        if self.state == "round_open" and self._everyone_in():
+            self._round_done.set()
+
+
+class ArenaHub:
+    """本 worker 的匹配队列副本和正在运行的对战。"""
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.matchmaker = Matchmaker()
+        self.battles: dict[str, LiveBattle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._sub = None
+        self._ticker: asyncio.Task | None = None
+
+    async def start(self):
+        self._sub = await get_broker().subscribe(QUEUE_CHANNEL, self._on_queue_event)
+        self._ticker = asyncio.create_task(self._tick_loop())
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._sub:
+            await self._sub.close()
+
+    async def send(self, user_id: int, message: dict):
+        await get_broker().publish(user_channel(user_id), message)
+
+    # ---- 玩家操作（由 WebSocket 路由调用） ----
+
+    async def enqueue(self, user_id: int, mode: str, rating: int):
+        await get_broker().publish(QUEUE_CHANNEL, {
+            "type": "join", "user_id": user_id, "mode": mode, "rating": rating,
+            "ts": time.time(), "worker": self.worker_id,
+        })
+
+    async def cancel(self, user_id: int):
+        await get_broker().publish(QUEUE_CHANNEL, {"type": "leave", "user_id": user_id, "ts": time.time()})
+
+    async def submit(self, user_id: int, battle_key: str, text: str, round_no: int | None = None):
+        await get_broker().publish(battle_channel(battle_key), {
+            "type": "submit", "user_id": user_id, "text": text, "round": round_no,
+        })
+
+    async def leave_battle(self, user_id: int, battle_key: str):
+        await get_broker().publish(battle_channel(battle_key), {"type": "leave", "user_id": user_id})
+
+    # ---- 队列事件 ----
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(QUEUE_TICK_SECONDS)
+            # 只有本 worker 有人在排队时才发 tick，驱动所有副本一起放宽范围
+            if any(e.worker == self.worker_id for e in self.matchmaker.entries.values()):
+                await get_broker().publish(QUEUE_CHANNEL, {"type": "tick", "ts": time.time()})
+
+    async def _on_queue_event(self, event: dict):
+        pairs, expired = [], []
+        if event["type"] == "join":
+            entry = QueueEntry(event["user_id"], event["mode"], event["rating"], event["ts"], event["worker"])
+            pair = self.matchmaker.join(entry)
+            if pair:
+                pairs.append(pair)
+            elif entry.worker == self.worker_id:
+                await self.send(entry.user_id, {"type": "queued", "mode": entry.mode, "rating": entry.rating})
+        elif event["type"] == "leave":
+            entry = self.matchmaker.leave(event["user_id"])
+            if entry and entry.worker == self.worker_id:
+                await self.send(entry.user_id, {"type": "cancelled"})
+        elif event["type"] == "tick":
+            pairs, expired = self.matchmaker.tick(event["ts"])
+
+        for entry in expired:
+            if entry.worker == self.worker_id:
+                await self.send(entry.user_id, {"type": "queue_timeout"})
+        for first, second in pairs:
+            if first.worker == self.worker_id:
+                self._start_battle(first, second)
+
+    def _start_battle(self, player1: QueueEntry, player2: QueueEntry):
+        key = uuid.uuid4().hex
+        battle = LiveBattle(self, key, player1.mode, player1, player2)
+        self.battles[key] = battle
+        task = asyncio.create_task(battle.run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+_hub: ArenaHub | None = None
+
+
+def get_hub() -> ArenaHub:
+    global _hub
+    if _hub is None:
+        _hub = ArenaHub()
+    return _hub
+
+
+async def start_hub():
+    await get_hub().start()
+
+
+async def stop_hub():
+    global _hub
+    if _hub is not None:
+        await _hub.stop()
+        _hub = None
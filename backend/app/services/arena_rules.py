@@ -0,0 +1,297 @@
+"""对战本地规则评分 — word_chain / spot_error 不调用 LLM。
+
+每回合有一个“题面”（challenge），由对战种子和回合号确定，AI 对战和实时对战共用：
+- word_chain：{"p1_anchor", "p2_anchor"}，各自要接的词（首回合相同，之后是对方上一回合的词）
+- spot_error：{"source", "item", "sentence"}，题目来源（bank 题库 / builtin 内置）、
+  题目 id 和带一处语法错误的句子（答案只在服务端）
+
+接龙词典和找错题目由 get_rule_bank 从数据库加载（进程内缓存）：
+- 词典取知识图谱节点（knowledge_nodes）的单词和 CEFR 等级，不在词典里的词不得分
+- 找错题取题库中“短文改错”类、能解析出单句和唯一一处改错的题目，不足时用内置题目
+"""
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.knowledge import KnowledgeNode
+from app.models.question import Question
+
+WORD_CHAIN_START_WORDS = [
+    "apple", "river", "garden", "music", "orange", "travel", "window", "yellow",
+    "teacher", "island", "planet", "summer", "doctor", "forest", "camera", "market",
+]
+
+# sentence 中 error 为错误的词（组），correction 为改正后的写法
+SPOT_ERROR_BANK = [
+    {"sentence": "She don't like eating vegetables.", "error": "don't", "correction": "doesn't"},
+    {"sentence": "He go to school by bus every day.", "error": "go", "correction": "goes"},
+    {"sentence": "I have seen that movie yesterday.", "error": "have seen", "correction": "saw"},
+    {"sentence": "There is many books on the desk.", "error": "is", "correction": "are"},
+    {"sentence": "She is more taller than her sister.", "error": "more taller", "correction": "taller"},
+    {"sentence": "We discussed about the plan for an hour.", "error": "discussed about", "correction": "discussed"},
+    {"sentence": "If I will see him, I will tell him.", "error": "will see", "correction": "see"},
+    {"sentence": "He is interested on learning Japanese.", "error": "on", "correction": "in"},
+    {"sentence": "The informations you gave me were useful.", "error": "informations", "correction": "information"},
+    {"sentence": "I am looking forward to see you.", "error": "see", "correction": "seeing"},
+    {"sentence": "Each of the students have a laptop.", "error": "have", "correction": "has"},
+    {"sentence": "She has lived here since three years.", "error": "since", "correction": "for"},
+    {"sentence": "This is the most unique idea I have heard.", "error": "most unique", "correction": "unique"},
+    {"sentence": "My father let me to use his car.", "error": "to use", "correction": "use"},
+    {"sentence": "He suggested me to take a break.", "error": "suggested me to take", "correction": "suggested that I take"},
+    {"sentence": "The news are very surprising today.", "error": "are", "correction": "is"},
+]
+
+LOCAL_SCORED_MODES = {"word_chain", "spot_error"}
+
+# AI 对手在找错模式下答对的概率（“水平适中”）
+AI_SPOT_ERROR_ACCURACY = 0.6
+
+# 接龙得分：词典内单词 6 分起，长度奖励最多 2 分（6 个字母封顶），词汇等级奖励最多 2 分
+WORD_CHAIN_BASE_SCORE = 6
+WORD_CHAIN_LENGTH_BONUS = 2
+WORD_CHAIN_LEVEL_BONUS = {"B2": 1, "C1": 2, "C2": 2}
+# 词典少于该数量（知识图谱尚未建立）时只做基本的拼写合理性检查，并且不给长度和等级奖励
+WORD_CHAIN_MIN_DICTIONARY = 500
+
+# 找错：答案中每多列出一个句中的其他词（“广撒网”）扣 3 分
+SPOT_ERROR_EXTRA_PENALTY = 3
+# 列举候选时不算作候选的常用说明用词
+_SPOT_ERROR_FILLER = {
+    "i", "think", "should", "be", "the", "a", "an", "it", "wrong", "error", "change", "changed",
+    "to", "into", "instead", "of", "correct", "is", "word",
+}
+# 题库中可用的找错题少于该数量时，退回内置的 SPOT_ERROR_BANK
+SPOT_ERROR_MIN_BANK = 20
+SPOT_ERROR_LOAD_LIMIT = 5000
+SPOT_ERROR_MAX_WORDS = 30
+
+_RULE_BANK_TTL_SECONDS = 600
+
+_WORD_RE = re.compile(r"^[a-z]+(?:-[a-z]+)*$")
+_VOWELS = set("aeiouy")
+# 题库答案中的改错写法：“don't → doesn't” / “don't 改为 doesn't”
+_PHRASE = r"[A-Za-z']+(?: [A-Za-z']+){0,3}"
+_CORRECTION_RE = re.compile(rf"({_PHRASE})\s*(?:→|->|=>|应改为|改为|改成|应为)\s*({_PHRASE})(?![A-Za-z' ]*[A-Za-z])")
+_SENTENCE_RE = re.compile(r"^[A-Za-z][A-Za-z0-9 ,'\-]*[.!?]$")
+
+
+@dataclass
+class RuleBank:
+    # 接龙词典：单词 -> CEFR 等级
+    words: dict[str, str] = field(default_factory=dict)
+    # 题库找错题：题目 id -> {sentence, error, correction}；为空时使用内置题目
+    spot_errors: dict[int, dict] = field(default_factory=dict)
+
+    @property
+    def spot_error_source(self) -> str:
+        return "bank" if self.spot_errors else "builtin"
+
+    def spot_error_ids(self) -> list[int]:
+        return sorted(self.spot_errors) if self.spot_errors else list(range(len(SPOT_ERROR_BANK)))
+
+    def spot_error(self, challenge: dict) -> dict | None:
+        """题面对应的题目；旧题面没有 source，按内置题目处理。"""
+        item = challenge.get("item")
+        if challenge.get("source", "builtin") == "builtin":
+            return SPOT_ERROR_BANK[item] if isinstance(item, int) and 0 <= item < len(SPOT_ERROR_BANK) else None
+        return self.spot_errors.get(item)
+
+
+_rule_bank: tuple[float, RuleBank] | None = None
+
+
+async def get_rule_bank(db: AsyncSession) -> RuleBank:
+    """接龙词典 + 找错题库，进程内缓存。"""
+    global _rule_bank
+    now = time.monotonic()
+    if _rule_bank and now - _rule_bank[0] < _RULE_BANK_TTL_SECONDS:
+        return _rule_bank[1]
+
+    result = await db.execute(select(KnowledgeNode.word, KnowledgeNode.cefr_level))
+    words = {w: level or "A1" for word, level in result.all() if (w := _valid_word(word))}
+    for word in WORD_CHAIN_START_WORDS:
+        words.setdefault(word, "A1")
+
+    result = await db.execute(
+        select(Question.id, Question.content, Question.answer)
+        .where(Question.question_type == "短文改错")
+        .limit(SPOT_ERROR_LOAD_LIMIT)
+    )
+    spot_errors = {}
+    for question_id, content, answer in result.all():
+        entry = parse_spot_error(content, answer)
+        if entry:
+            spot_errors[question_id] = entry
+    if len(spot_errors) < SPOT_ERROR_MIN_BANK:
+        spot_errors = {}
+
+    bank = RuleBank(words=words, spot_errors=spot_errors)
+    _rule_bank = (now, bank)
+    return bank
+
+
+def parse_spot_error(content: str, answer: str) -> dict | None:
+    """从题库的改错题解析出 {sentence, error, correction}；不是单句单处错误的题目返回 None。"""
+    corrections = _CORRECTION_RE.findall(answer or "")
+    if len({(e.strip().lower(), c.strip().lower()) for e, c in corrections}) != 1:
+        return None
+    error, correction = (part.strip() for part in corrections[0])
+    for line in (content or "").splitlines():
+        sentence = re.sub(r"^\s*(?:\d+[.、)]\s*)?", "", line).strip().strip("\"“”")
+        if (
+            _SENTENCE_RE.match(sentence)
+            and len(sentence.split()) <= SPOT_ERROR_MAX_WORDS
+            and _find(sentence.lower(), error.lower()) is not None
+        ):
+            return {"sentence": sentence, "error": error, "correction": correction}
+    return None
+
+
+def _rng(seed: int | str, round_no: int) -> random.Random:
+    return random.Random(f"{seed}:{round_no}")
+
+
+def round_challenge(mode: str, seed: int | str, round_no: int, rounds: list[dict], bank: RuleBank) -> dict | None:
+    """第 round_no 回合的题面；rounds 为此前已完成的回合。"""
+    if mode == "word_chain":
+        if not rounds:
+            start = _rng(seed, 0).choice(WORD_CHAIN_START_WORDS)
+            return {"p1_anchor": start, "p2_anchor": start}
+        last = rounds[-1]
+        previous = last.get("challenge") or {}
+        # 对方上回合没给出合法单词时，沿用自己上回合要接的词
+        return {
+            "p1_anchor": _valid_word(last.get("p2_input")) or previous.get("p1_anchor", ""),
+            "p2_anchor": _valid_word(last.get("p1_input")) or previous.get("p2_anchor", ""),
+        }
+    if mode == "spot_error":
+        source = bank.spot_error_source
+        used = {r.get("challenge", {}).get("item") for r in rounds if r.get("challenge", {}).get("source", "builtin") == source}
+        order = bank.spot_error_ids()
+        _rng(seed, 0).shuffle(order)
+        item = next((i for i in order if i not in used), order[round_no % len(order)])
+        entry = bank.spot_error({"source": source, "item": item})
+        return {"source": source, "item": item, "sentence": entry["sentence"]}
+    return None
+
+
+def _valid_word(text: str | None) -> str | None:
+    word = (text or "").strip().lower()
+    return word if _WORD_RE.match(word) else None
+
+
+def _plausible_word(word: str) -> bool:
+    """没有词典时的拼写合理性检查：元音比例正常、没有五个以上连续辅音或三个相同字母、不是同一片段的重复。"""
+    letters = word.replace("-", "")
+    vowels = sum(ch in _VOWELS for ch in letters)
+    return (
+        0.1 <= vowels / len(letters) <= 0.8
+        and not re.search(r"[^aeiouy]{5}", letters)
+        and not re.search(r"(.)\1\1", letters)
+        and not re.fullmatch(r"(.{1,4})\1{2,}.{0,3}", letters)
+    )
+
+
+def score_word_chain(text: str, anchor: str, used: set[str], words: dict[str, str]) -> tuple[int, str]:
+    """合法（词典内的单个英文单词、首字母接上、本局未用过）得 6 分起，
+    长度和词汇等级各加最多 2 分，满分 10。words 为词典（单词 -> CEFR 等级）。"""
+    word = (text or "").strip().lower()
+    if not word:
+        return 0, "未作答"
+    if not _WORD_RE.match(word):
+        return 0, "请只输入一个英文单词"
+    if anchor and word[0] != anchor[-1]:
+        return 0, f"需要以字母 {anchor[-1]} 开头（接 {anchor}）"
+    if word in used:
+        return 1, f"{word} 本局已经用过了"
+    if len(words) >= WORD_CHAIN_MIN_DICTIONARY:
+        if word not in words:
+            return 0, f"{word} 不在词库中"
+        score = (
+            WORD_CHAIN_BASE_SCORE
+            + min(max(len(word) - 4, 0), WORD_CHAIN_LENGTH_BONUS)
+            + WORD_CHAIN_LEVEL_BONUS.get(words[word], 0)
+        )
+    elif word in words or _plausible_word(word):
+        score = WORD_CHAIN_BASE_SCORE
+    else:
+        return 0, f"{word} 不像是一个英文单词"
+    return score, f"接龙成功：{anchor} → {word}" if anchor else "接龙成功"
+
+
+def score_spot_error(text: str, entry: dict | None) -> tuple[int, str]:
+    """指出错误处并给出改正（“are → is”）10 分；写出改正后的整句 8 分；只指出错误处 4 分。
+
+    答案里每多出现一个句中的其他词（同时列出多个候选）扣 SPOT_ERROR_EXTRA_PENALTY 分。
+    """
+    answer = _normalize(text)
+    if not answer:
+        return 0, "未作答"
+    if entry is None:
+        return 0, "题目已失效"
+    error, correction = entry["error"].lower(), entry["correction"].lower()
+    corrected = _normalize(re.sub(_pattern(error), correction, entry["sentence"].lower(), count=1))
+    if answer.rstrip(".!?") == corrected.rstrip(".!?"):
+        return 8, f"改对了，错误在 “{entry['error']}”"
+
+    located = _find(answer, error)
+    if located is not None and _find(answer[located:], correction) is not None:
+        score, feedback = 10, "完全正确"
+    elif located is not None:
+        score, feedback = 4, f"找到了错误，应改为 “{entry['correction']}”"
+    else:
+        return 0, f"错误在 “{entry['error']}”，应改为 “{entry['correction']}”"
+
+    extra = _words(entry["sentence"]) & _words(answer) - _words(error) - _words(correction) - _SPOT_ERROR_FILLER
+    if extra:
+        score = max(score - SPOT_ERROR_EXTRA_PENALTY * len(extra), 0)
+        feedback = f"一次只能指出一处错误，错误在 “{entry['error']}”，应改为 “{entry['correction']}”"
+    return score, feedback
+
+
+def _normalize(text: str | None) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _pattern(phrase: str) -> str:
+    return rf"(?<![a-z']){re.escape(phrase)}(?![a-z'])"
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"[a-z]+(?:'[a-z]+)?", text.lower()))
+
+
+def _find(text: str, phrase: str) -> int | None:
+    """phrase 作为完整词（组）出现时，返回其结束位置。"""
+    match = re.search(_pattern(phrase), text)
+    return match.end() if match else None
+
+
+def score_round_locally(
+    mode: str, challenge: dict, rounds: list[dict], p1_input: str, p2_input: str, bank: RuleBank,
+) -> dict:
+    """按本地规则评一个回合，返回 p1/p2 得分和评语。"""
+    if mode == "word_chain":
+        used = {w for r in rounds for w in (_valid_word(r.get("p1_input")), _valid_word(r.get("p2_input"))) if w}
+        p1 = score_word_chain(p1_input, challenge.get("p1_anchor", ""), used, bank.words)
+        p2 = score_word_chain(p2_input, challenge.get("p2_anchor", ""), used, bank.words)
+    else:
+        entry = bank.spot_error(challenge)
+        p1 = score_spot_error(p1_input, entry)
+        p2 = score_spot_error(p2_input, entry)
+    return {"p1_score": p1[0], "p2_score": p2[0], "p1_feedback": p1[1], "p2_feedback": p2[1]}
+
+
+def ai_spot_error_answer(seed: int | str, round_no: int, entry: dict | None) -> str:
+    """AI 对手的找错作答：按 AI_SPOT_ERROR_ACCURACY 概率答对，否则猜句中另一个词。"""
+    rng = _rng(seed, round_no)
+    if entry is None:
+        return ""
+    if rng.random() < AI_SPOT_ERROR_ACCURACY:
+        return f"{entry['error']} → {entry['correction']}"
+    words = [w.strip(".,!?").lower() for w in entry["sentence"].split()]
+    candidates = [w for w in words if w and _find(entry["error"].lower(), w) is None] or words
+    return f"I think \"{rng.choice(candidates)}\" is wrong."
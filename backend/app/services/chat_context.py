@@ -0,0 +1,162 @@
+"""对话上下文窗口 — /chat/send 的历史由服务端按 CognitiveTurn 记录重建，不信任客户端传来的 history。
+
+- 最近 RECENT_MESSAGES 条消息原样保留，总量受 HISTORY_TOKEN_BUDGET 约束（超出时从最旧的丢起）
+- 窗口之外的消息折叠进滚动摘要，存在 CognitiveSession.context_json：
+  summary 为摘要文本，summarized_through 为已折叠到的最后一条 turn id
+- 折叠在回复结束后后台进行，窗口外攒够 FOLD_MIN_MESSAGES 条才调用一次模型
+- token 数在本地估算：CJK 字符每个约 1 token，其余字符约 4 个 1 token
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_session
+from app.models.cognitive import CognitiveSession, CognitiveTurn
+from app.services import cognitive_log
+from app.services.llm import chat_once
+from app.services.prompts import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RECENT_MESSAGES = 8
+HISTORY_TOKEN_BUDGET = 3000
+SUMMARY_TOKEN_BUDGET = 400
+FOLD_MIN_MESSAGES = 6
+# 折叠时每条消息最多取的字符数
+FOLD_MESSAGE_CHARS = 600
+
+SUMMARY_SYSTEM = """你负责为英语辅导对话维护一份滚动摘要，供导师在后续对话中参考。
+根据已有摘要和新增的对话，输出更新后的完整摘要（中文，不超过 300 字）：
+- 学生在学什么、问过哪些问题，当前进行到哪一步
+- 学生暴露出的错误、薄弱点和已经掌握的内容
+- 导师已经给过的提示，避免重复
+只输出摘要正文。"""
+
+# 正在进行的折叠任务：session_id -> 任务
+_folding: dict[int, asyncio.Task] = {}
+
+
+@dataclass
+class ChatContext:
+    summary: str
+    messages: list[dict]
+    next_turn_index: int
+    # 窗口之外、尚未折叠进摘要的消息数
+    unfolded: int
+
+
+@dataclass
+class _PendingTurn:
+    role: str
+    content: str
+    turn_index: int
+
+
+async def _load_turns(session_id: int, after_id: int, db: AsyncSession) -> list[CognitiveTurn]:
+    result = await db.execute(
+        select(CognitiveTurn)
+        .where(
+            CognitiveTurn.session_id == session_id,
+            CognitiveTurn.id > after_id,
+            CognitiveTurn.role.in_(("user", "assistant")),
+        )
+        .order_by(CognitiveTurn.id)
+    )
+    return list(result.scalars().all())
+
+
+async def build_context(session: CognitiveSession | None, db: AsyncSession) -> ChatContext:
+    """按会话记录重建发给模型的历史：滚动摘要 + 预算内的最近消息。session 为 None 表示新会话。"""
+    if session is None:
+        return ChatContext(summary="", messages=[], next_turn_index=1, unfolded=0)
+    state = session.context_json or {}
+    summary = state.get("summary") or ""
+    # 写入缓冲里还没提交的 turn 也算历史；先取快照再查库，按 id 去掉查询期间已提交的
+    pending = cognitive_log.pending_turns(session.id)
+    turns = await _load_turns(session.id, state.get("summarized_through", 0), db)
+    loaded = {t.id for t in turns}
+    turns += [
+        _PendingTurn(ref.values["role"], ref.values["content"], ref.values["turn_index"])
+        for ref in pending
+        if ref.id is None or ref.id not in loaded
+    ]
+
+    budget = HISTORY_TOKEN_BUDGET - estimate_tokens(summary)
+    kept: list = []
+    used = 0
+    for turn in reversed(turns[-RECENT_MESSAGES:]):
+        cost = estimate_tokens(turn.content)
+        if kept and used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+
+    last_index = turns[-1].turn_index if turns else state.get("summarized_turn_index", 0)
+    return ChatContext(
+        summary=summary,
+        messages=[{"role": t.role, "content": t.content} for t in kept],
+        next_turn_index=last_index + 1,
+        unfolded=max(len(turns) - RECENT_MESSAGES, 0),
+    )
+
+
+def with_summary(system_prompt: str, context: ChatContext) -> str:
+    if not context.summary:
+        return system_prompt
+    return f"{system_prompt}\n\n之前对话的摘要（更早的消息已省略）：\n{context.summary}"
+
+
+def schedule_fold(session_id: int, context: ChatContext, new_messages: int = 2):
+    """本轮新增 new_messages 条后，窗口外未折叠的消息够多时在后台更新摘要。"""
+    if context.unfolded + new_messages < FOLD_MIN_MESSAGES:
+        return
+    running = _folding.get(session_id)
+    if running and not running.done():
+        return
+    task = asyncio.create_task(_fold(session_id))
+    _folding[session_id] = task
+    task.add_done_callback(lambda t: _folding.pop(session_id, None) if _folding.get(session_id) is t else None)
+
+
+async def _fold(session_id: int):
+    try:
+        async with async_session() as db:
+            await fold_history(session_id, db)
+            await db.commit()
+    except Exception:
+        logger.exception("chat history fold failed for session %s", session_id)
+
+
+async def fold_history(session_id: int, db: AsyncSession) -> bool:
+    """把窗口之外的消息折叠进滚动摘要，返回是否更新了摘要。"""
+    result = await db.execute(select(CognitiveSession).where(CognitiveSession.id == session_id))
+    session = result.scalar_one_or_none()
+    if not session:
+        return False
+    state = session.context_json or {}
+    turns = await _load_turns(session_id, state.get("summarized_through", 0), db)
+    overflow = turns[:-RECENT_MESSAGES]
+    if len(overflow) < FOLD_MIN_MESSAGES:
+        return False
+
+    transcript = "\n".join(
+        f"{'学生' if t.role == 'user' else '导师'}：{t.content[:FOLD_MESSAGE_CHARS]}" for t in overflow
+    )
+    prompt = f"已有摘要：\n{state.get('summary') or '（无）'}\n\n新增对话：\n{transcript}"
+    summary = (await chat_once([{"role": "user", "content": prompt}], SUMMARY_SYSTEM)).strip()
+    # 模型没守字数时按预算截断
+    while summary and estimate_tokens(summary) > SUMMARY_TOKEN_BUDGET:
+        summary = summary[: int(len(summary) * 0.9)]
+
+    # 赋新 dict 以便 SQLAlchemy 检测到 JSON 列变化；保留其他键
+    session.context_json = {
+        **state,
+        "summary": summary,
+        "summarized_through": overflow[-1].id,
+        "summarized_turn_index": overflow[-1].turn_index,
+    }
+    await db.flush()
+    return True
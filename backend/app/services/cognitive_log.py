@@ -0,0 +1,208 @@
+"""认知日志写入缓冲 — 聊天热路径上的 turn / reflection / TQI 记录先进内存，批量写库。
+
+记录按 settings.cognitive_log_flush_ms 间隔（或攒满 MAX_BATCH 条）合并成每张表一条多行 INSERT，
+在独立会话里写入；reflection 引用的 turn id 在同一批次里由 INSERT ... RETURNING 回填。
+
+崩溃安全由 settings.cognitive_log_mode 控制：
+- durable（默认）：请求在响应结束前等待自己的记录落库，崩溃时只丢失进行中的请求
+  （与原先在流结束时才 commit 相同）
+- buffered：请求不等待，进程崩溃会丢失最近一个刷新间隔内的记录
+- sync：不走缓冲，在请求自己的事务里逐条写入
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import async_session
+from app.models.cognitive import CognitiveTurn, ReflectionEntry, TeachingQualityMetric
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 500
+
+
+@dataclass
+class TurnRef:
+    """缓冲中的 turn，落库后 id 才有值。"""
+
+    values: dict
+    id: int | None = None
+
+
+@dataclass
+class _Batch:
+    turns: list[TurnRef] = field(default_factory=list)
+    reflections: list[tuple[TurnRef | None, dict]] = field(default_factory=list)
+    metrics: list[dict] = field(default_factory=list)
+    done: asyncio.Future | None = None
+
+    def __len__(self) -> int:
+        return len(self.turns) + len(self.reflections) + len(self.metrics)
+
+
+class CognitiveLogBuffer:
+    def __init__(self, interval: float, max_batch: int = MAX_BATCH):
+        self.interval = interval
+        self.max_batch = max_batch
+        self._batch = _Batch()
+        self._timer: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        # 正在写入、尚未提交的批次
+        self._inflight: list[_Batch] = []
+
+    def log_turn(self, values: dict) -> TurnRef:
+        ref = TurnRef(values)
+        self._batch.turns.append(ref)
+        self._added()
+        return ref
+
+    def log_reflection(self, values: dict | None, turn: TurnRef | None = None):
+        if values is None:
+            return
+        self._batch.reflections.append((turn, values))
+        self._added()
+
+    def log_tqi(self, values: dict):
+        self._batch.metrics.append(values)
+        self._added()
+
+    def pending_turns(self, session_id: int) -> list[TurnRef]:
+        """某会话还没提交到数据库的 turn（按加入顺序），用于读取历史时补上写入延迟。"""
+        return [
+            ref
+            for batch in [*self._inflight, self._batch]
+            for ref in batch.turns
+            if ref.values["session_id"] == session_id
+        ]
+
+    def flushed(self) -> asyncio.Future:
+        """当前批次（含此前加入的全部记录）写入后完成的 Future；写入失败时带异常。"""
+        if self._batch.done is None:
+            self._batch.done = asyncio.get_running_loop().create_future()
+        return self._batch.done
+
+    def _added(self):
+        if len(self._batch) >= self.max_batch:
+            self._kick()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._kick)
+
+    def _kick(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, _Batch()
+        if not len(batch):
+            if batch.done is not None and not batch.done.done():
+                batch.done.set_result(None)
+            return
+        # 批次之间串行写入，保证 turn 的 id 顺序与加入顺序一致
+        self._inflight.append(batch)
+        async with self._lock:
+            try:
+                await _write(batch)
+            except Exception as exc:
+                logger.exception("cognitive log flush failed (%d records dropped)", len(batch))
+                if batch.done is not None and not batch.done.done():
+                    batch.done.set_exception(exc)
+                    # 没人等待时避免 "exception never retrieved" 警告
+                    batch.done.exception()
+                return
+            finally:
+                self._inflight.remove(batch)
+        if batch.done is not None and not batch.done.done():
+            batch.done.set_result(None)
+
+    async def stop(self):
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def _write(batch: _Batch):
+    async with async_session() as db:
+        if batch.turns:
+            result = await db.execute(
+                insert(CognitiveTurn).returning(CognitiveTurn.id, sort_by_parameter_order=True),
+                [t.values for t in batch.turns],
+            )
+            for ref, turn_id in zip(batch.turns, result.scalars().all()):
+                ref.id = turn_id
+        if batch.reflections:
+            await db.execute(
+                insert(ReflectionEntry),
+                [{**values, "turn_id": turn.id if turn else values.get("turn_id")} for turn, values in batch.reflections],
+            )
+        if batch.metrics:
+            await db.execute(insert(TeachingQualityMetric), batch.metrics)
+        await db.commit()
+
+
+async def record(
+    db: AsyncSession, turns: list[dict], reflection: dict | None = None, metric: dict | None = None,
+) -> asyncio.Future | None:
+    """按当前写入模式记录一组日志，reflection 关联 turns[0]（值由 cognitive_orchestrator 的 *_values 构造）。
+
+    sync 模式在 db 的事务里写入（由调用方提交），返回 None；
+    其他模式进缓冲，返回这批记录落库后完成的 Future。
+    """
+    if settings.cognitive_log_mode == "sync":
+        rows = [CognitiveTurn(**values) for values in turns]
+        db.add_all(rows)
+        await db.flush()
+        if reflection is not None:
+            db.add(ReflectionEntry(**{**reflection, "turn_id": rows[0].id if rows else reflection.get("turn_id")}))
+        if metric is not None:
+            db.add(TeachingQualityMetric(**metric))
+        await db.flush()
+        return None
+
+    buffer = get_buffer()
+    refs = [buffer.log_turn(values) for values in turns]
+    buffer.log_reflection(reflection, refs[0] if refs else None)
+    if metric is not None:
+        buffer.log_tqi(metric)
+    return buffer.flushed()
+
+
+async def wait_durable(*pending: asyncio.Future | None):
+    """durable 模式下等待记录落库（写入失败已记录日志，这里不再抛出）。"""
+    if settings.cognitive_log_mode != "durable":
+        return
+    futures = [f for f in pending if f is not None]
+    if futures:
+        await asyncio.gather(*futures, return_exceptions=True)
+
+
+_buffer: CognitiveLogBuffer | None = None
+
+
+def pending_turns(session_id: int) -> list[TurnRef]:
+    return _buffer.pending_turns(session_id) if _buffer is not None else []
+
+
+def get_buffer() -> CognitiveLogBuffer:
+    global _buffer
+    if _buffer is None:
+        _buffer = CognitiveLogBuffer(settings.cognitive_log_flush_ms / 1000)
+    return _buffer
+
+
+async def stop_buffer():
+    """进程退出前写出缓冲中剩余的记录。"""
+    global _buffer
+    if _buffer is not None:
+        await _buffer.stop()
+        _buffer = None
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import re
 from dataclasses import dataclass
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,19 +11,7 @@ from app.models.cognitive import (
     ReflectionEntry,
     TeachingQualityMetric,
 )
-
-DIRECT_ANSWER_PATTERNS = [
-    r"直接告诉我",
-    r"给我答案",
-    r"直接给答案",
-    r"只要答案",
-    r"不要解释",
-    r"不用解释",
-    r"tell me the answer",
-    r"just give me the answer",
-    r"answer only",
-    r"no explanation",
-]
+from app.services.text_analysis import reflection_quality, wants_direct_answer
 
 
 @dataclass
@@ -39,22 +26,12 @@ class GuidanceDecision:
 
 
 def detect_direct_answer_request(text: str) -> bool:
-    lowered = text.lower().strip()
-    return any(re.search(p, lowered) for p in DIRECT_ANSWER_PATTERNS)
+    return wants_direct_answer(text)
 
 
 def score_reflection_quality(reflection_text: str) -> float:
-    text = (reflection_text or "").strip()
-    if not text:
-        return 0.0
-
-    # 简单启发式：长度 + 逻辑连接词 + 自我修正表达
-    length_score = min(len(text) / 120.0, 1.0)
-    logic_hits = len(re.findall(r"(因为|所以|但是|因此|if|because|therefore|however)", text, flags=re.IGNORECASE))
-    logic_score = min(logic_hits / 3.0, 1.0)
-    self_check_hits = len(re.findall(r"(我认为|我不确定|可能|I think|I guess|not sure|maybe)", text, flags=re.IGNORECASE))
-    self_check_score = min(self_check_hits / 2.0, 1.0)
-    return round(length_score * 0.5 + logic_score * 0.3 + self_check_score * 0.2, 3)
+    # 简单启发式：长度 + 逻辑连接词 + 自我修正表达（见 app.services.text_analysis）
+    return reflection_quality(reflection_text)
 
 
 def to_mirror_level(tqi_score: float) -> str:
@@ -133,6 +110,13 @@ def decide_guidance(
     )
 
 
+async def find_session(user_id: int, session_id: int, db: AsyncSession) -> CognitiveSession | None:
+    result = await db.execute(
+        select(CognitiveSession).where(CognitiveSession.id == session_id, CognitiveSession.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
+
+
 async def get_or_create_session(
     user_id: int,
     db: AsyncSession,
@@ -141,10 +125,7 @@ async def get_or_create_session(
     session_id: int | None = None,
 ) -> CognitiveSession:
     if session_id:
-        result = await db.execute(
-            select(CognitiveSession).where(CognitiveSession.id == session_id, CognitiveSession.user_id == user_id)
-        )
-        session = result.scalar_one_or_none()
+        session = await find_session(user_id, session_id, db)
         if session:
             return session
 
@@ -159,6 +140,67 @@ async def get_or_create_session(
     return session
 
 
+def turn_values(
+    session_id: int,
+    content: str,
+    stage: str,
+    role: str,
+    turn_index: int = 0,
+    mirror_level: str | None = None,
+    zpd_band: str | None = None,
+    hint_used: bool = False,
+) -> dict:
+    return {
+        "session_id": session_id,
+        "turn_index": turn_index,
+        "stage": stage,
+        "role": role,
+        "content": content,
+        "mirror_level": mirror_level,
+        "zpd_band": zpd_band,
+        "hint_used": hint_used,
+    }
+
+
+def reflection_values(
+    user_id: int,
+    session_id: int,
+    reflection_text: str,
+    turn_id: int | None = None,
+    quality_score: float | None = None,
+) -> dict | None:
+    """反思为空时返回 None（不记录）。"""
+    text = reflection_text.strip()
+    if not text:
+        return None
+    return {
+        "user_id": user_id,
+        "session_id": session_id,
+        "turn_id": turn_id,
+        "reflection_text": text,
+        "quality_score": quality_score,
+    }
+
+
+def tqi_values(
+    user_id: int,
+    session_id: int | None,
+    tqi_score: float,
+    mirror_level: str | None,
+    details_json: dict | None = None,
+) -> dict:
+    return {
+        "user_id": user_id,
+        "session_id": session_id,
+        "tqi_score": tqi_score,
+        "coherence_score": tqi_score,
+        "evidence_score": tqi_score,
+        "clarity_score": tqi_score,
+        "mirror_level": mirror_level,
+        "details_json": details_json,
+    }
+
+
 async def log_user_turn(
     session_id: int,
     content: str,
@@ -169,16 +211,7 @@ async def log_user_turn(
     zpd_band: str | None = None,
     hint_used: bool = False,
 ):
-    turn = CognitiveTurn(
-        session_id=session_id,
-        turn_index=turn_index,
-        stage=stage,
-        role="user",
-        content=content,
-        mirror_level=mirror_level,
-        zpd_band=zpd_band,
-        hint_used=hint_used,
-    )
+    turn = CognitiveTurn(**turn_values(session_id, content, stage, "user", turn_index, mirror_level, zpd_band, hint_used))
     db.add(turn)
     await db.flush()
     return turn
@@ -193,16 +226,7 @@ async def log_assistant_turn(
     mirror_level: str | None = None,
     zpd_band: str | None = None,
 ):
-    turn = CognitiveTurn(
-        session_id=session_id,
-        turn_index=turn_index,
-        stage=stage,
-        role="assistant",
-        content=content,
-        mirror_level=mirror_level,
-        zpd_band=zpd_band,
-        hint_used=False,
-    )
+    turn = CognitiveTurn(**turn_values(session_id, content, stage, "assistant", turn_index, mirror_level, zpd_band))
     db.add(turn)
     await db.flush()
     return turn
@@ -216,16 +240,10 @@ async def log_reflection(
     turn_id: int | None = None,
     quality_score: float | None = None,
 ):
-    text = reflection_text.strip()
-    if not text:
+    values = reflection_values(user_id, session_id, reflection_text, turn_id, quality_score)
+    if values is None:
         return None
-    entry = ReflectionEntry(
-        user_id=user_id,
-        session_id=session_id,
-        turn_id=turn_id,
-        reflection_text=text,
-        quality_score=quality_score,
-    )
+    entry = ReflectionEntry(**values)
     db.add(entry)
     await db.flush()
     return entry
@@ -239,16 +257,7 @@ async def log_tqi_metric(
     db: AsyncSession,
     details_json: dict | None = None,
 ):
-    metric = TeachingQualityMetric(
-        user_id=user_id,
-        session_id=session_id,
-        tqi_score=tqi_score,
-        coherence_score=tqi_score,
-        evidence_score=tqi_score,
-        clarity_score=tqi_score,
-        mirror_level=mirror_level,
-        details_json=details_json,
-    )
+    metric = TeachingQualityMetric(**tqi_values(user_id, session_id, tqi_score, mirror_level, details_json))
     db.add(metric)
     await db.flush()
     return metric
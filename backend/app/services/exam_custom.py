@@ -1,10 +1,12 @@
 """AI 出题官服务 — 学生自定义 LLM 出题。"""
 
-import json
+from collections.abc import AsyncIterator
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import CustomQuizSession, ExamProfile
-from app.services.llm import chat_once_json
+from app.services import prompts
+from app.services.llm import chat_once_json, chat_stream_json
+from app.utils import json_codec
 
 
 SECTION_NAMES = {
@@ -15,41 +17,88 @@ SECTION_NAMES = {
 
 async def generate_custom_quiz(user_id: int, user_prompt: str, db: AsyncSession) -> dict:
     """根据用户描述生成自定义题目。"""
+    exam_type = await _exam_type(user_id, db)
+    try:
+        result = await chat_once_json(system_prompt=_quiz_system(exam_type), user_prompt=user_prompt)
+    except Exception:
+        return {"error": "题目生成失败，请稍后重试"}
+
+    return await _save_quiz(
+        user_id, exam_type, user_prompt,
+        result.get("section", "mixed"), result.get("difficulty", 3), result.get("questions", []), db,
+    )
+
+
+async def stream_custom_quiz(user_id: int, user_prompt: str, db: AsyncSession) -> AsyncIterator[dict]:
+    """流式版 generate_custom_quiz，依次 yield：
+
+    - {"type": "question", "index", "question"}：每道题生成完整后立即推送
+    - {"type": "quiz", ...}：全部生成完并落库后的结果（同 generate_custom_quiz）
+    - {"type": "error", "error"}：一道完整的题都没生成出来
+    """
+    exam_type = await _exam_type(user_id, db)
+    result: dict = {}
+    questions: list[dict] = []
+    try:
+        async for kind, path, value in chat_stream_json(_quiz_system(exam_type), user_prompt):
+            if kind != "value":
+                continue
+            if len(path) == 2 and path[0] == "questions" and isinstance(value, dict):
+                questions.append(value)
+                yield {"type": "question", "index": len(questions) - 1, "question": value}
+            elif len(path) == 1:
+                result[path[0]] = value
+    except Exception:
+        pass
+    # 输出中断时只保留已经完整的题目
+    if not questions:
+        yield {"type": "error", "error": "题目生成失败，请稍后重试"}
+        return
+
+    quiz = await _save_quiz(
+        user_id, exam_type, user_prompt,
+        result.get("section", "mixed"), result.get("difficulty", 3), questions, db,
+    )
+    yield {"type": "quiz", **quiz}
+
+
+async def _exam_type(user_id: int, db: AsyncSession) -> str:
     profile_result = await db.execute(
         select(ExamProfile).where(ExamProfile.user_id == user_id)
     )
     profile = profile_result.scalar_one_or_none()
-    exam_type = profile.exam_type if profile else "zhongkao"
-    exam_label = "高考" if exam_type == "gaokao" else "中考"
+    return profile.exam_type if profile else "zhongkao"
+
+
+# 考试类型放在最后，中考/高考共用同一段静态前缀
+# section / difficulty 放在 questions 之前，流式生成时先到达
+QUIZ_SYSTEM = prompts.register(
+    "exam.custom_quiz",
+    "你是一个英语出题专家。根据学生的要求生成练习题，质量对标真题。\n"
+    "返回 JSON：{{\"section\": \"题型（reading/cloze/grammar_fill/error_correction/writing/mixed）\", "
+    "\"difficulty\": 1-5的难度, \"questions\": ["
+    "{{\"question\": \"题目内容（如果是阅读理解，包含文章）\", "
+    "\"options\": [\"A. ...\", \"B. ...\", \"C. ...\", \"D. ...\"], "
+    "\"answer\": \"正确答案\", \"explanation\": \"解析\"}}]}}\n"
+    "如果学生没有指定题数，默认生成 5 道题。",
+    "\n考试类型：{exam_label}，请确保题目格式和难度符合{exam_label}标准。",
+)
 
-    try:
-        result = await chat_once_json(
-            system_prompt=(
-                f"你是一个{exam_label}英语出题专家。根据学生的要求生成练习题，质量对标真题。\n"
-                "返回 JSON：{\"section\": \"题型（reading/cloze/grammar_fill/error_correction/writing/mixed）\", "
-                "\"difficulty\": 1-5的难度, \"questions\": ["
-                "{\"question\": \"题目内容（如果是阅读理解，包含文章）\", "
-                "\"options\": [\"A. ...\", \"B. ...\", \"C. ...\", \"D. ...\"], "
-                "\"answer\": \"正确答案\", \"explanation\": \"解析\"}]}\n"
-                f"考试类型：{exam_label}，请确保题目格式和难度符合{exam_label}标准。\n"
-                "如果学生没有指定题数，默认生成 5 道题。"
-            ),
-            user_prompt=user_prompt,
-        )
-    except Exception:
-        return {"error": "题目生成失败，请稍后重试"}
 
-    questions = result.get("questions", [])
-    section = result.get("section", "mixed")
-    difficulty = result.get("difficulty", 3)
+def _quiz_system(exam_type: str) -> str:
+    return QUIZ_SYSTEM.render(exam_label="高考" if exam_type == "gaokao" else "中考")
 
+
+async def _save_quiz(
+    user_id: int, exam_type: str, user_prompt: str, section: str, difficulty, questions: list, db: AsyncSession
+) -> dict:
     session = CustomQuizSession(
         user_id=user_id,
         exam_type=exam_type,
         user_prompt=user_prompt,
         section=section,
         difficulty=difficulty,
-        generated_questions_json=json.dumps(questions, ensure_ascii=False),
+        generated_questions_json=json_codec.dumps(questions),
         total_questions=len(questions),
     )
     db.add(session)
@@ -78,7 +127,7 @@ async def submit_custom_quiz(
     if not session:
         return {"error": "session not found"}
 
-    questions = json.loads(session.generated_questions_json or "[]")
+    questions = json_codec.loads(session.generated_questions_json or "[]")
     correct_count = 0
     feedback = []
 
@@ -101,9 +150,9 @@ async def submit_custom_quiz(
             "explanation": q.get("explanation", ""),
         })
 
-    session.answers_json = json.dumps(answers, ensure_ascii=False)
+    session.answers_json = json_codec.dumps(answers)
     session.score = correct_count
-    session.feedback_json = json.dumps(feedback, ensure_ascii=False)
+    session.feedback_json = json_codec.dumps(feedback)
     session.status = "completed"
     await db.flush()
 
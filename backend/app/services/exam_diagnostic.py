@@ -1,6 +1,5 @@
 """诊断测试服务 — 从题库抽取诊断题 + 深度分析 + 冲刺计划。"""
 
-import json
 import datetime
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,6 +8,7 @@ from app.models.exam import (
     ExamQuestion,
 )
 from app.services.llm import chat_once_json, judge_answer
+from app.utils import json_codec
 
 SECTION_LABELS = {
     "listening": "听力理解",
@@ -43,7 +43,7 @@ async def start_diagnostic(user_id: int, exam_type: str, db: AsyncSession) -> di
         user_id=user_id,
         exam_type=exam_type,
         status="in_progress",
-        questions_json=json.dumps(questions, ensure_ascii=False),
+        questions_json=json_codec.dumps(questions),
     )
     db.add(session)
     await db.flush()
@@ -71,7 +71,7 @@ async def _questions_from_bank(
             questions.append({
                 "section": sec,
                 "question": q.content,
-                "options": json.loads(q.options_json) if q.options_json else [],
+                "options": json_codec.loads(q.options_json) if q.options_json else [],
                 "answer": q.answer,
                 "explanation": q.explanation,
                 "difficulty": q.difficulty,
@@ -114,7 +114,7 @@ async def _questions_from_llm(
 {{"section": "题型", "question": "题目内容", "options": ["A. ...", "B. ...", "C. ...", "D. ..."], "answer": "正确答案", "difficulty": 1-5, "knowledge_point_id": 知识点ID}}
 对于书面表达，options 为空数组，answer 为评分要点。"""
 
-    user_prompt = f"知识点列表：\n{json.dumps(kp_summary, ensure_ascii=False)}\n\n请生成诊断测试题。"
+    user_prompt = f"知识点列表：\n{json_codec.dumps(kp_summary)}\n\n请生成诊断测试题。"
 
     try:
         questions = await chat_once_json(system_prompt, user_prompt)
@@ -137,7 +137,7 @@ async def submit_diagnostic(session_id: int, answers: list[dict], user_id: int,
     if session.status == "completed":
         return {"error": "诊断已完成"}
 
-    questions = json.loads(session.questions_json) if session.questions_json else []
+    questions = json_codec.loads(session.questions_json) if session.questions_json else []
 
     # 批改
     total_score = 0
@@ -223,9 +223,9 @@ async def submit_diagnostic(session_id: int, answers: list[dict], user_id: int,
     analysis_prompt = f"""你是一位资深英语教师，专门辅导中国学生备考{exam_label}。
 根据学生的诊断测试结果，生成详细的分析报告。
 
-学生答题数据：{json.dumps(result_data, ensure_ascii=False)}
+学生答题数据：{json_codec.dumps(result_data)}
 题目详情：{session.questions_json}
-学生答案：{json.dumps(graded_answers, ensure_ascii=False)}
+学生答案：{json_codec.dumps(graded_answers)}
 
 请分析：
 1. 各题型得分率和薄弱环节
@@ -258,9 +258,9 @@ async def submit_diagnostic(session_id: int, answers: list[dict], user_id: int,
     if profile:
         profile.current_estimated_score = estimated
 
-    session.answers_json = json.dumps(graded_answers, ensure_ascii=False)
-    session.result_json = json.dumps(result_data, ensure_ascii=False)
-    session.ai_analysis_json = json.dumps(ai_analysis, ensure_ascii=False)
+    session.answers_json = json_codec.dumps(graded_answers)
+    session.result_json = json_codec.dumps(result_data)
+    session.ai_analysis_json = json_codec.dumps(ai_analysis)
     session.status = "completed"
     session.completed_at = datetime.datetime.now(datetime.timezone.utc)
     await db.flush()
@@ -284,10 +284,10 @@ async def get_diagnostic_result(session_id: int, user_id: int, db: AsyncSession)
         "id": session.id,
         "exam_type": session.exam_type,
         "status": session.status,
-        "questions_json": json.loads(session.questions_json) if session.questions_json else None,
-        "answers_json": json.loads(session.answers_json) if session.answers_json else None,
-        "result_json": json.loads(session.result_json) if session.result_json else None,
-        "ai_analysis_json": json.loads(session.ai_analysis_json) if session.ai_analysis_json else None,
+        "questions_json": json_codec.loads(session.questions_json) if session.questions_json else None,
+        "answers_json": json_codec.loads(session.answers_json) if session.answers_json else None,
+        "result_json": json_codec.loads(session.result_json) if session.result_json else None,
+        "ai_analysis_json": json_codec.loads(session.ai_analysis_json) if session.ai_analysis_json else None,
     }
 
 
@@ -303,8 +303,8 @@ async def generate_plan(session_id: int, user_id: int, db: AsyncSession) -> dict
     if session.status != "completed":
         return {"error": "请先完成诊断测试"}
 
-    result_data = json.loads(session.result_json) if session.result_json else {}
-    ai_analysis = json.loads(session.ai_analysis_json) if session.ai_analysis_json else {}
+    result_data = json_codec.loads(session.result_json) if session.result_json else {}
+    ai_analysis = json_codec.loads(session.ai_analysis_json) if session.ai_analysis_json else {}
 
     # 获取用户档案
     profile_result = await db.execute(
@@ -319,8 +319,8 @@ async def generate_plan(session_id: int, user_id: int, db: AsyncSession) -> dict
     plan_prompt = f"""你是一位资深英语教师，专门辅导中国学生备考{exam_label}。
 根据学生的诊断结果，生成个性化的冲刺复习计划。
 
-诊断结果：{json.dumps(result_data, ensure_ascii=False)}
-AI 分析：{json.dumps(ai_analysis, ensure_ascii=False)}
+诊断结果：{json_codec.dumps(result_data)}
+AI 分析：{json_codec.dumps(ai_analysis)}
 目标分数：{target_score}
 考试日期：{exam_date}
 
@@ -350,7 +350,7 @@ AI 分析：{json.dumps(ai_analysis, ensure_ascii=False)}
 
     # 保存到用户档案
     if profile:
-        profile.plan_json = json.dumps(plan, ensure_ascii=False)
+        profile.plan_json = json_codec.dumps(plan)
         await db.flush()
 
     return {"session_id": session_id, "plan": plan}
@@ -379,7 +379,10 @@ async def _update_mastery(user_id: int, kp_id: int, is_correct: bool, db: AsyncS
         alpha = 0.3
         new_val = mastery.mastery_level * (1 - alpha) + (1.0 if is_correct else 0.0) * alpha
         if mastery.last_practiced_at:
-            days_since = (now - mastery.last_practiced_at).days
+            last = mastery.last_practiced_at
+            if last.tzinfo is None:  # SQLite 读回的时间不带时区
+                last = last.replace(tzinfo=datetime.timezone.utc)
+            days_since = (now - last).days
             decay = max(0.9, 1.0 - days_since * 0.01)
             new_val *= decay
         mastery.mastery_level = min(1.0, max(0.0, new_val))
@@ -1,11 +1,11 @@
 """错题基因服务 — AI 错误模式分析与修复。"""
 
-import json
 import datetime
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import ErrorGene, MockExam, DiagnosticSession
 from app.services.llm import chat_once_json
+from app.utils import json_codec
 
 
 async def analyze_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
@@ -20,8 +20,8 @@ async def analyze_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
         .limit(10)
     )
     for mock in mock_result.scalars().all():
-        sections = json.loads(mock.sections_json) if mock.sections_json else []
-        answers = json.loads(mock.answers_json) if mock.answers_json else []
+        sections = json_codec.loads(mock.sections_json) if mock.sections_json else []
+        answers = json_codec.loads(mock.answers_json) if mock.answers_json else []
         answer_map = {a.get("question_id"): a for a in answers}
         for sec in sections:
             for q in sec.get("questions", []):
@@ -43,8 +43,8 @@ async def analyze_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
         .limit(3)
     )
     for diag in diag_result.scalars().all():
-        questions = json.loads(diag.questions_json) if diag.questions_json else []
-        answers = json.loads(diag.answers_json) if diag.answers_json else []
+        questions = json_codec.loads(diag.questions_json) if diag.questions_json else []
+        answers = json_codec.loads(diag.answers_json) if diag.answers_json else []
         for i, q in enumerate(questions):
             if i < len(answers) and not answers[i].get("is_correct", True):
                 error_summaries.append({
@@ -58,7 +58,7 @@ async def analyze_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
     if len(error_summaries) < 3:
         return []
 
-    summary_text = json.dumps(error_summaries[:30], ensure_ascii=False)
+    summary_text = json_codec.dumps(error_summaries[:30])
 
     try:
         result = await chat_once_json(
@@ -94,7 +94,7 @@ async def analyze_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
 
         if gene:
             # 更新已有基因
-            gene.example_ids_json = json.dumps(g.get("example_ids", []))
+            gene.example_ids_json = json_codec.dumps(g.get("example_ids", []))
             gene.updated_at = datetime.datetime.now(datetime.timezone.utc)
         else:
             gene = ErrorGene(
@@ -102,7 +102,7 @@ async def analyze_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
                 pattern_key=pattern_key,
                 pattern_description=g.get("pattern_description", ""),
                 section=g.get("section", "unknown"),
-                example_ids_json=json.dumps(g.get("example_ids", [])),
+                example_ids_json=json_codec.dumps(g.get("example_ids", [])),
             )
             db.add(gene)
 
@@ -135,10 +135,10 @@ async def get_error_genes(user_id: int, db: AsyncSession) -> list[dict]:
             "pattern_description": g.pattern_description,
             "section": g.section,
             "status": g.status,
-            "example_ids": json.loads(g.example_ids_json) if g.example_ids_json else [],
+            "example_ids": json_codec.loads(g.example_ids_json) if g.example_ids_json else [],
             "fix_attempts": g.fix_attempts,
             "fix_correct": g.fix_correct,
-            "fix_exercises": json.loads(g.fix_exercises_json) if g.fix_exercises_json else None,
+            "fix_exercises": json_codec.loads(g.fix_exercises_json) if g.fix_exercises_json else None,
             "created_at": g.created_at.isoformat() if g.created_at else None,
         }
         for g in genes
@@ -167,7 +167,7 @@ async def generate_fix_drill(user_id: int, gene_id: int, db: AsyncSession) -> di
     except Exception:
         return {"error": "生成练习失败，请稍后重试"}
 
-    gene.fix_exercises_json = json.dumps(exercises.get("exercises", []), ensure_ascii=False)
+    gene.fix_exercises_json = json_codec.dumps(exercises.get("exercises", []))
     gene.status = "improving"
     await db.flush()
 
@@ -189,7 +189,7 @@ async def submit_fix_answer(
     if not gene or not gene.fix_exercises_json:
         return {"error": "gene or exercises not found"}
 
-    exercises = json.loads(gene.fix_exercises_json)
+    exercises = json_codec.loads(gene.fix_exercises_json)
     if exercise_index < 0 or exercise_index >= len(exercises):
         return {"error": "invalid exercise index"}
 
@@ -1,23 +1,14 @@
 """心流刷题服务 — 沉浸式连击刷题模式。"""
 
-import json
 import datetime
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import FlowSession, ExamQuestion, ExamProfile, ExamKnowledgePoint, KnowledgeMastery
+from app.services.adaptive import (
+    BANK_EXAM, get_ability, get_exam_item_bank, prior_item_params, record_response, theta_to_difficulty,
+)
 from app.services.llm import judge_answer
-
-
-def _streak_to_difficulty(streak: int) -> int:
-    """连击数映射到难度：越高越难。"""
-    if streak < 3:
-        return 2
-    elif streak < 7:
-        return 3
-    elif streak < 15:
-        return 4
-    else:
-        return 5
+from app.utils import json_codec
 
 
 async def start_flow(user_id: int, section: str, db: AsyncSession) -> dict:
@@ -27,23 +18,25 @@ async def start_flow(user_id: int, section: str, db: AsyncSession) -> dict:
     )
     profile = profile_result.scalar_one_or_none()
     exam_type = profile.exam_type if profile else "zhongkao"
+    theta, _ = await get_ability(user_id, BANK_EXAM, db)
+    difficulty = theta_to_difficulty(theta)
 
     session = FlowSession(
         user_id=user_id,
         exam_type=exam_type,
         section=section,
-        current_difficulty=2,
+        current_difficulty=difficulty,
         difficulty_curve_json="[]",
     )
     db.add(session)
     await db.flush()
 
-    question = await _pick_question(user_id, exam_type, section, 2, db)
+    question = await _pick_question(exam_type, section, theta, [], db)
 
     return {
         "session_id": session.id,
         "streak": 0,
-        "difficulty": 2,
+        "difficulty": difficulty,
         "question": question,
     }
 
@@ -93,14 +86,17 @@ async def submit_flow_answer(
     else:
         session.current_streak = 0
 
-    # 更新难度
-    new_difficulty = _streak_to_difficulty(session.current_streak)
+    # IRT 在线更新能力值，难度跟随能力估计
+    bank = await get_exam_item_bank(session.exam_type, session.section, db)
+    params = bank.params(question.id) or prior_item_params(question.difficulty, bool(question.options_json))
+    ability = await record_response(user_id, BANK_EXAM, params, is_correct, db)
+    new_difficulty = theta_to_difficulty(ability.theta)
     session.current_difficulty = new_difficulty
 
     # 记录难度曲线
-    curve = json.loads(session.difficulty_curve_json or "[]")
-    curve.append({"q": session.total_questions, "d": new_difficulty, "correct": is_correct})
-    session.difficulty_curve_json = json.dumps(curve)
+    curve = json_codec.loads(session.difficulty_curve_json or "[]")
+    curve.append({"q": session.total_questions, "d": new_difficulty, "correct": is_correct, "qid": question.id})
+    session.difficulty_curve_json = json_codec.dumps(curve)
 
     # 更新平均响应时间
     if session.total_questions == 1:
@@ -127,8 +123,9 @@ async def submit_flow_answer(
 
     await db.flush()
 
-    # 获取下一题
-    next_question = await _pick_question(user_id, session.exam_type, session.section, new_difficulty, db)
+    # 获取下一题（本 session 已做过的题不再出现）
+    seen_ids = [c["qid"] for c in curve if "qid" in c]
+    next_question = await _pick_question(session.exam_type, session.section, ability.theta, seen_ids, db)
 
     return {
         "is_correct": is_correct,
@@ -170,7 +167,7 @@ async def end_flow(user_id: int, session_id: int, db: AsyncSession) -> dict:
         "avg_response_ms": session.avg_response_ms,
         "xp_earned": session.xp_earned,
         "duration_seconds": duration_seconds,
-        "difficulty_curve": json.loads(session.difficulty_curve_json or "[]"),
+        "difficulty_curve": json_codec.loads(session.difficulty_curve_json or "[]"),
     }
 
 
@@ -197,35 +194,21 @@ async def get_flow_history(user_id: int, db: AsyncSession) -> list[dict]:
 
 
 async def _pick_question(
-    user_id: int, exam_type: str, section: str, difficulty: int, db: AsyncSession
+    exam_type: str, section: str, theta: float, exclude_ids: list[int], db: AsyncSession
 ) -> dict | None:
-    """根据难度选一道题。"""
-    result = await db.execute(
-        select(ExamQuestion)
-        .where(
-            ExamQuestion.exam_type == exam_type,
-            ExamQuestion.section == section,
-            ExamQuestion.difficulty.between(max(1, difficulty - 1), min(5, difficulty + 1)),
-        )
-        .order_by(func.random())
-        .limit(1)
-    )
+    """在当前能力值处选信息量最大的题；题目都做过一遍后允许重复。"""
+    bank = await get_exam_item_bank(exam_type, section, db)
+    picked = bank.select(theta, k=1, exclude_ids=exclude_ids) or bank.select(theta, k=1)
+    if not picked:
+        return None
+    result = await db.execute(select(ExamQuestion).where(ExamQuestion.id == picked[0]))
     q = result.scalar_one_or_none()
-    if not q:
-        # fallback: any question in this section
-        result = await db.execute(
-            select(ExamQuestion)
-            .where(ExamQuestion.exam_type == exam_type, ExamQuestion.section == section)
-            .order_by(func.random())
-            .limit(1)
-        )
-        q = result.scalar_one_or_none()
     if not q:
         return None
     return {
         "id": q.id,
         "content": q.content,
-        "options": json.loads(q.options_json) if q.options_json else [],
+        "options": json_codec.loads(q.options_json) if q.options_json else [],
         "passage_text": q.passage_text,
         "difficulty": q.difficulty,
     }
@@ -1,12 +1,13 @@
 """模考服务 — 组卷（passage_group 选题）+ 批改 + AI 报告。"""
 
-import json
 import datetime
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import MockExam, ExamQuestion, ExamProfile
+from app.services.adaptive import BANK_EXAM, get_exam_item_bank, prior_item_params, record_responses
 from app.services.cognitive_orchestrator import score_reflection_quality
 from app.services.llm import chat_once_json, judge_answer
+from app.utils import json_codec
 
 # 新高考全国卷 (gaokao) — 150分, 120分钟（去掉听力后 120分, ~100分钟）
 GAOKAO_STRUCTURE = {
@@ -100,17 +101,47 @@ async def _pick_individual_questions(
 
 
 def _format_question(q: ExamQuestion) -> dict:
+    """题目输出格式。passage_text 由所在 passage_group 统一携带，不在每道题上重复。"""
     return {
         "id": q.id,
         "content": q.content,
-        "options": json.loads(q.options_json) if q.options_json else [],
-        "passage_text": q.passage_text,
+        "options": json_codec.loads(q.options_json) if q.options_json else [],
         "difficulty": q.difficulty,
         "passage_group": q.passage_group,
         "passage_index": q.passage_index,
     }
 
 
+def _build_passage_groups(questions: list[ExamQuestion]) -> list[dict]:
+    """按 passage_group 连续分组，每组只保存一份篇章原文和组内题目 id。"""
+    passage_groups: list[dict] = []
+    current_group = None
+    for q in questions:
+        if passage_groups and q.passage_group and q.passage_group == current_group:
+            passage_groups[-1]["question_ids"].append(q.id)
+        else:
+            current_group = q.passage_group
+            passage_groups.append({
+                "group_id": current_group,
+                "passage_text": q.passage_text,
+                "question_ids": [q.id],
+            })
+    return passage_groups
+
+
+def _normalize_sections(sections: list[dict]) -> list[dict]:
+    """旧版模考的 passage_groups 是 {group_id, questions: [完整题目]}，读出时转换成
+    {group_id, passage_text, question_ids}，客户端只需处理新格式。"""
+    for sec in sections:
+        for group in sec.get("passage_groups") or []:
+            if "question_ids" in group:
+                continue
+            legacy = group.pop("questions", None) or []
+            group["question_ids"] = [q["id"] for q in legacy]
+            group["passage_text"] = next((q.get("passage_text") for q in legacy if q.get("passage_text")), None)
+    return sections
+
+
 async def start_mock(user_id: int, exam_type: str | None, db: AsyncSession) -> dict:
     """组卷并开始模考。reading/cloze 按 passage_group 整组选取。"""
     if not exam_type:
@@ -148,27 +179,6 @@ async def start_mock(user_id: int, exam_type: str | None, db: AsyncSession) -> d
         # 截断到目标数量
         questions = questions[:count]
 
-        # 按 passage_group 分组输出
-        passage_groups = []
-        current_group = None
-        current_group_questions = []
-        for q in questions:
-            if q.passage_group and q.passage_group == current_group:
-                current_group_questions.append(_format_question(q))
-            else:
-                if current_group_questions:
-                    passage_groups.append({
-                        "group_id": current_group,
-                        "questions": current_group_questions,
-                    })
-                current_group = q.passage_group
-                current_group_questions = [_format_question(q)]
-        if current_group_questions:
-            passage_groups.append({
-                "group_id": current_group,
-                "questions": current_group_questions,
-            })
-
         sections_data.append({
             "section": section,
             "label": SECTION_LABELS.get(section, section),
@@ -179,7 +189,7 @@ async def start_mock(user_id: int, exam_type: str | None, db: AsyncSession) -> d
             "section_num": cfg.get("section_num"),
             "instruction": cfg.get("instruction", ""),
             "per_score": cfg.get("per_score"),
-            "passage_groups": passage_groups,
+            "passage_groups": _build_passage_groups(questions),
             "questions": [_format_question(q) for q in questions],
         })
 
@@ -187,7 +197,7 @@ async def start_mock(user_id: int, exam_type: str | None, db: AsyncSession) -> d
         user_id=user_id,
         exam_type=exam_type,
         time_limit_minutes=time_limit,
-        sections_json=json.dumps(sections_data, ensure_ascii=False),
+        sections_json=json_codec.dumps(sections_data),
     )
     db.add(mock)
     await db.flush()
@@ -209,7 +219,7 @@ async def submit_mock(user_id: int, mock_id: int, answers: list[dict], db: Async
     if not mock or mock.status != "in_progress":
         return {"error": "模考不存在或已完成"}
 
-    sections = json.loads(mock.sections_json)
+    sections = json_codec.loads(mock.sections_json)
     answer_payload_map = {a["question_id"]: a for a in answers}
     answer_map = {qid: payload.get("answer", "") for qid, payload in answer_payload_map.items()}
 
@@ -217,9 +227,12 @@ async def submit_mock(user_id: int, mock_id: int, answers: list[dict], db: Async
     total_score = 0
     max_score = 0
     graded_answers = []
+    irt_params: list[tuple[float, float, float]] = []
+    irt_correct: list[bool] = []
 
     for sec in sections:
         section_name = sec["section"]
+        item_bank = await get_exam_item_bank(mock.exam_type, section_name, db)
         sec_score = 0
         sec_max = sec["score"]
         max_score += sec_max
@@ -244,6 +257,11 @@ async def submit_mock(user_id: int, mock_id: int, answers: list[dict], db: Async
 
             earned = per_q_score if is_correct else 0
             sec_score += earned
+            if student_answer:
+                irt_params.append(
+                    item_bank.params(qid) or prior_item_params(question.difficulty, bool(question.options_json))
+                )
+                irt_correct.append(is_correct)
 
             graded_answers.append({
                 "question_id": qid,
@@ -269,6 +287,9 @@ async def submit_mock(user_id: int, mock_id: int, answers: list[dict], db: Async
         }
         total_score += sec_score
 
+    # 整张试卷一次性更新 IRT 能力值
+    await record_responses(user_id, BANK_EXAM, irt_params, irt_correct, db)
+
     score_data = {
         "total": round(total_score, 1),
         "max": max_score,
@@ -298,9 +319,9 @@ async def submit_mock(user_id: int, mock_id: int, answers: list[dict], db: Async
     ai_report["review_progress"] = {"completed": 0, "total": len(review_tasks), "rate": 0.0}
 
     mock.status = "completed"
-    mock.answers_json = json.dumps(graded_answers, ensure_ascii=False)
-    mock.score_json = json.dumps(score_data, ensure_ascii=False)
-    mock.ai_report_json = json.dumps(ai_report, ensure_ascii=False)
+    mock.answers_json = json_codec.dumps(graded_answers)
+    mock.score_json = json_codec.dumps(score_data)
+    mock.ai_report_json = json_codec.dumps(ai_report)
     mock.completed_at = datetime.datetime.now(datetime.timezone.utc)
     await db.flush()
 
@@ -434,7 +455,7 @@ async def submit_mock_review(
     if not reflection:
         return {"error": "复盘内容不能为空"}
 
-    graded_answers = json.loads(mock.answers_json) if mock.answers_json else []
+    graded_answers = json_codec.loads(mock.answers_json) if mock.answers_json else []
     target = next((a for a in graded_answers if a.get("question_id") == question_id), None)
     if not target:
         return {"error": "题目不存在"}
@@ -444,7 +465,7 @@ async def submit_mock_review(
     quality = score_reflection_quality(reflection)
     feedback = await _generate_review_feedback(target, reflection, quality)
 
-    report = json.loads(mock.ai_report_json) if mock.ai_report_json else {}
+    report = json_codec.loads(mock.ai_report_json) if mock.ai_report_json else {}
     if not isinstance(report, dict):
         report = {}
 
@@ -474,7 +495,7 @@ async def submit_mock_review(
             "rate": round(completed / max(total, 1), 2),
         }
 
-    mock.ai_report_json = json.dumps(report, ensure_ascii=False)
+    mock.ai_report_json = json_codec.dumps(report)
     await db.flush()
 
     return {
@@ -535,10 +556,10 @@ async def get_mock_result(user_id: int, mock_id: int, db: AsyncSession) -> dict
     return {
         "id": mock.id, "exam_type": mock.exam_type, "status": mock.status,
         "time_limit_minutes": mock.time_limit_minutes,
-        "sections_json": json.loads(mock.sections_json) if mock.sections_json else None,
-        "answers_json": json.loads(mock.answers_json) if mock.answers_json else None,
-        "score_json": json.loads(mock.score_json) if mock.score_json else None,
-        "ai_report_json": json.loads(mock.ai_report_json) if mock.ai_report_json else None,
+        "sections_json": _normalize_sections(json_codec.loads(mock.sections_json)) if mock.sections_json else None,
+        "answers_json": json_codec.loads(mock.answers_json) if mock.answers_json else None,
+        "score_json": json_codec.loads(mock.score_json) if mock.score_json else None,
+        "ai_report_json": json_codec.loads(mock.ai_report_json) if mock.ai_report_json else None,
         "started_at": mock.started_at.isoformat() if mock.started_at else "",
         "completed_at": mock.completed_at.isoformat() if mock.completed_at else None,
     }
@@ -553,7 +574,7 @@ async def get_mock_history(user_id: int, db: AsyncSession) -> list[dict]:
     )
     mocks = []
     for m in result.scalars().all():
-        score = json.loads(m.score_json) if m.score_json else None
+        score = json_codec.loads(m.score_json) if m.score_json else None
         mocks.append({
             "id": m.id, "exam_type": m.exam_type, "status": m.status,
             "total_score": score["total"] if score else None,
@@ -1,6 +1,5 @@
 """分数预测服务 — 多维数据预测 + 周报。"""
 
-import json
 import datetime
 from sqlalchemy import select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +7,7 @@ from app.models.exam import (
     ExamProfile, MockExam, KnowledgeMastery, ExamKnowledgePoint, ScorePrediction,
 )
 from app.services.llm import chat_once_json
+from app.utils import json_codec
 
 SECTION_LABELS = {
     "listening": "听力理解", "reading": "阅读理解", "cloze": "完形填空",
@@ -57,7 +57,7 @@ async def predict_score(user_id: int, db: AsyncSession) -> dict:
     mocks = mock_result.scalars().all()
     mock_scores = []
     for m in mocks:
-        score_data = json.loads(m.score_json) if m.score_json else {}
+        score_data = json_codec.loads(m.score_json) if m.score_json else {}
         mock_scores.append(score_data.get("total", 0))
 
     # 3. 计算各 section 预测分
@@ -83,7 +83,7 @@ async def predict_score(user_id: int, db: AsyncSession) -> dict:
         if mock_scores:
             # 从最近模考中提取该 section 分数
             for m in mocks:
-                score_data = json.loads(m.score_json) if m.score_json else {}
+                score_data = json_codec.loads(m.score_json) if m.score_json else {}
                 sec_scores = score_data.get("sections", {})
                 if sec in sec_scores:
                     mock_sec_score = sec_scores[sec].get("score", 0)
@@ -127,10 +127,10 @@ async def predict_score(user_id: int, db: AsyncSession) -> dict:
         exam_type=exam_type,
         predicted_score=round(total_predicted, 1),
         confidence=confidence,
-        section_predictions_json=json.dumps(section_predictions, ensure_ascii=False),
-        factors_json=json.dumps({
+        section_predictions_json=json_codec.dumps(section_predictions),
+        factors_json=json_codec.dumps({
             "strengths": strengths, "risks": risks, "recommendations": recommendations,
-        }, ensure_ascii=False),
+        }),
     )
     db.add(prediction)
     await db.flush()
@@ -162,8 +162,8 @@ async def get_prediction_history(user_id: int, db: AsyncSession) -> list[dict]:
         {
             "predicted_score": p.predicted_score,
             "confidence": p.confidence,
-            "section_predictions_json": json.loads(p.section_predictions_json) if p.section_predictions_json else {},
-            "factors_json": json.loads(p.factors_json) if p.factors_json else {},
+            "section_predictions_json": json_codec.loads(p.section_predictions_json) if p.section_predictions_json else {},
+            "factors_json": json_codec.loads(p.factors_json) if p.factors_json else {},
             "created_at": p.created_at.isoformat() if p.created_at else "",
         }
         for p in predictions
@@ -207,7 +207,7 @@ async def generate_weekly_report(user_id: int, db: AsyncSession) -> dict:
     recent_mocks = mock_result.scalars().all()
     mock_info = []
     for m in recent_mocks:
-        score_data = json.loads(m.score_json) if m.score_json else {}
+        score_data = json_codec.loads(m.score_json) if m.score_json else {}
         mock_info.append({"score": score_data.get("total", 0), "date": m.completed_at.isoformat() if m.completed_at else ""})
 
     system_prompt = f"""你是一位温暖鼓励的英语老师。根据学生本周的学习数据，生成一份简短的周报。
@@ -222,7 +222,7 @@ async def generate_weekly_report(user_id: int, db: AsyncSession) -> dict:
 
 返回 JSON：{{"summary": "本周总结", "focus_next_week": ["重点1", "重点2"], "encouragement": "鼓励语", "score_change": "分数变化描述"}}"""
 
-    user_prompt = f"各题型掌握度：{json.dumps(section_masteries, ensure_ascii=False)}\n最近模考：{json.dumps(mock_info, ensure_ascii=False)}"
+    user_prompt = f"各题型掌握度：{json_codec.dumps(section_masteries)}\n最近模考：{json_codec.dumps(mock_info)}"
 
     try:
         report = await chat_once_json(system_prompt, user_prompt)
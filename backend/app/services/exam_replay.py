@@ -1,11 +1,11 @@
 """考场复盘剧场服务 — 成长回放动画数据。"""
 
-import json
 import datetime
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import MockExam, KnowledgeMastery, ExamKnowledgePoint, ExamProfile, ScorePrediction
 from app.services.llm import chat_once_json
+from app.utils import json_codec
 
 
 async def generate_replay_data(user_id: int, db: AsyncSession) -> dict:
@@ -52,7 +52,7 @@ async def generate_replay_data(user_id: int, db: AsyncSession) -> dict:
     chapters = []
     mock_scores = []
     for m in mocks:
-        score_data = json.loads(m.score_json) if m.score_json else None
+        score_data = json_codec.loads(m.score_json) if m.score_json else None
         if score_data:
             mock_scores.append({
                 "date": m.completed_at.isoformat() if m.completed_at else "",
@@ -116,7 +116,7 @@ async def generate_replay_data(user_id: int, db: AsyncSession) -> dict:
                     "语气温暖、鼓励，像纪录片旁白。2-3 段，每段 1-2 句话。\n"
                     "返回 JSON：{\"narrative\": \"旁白文字\", \"highlight\": \"最大亮点（一句话）\"}"
                 ),
-                user_prompt=json.dumps(summary, ensure_ascii=False),
+                user_prompt=json_codec.dumps(summary),
             )
             narrative = narr_result.get("narrative", "")
         except Exception:
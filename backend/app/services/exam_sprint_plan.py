@@ -1,6 +1,5 @@
 """每日冲刺计划服务 — 智能日程编排。"""
 
-import json
 import datetime
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +7,7 @@ from app.models.exam import DailySprintPlan, ExamProfile
 from app.services.exam_training import get_section_masteries
 from app.services.exam_weakness import get_weakness_list
 from app.services.llm import chat_once_json
+from app.utils import json_codec
 
 
 async def get_or_generate_sprint_plan(user_id: int, db: AsyncSession) -> dict:
@@ -77,7 +77,7 @@ async def _generate_plan(user_id: int, today: str, db: AsyncSession) -> dict:
                 "\"motivation\": \"今日鼓励语（一句话）\"}\n"
                 f"工作日安排 4-5 个任务，周末安排 6-7 个任务。"
             ),
-            user_prompt=json.dumps(context, ensure_ascii=False),
+            user_prompt=json_codec.dumps(context),
         )
     except Exception:
         # fallback: 生成默认计划
@@ -89,7 +89,7 @@ async def _generate_plan(user_id: int, today: str, db: AsyncSession) -> dict:
     plan = DailySprintPlan(
         user_id=user_id,
         plan_date=today,
-        tasks_json=json.dumps(tasks, ensure_ascii=False),
+        tasks_json=json_codec.dumps(tasks),
         total_count=len(tasks),
     )
     db.add(plan)
@@ -164,7 +164,7 @@ async def complete_sprint_task(
     if not plan:
         return {"error": "plan not found"}
 
-    tasks = json.loads(plan.tasks_json or "[]")
+    tasks = json_codec.loads(plan.tasks_json or "[]")
     if task_index < 0 or task_index >= len(tasks):
         return {"error": "invalid task index"}
 
@@ -173,7 +173,7 @@ async def complete_sprint_task(
 
     tasks[task_index]["completed"] = True
     xp_reward = tasks[task_index].get("xp_reward", 10)
-    plan.tasks_json = json.dumps(tasks, ensure_ascii=False)
+    plan.tasks_json = json_codec.dumps(tasks)
     plan.completed_count += 1
     plan.xp_earned += xp_reward
 
@@ -1,11 +1,11 @@
 """时间沙漏服务 — 考场时间管理训练。"""
 
-import json
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import ExamTimeRecord
 from app.services.exam_mock import GAOKAO_STRUCTURE, ZHONGKAO_STRUCTURE
 from app.services.llm import chat_once_json
+from app.utils import json_codec
 
 
 # 每道题的基准时间（秒），按题型和难度
@@ -59,7 +59,7 @@ async def record_time_data(
         user_id=user_id,
         session_type=session_type,
         session_id=session_id,
-        time_data_json=json.dumps(time_entries, ensure_ascii=False),
+        time_data_json=json_codec.dumps(time_entries),
         on_budget_rate=on_budget_rate,
     )
     db.add(record)
@@ -88,7 +88,7 @@ async def get_time_history(user_id: int, db: AsyncSession) -> list[dict]:
             "session_type": r.session_type,
             "on_budget_rate": r.on_budget_rate,
             "created_at": r.created_at.isoformat() if r.created_at else None,
-            "time_data": json.loads(r.time_data_json) if r.time_data_json else [],
+            "time_data": json_codec.loads(r.time_data_json) if r.time_data_json else [],
         }
         for r in records
     ]
@@ -109,7 +109,7 @@ async def analyze_time_patterns(user_id: int, db: AsyncSession) -> dict:
     # 汇总数据
     all_entries = []
     for r in records:
-        entries = json.loads(r.time_data_json) if r.time_data_json else []
+        entries = json_codec.loads(r.time_data_json) if r.time_data_json else []
         all_entries.extend(entries)
 
     if not all_entries:
@@ -128,7 +128,7 @@ async def analyze_time_patterns(user_id: int, db: AsyncSession) -> dict:
             section_stats[sec]["over_budget"] += 1
             section_stats[sec]["total_over_seconds"] += actual - budget
 
-    summary = json.dumps(section_stats, ensure_ascii=False)
+    summary = json_codec.dumps(section_stats)
 
     try:
         analysis = await chat_once_json(
@@ -141,7 +141,7 @@ async def analyze_time_patterns(user_id: int, db: AsyncSession) -> dict:
         )
         # 保存分析到最新记录
         if records:
-            records[0].ai_analysis_json = json.dumps(analysis, ensure_ascii=False)
+            records[0].ai_analysis_json = json_codec.dumps(analysis)
             await db.flush()
         return analysis
     except Exception:
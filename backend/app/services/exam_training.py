@@ -1,12 +1,13 @@
 """专项训练服务 — 自适应出题 + 掌握度更新。"""
 
-import json
 import datetime
-import re
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import ExamQuestion, ExamKnowledgePoint, KnowledgeMastery
+from app.services.adaptive import BANK_EXAM, get_ability, get_exam_item_bank, prior_item_params, record_response
 from app.services.llm import judge_answer
+from app.services.text_analysis import reasoning_quality
+from app.utils import json_codec
 
 SECTION_LABELS = {
     "listening": "听力理解",
@@ -36,18 +37,7 @@ SECTION_STRATEGIES = {
 
 
 def _score_reasoning_quality(strategy_choice: str | None, reflection_text: str | None) -> float:
-    score = 0.0
-    if (strategy_choice or "").strip():
-        score += 0.4
-
-    reflection = (reflection_text or "").strip()
-    if reflection:
-        score += 0.25
-        score += min(len(reflection) / 120.0, 0.25)
-        logic_hits = len(re.findall(r"(因为|所以|但是|因此|if|because|therefore|however)", reflection, flags=re.IGNORECASE))
-        score += min(logic_hits * 0.05, 0.10)
-
-    return round(min(score, 1.0), 3)
+    return reasoning_quality(strategy_choice, reflection_text)
 
 
 async def get_section_masteries(user_id: int, exam_type: str, db: AsyncSession) -> list[dict]:
@@ -91,7 +81,7 @@ async def get_section_masteries(user_id: int, exam_type: str, db: AsyncSession)
 async def get_adaptive_questions(
     user_id: int, exam_type: str, section: str, limit: int, db: AsyncSession
 ) -> list[dict]:
-    """自适应出题：根据知识点掌握度动态选题。"""
+    """自适应出题：按知识点掌握度分配知识点，再按 IRT 信息量选题。"""
     # 1. 获取该 section 下所有知识点及掌握度
     result = await db.execute(
         select(ExamKnowledgePoint, KnowledgeMastery.mastery_level)
@@ -132,52 +122,20 @@ async def get_adaptive_questions(
         pool.sort(key=lambda x: x["mastery"])
         selected_kps.extend(pool[:n])
 
-    if not selected_kps:
-        # 没有知识点数据，随机出题
-        result = await db.execute(
-            select(ExamQuestion)
-            .where(ExamQuestion.exam_type == exam_type, ExamQuestion.section == section)
-            .order_by(func.random())
-            .limit(limit)
-        )
-        return [_question_to_dict(q) for q in result.scalars().all()]
-
-    # 4. 为每个知识点选题，难度匹配掌握度
-    questions = []
+    # 4. 在题库内存数组上按 IRT 信息量选题：每个知识点取一道，再整体补足
+    bank = await get_exam_item_bank(exam_type, section, db)
+    theta, _ = await get_ability(user_id, BANK_EXAM, db)
+    chosen: list[int] = []
     for entry in selected_kps:
-        target_diff = max(1, min(5, int(entry["mastery"] * 5) + 1))
-        result = await db.execute(
-            select(ExamQuestion)
-            .where(
-                ExamQuestion.exam_type == exam_type,
-                ExamQuestion.section == section,
-                ExamQuestion.knowledge_point_id == entry["kp_id"],
-                ExamQuestion.difficulty.between(max(1, target_diff - 1), min(5, target_diff + 1)),
-            )
-            .order_by(func.random())
-            .limit(1)
-        )
-        q = result.scalar_one_or_none()
-        if q:
-            questions.append(_question_to_dict(q))
-
-    # 补足数量
-    if len(questions) < limit:
-        existing_ids = [q["id"] for q in questions]
-        result = await db.execute(
-            select(ExamQuestion)
-            .where(
-                ExamQuestion.exam_type == exam_type,
-                ExamQuestion.section == section,
-                ExamQuestion.id.notin_(existing_ids) if existing_ids else True,
-            )
-            .order_by(func.random())
-            .limit(limit - len(questions))
-        )
-        for q in result.scalars().all():
-            questions.append(_question_to_dict(q))
+        chosen.extend(bank.select(theta, k=1, exclude_ids=chosen, group=entry["kp_id"]))
+    if len(chosen) < limit:
+        chosen.extend(bank.select(theta, k=limit - len(chosen), exclude_ids=chosen))
+    if not chosen:
+        return []
 
-    return questions[:limit]
+    result = await db.execute(select(ExamQuestion).where(ExamQuestion.id.in_(chosen)))
+    by_id = {q.id: q for q in result.scalars().all()}
+    return [_question_to_dict(by_id[qid]) for qid in chosen if qid in by_id][:limit]
 
 
 async def submit_training_answer(
@@ -203,7 +161,7 @@ async def submit_training_answer(
 
     # 智能判题：有选项的选择题用字母比较快速路径，其余用 LLM
     judge_explanation = ""
-    if question.options_json and json.loads(question.options_json):
+    if question.options_json and json_codec.loads(question.options_json):
         is_correct = student_ans.upper()[:1] == question.answer.strip().upper()[:1]
     elif student_ans:
         try:
@@ -215,6 +173,10 @@ async def submit_training_answer(
     else:
         is_correct = False
 
+    bank = await get_exam_item_bank(question.exam_type, question.section, db)
+    params = bank.params(question.id) or prior_item_params(question.difficulty, bool(question.options_json))
+    await record_response(user_id, BANK_EXAM, params, is_correct, db)
+
     mastery_before = 0.0
     mastery_after = 0.0
 
@@ -365,7 +327,7 @@ def _question_to_dict(q: ExamQuestion) -> dict:
         "difficulty": q.difficulty,
         "content": q.content,
         "passage_text": q.passage_text,
-        "options": json.loads(q.options_json) if q.options_json else [],
+        "options": json_codec.loads(q.options_json) if q.options_json else [],
         "knowledge_point_id": q.knowledge_point_id,
         "year": q.year,
         "strategy_tip": q.strategy_tip,
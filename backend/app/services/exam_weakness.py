@@ -1,11 +1,11 @@
 """薄弱点突破服务 — 优先级排序 + 三阶段突破。"""
 
-import json
 import datetime
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.exam import ExamKnowledgePoint, KnowledgeMastery, WeaknessBreakthrough
 from app.services.llm import chat_once_json
+from app.utils import json_codec
 
 FREQ_WEIGHT = {"high": 3, "medium": 2, "low": 1}
 
@@ -129,8 +129,8 @@ exercises 数组应包含 8 道题（Phase 2 的 5 道 + Phase 3 的 3 道）。
         knowledge_point_id=kp_id,
         status="in_progress",
         phase=1,
-        micro_lesson_json=json.dumps(micro_lesson, ensure_ascii=False),
-        exercises_json=json.dumps(exercises, ensure_ascii=False),
+        micro_lesson_json=json_codec.dumps(micro_lesson),
+        exercises_json=json_codec.dumps(exercises),
         total_exercises=len(exercises),
         completed_exercises=0,
         mastery_before=mastery_before,
@@ -166,7 +166,7 @@ async def submit_breakthrough_exercise(
     if not bt:
         return {"error": "突破记录不存在"}
 
-    exercises = json.loads(bt.exercises_json) if bt.exercises_json else []
+    exercises = json_codec.loads(bt.exercises_json) if bt.exercises_json else []
     if exercise_index >= len(exercises):
         return {"error": "练习索引无效"}
 
@@ -177,7 +177,7 @@ async def submit_breakthrough_exercise(
     # 标记完成
     ex["completed"] = True
     ex["correct"] = is_correct
-    bt.exercises_json = json.dumps(exercises, ensure_ascii=False)
+    bt.exercises_json = json_codec.dumps(exercises)
     bt.completed_exercises = sum(1 for e in exercises if e.get("completed"))
 
     # 更新掌握度
@@ -220,8 +220,8 @@ def _breakthrough_to_dict(bt, kp_name: str) -> dict:
         "name": kp_name,
         "status": bt.status,
         "phase": bt.phase,
-        "micro_lesson_json": json.loads(bt.micro_lesson_json) if bt.micro_lesson_json else None,
-        "exercises_json": json.loads(bt.exercises_json) if bt.exercises_json else [],
+        "micro_lesson_json": json_codec.loads(bt.micro_lesson_json) if bt.micro_lesson_json else None,
+        "exercises_json": json_codec.loads(bt.exercises_json) if bt.exercises_json else [],
         "total_exercises": bt.total_exercises,
         "completed_exercises": bt.completed_exercises,
         "mastery_before": bt.mastery_before,
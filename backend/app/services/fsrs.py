@@ -0,0 +1,276 @@
+"""FSRS 记忆模型 — 基于稳定性 / 难度的间隔重复调度（NumPy 向量化）。
+
+纯计算模块，不访问数据库：
+- 单卡复习：由 (稳定性 S, 难度 D, 距上次复习天数, 评分) 得到新的记忆状态与间隔
+- 批量预测：对一个用户的全部卡片逐日模拟，给出未来 N 天每天到期的数量
+- 参数优化：按卡片回放全部复习记录，最小化回忆预测的对数损失，得到个人参数
+
+公式采用 FSRS-4.5（17 个参数）。评分：1=忘记 2=模糊 3=认识 4=很熟。
+所有函数都支持数组输入；参数 w 可以是 (17,) 或 (P, 17)，后者用于优化时
+一次回放 P 组参数。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+RATING_AGAIN = 1
+RATING_HARD = 2
+RATING_GOOD = 3
+RATING_EASY = 4
+
+DEFAULT_WEIGHTS = np.array([
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+])
+# 参数取值范围，优化时逐项截断
+WEIGHT_BOUNDS = np.array([
+    (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (0.1, 100.0),
+    (1.0, 10.0), (0.1, 5.0), (0.1, 5.0), (0.0, 0.75),
+    (0.0, 4.5), (0.0, 0.8), (0.01, 3.5), (0.1, 5.0),
+    (0.01, 0.25), (0.01, 0.9), (0.01, 4.0), (0.0, 1.0), (1.0, 6.0),
+])
+
+DESIRED_RETENTION = 0.9
+MAX_INTERVAL_DAYS = 365.0
+DECAY = -0.5
+FACTOR = 0.9 ** (1 / DECAY) - 1  # 保证 R(S) = 0.9
+S_MIN = 0.01
+S_MAX = 36500.0
+
+
+def _w(w: np.ndarray, i: int):
+    """取第 i 个参数；w 为 (P, 17) 时返回 (P, 1) 以便与 (P, n) 的状态广播。"""
+    return w[..., i, None] if w.ndim > 1 else w[i]
+
+
+def retrievability(elapsed_days, stability):
+    """遗忘曲线 R(t, S) = (1 + FACTOR · t / S) ^ DECAY。"""
+    return (1.0 + FACTOR * np.maximum(elapsed_days, 0.0) / stability) ** DECAY
+
+
+def next_interval(stability, retention: float = DESIRED_RETENTION):
+    """使回忆概率降到 retention 的间隔（天），取整并截断到 [1, MAX_INTERVAL_DAYS]。"""
+    interval = stability / FACTOR * (retention ** (1.0 / DECAY) - 1.0)
+    return np.clip(np.round(interval), 1.0, MAX_INTERVAL_DAYS)
+
+
+def init_stability(rating, w: np.ndarray = DEFAULT_WEIGHTS):
+    r = np.asarray(rating, dtype=np.int64)
+    if w.ndim > 1:
+        if r.ndim == 0:
+            return w[:, int(r) - 1, None]
+        return np.take_along_axis(w[:, :4], np.broadcast_to(r - 1, (w.shape[0],) + r.shape), axis=1)
+    return w[r - 1]
+
+
+def init_difficulty(rating, w: np.ndarray = DEFAULT_WEIGHTS):
+    return np.clip(_w(w, 4) - (np.asarray(rating) - 3) * _w(w, 5), 1.0, 10.0)
+
+
+def next_difficulty(difficulty, rating, w: np.ndarray = DEFAULT_WEIGHTS):
+    """难度随评分变化，并向“认识”的初始难度均值回归。"""
+    d = difficulty - _w(w, 6) * (np.asarray(rating) - 3)
+    d = _w(w, 7) * init_difficulty(RATING_GOOD, w) + (1.0 - _w(w, 7)) * d
+    return np.clip(d, 1.0, 10.0)
+
+
+def next_stability(difficulty, stability, r, rating, w: np.ndarray = DEFAULT_WEIGHTS):
+    """复习后的稳定性：回忆成功时增长，遗忘时按遗忘后公式重置（不超过原稳定性）。"""
+    rating = np.asarray(rating)
+    hard_penalty = np.where(rating == RATING_HARD, _w(w, 15), 1.0)
+    easy_bonus = np.where(rating == RATING_EASY, _w(w, 16), 1.0)
+    recall = stability * (
+        1.0
+        + np.exp(_w(w, 8))
+        * (11.0 - difficulty)
+        * stability ** -_w(w, 9)
+        * (np.exp((1.0 - r) * _w(w, 10)) - 1.0)
+        * hard_penalty
+        * easy_bonus
+    )
+    forget = (
+        _w(w, 11)
+        * difficulty ** -_w(w, 12)
+        * ((stability + 1.0) ** _w(w, 13) - 1.0)
+        * np.exp((1.0 - r) * _w(w, 14))
+    )
+    forget = np.minimum(forget, stability)
+    return np.clip(np.where(rating == RATING_AGAIN, forget, recall), S_MIN, S_MAX)
+
+
+def review(stability, difficulty, elapsed_days, rating, w: np.ndarray = DEFAULT_WEIGHTS):
+    """一次复习后的记忆状态，返回 (S, D, 复习时的回忆概率 R)。
+
+    stability 为 NaN 的位置视为首次复习（新卡），按评分初始化。
+    """
+    stability = np.asarray(stability, dtype=np.float64)
+    difficulty = np.asarray(difficulty, dtype=np.float64)
+    is_new = np.isnan(stability)
+    s_prev = np.where(is_new, 1.0, stability)
+    d_prev = np.where(is_new, 5.0, difficulty)
+
+    r = np.where(is_new, 1.0, retrievability(elapsed_days, s_prev))
+    s = np.where(is_new, init_stability(rating, w), next_stability(d_prev, s_prev, r, rating, w))
+    d = np.where(is_new, init_difficulty(rating, w), next_difficulty(d_prev, rating, w))
+    return s, d, r
+
+
+def forecast_due(
+    due_in_days: np.ndarray,
+    stability: np.ndarray,
+    difficulty: np.ndarray,
+    last_review_days: np.ndarray,
+    days: int,
+    w: np.ndarray = DEFAULT_WEIGHTS,
+    retention: float = DESIRED_RETENTION,
+) -> np.ndarray:
+    """未来 days 天每天到期的卡片数（含期间复习后再次到期的）。
+
+    due_in_days：距到期的天数（≤0 表示已到期，计入第 0 天）；last_review_days：
+    上次复习距今的天数（负数，新卡为 NaN）。模拟假设每次
+    复习都按时完成且评分为“认识”，每天只对当天到期的卡片做一次向量化更新。
+    """
+    due = np.maximum(np.asarray(due_in_days, dtype=np.float64), 0.0)
+    s = np.asarray(stability, dtype=np.float64).copy()
+    d = np.asarray(difficulty, dtype=np.float64).copy()
+    last = np.asarray(last_review_days, dtype=np.float64).copy()
+    counts = np.zeros(days, dtype=np.int64)
+    for day in range(days):
+        hit = due < day + 1
+        n = int(hit.sum())
+        counts[day] = n
+        if not n:
+            continue
+        elapsed = day - last[hit]
+        s_new, d_new, _ = review(s[hit], d[hit], elapsed, RATING_GOOD, w)
+        s[hit], d[hit] = s_new, d_new
+        last[hit] = day
+        due[hit] = day + next_interval(s_new, retention)
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# 参数优化
+# ---------------------------------------------------------------------------
+
+@dataclass
+class OptimizeResult:
+    weights: np.ndarray
+    loss_before: float
+    loss_after: float
+    n_reviews: int
+    iterations: int
+
+
+def pack_histories(card_idx: np.ndarray, elapsed_days: np.ndarray, ratings: np.ndarray):
+    """把按 (卡片, 时间) 排序的复习记录整理成 (n_cards, max_len) 的补齐矩阵。
+
+    返回 (elapsed, ratings, mask)，mask 为 False 的位置是补齐。
+    """
+    card_idx = np.asarray(card_idx, dtype=np.int64)
+    _, inverse, lengths = np.unique(card_idx, return_inverse=True, return_counts=True)
+    n_cards, max_len = len(lengths), int(lengths.max()) if len(lengths) else 0
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    rows = inverse[order]
+    cols = np.arange(len(order)) - starts[rows]
+
+    elapsed = np.zeros((n_cards, max_len))
+    rating = np.full((n_cards, max_len), RATING_GOOD, dtype=np.int64)
+    mask = np.zeros((n_cards, max_len), dtype=bool)
+    elapsed[rows, cols] = np.asarray(elapsed_days, dtype=np.float64)[order]
+    rating[rows, cols] = np.asarray(ratings, dtype=np.int64)[order]
+    mask[rows, cols] = True
+    return elapsed, rating, mask
+
+
+def log_loss(w: np.ndarray, elapsed: np.ndarray, rating: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """回放全部卡片，返回回忆预测的平均对数损失；w 为 (P, 17) 时返回 (P,)。
+
+    每张卡的第一次复习只用于初始化状态，之后每次复习用复习前的 R 预测是否回忆
+    （评分 > 1 视为回忆成功）。同一天内的重复复习（间隔 < 1 天）照常回放状态，
+    但不计入损失——此时 R≈1，与参数无关。
+    """
+    batch = w.ndim > 1
+    shape = (w.shape[0], elapsed.shape[0]) if batch else (elapsed.shape[0],)
+    s = np.full(shape, np.nan)
+    d = np.full(shape, np.nan)
+    total = np.zeros(w.shape[0]) if batch else 0.0
+    n = 0
+    for j in range(elapsed.shape[1]):
+        m = mask[:, j]
+        s_new, d_new, r = review(s, d, elapsed[:, j], rating[:, j], w)
+        if j > 0:
+            scored = m & (elapsed[:, j] >= 1.0)
+            y = rating[:, j] > RATING_AGAIN
+            p = np.clip(r, 1e-6, 1.0 - 1e-6)
+            bce = -np.where(y, np.log(p), np.log1p(-p))
+            total = total + np.where(scored, bce, 0.0).sum(axis=-1)
+            n += int(scored.sum())
+        s = np.where(m, s_new, s)
+        d = np.where(m, d_new, d)
+    return total / max(n, 1)
+
+
+def optimize(
+    card_idx: np.ndarray,
+    elapsed_days: np.ndarray,
+    ratings: np.ndarray,
+    w0: np.ndarray = DEFAULT_WEIGHTS,
+    max_iter: int = 150,
+    lr: float = 0.05,
+    reg: float = 1.0,
+) -> OptimizeResult:
+    """从复习记录拟合个人参数。
+
+    在相对尺度上做有限差分梯度 + Adam：每轮把 1 + 2×17 组参数堆成 (P, 17)
+    一次回放，因此每轮只需一次向量化回放。reg 为向默认参数收缩的 L2 强度
+    （除以复习次数），数据少时参数基本保持默认。
+    """
+    elapsed, rating, mask = pack_histories(card_idx, elapsed_days, ratings)
+    n_reviews = int((mask[:, 1:] & (elapsed[:, 1:] >= 1.0)).sum()) if mask.shape[1] > 1 else 0
+    w0 = np.asarray(w0, dtype=np.float64)
+    base_loss = float(log_loss(w0, elapsed, rating, mask))
+    if n_reviews == 0:
+        return OptimizeResult(w0.copy(), base_loss, base_loss, 0, 0)
+
+    lo, hi = WEIGHT_BOUNDS[:, 0], WEIGHT_BOUNDS[:, 1]
+    scale = np.maximum(np.abs(DEFAULT_WEIGHTS), 0.05)
+    k = len(w0)
+    eps = 1e-3
+    lam = reg / n_reviews
+
+    def objective(batch: np.ndarray) -> np.ndarray:
+        penalty = lam * (((batch - DEFAULT_WEIGHTS) / scale) ** 2).sum(axis=1)
+        return log_loss(batch, elapsed, rating, mask) + penalty
+
+    x = (w0 - DEFAULT_WEIGHTS) / scale  # 相对默认参数的标准化偏移
+    m = np.zeros(k)
+    v = np.zeros(k)
+    offsets = np.vstack([np.zeros(k), np.eye(k) * eps, -np.eye(k) * eps])
+    best_x, best = x.copy(), np.inf
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        batch = np.clip(DEFAULT_WEIGHTS + (x + offsets) * scale, lo, hi)
+        losses = objective(batch)
+        if losses[0] < best - 1e-7:
+            best_x, best = x.copy(), float(losses[0])
+        grad = (losses[1:k + 1] - losses[k + 1:]) / (2 * eps)
+        m = 0.9 * m + 0.1 * grad
+        v = 0.999 * v + 0.001 * grad ** 2
+        m_hat = m / (1 - 0.9 ** iterations)
+        v_hat = v / (1 - 0.999 ** iterations)
+        step = lr * m_hat / (np.sqrt(v_hat) + 1e-8)
+        x = np.clip(x - step, (lo - DEFAULT_WEIGHTS) / scale, (hi - DEFAULT_WEIGHTS) / scale)
+        if np.abs(step).max() < 1e-4:
+            break
+
+    weights = np.clip(DEFAULT_WEIGHTS + best_x * scale, lo, hi)
+    return OptimizeResult(
+        weights=weights,
+        loss_before=base_loss,
+        loss_after=float(log_loss(weights, elapsed, rating, mask)),
+        n_reviews=n_reviews,
+        iterations=iterations,
+    )
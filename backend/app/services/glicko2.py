@@ -0,0 +1,203 @@
+"""Glicko-2 评分 — 对战评分的向量化实现（NumPy）。
+
+纯计算模块，不访问数据库：
+- rate_period：一个评分周期内所有对局一次性结算，按玩家聚合后批量更新
+- recompute：按周期回放全部对战历史，得到每个玩家的最终 (rating, rd, volatility)
+- rate_single：对局结束时的在线增量更新（把单局视为一个小周期）
+
+对外使用 Glicko 尺度（rating / rd），内部换算到 Glicko-2 尺度 (mu, phi)。
+评分中心取 1000，与 PlayerRating 的默认值和历史 Elo 分数保持一致。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_RATING = 1000.0
+DEFAULT_RD = 350.0
+DEFAULT_VOLATILITY = 0.06
+MIN_RD = 30.0
+# 系统常数 τ：约束波动率随时间的变化，常用 0.3~1.2
+TAU = 0.5
+SCALE = 173.7178
+EPSILON = 1e-6
+# 评分周期长度（天）
+PERIOD_DAYS = 7
+
+
+def to_glicko2(rating, rd):
+    return (np.asarray(rating, dtype=np.float64) - DEFAULT_RATING) / SCALE, np.asarray(rd, dtype=np.float64) / SCALE
+
+
+def from_glicko2(mu, phi):
+    return mu * SCALE + DEFAULT_RATING, np.clip(phi * SCALE, MIN_RD, DEFAULT_RD)
+
+
+def _g(phi):
+    return 1.0 / np.sqrt(1.0 + 3.0 * phi ** 2 / np.pi ** 2)
+
+
+def expected_score(mu, mu_opp, phi_opp):
+    return 1.0 / (1.0 + np.exp(-_g(phi_opp) * (mu - mu_opp)))
+
+
+def _new_volatility(sigma, phi, v, delta, tau: float = TAU, max_iter: int = 100):
+    """Glickman 第 5 步：Illinois 算法求新的波动率，对所有玩家同时迭代。"""
+    a = np.log(sigma ** 2)
+    phi2, delta2 = phi ** 2, delta ** 2
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta2 - phi2 - v - ex) / (2.0 * (phi2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    A = a.copy()
+    B = np.where(delta2 > phi2 + v, np.log(np.maximum(delta2 - phi2 - v, 1e-300)), a - tau)
+    # delta² ≤ phi² + v 时向下找使 f(B) ≥ 0 的 B
+    need = ~(delta2 > phi2 + v)
+    for _ in range(max_iter):
+        low = need & (f(B) < 0)
+        if not low.any():
+            break
+        B = np.where(low, B - tau, B)
+
+    fA, fB = f(A), f(B)
+    for _ in range(max_iter):
+        active = np.abs(B - A) > EPSILON
+        if not active.any():
+            break
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        flip = fC * fB <= 0
+        A = np.where(active & flip, B, A)
+        fA = np.where(active & flip, fB, np.where(active, fA / 2.0, fA))
+        B = np.where(active, C, B)
+        fB = np.where(active, fC, fB)
+    return np.exp(A / 2.0)
+
+
+def rate_period(mu, phi, sigma, a, b, score_a, tau: float = TAU, fixed=None):
+    """结算一个评分周期。
+
+    mu / phi / sigma：(n,) 周期开始时所有玩家的状态（Glicko-2 尺度）
+    a / b / score_a：本周期的对局，玩家下标和 a 方得分（1 胜 / 0.5 平 / 0 负）
+    fixed：(n,) bool，为 True 的玩家（如 AI 对手）状态不变
+    返回周期结束后的 (mu, phi, sigma)。对手一律取周期开始时的状态。
+    """
+    n = len(mu)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    score_a = np.asarray(score_a, dtype=np.float64)
+
+    # 每局对双方各产生一条记录
+    player = np.concatenate([a, b])
+    opp = np.concatenate([b, a])
+    score = np.concatenate([score_a, 1.0 - score_a])
+    g = _g(phi[opp])
+    e = 1.0 / (1.0 + np.exp(-g * (mu[player] - mu[opp])))
+
+    v_inv = np.bincount(player, weights=g ** 2 * e * (1.0 - e), minlength=n)
+    gain = np.bincount(player, weights=g * (score - e), minlength=n)
+    played = v_inv > 0
+
+    new_sigma = sigma.copy()
+    if played.any():
+        v = 1.0 / v_inv[played]
+        new_sigma[played] = _new_volatility(sigma[played], phi[played], v, v * gain[played], tau)
+
+    phi_star = np.sqrt(phi ** 2 + new_sigma ** 2)
+    new_phi = np.where(played, 1.0 / np.sqrt(1.0 / phi_star ** 2 + v_inv), phi_star)
+    new_mu = mu + np.where(played, new_phi ** 2 * gain, 0.0)
+    # 长期不对战时 rd 增长到初始值为止
+    new_phi = np.minimum(new_phi, DEFAULT_RD / SCALE)
+
+    if fixed is not None:
+        new_mu = np.where(fixed, mu, new_mu)
+        new_phi = np.where(fixed, phi, new_phi)
+        new_sigma = np.where(fixed, sigma, new_sigma)
+    return new_mu, new_phi, new_sigma
+
+
+@dataclass
+class RecomputeResult:
+    rating: np.ndarray
+    rd: np.ndarray
+    volatility: np.ndarray
+    wins: np.ndarray
+    losses: np.ndarray
+    games: np.ndarray
+    periods: int
+
+
+def recompute(
+    n_players: int,
+    period: np.ndarray,
+    a: np.ndarray,
+    b: np.ndarray,
+    score_a: np.ndarray,
+    fixed_ratings: dict[int, tuple[float, float]] | None = None,
+    last_period: int | None = None,
+    tau: float = TAU,
+) -> RecomputeResult:
+    """按评分周期回放全部对局。
+
+    period：每局所属周期编号（从 0 开始）；a / b：玩家下标（0..n_players-1）。
+    fixed_ratings：{下标: (rating, rd)}，这些玩家（AI 对手）评分固定不变。
+    last_period：回放到的最后一个周期（含），用于让此后没有对局的玩家 rd 继续增长。
+    首次出场之前的周期不会增长 rd。
+    """
+    period = np.asarray(period, dtype=np.int64)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    score_a = np.asarray(score_a, dtype=np.float64)
+
+    mu = np.zeros(n_players)
+    phi = np.full(n_players, DEFAULT_RD / SCALE)
+    sigma = np.full(n_players, DEFAULT_VOLATILITY)
+    fixed = np.zeros(n_players, dtype=bool)
+    for idx, (rating, rd) in (fixed_ratings or {}).items():
+        mu[idx], phi[idx] = to_glicko2(rating, rd)
+        fixed[idx] = True
+
+    # 按周期排序后用二分切出每个周期的对局
+    order = np.argsort(period, kind="stable")
+    period, a, b, score_a = period[order], a[order], b[order], score_a[order]
+    first = np.full(n_players, np.iinfo(np.int64).max)
+    np.minimum.at(first, np.concatenate([a, b]), np.concatenate([period, period]))
+
+    n_periods = 0
+    if len(period):
+        end = int(period[-1]) if last_period is None else max(int(period[-1]), last_period)
+        bounds = np.searchsorted(period, np.arange(end + 2))
+        for p in range(end + 1):
+            lo, hi = bounds[p], bounds[p + 1]
+            # 还没出场的玩家保持初始状态，不参与本周期的 rd 增长
+            active = first <= p
+            new_mu, new_phi, new_sigma = rate_period(mu, phi, sigma, a[lo:hi], b[lo:hi], score_a[lo:hi], tau, fixed)
+            mu = np.where(active, new_mu, mu)
+            phi = np.where(active, new_phi, phi)
+            sigma = np.where(active, new_sigma, sigma)
+        n_periods = end + 1
+
+    rating, rd = from_glicko2(mu, phi)
+    players = np.concatenate([a, b])
+    scores = np.concatenate([score_a, 1.0 - score_a])
+    return RecomputeResult(
+        rating=rating,
+        rd=rd,
+        volatility=sigma,
+        wins=np.bincount(players, weights=scores > 0.5, minlength=n_players).astype(np.int64),
+        losses=np.bincount(players, weights=scores < 0.5, minlength=n_players).astype(np.int64),
+        games=np.bincount(players, minlength=n_players),
+        periods=n_periods,
+    )
+
+
+def rate_single(rating: float, rd: float, volatility: float, opp_rating: float, opp_rd: float, score: float, tau: float = TAU):
+    """在线增量：一局结束后立即更新一方的 (rating, rd, volatility)。"""
+    mu, phi = to_glicko2([rating, opp_rating], [rd, opp_rd])
+    sigma = np.array([volatility, DEFAULT_VOLATILITY])
+    new_mu, new_phi, new_sigma = rate_period(
+        mu, phi, sigma, [0], [1], [score], tau, fixed=np.array([False, True]),
+    )
+    r, d = from_glicko2(new_mu[0], new_phi[0])
+    return float(r), float(d), float(new_sigma[0])
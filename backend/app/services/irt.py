@@ -0,0 +1,229 @@
+"""IRT 项目反应理论引擎 — 2PL/3PL 模型的向量化能力估计、选题与参数标定（NumPy）。
+
+纯计算模块，不访问数据库：
+- 在线：EAP / MAP 能力估计、单题增量更新、最大信息量选题（单次调用为微秒级）
+- 离线：基于全部作答记录的联合 MAP 标定（JMAP），每轮迭代只对作答数组做
+  向量化运算 + bincount 聚合，百万级作答、十万级题目可在分钟内完成
+
+3PL 中的猜测参数 c 视为已知（选择题按选项数给定，主观题为 0），c=0 即 2PL。
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+THETA_MIN = -4.0
+THETA_MAX = 4.0
+A_MIN = 0.2
+A_MAX = 4.0
+B_MIN = -5.0
+B_MAX = 5.0
+
+# 能力漂移：每次作答前先把先验标准差放大为 sqrt(se² + ABILITY_DRIFT²)。
+# 不放大时 se 只降不升，几十题后 θ 几乎不再变化，跟不上学生的进步；
+# 取 0.06 时 se 稳定在约 0.4，新作答的权重相当于最近约 40 题的平均。
+ABILITY_DRIFT = 0.06
+
+# EAP 积分节点（以先验均值为中心、先验标准差为单位）
+_EAP_NODES = np.linspace(-5.0, 5.0, 81)
+_EAP_LOG_PRIOR = -0.5 * _EAP_NODES ** 2
+_P_EPS = 1e-9
+
+
+def probability(theta, a, b, c=0.0):
+    """答对概率 P(θ) = c + (1 - c) / (1 + exp(-a(θ - b)))，支持广播。"""
+    return c + (1.0 - c) / (1.0 + np.exp(-a * (theta - b)))
+
+
+def information(theta, a, b, c=0.0):
+    """题目信息量 I(θ) = a² · (Q/P) · ((P - c) / (1 - c))²，支持广播。"""
+    p = np.clip(probability(theta, a, b, c), _P_EPS, 1.0 - _P_EPS)
+    return a ** 2 * ((1.0 - p) / p) * ((p - c) / (1.0 - c)) ** 2
+
+
+def estimate_eap(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    responses: np.ndarray,
+    prior_mean: float = 0.0,
+    prior_sd: float = 1.0,
+) -> tuple[float, float]:
+    """EAP 能力估计，返回 (θ, 后验标准差)。
+
+    正态先验 N(prior_mean, prior_sd²)；以上一次估计为先验即可做增量更新。
+    """
+    grid = prior_mean + prior_sd * _EAP_NODES
+    if len(responses) == 0:
+        return float(prior_mean), float(prior_sd)
+    p = np.clip(probability(grid[:, None], a, b, c), _P_EPS, 1.0 - _P_EPS)
+    log_like = np.where(responses, np.log(p), np.log1p(-p)).sum(axis=1) + _EAP_LOG_PRIOR
+    w = np.exp(log_like - log_like.max())
+    w /= w.sum()
+    theta = float(w @ grid)
+    se = float(np.sqrt(w @ (grid - theta) ** 2))
+    return min(max(theta, THETA_MIN), THETA_MAX), se
+
+
+def estimate_map(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    responses: np.ndarray,
+    prior_mean: float = 0.0,
+    prior_sd: float = 1.0,
+    max_iter: int = 20,
+    tol: float = 1e-4,
+) -> tuple[float, float]:
+    """MAP 能力估计（Fisher scoring），返回 (θ, 标准误)。"""
+    prior_prec = 1.0 / prior_sd ** 2
+    theta = float(prior_mean)
+    info_total = prior_prec
+    for _ in range(max_iter):
+        p = np.clip(probability(theta, a, b, c), _P_EPS, 1.0 - _P_EPS)
+        ratio = (p - c) / (p * (1.0 - c))
+        score = float(np.sum(a * (responses - p) * ratio)) - (theta - prior_mean) * prior_prec
+        info_total = float(np.sum(a ** 2 * ratio ** 2 * p * (1.0 - p))) + prior_prec
+        step = score / info_total
+        theta = min(max(theta + step, THETA_MIN), THETA_MAX)
+        if abs(step) < tol:
+            break
+    return theta, float(1.0 / np.sqrt(info_total))
+
+
+def drifted_prior_sd(se: float, n_responses: int = 1) -> float:
+    """以上一次估计为先验时的先验标准差：按本批作答数计入能力漂移。"""
+    return math.sqrt(se ** 2 + n_responses * ABILITY_DRIFT ** 2)
+
+
+def update_ability(
+    theta: float, se: float, a: float, b: float, c: float, correct: bool
+) -> tuple[float, float]:
+    """单题增量更新：以当前 θ 和放大后的 se 为先验，对一次新作答做 EAP。"""
+    return estimate_eap(
+        np.array([a]), np.array([b]), np.array([c]), np.array([bool(correct)]),
+        prior_mean=theta, prior_sd=drifted_prior_sd(se),
+    )
+
+
+def select_max_information(
+    theta: float,
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    exclude: np.ndarray | None = None,
+    k: int = 1,
+    randomesque: int = 1,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """按当前 θ 处信息量选题，返回题目下标。
+
+    exclude 为布尔掩码（True 表示不可选）。randomesque > 1 时从信息量最高的
+    k × randomesque 道题中随机抽 k 道，避免同一能力段的学生总拿到同一批题。
+    """
+    info = information(theta, a, b, c)
+    if exclude is not None:
+        info = np.where(exclude, -np.inf, info)
+    available = int(np.isfinite(info).sum())
+    if available == 0:
+        return np.empty(0, dtype=np.int64)
+    pool = min(available, max(k, k * randomesque))
+    top = np.argpartition(-info, pool - 1)[:pool]
+    top = top[np.argsort(-info[top])]
+    if pool > k:
+        rng = rng or np.random.default_rng()
+        top = rng.choice(top, size=min(k, pool), replace=False)
+    return top[:k]
+
+
+@dataclass
+class CalibrationResult:
+    a: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+    theta: np.ndarray
+    item_counts: np.ndarray
+    iterations: int
+
+
+def calibrate(
+    user_idx: np.ndarray,
+    item_idx: np.ndarray,
+    correct: np.ndarray,
+    n_users: int,
+    n_items: int,
+    c: np.ndarray | None = None,
+    model: str = "2PL",
+    max_iter: int = 30,
+    tol: float = 1e-3,
+    b_init: np.ndarray | None = None,
+) -> CalibrationResult:
+    """联合 MAP 标定题目参数（a, b）与学生能力 θ。
+
+    作答以三个等长数组给出（学生下标、题目下标、是否答对）。先验：
+    θ ~ N(0, 1)，b ~ N(0, 2²)，a ~ N(1, 0.5²)；每轮对 θ、b、a 各做一步 Fisher
+    scoring，再把 θ 标准化到均值 0 方差 1 以固定量尺。model="3PL" 时使用传入的 c。
+    """
+    user_idx = np.asarray(user_idx, dtype=np.int64)
+    item_idx = np.asarray(item_idx, dtype=np.int64)
+    u = np.asarray(correct, dtype=np.float64)
+
+    if model == "3PL" and c is not None:
+        c_items = np.clip(np.asarray(c, dtype=np.float64), 0.0, 0.5)
+    else:
+        c_items = np.zeros(n_items)
+    item_counts = np.bincount(item_idx, minlength=n_items)
+
+    a = np.ones(n_items)
+    if b_init is not None:
+        b = np.asarray(b_init, dtype=np.float64).copy()
+    else:
+        # 以经验正确率的 logit 作为 b 的初值
+        item_correct = np.bincount(item_idx, weights=u, minlength=n_items)
+        p_item = (item_correct + 0.5) / (item_counts + 1.0)
+        b = -np.log(p_item / (1.0 - p_item))
+    theta = np.zeros(n_users)
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        # θ 步
+        ar, br, cr = a[item_idx], b[item_idx], c_items[item_idx]
+        p = np.clip(probability(theta[user_idx], ar, br, cr), _P_EPS, 1.0 - _P_EPS)
+        ratio = (p - cr) / (p * (1.0 - cr))
+        resid = (u - p) * ratio
+        curv = ratio ** 2 * p * (1.0 - p)
+        grad = np.bincount(user_idx, weights=ar * resid, minlength=n_users) - theta
+        info = np.bincount(user_idx, weights=ar ** 2 * curv, minlength=n_users) + 1.0
+        step_theta = grad / info
+        theta = np.clip(theta + step_theta, THETA_MIN, THETA_MAX)
+
+        # b、a 步（共用同一次概率计算）
+        diff = theta[user_idx] - br
+        p = np.clip(probability(theta[user_idx], ar, br, cr), _P_EPS, 1.0 - _P_EPS)
+        ratio = (p - cr) / (p * (1.0 - cr))
+        resid = (u - p) * ratio
+        curv = ratio ** 2 * p * (1.0 - p)
+
+        grad_b = -np.bincount(item_idx, weights=ar * resid, minlength=n_items) - b / 4.0
+        info_b = np.bincount(item_idx, weights=ar ** 2 * curv, minlength=n_items) + 0.25
+        step_b = grad_b / info_b
+        b = np.clip(b + step_b, B_MIN, B_MAX)
+
+        grad_a = np.bincount(item_idx, weights=diff * resid, minlength=n_items) - (a - 1.0) / 0.25
+        info_a = np.bincount(item_idx, weights=diff ** 2 * curv, minlength=n_items) + 4.0
+        step_a = grad_a / info_a
+        a = np.clip(a + step_a, A_MIN, A_MAX)
+
+        # 固定量尺：θ 标准化，题目参数同步线性变换
+        mean, sd = float(theta.mean()), float(theta.std()) or 1.0
+        theta = (theta - mean) / sd
+        b = np.clip((b - mean) / sd, B_MIN, B_MAX)
+        a = np.clip(a * sd, A_MIN, A_MAX)
+
+        if max(np.abs(step_theta).max(), np.abs(step_b).max(), np.abs(step_a).max()) < tol:
+            break
+
+    return CalibrationResult(
+        a=a, b=b, c=c_items, theta=theta, item_counts=item_counts, iterations=iterations,
+    )
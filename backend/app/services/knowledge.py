@@ -1,9 +1,14 @@
 """知识图谱服务 — 星系视图、节点探索、LLM扩展。"""
 
 import datetime
+import math
+import random
+import time
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.knowledge import KnowledgeNode, KnowledgeEdge, UserNodeStatus
+from app.models.knowledge import KnowledgeNode, KnowledgeEdge, UserNodeStatus, UserGalaxyStats
+from app.database import upsert_insert
+from app.services.knowledge_graph import LOD_LEVELS, get_graph, record_expansion
 from app.services.llm import chat_once_json
 
 EXPAND_SYSTEM = """你是一位英语词汇专家。给定一个英语单词，生成它的关联词网络。
@@ -15,14 +20,59 @@ EXPAND_SYSTEM = """你是一位英语词汇专家。给定一个英语单词，
 }
 请生成 5-8 个关联词，包含同义词、反义词、词族、搭配等多种关系。"""
 
+# 扩展出的新节点放在源节点附近（布局坐标单位），等下次离线布局再归位
+EXPAND_PLACEMENT_RADIUS = 15.0
 
-async def get_galaxy_view(user_id: int, db: AsyncSession, limit: int = 50, offset: int = 0) -> dict:
-    """获取用户知识图谱子图。"""
-    # Get nodes with user status
-    result = await db.execute(
-        select(KnowledgeNode).order_by(KnowledgeNode.frequency_rank.asc().nullslast()).offset(offset).limit(limit)
-    )
-    nodes = result.scalars().all()
+# 节点状态只升不降
+STATUS_ORDER = {"undiscovered": 0, "seen": 1, "familiar": 2, "mastered": 3}
+# 计入 user_galaxy_stats 的状态 -> 计数列
+_STATUS_COUNTERS = {"seen": "seen_count", "familiar": "familiar_count", "mastered": "mastered_count"}
+
+# 全局节点总数缓存：(过期时间 monotonic, 总数)；本进程扩展出新节点时失效，其他进程靠 TTL
+_NODE_COUNT_TTL_SECONDS = 600
+_node_count_cache: tuple[float, int] | None = None
+
+
+def _node_dict(n: KnowledgeNode, status: str) -> dict:
+    return {
+        "id": n.id, "word": n.word, "pos": n.pos, "definition": n.definition,
+        "definition_en": n.definition_en, "cefr_level": n.cefr_level,
+        "frequency_rank": n.frequency_rank, "example_sentence": n.example_sentence,
+        "x": n.x, "y": n.y, "cluster_id": n.cluster_id, "lod_level": n.lod_level,
+        "status": status,
+    }
+
+
+async def get_galaxy_view(
+    user_id: int,
+    db: AsyncSession,
+    limit: int = 50,
+    offset: int = 0,
+    bbox: tuple[float, float, float, float] | None = None,
+    lod: int = 3,
+) -> dict:
+    """获取用户知识图谱子图。
+
+    传入 bbox=(min_x, min_y, max_x, max_y) 时按视口从空间网格取节点（LOD 0..lod 层，
+    粗层优先），否则按词频分页。
+    """
+    truncated = False
+    if bbox is not None:
+        graph = await get_graph(db)
+        node_ids = graph.layout.query(*bbox, lod=lod, limit=limit + 1)
+        truncated = len(node_ids) > limit
+        node_ids = node_ids[:limit]
+        nodes = []
+        if node_ids:
+            result = await db.execute(select(KnowledgeNode).where(KnowledgeNode.id.in_(node_ids)))
+            rank = {node_id: i for i, node_id in enumerate(node_ids)}
+            nodes = sorted(result.scalars().all(), key=lambda n: rank[n.id])
+    else:
+        # Get nodes with user status
+        result = await db.execute(
+            select(KnowledgeNode).order_by(KnowledgeNode.frequency_rank.asc().nullslast()).offset(offset).limit(limit)
+        )
+        nodes = result.scalars().all()
     node_ids = [n.id for n in nodes]
 
     # Get user statuses
@@ -34,52 +84,40 @@ async def get_galaxy_view(user_id: int, db: AsyncSession, limit: int = 50, offse
         for s in result.scalars().all():
             status_map[s.node_id] = s.status
 
-    # Get edges between these nodes
+    # Edges between these nodes (from the in-memory graph)
     edges = []
     if node_ids:
-        result = await db.execute(
-            select(KnowledgeEdge).where(
-                KnowledgeEdge.source_node_id.in_(node_ids),
-                KnowledgeEdge.target_node_id.in_(node_ids),
-            )
-        )
+        graph = await get_graph(db)
         word_map = {n.id: n.word for n in nodes}
-        for e in result.scalars().all():
+        for e in graph.subgraph(node_ids):
             edges.append({
-                "source_id": e.source_node_id, "target_id": e.target_node_id,
-                "source_word": word_map.get(e.source_node_id, ""),
-                "target_word": word_map.get(e.target_node_id, ""),
-                "relation_type": e.relation_type, "weight": e.weight,
+                **e,
+                "source_word": word_map.get(e["source_id"], ""),
+                "target_word": word_map.get(e["target_id"], ""),
             })
 
     # Stats
-    total_result = await db.execute(select(func.count()).select_from(KnowledgeNode))
-    total_nodes = total_result.scalar() or 0
-    mastered_result = await db.execute(
-        select(func.count()).select_from(UserNodeStatus)
-        .where(UserNodeStatus.user_id == user_id, UserNodeStatus.status == "mastered")
-    )
-    mastered_count = mastered_result.scalar() or 0
-    seen_result = await db.execute(
-        select(func.count()).select_from(UserNodeStatus)
-        .where(UserNodeStatus.user_id == user_id, UserNodeStatus.status.in_(["seen", "familiar", "mastered"]))
-    )
-    seen_count = seen_result.scalar() or 0
+    total_nodes = await count_nodes(db)
+    counts = await _status_counts(user_id, db)
 
     return {
-        "nodes": [
-            {
-                "id": n.id, "word": n.word, "pos": n.pos, "definition": n.definition,
-                "definition_en": n.definition_en, "cefr_level": n.cefr_level,
-                "frequency_rank": n.frequency_rank, "example_sentence": n.example_sentence,
-                "status": status_map.get(n.id, "undiscovered"),
-            }
-            for n in nodes
-        ],
+        "nodes": [_node_dict(n, status_map.get(n.id, "undiscovered")) for n in nodes],
         "edges": edges,
         "total_nodes": total_nodes,
-        "mastered_count": mastered_count,
-        "seen_count": seen_count,
+        "mastered_count": counts["mastered"],
+        "seen_count": sum(counts.values()),
+        "truncated": truncated,
+    }
+
+
+async def get_galaxy_bounds(db: AsyncSession) -> dict:
+    """布局坐标范围与 LOD 层数，前端据此确定初始视口。"""
+    graph = await get_graph(db)
+    min_x, min_y, max_x, max_y = graph.layout.bounds
+    return {
+        "min_x": min_x, "min_y": min_y, "max_x": max_x, "max_y": max_y,
+        "lod_levels": len(graph.layout.tiers),
+        "placed_nodes": len(graph.layout),
     }
 
 
@@ -96,19 +134,10 @@ async def get_node_detail(node_id: int, user_id: int, db: AsyncSession) -> dict:
     )
     status = result.scalar_one_or_none()
 
-    # Get related nodes via edges
-    result = await db.execute(
-        select(KnowledgeEdge).where(
-            (KnowledgeEdge.source_node_id == node_id) | (KnowledgeEdge.target_node_id == node_id)
-        )
-    )
-    edge_rows = result.scalars().all()
-    related_ids = set()
-    edges = []
-    for e in edge_rows:
-        other_id = e.target_node_id if e.source_node_id == node_id else e.source_node_id
-        related_ids.add(other_id)
-        edges.append({"source_id": e.source_node_id, "target_id": e.target_node_id, "relation_type": e.relation_type, "weight": e.weight})
+    # Get related nodes via edges (from the in-memory graph)
+    graph = await get_graph(db)
+    edges = graph.neighbors_of(node_id)
+    related_ids = {e["target_id"] if e["source_id"] == node_id else e["source_id"] for e in edges}
 
     related_nodes = []
     if related_ids:
@@ -122,17 +151,21 @@ async def get_node_detail(node_id: int, user_id: int, db: AsyncSession) -> dict:
     await update_node_status(user_id, node_id, "seen", db)
 
     return {
-        "node": {
-            "id": node.id, "word": node.word, "pos": node.pos, "definition": node.definition,
-            "definition_en": node.definition_en, "cefr_level": node.cefr_level,
-            "frequency_rank": node.frequency_rank, "example_sentence": node.example_sentence,
-            "status": status.status if status else "seen",
-        },
+        "node": _node_dict(node, status.status if status else "seen"),
         "related": related_nodes,
         "edges": edges,
     }
 
 
+def _place_near(node: KnowledgeNode) -> tuple[float | None, float | None]:
+    """源节点附近的随机位置；源节点尚未布局时返回 (None, None)。"""
+    if node.x is None or node.y is None:
+        return None, None
+    angle = random.uniform(0, 2 * math.pi)
+    r = EXPAND_PLACEMENT_RADIUS * math.sqrt(random.uniform(0.25, 1.0))
+    return round(node.x + r * math.cos(angle), 2), round(node.y + r * math.sin(angle), 2)
+
+
 async def expand_node(node_id: int, user_id: int, db: AsyncSession) -> dict:
     """LLM 扩展节点关联词。"""
     result = await db.execute(select(KnowledgeNode).where(KnowledgeNode.id == node_id))
@@ -147,57 +180,123 @@ async def expand_node(node_id: int, user_id: int, db: AsyncSession) -> dict:
     except Exception:
         return {"new_nodes": [], "new_edges": []}
 
-    new_nodes = []
-    new_edges = []
+    # 同一个词只取第一次出现；跳过源词本身
+    items: dict[str, dict] = {}
     for item in data.get("related", []):
-        word = item.get("word", "").strip().lower()
-        if not word:
-            continue
-
-        # Check if node exists
-        result = await db.execute(select(KnowledgeNode).where(KnowledgeNode.word == word))
-        existing = result.scalar_one_or_none()
-        if existing:
-            target_id = existing.id
-        else:
-            new_node = KnowledgeNode(
-                word=word, pos=item.get("pos", ""),
-                definition=item.get("definition", ""), definition_en=item.get("definition_en"),
-                cefr_level=item.get("cefr_level", "A1"), example_sentence=item.get("example"),
-            )
-            db.add(new_node)
-            await db.flush()
-            target_id = new_node.id
-            new_nodes.append({"id": new_node.id, "word": word, "pos": new_node.pos, "definition": new_node.definition, "cefr_level": new_node.cefr_level})
-
-        # Check if edge exists
-        relation = item.get("relation", "collocation")
-        result = await db.execute(
-            select(KnowledgeEdge).where(
-                KnowledgeEdge.source_node_id == node_id, KnowledgeEdge.target_node_id == target_id
-            )
+        word = (item.get("word") or "").strip().lower()
+        if word and word != node.word and word not in items:
+            items[word] = item
+    if not items:
+        return {"new_nodes": [], "new_edges": []}
+
+    # 一次 IN 查询解析已有节点
+    result = await db.execute(select(KnowledgeNode.id, KnowledgeNode.word).where(KnowledgeNode.word.in_(items)))
+    word_ids = {word: nid for nid, word in result.all()}
+
+    # 缺失的节点一条多行 INSERT；并发扩展抢先插入的词由 ON CONFLICT 跳过
+    new_nodes = []
+    missing = [w for w in items if w not in word_ids]
+    if missing:
+        rows = []
+        for word in missing:
+            item = items[word]
+            x, y = _place_near(node)
+            rows.append({
+                "word": word, "pos": item.get("pos") or "",
+                "definition": item.get("definition") or "", "definition_en": item.get("definition_en"),
+                "cefr_level": item.get("cefr_level") or "A1", "example_sentence": item.get("example"),
+                "x": x, "y": y, "cluster_id": node.cluster_id, "lod_level": LOD_LEVELS - 1,
+            })
+        stmt = (
+            upsert_insert(db, KnowledgeNode).values(rows)
+            .on_conflict_do_nothing(index_elements=["word"])
+            .returning(KnowledgeNode.id, KnowledgeNode.word)
         )
-        if not result.scalar_one_or_none():
-            edge = KnowledgeEdge(source_node_id=node_id, target_node_id=target_id, relation_type=relation)
-            db.add(edge)
-            new_edges.append({"source_id": node_id, "target_id": target_id, "relation_type": relation})
+        inserted = {word: nid for nid, word in (await db.execute(stmt)).all()}
+        word_ids.update(inserted)
+        for row in rows:
+            if row["word"] in inserted:
+                new_nodes.append({
+                    "id": inserted[row["word"]], "word": row["word"], "pos": row["pos"],
+                    "definition": row["definition"], "cefr_level": row["cefr_level"],
+                    "x": row["x"], "y": row["y"], "cluster_id": row["cluster_id"],
+                })
+        # 被别的请求抢先插入的词，再查一次拿到 id
+        lost = [w for w in missing if w not in inserted]
+        if lost:
+            result = await db.execute(select(KnowledgeNode.id, KnowledgeNode.word).where(KnowledgeNode.word.in_(lost)))
+            word_ids.update({word: nid for nid, word in result.all()})
 
-    await db.flush()
+    # 边同理，依赖 (source, target, relation) 唯一约束去重
+    edge_rows = [
+        {"source_node_id": node_id, "target_node_id": word_ids[word],
+         "relation_type": item.get("relation") or "collocation", "weight": 1.0}
+        for word, item in items.items() if word in word_ids
+    ]
+    stmt = (
+        upsert_insert(db, KnowledgeEdge).values(edge_rows)
+        .on_conflict_do_nothing(index_elements=["source_node_id", "target_node_id", "relation_type"])
+        .returning(KnowledgeEdge.source_node_id, KnowledgeEdge.target_node_id, KnowledgeEdge.relation_type)
+    )
+    new_edges = [
+        {"source_id": source_id, "target_id": target_id, "relation_type": relation}
+        for source_id, target_id, relation in (await db.execute(stmt)).all()
+    ]
+
+    if new_nodes:
+        invalidate_node_count()
+    record_expansion(
+        new_nodes,
+        [(e["source_id"], e["target_id"], e["relation_type"], 1.0) for e in new_edges],
+    )
     return {"new_nodes": new_nodes, "new_edges": new_edges}
 
 
+async def get_neighborhood(node_id: int, hops: int, limit: int, db: AsyncSession) -> dict:
+    """k 跳邻域：节点（带跳数）及其内部的边。"""
+    graph = await get_graph(db)
+    hop_map = graph.k_hop(node_id, hops, limit)
+    if not hop_map:
+        return {"error": "节点不存在"}
+
+    result = await db.execute(select(KnowledgeNode).where(KnowledgeNode.id.in_(hop_map)))
+    nodes = sorted(result.scalars().all(), key=lambda n: (hop_map[n.id], n.frequency_rank or 10**9))
+    return {
+        "center_id": node_id,
+        "nodes": [
+            {"id": n.id, "word": n.word, "pos": n.pos, "definition": n.definition,
+             "cefr_level": n.cefr_level, "hops": hop_map[n.id]}
+            for n in nodes
+        ],
+        "edges": graph.subgraph(list(hop_map)),
+    }
+
+
+async def find_word_relation(source_word: str, target_word: str, db: AsyncSession) -> dict:
+    """两个单词之间的最短关联路径。"""
+    graph = await get_graph(db)
+    s, t = graph.index_of_word(source_word), graph.index_of_word(target_word)
+    if s is None or t is None:
+        return {"error": "单词不在图谱中"}
+    path = graph.shortest_path(int(graph.node_ids[s]), int(graph.node_ids[t]))
+    if not path:
+        return {"source": source_word, "target": target_word, "connected": False, "path": None}
+    return {"source": source_word, "target": target_word, "connected": True, "path": path}
+
+
 async def update_node_status(user_id: int, node_id: int, new_status: str, db: AsyncSession):
-    """更新用户节点学习状态。"""
+    """更新用户节点学习状态，状态变化时同步增减 user_galaxy_stats 计数。"""
     result = await db.execute(
         select(UserNodeStatus).where(UserNodeStatus.user_id == user_id, UserNodeStatus.node_id == node_id)
     )
     status = result.scalar_one_or_none()
     now = datetime.datetime.now(datetime.timezone.utc)
 
+    old_status = None
     if status:
+        old_status = status.status
         # Only upgrade status, never downgrade
-        order = {"undiscovered": 0, "seen": 1, "familiar": 2, "mastered": 3}
-        if order.get(new_status, 0) > order.get(status.status, 0):
+        if STATUS_ORDER.get(new_status, 0) > STATUS_ORDER.get(status.status, 0):
             status.status = new_status
         status.encounter_count += 1
         status.last_seen = now
@@ -205,21 +304,65 @@ async def update_node_status(user_id: int, node_id: int, new_status: str, db: As
         status = UserNodeStatus(user_id=user_id, node_id=node_id, status=new_status, encounter_count=1, last_seen=now)
         db.add(status)
 
+    if status.status != old_status:
+        await _shift_status_counter(user_id, old_status, status.status, db)
     await db.flush()
 
 
+async def _shift_status_counter(user_id: int, old_status: str | None, new_status: str, db: AsyncSession):
+    """计数行 upsert：旧状态列 -1，新状态列 +1（单条语句，并发安全）。"""
+    deltas = {}
+    if old_status in _STATUS_COUNTERS:
+        deltas[_STATUS_COUNTERS[old_status]] = -1
+    if new_status in _STATUS_COUNTERS:
+        deltas[_STATUS_COUNTERS[new_status]] = 1
+    if not deltas:
+        return
+    table = UserGalaxyStats.__table__
+    stmt = (
+        upsert_insert(db, UserGalaxyStats)
+        .values(user_id=user_id, **{col: max(d, 0) for col, d in deltas.items()})
+        .on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={col: table.c[col] + d for col, d in deltas.items()},
+        )
+    )
+    await db.execute(stmt)
+
+
+async def _status_counts(user_id: int, db: AsyncSession) -> dict:
+    """一次主键读取：{"seen", "familiar", "mastered"}。"""
+    result = await db.execute(
+        select(UserGalaxyStats.seen_count, UserGalaxyStats.familiar_count, UserGalaxyStats.mastered_count)
+        .where(UserGalaxyStats.user_id == user_id)
+    )
+    row = result.first()
+    if not row:
+        return {"seen": 0, "familiar": 0, "mastered": 0}
+    return {"seen": row[0], "familiar": row[1], "mastered": row[2]}
+
+
+async def count_nodes(db: AsyncSession) -> int:
+    """全局节点总数（带缓存）。"""
+    global _node_count_cache
+    if _node_count_cache and time.monotonic() < _node_count_cache[0]:
+        return _node_count_cache[1]
+    result = await db.execute(select(func.count()).select_from(KnowledgeNode))
+    total = result.scalar() or 0
+    _node_count_cache = (time.monotonic() + _NODE_COUNT_TTL_SECONDS, total)
+    return total
+
+
+def invalidate_node_count():
+    """新增节点后调用。"""
+    global _node_count_cache
+    _node_count_cache = None
+
+
 async def get_galaxy_stats(user_id: int, db: AsyncSession) -> dict:
     """获取图谱统计。"""
-    total_result = await db.execute(select(func.count()).select_from(KnowledgeNode))
-    total = total_result.scalar() or 0
-
-    status_counts = {}
-    for s in ["seen", "familiar", "mastered"]:
-        r = await db.execute(
-            select(func.count()).select_from(UserNodeStatus)
-            .where(UserNodeStatus.user_id == user_id, UserNodeStatus.status == s)
-        )
-        status_counts[s] = r.scalar() or 0
+    total = await count_nodes(db)
+    status_counts = await _status_counts(user_id, db)
 
     return {
         "total_nodes": total,
@@ -0,0 +1,437 @@
+"""知识图谱拓扑的内存索引 — CSR（压缩稀疏行）邻接表，NumPy 数组存储。
+
+节点属性（释义、例句等）仍在数据库里，这里只保存拓扑：
+    node_ids   下标 → knowledge_nodes.id
+    offsets    每个节点的邻接区间 [offsets[i], offsets[i+1])
+    neighbors  邻居下标
+    relations  关系类型编码（对应 relation_names）
+    weights    边权重
+    forward    True 表示这一条是原始边 source → target 方向
+
+边按无向存两份，查询多跳邻域、加权最短路、子图都不访问数据库。
+进程启动时整体加载（app.main 的 lifespan），expand_node 新增的节点和边先进入
+增量区，积累到一定数量后重建 CSR；多 worker 部署下每个进程定期整体重载，
+以读到其他进程写入的扩展结果。
+
+同时加载离线布局（x/y/lod_level，见 app.utils.galaxy_layout）并建立按 LOD 分层
+的空间网格索引，星系视图按视口矩形查询节点。
+"""
+
+import asyncio
+import heapq
+import time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.knowledge import KnowledgeNode, KnowledgeEdge
+
+# 增量边超过该数量时重建 CSR
+_COMPACT_THRESHOLD = 1024
+# 定期整体重载，合并其他 worker 的扩展结果
+_RELOAD_SECONDS = 600
+# 空间网格边长（布局坐标范围约为 ±1000）
+GRID_CELL_SIZE = 50.0
+LOD_LEVELS = 4
+
+
+class KnowledgeGraph:
+    """单词关联图的 CSR 邻接表。对外接口使用数据库 id，内部使用下标。"""
+
+    def __init__(self, node_ids, words, sources, targets, relation_types, weights):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.words = list(words)
+        self._index = {int(node_id): i for i, node_id in enumerate(self.node_ids)}
+        self._word_index = {w: i for i, w in enumerate(self.words)}
+        self.relation_names: list[str] = []
+        self._relation_codes: dict[str, int] = {}
+        self.layout = GalaxyLayout([], [], [], [], [])
+
+        src = np.array([self._index.get(int(s), -1) for s in sources], dtype=np.int64)
+        dst = np.array([self._index.get(int(t), -1) for t in targets], dtype=np.int64)
+        rel = np.array([self._relation_code(r) for r in relation_types], dtype=np.int16)
+        w = np.asarray(weights, dtype=np.float32)
+        valid = (src >= 0) & (dst >= 0)
+        self._build(src[valid], dst[valid], rel[valid], w[valid])
+
+    def _relation_code(self, name: str) -> int:
+        code = self._relation_codes.get(name)
+        if code is None:
+            code = len(self.relation_names)
+            self.relation_names.append(name)
+            self._relation_codes[name] = code
+        return code
+
+    def _build(self, src: np.ndarray, dst: np.ndarray, rel: np.ndarray, w: np.ndarray):
+        n = len(self.node_ids)
+        heads = np.concatenate([src, dst])
+        order = np.argsort(heads, kind="stable")
+        self.neighbors = np.concatenate([dst, src])[order]
+        self.relations = np.concatenate([rel, rel])[order]
+        self.weights = np.concatenate([w, w])[order]
+        self.forward = np.concatenate([np.ones(len(src), bool), np.zeros(len(src), bool)])[order]
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=n), out=self.offsets[1:])
+        self._offsets_list = self.offsets.tolist()
+        self._n_base = n
+        # 增量区：下标 → [(邻居, 关系编码, 权重, 是否正向)]
+        self._pending: dict[int, list[tuple[int, int, float, bool]]] = {}
+        self._pending_count = 0
+
+    # ------------------------------------------------------------------
+    # 基本查询
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.neighbors) // 2 + self._pending_count
+
+    def index_of(self, node_id: int) -> int | None:
+        return self._index.get(node_id)
+
+    def index_of_word(self, word: str) -> int | None:
+        return self._word_index.get(word.strip().lower())
+
+    def _gather(self, idx: np.ndarray) -> np.ndarray:
+        """一组节点在 CSR 中全部邻接项的位置。"""
+        idx = idx[idx < self._n_base]
+        starts = self.offsets[idx]
+        lengths = self.offsets[idx + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # 把每段 [start, start+len) 拼成一个位置数组
+        shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return shift + np.arange(total)
+
+    def neighbors_of(self, node_id: int) -> list[dict]:
+        """直接相连的节点及边信息（原始方向）。"""
+        i = self._index.get(node_id)
+        if i is None:
+            return []
+        pos = self._gather(np.array([i]))
+        items = [
+            (int(self.neighbors[p]), int(self.relations[p]), float(self.weights[p]), bool(self.forward[p]))
+            for p in pos
+        ] + self._pending.get(i, [])
+        return [self._edge_dict(i, j, rel, w, fwd) for j, rel, w, fwd in items]
+
+    def _edge_dict(self, i: int, j: int, rel: int, w: float, fwd: bool) -> dict:
+        a, b = (i, j) if fwd else (j, i)
+        return {
+            "source_id": int(self.node_ids[a]),
+            "target_id": int(self.node_ids[b]),
+            "relation_type": self.relation_names[rel],
+            "weight": w,
+        }
+
+    def k_hop(self, node_id: int, k: int = 2, limit: int | None = None) -> dict[int, int]:
+        """k 跳以内的节点 → 跳数（含自身，跳数 0）。按层向量化 BFS。"""
+        start = self._index.get(node_id)
+        if start is None:
+            return {}
+        visited = np.zeros(len(self.node_ids), dtype=bool)
+        visited[start] = True
+        hops = {node_id: 0}
+        frontier = np.array([start], dtype=np.int64)
+        for depth in range(1, k + 1):
+            nxt = self.neighbors[self._gather(frontier)]
+            extra = [j for i in frontier.tolist() for j, *_ in self._pending.get(i, ())]
+            if extra:
+                nxt = np.concatenate([nxt, np.array(extra, dtype=np.int64)])
+            nxt = np.unique(nxt)
+            nxt = nxt[~visited[nxt]]
+            if not len(nxt):
+                break
+            visited[nxt] = True
+            for j in self.node_ids[nxt].tolist():
+                hops[j] = depth
+                if limit and len(hops) >= limit:
+                    return hops
+            frontier = nxt
+        return hops
+
+    def _adjacent(self, i: int) -> list[tuple[int, int, float, bool]]:
+        """单个节点的邻接项 (邻居, 关系编码, 权重, 是否正向)。"""
+        items = []
+        if i < self._n_base:
+            lo, hi = self._offsets_list[i], self._offsets_list[i + 1]
+            items = list(zip(
+                self.neighbors[lo:hi].tolist(), self.relations[lo:hi].tolist(),
+                self.weights[lo:hi].tolist(), self.forward[lo:hi].tolist(),
+            ))
+        return items + self._pending.get(i, [])
+
+    def shortest_path(self, source_id: int, target_id: int) -> dict | None:
+        """加权最短路，边代价 = 1 / 权重。返回路径节点与每一步的关系，不连通时返回 None。
+
+        双向 Dijkstra：两端交替扩展，两侧堆顶距离之和不小于当前最优时停止，
+        只需访问两个端点附近的一小片节点。
+        """
+        s, t = self._index.get(source_id), self._index.get(target_id)
+        if s is None or t is None:
+            return None
+        dist: list[dict[int, float]] = [{s: 0.0}, {t: 0.0}]
+        prev: list[dict[int, tuple[int, int, float, bool]]] = [{}, {}]
+        heaps = [[(0.0, s)], [(0.0, t)]]
+        done: list[set[int]] = [set(), set()]
+        best, meet = (0.0, s) if s == t else (np.inf, None)
+
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, i = heapq.heappop(heaps[side])
+            if i in done[side]:
+                continue
+            done[side].add(i)
+            mine, other = dist[side], dist[1 - side]
+            for j, rel, w, fwd in self._adjacent(i):
+                nd = d + 1.0 / max(w, 1e-3)
+                if nd < mine.get(j, np.inf):
+                    mine[j] = nd
+                    prev[side][j] = (i, rel, w, fwd)
+                    heapq.heappush(heaps[side], (nd, j))
+                if j in other and mine[j] + other[j] < best:
+                    best, meet = mine[j] + other[j], j
+        if meet is None:
+            return None
+
+        # meet → s 与 meet → t 两段拼接
+        path, steps = [meet], []
+        while path[0] != s:
+            i, rel, w, fwd = prev[0][path[0]]
+            steps.insert(0, self._edge_dict(i, path[0], rel, w, fwd))
+            path.insert(0, i)
+        while path[-1] != t:
+            i, rel, w, fwd = prev[1][path[-1]]
+            steps.append(self._edge_dict(i, path[-1], rel, w, fwd))
+            path.append(i)
+        return {
+            "node_ids": [int(self.node_ids[i]) for i in path],
+            "words": [self.words[i] for i in path],
+            "edges": steps,
+            "cost": round(float(best), 4),
+        }
+
+    def subgraph(self, node_ids) -> list[dict]:
+        """给定节点集合内部的全部边（每条边只出现一次，保持原始方向）。"""
+        idx = np.array([self._index[n] for n in node_ids if n in self._index], dtype=np.int64)
+        if not len(idx):
+            return []
+        member = np.zeros(len(self.node_ids), dtype=bool)
+        member[idx] = True
+
+        pos = self._gather(idx)
+        heads = np.repeat(idx[idx < self._n_base], np.diff(self.offsets)[idx[idx < self._n_base]])
+        keep = self.forward[pos] & member[self.neighbors[pos]]
+        pos, heads = pos[keep], heads[keep]
+        edges = [
+            self._edge_dict(i, j, rel, w, True)
+            for i, j, rel, w in zip(
+                heads.tolist(), self.neighbors[pos].tolist(),
+                self.relations[pos].tolist(), self.weights[pos].tolist(),
+            )
+        ]
+        for i in idx.tolist():
+            for j, rel, w, fwd in self._pending.get(i, ()):
+                if fwd and member[j]:
+                    edges.append(self._edge_dict(i, j, rel, w, True))
+        return edges
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    def add_node(self, node_id: int, word: str) -> int:
+        i = self._index.get(node_id)
+        if i is not None:
+            return i
+        i = len(self.node_ids)
+        self.node_ids = np.append(self.node_ids, node_id)
+        self.words.append(word)
+        self._index[node_id] = i
+        self._word_index[word] = i
+        return i
+
+    def add_edge(self, source_id: int, target_id: int, relation_type: str, weight: float = 1.0):
+        s, t = self._index.get(source_id), self._index.get(target_id)
+        if s is None or t is None:
+            return
+        rel = self._relation_code(relation_type)
+        self._pending.setdefault(s, []).append((t, rel, float(weight), True))
+        self._pending.setdefault(t, []).append((s, rel, float(weight), False))
+        self._pending_count += 1
+        if self._pending_count >= _COMPACT_THRESHOLD:
+            self.compact()
+
+    def compact(self):
+        """把增量区合并进 CSR。"""
+        if not self._pending_count and self._n_base == len(self.node_ids):
+            return
+        heads = np.repeat(np.arange(self._n_base), np.diff(self.offsets))
+        fwd = self.forward
+        src = [heads[fwd]]
+        dst = [self.neighbors[fwd]]
+        rel = [self.relations[fwd]]
+        w = [self.weights[fwd]]
+        extra = [(i, j, r, wt) for i, items in self._pending.items() for j, r, wt, f in items if f]
+        if extra:
+            e = np.array(extra, dtype=np.float64)
+            src.append(e[:, 0].astype(np.int64))
+            dst.append(e[:, 1].astype(np.int64))
+            rel.append(e[:, 2].astype(np.int16))
+            w.append(e[:, 3].astype(np.float32))
+        self._build(np.concatenate(src), np.concatenate(dst), np.concatenate(rel), np.concatenate(w))
+
+
+class SpatialGrid:
+    """二维点的均匀网格索引：点按 (列, 行) 排序，矩形查询对每一列做两次二分。"""
+
+    _ROW_SPAN = 1 << 32
+
+    def __init__(self, ids: np.ndarray, x: np.ndarray, y: np.ndarray, cell_size: float = GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        keys = self._keys(x, y)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.x = np.asarray(x, dtype=np.float64)[order]
+        self.y = np.asarray(y, dtype=np.float64)[order]
+        if len(self.ids):
+            self._min_x, self._max_x = float(self.x.min()), float(self.x.max())
+            self._min_y, self._max_y = float(self.y.min()), float(self.y.max())
+        self._extra: list[tuple[int, float, float]] = []
+
+    def _cell(self, v):
+        return np.floor(np.asarray(v, dtype=np.float64) / self.cell_size).astype(np.int64)
+
+    def _keys(self, x, y):
+        return self._cell(x) * self._ROW_SPAN + (self._cell(y) + self._ROW_SPAN // 2)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self._extra)
+
+    def add(self, node_id: int, x: float, y: float):
+        self._extra.append((node_id, x, y))
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """矩形内的节点 id。"""
+        # 只在网格自身范围内枚举列，视口再大也不会展开出海量格子
+        if len(self.ids):
+            lo_x, hi_x = max(min_x, self._min_x), min(max_x, self._max_x)
+            lo_y, hi_y = max(min_y, self._min_y), min(max_y, self._max_y)
+        if not len(self.ids) or lo_x > hi_x or lo_y > hi_y:
+            found = np.empty(0, dtype=np.int64)
+        else:
+            cols = np.arange(self._cell(lo_x), self._cell(hi_x) + 1)
+            lo = np.searchsorted(self.keys, cols * self._ROW_SPAN + self._cell(lo_y) + self._ROW_SPAN // 2)
+            hi = np.searchsorted(self.keys, cols * self._ROW_SPAN + self._cell(hi_y) + self._ROW_SPAN // 2, side="right")
+            lengths = hi - lo
+            total = int(lengths.sum())
+            pos = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+            # 边界格子里的点再精确过滤一次
+            inside = (self.x[pos] >= min_x) & (self.x[pos] <= max_x) & (self.y[pos] >= min_y) & (self.y[pos] <= max_y)
+            found = self.ids[pos[inside]]
+        if self._extra:
+            extra = [i for i, x, y in self._extra if min_x <= x <= max_x and min_y <= y <= max_y]
+            found = np.concatenate([found, np.array(extra, dtype=np.int64)])
+        return found
+
+
+class GalaxyLayout:
+    """各 LOD 层一个 SpatialGrid；查询 lod=k 时返回第 0..k 层的节点，粗层在前。"""
+
+    def __init__(self, ids, x, y, lod, cluster):
+        ids = np.asarray(ids, dtype=np.int64)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        lod = np.clip(np.asarray(lod, dtype=np.int64), 0, LOD_LEVELS - 1)
+        self.positions = {
+            int(i): (float(a), float(b), None if np.isnan(c) else int(c))
+            for i, a, b, c in zip(ids, x, y, np.asarray(cluster, dtype=np.float64))
+        }
+        self.tiers = [SpatialGrid(ids[lod == level], x[lod == level], y[lod == level]) for level in range(LOD_LEVELS)]
+        if len(ids):
+            self.bounds = (float(x.min()), float(y.min()), float(x.max()), float(y.max()))
+        else:
+            self.bounds = (0.0, 0.0, 0.0, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def add(self, node_id: int, x: float, y: float, cluster_id: int | None):
+        self.positions[node_id] = (x, y, cluster_id)
+        self.tiers[-1].add(node_id, x, y)
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float, lod: int, limit: int) -> list[int]:
+        found: list[int] = []
+        for grid in self.tiers[:lod + 1]:
+            found.extend(grid.query(min_x, min_y, max_x, max_y).tolist())
+            if len(found) >= limit:
+                return found[:limit]
+        return found
+
+
+# ----------------------------------------------------------------------
+# 进程级单例
+# ----------------------------------------------------------------------
+
+_graph: KnowledgeGraph | None = None
+_loaded_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def load_graph(db: AsyncSession) -> KnowledgeGraph:
+    """从数据库整体加载拓扑（两条查询）。"""
+    global _graph, _loaded_at
+    nodes = (await db.execute(
+        select(
+            KnowledgeNode.id, KnowledgeNode.word, KnowledgeNode.x, KnowledgeNode.y,
+            KnowledgeNode.lod_level, KnowledgeNode.cluster_id,
+        )
+    )).all()
+    edges = (await db.execute(
+        select(
+            KnowledgeEdge.source_node_id, KnowledgeEdge.target_node_id,
+            KnowledgeEdge.relation_type, KnowledgeEdge.weight,
+        )
+    )).all()
+    graph = KnowledgeGraph(
+        [n[0] for n in nodes], [n[1] for n in nodes],
+        [e[0] for e in edges], [e[1] for e in edges],
+        [e[2] for e in edges], [e[3] if e[3] is not None else 1.0 for e in edges],
+    )
+    placed = [n for n in nodes if n[2] is not None and n[3] is not None]
+    graph.layout = GalaxyLayout(
+        [n[0] for n in placed], [n[2] for n in placed], [n[3] for n in placed],
+        [n[4] if n[4] is not None else LOD_LEVELS - 1 for n in placed],
+        [n[5] if n[5] is not None else np.nan for n in placed],
+    )
+    _graph, _loaded_at = graph, time.monotonic()
+    return graph
+
+
+async def get_graph(db: AsyncSession) -> KnowledgeGraph:
+    """返回内存图；未加载或已过期时从数据库加载。"""
+    if _graph is not None and time.monotonic() - _loaded_at < _RELOAD_SECONDS:
+        return _graph
+    async with _lock:
+        if _graph is not None and time.monotonic() - _loaded_at < _RELOAD_SECONDS:
+            return _graph
+        return await load_graph(db)
+
+
+def record_expansion(nodes: list[dict], edges: list[tuple[int, int, str, float]]):
+    """expand_node 写库后同步更新内存图；图尚未加载时忽略（加载时会读到）。
+
+    nodes: [{"id", "word", "x"?, "y"?, "cluster_id"?}]
+    """
+    if _graph is None:
+        return
+    for n in nodes:
+        _graph.add_node(n["id"], n["word"])
+        if n.get("x") is not None and n.get("y") is not None:
+            _graph.layout.add(n["id"], n["x"], n["y"], n.get("cluster_id"))
+    for source_id, target_id, relation_type, weight in edges:
+        _graph.add_edge(source_id, target_id, relation_type, weight)
@@ -1,17 +1,36 @@
-"""LLM 调用封装 — 使用 Gemini API (OpenAI 兼容接口)，支持流式输出。"""
+"""LLM 调用封装 — 使用 Gemini API (OpenAI 兼容接口)，支持流式输出。
 
+每次调用都记录到 app.services.metrics：耗时、首 token 时间（流式）、输入/输出 token、
+前缀缓存命中的 token 和重试次数，并把耗时计入当前请求的 LLM 时间。
+连接错误和 429/5xx 按 settings.llm_max_retries 重试；流式调用只在收到首块之前重试。
+"""
+
+import asyncio
+import json
+import time
 from collections.abc import AsyncIterator
 import httpx
 from app.config import settings
+from app.services import metrics
+from app.services.prompts import estimate_tokens
+from app.utils.json_stream import JsonStreamParser, parse_json
+
+JSON_ONLY_INSTRUCTION = "\n\n你必须返回且仅返回一个合法的 JSON 对象，不要包含 markdown 代码块标记。"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF = 0.5  # 秒，按重试次数线性增加
+
 
-API_URL = "https://generativelanguage.googleapis.com/v1beta/openai"
+def _completions_url() -> str:
+    return f"{settings.llm_base_url.rstrip('/')}/chat/completions"
 
 
 def _headers() -> dict:
-    return {
-        "Authorization": f"Bearer {settings.gemini_api_key}",
-        "Content-Type": "application/json",
-    }
+    headers = {"Content-Type": "application/json"}
+    # 本地模拟服务不需要密钥；空的 "Bearer " 是非法请求头
+    if settings.gemini_api_key:
+        headers["Authorization"] = f"Bearer {settings.gemini_api_key}"
+    return headers
 
 
 def _to_openai_messages(messages: list[dict], system_prompt: str = "") -> list[dict]:
@@ -24,6 +43,90 @@ def _to_openai_messages(messages: list[dict], system_prompt: str = "") -> list[d
     return out
 
 
+def _retryable(exc: httpx.HTTPError) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUSES
+    # 读超时已经等满了 timeout，不再重试
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, httpx.ReadTimeout)
+
+
+async def _backoff(kind: str, attempt: int, exc: httpx.HTTPError) -> bool:
+    """可以重试时计数并等待，返回 True；否则返回 False，由调用方抛出原异常。"""
+    if attempt >= settings.llm_max_retries or not _retryable(exc):
+        return False
+    metrics.LLM_RETRIES.inc(kind=kind)
+    await asyncio.sleep(RETRY_BACKOFF * (attempt + 1))
+    return True
+
+
+async def _post(client: httpx.AsyncClient, kind: str, body: dict) -> dict:
+    attempt = 0
+    while True:
+        try:
+            resp = await client.post(_completions_url(), headers=_headers(), json=body)
+            resp.raise_for_status()
+            return resp.json()
+        except httpx.HTTPError as e:
+            if not await _backoff(kind, attempt, e):
+                raise
+            attempt += 1
+
+
+async def _open_stream(client: httpx.AsyncClient, body: dict) -> httpx.Response:
+    attempt = 0
+    while True:
+        request = client.build_request("POST", _completions_url(), headers=_headers(), json=body)
+        try:
+            resp = await client.send(request, stream=True)
+            if resp.is_error:
+                await resp.aclose()
+                resp.raise_for_status()
+            return resp
+        except httpx.HTTPError as e:
+            if not await _backoff("stream", attempt, e):
+                raise
+            attempt += 1
+
+
+def _prompt_text(messages: list[dict]) -> str:
+    parts = []
+    for m in messages:
+        content = m.get("content", "")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            # 多模态消息只估算文本部分
+            parts.extend(p.get("text", "") for p in content if p.get("type") == "text")
+    return "\n".join(parts)
+
+
+def _record(kind: str, started: float, outcome: str, messages: list[dict], output: str = "", usage: dict | None = None):
+    elapsed = time.perf_counter() - started
+    metrics.LLM_REQUESTS.inc(kind=kind, outcome=outcome)
+    metrics.LLM_DURATION.observe(elapsed, kind=kind)
+    if outcome == "error":
+        metrics.add_llm_time(elapsed, kind=kind, outcome=outcome)
+        return
+    # 服务端返回 usage 时以它为准，否则按本地估算
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens")
+    if prompt_tokens is None:
+        prompt_tokens = estimate_tokens(_prompt_text(messages))
+    completion_tokens = usage.get("completion_tokens")
+    if completion_tokens is None:
+        completion_tokens = estimate_tokens(output)
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    metrics.LLM_TOKENS.inc(prompt_tokens, kind=kind, direction="in")
+    metrics.LLM_TOKENS.inc(completion_tokens, kind=kind, direction="out")
+    metrics.LLM_PROMPT_TOKENS.observe(prompt_tokens, kind=kind)
+    if cached:
+        metrics.LLM_CACHED_TOKENS.inc(cached, kind=kind)
+    metrics.add_llm_time(
+        elapsed, kind=kind, outcome=outcome,
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached_tokens=cached,
+    )
+
+
 async def chat_stream(
     messages: list[dict], system_prompt: str = ""
 ) -> AsyncIterator[str]:
@@ -32,26 +135,45 @@ async def chat_stream(
         "model": settings.gemini_model,
         "max_tokens": 2048,
         "stream": True,
+        "stream_options": {"include_usage": True},
         "messages": _to_openai_messages(messages, system_prompt),
     }
+    started = time.perf_counter()
+    outcome = "error"
+    parts: list[str] = []
+    usage = None
 
-    async with httpx.AsyncClient(timeout=60) as client:
-        async with client.stream("POST", f"{API_URL}/chat/completions", headers=_headers(), json=body) as resp:
-            resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if not line.startswith("data: "):
-                    continue
-                data = line[6:]
-                if data.strip() == "[DONE]":
-                    break
-                import json
-                event = json.loads(data)
-                choices = event.get("choices", [])
-                if choices:
-                    delta = choices[0].get("delta", {})
-                    text = delta.get("content", "")
-                    if text:
-                        yield text
+    try:
+        async with httpx.AsyncClient(timeout=60) as client:
+            resp = await _open_stream(client, body)
+            try:
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data.strip() == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    # include_usage 时最后一个数据块带 usage、choices 为空
+                    usage = event.get("usage") or usage
+                    choices = event.get("choices", [])
+                    if choices:
+                        delta = choices[0].get("delta", {})
+                        text = delta.get("content", "")
+                        if text:
+                            if not parts:
+                                metrics.LLM_TTFT.observe(time.perf_counter() - started, kind="stream")
+                            parts.append(text)
+                            yield text
+            finally:
+                await resp.aclose()
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        # 调用方提前结束（客户端断开、JSON 已完整）
+        outcome = "cancelled"
+        raise
+    finally:
+        _record("stream", started, outcome, body["messages"], "".join(parts), usage)
 
 
 async def chat_once(messages: list[dict], system_prompt: str = "") -> str:
@@ -61,12 +183,7 @@ async def chat_once(messages: list[dict], system_prompt: str = "") -> str:
         "max_tokens": 2048,
         "messages": _to_openai_messages(messages, system_prompt),
     }
-
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.post(f"{API_URL}/chat/completions", headers=_headers(), json=body)
-        resp.raise_for_status()
-        result = resp.json()
-        return result["choices"][0]["message"]["content"]
+    return await _complete("once", body, timeout=60)
 
 
 async def chat_once_vision(image_base64: str, system_prompt: str, user_prompt: str, media_type: str = "image/png") -> str:
@@ -82,23 +199,54 @@ async def chat_once_vision(image_base64: str, system_prompt: str, user_prompt: s
         },
     ]
     body = {"model": settings.gemini_model, "max_tokens": 4096, "messages": messages}
+    return await _complete("vision", body, timeout=120)
 
-    async with httpx.AsyncClient(timeout=120) as client:
-        resp = await client.post(f"{API_URL}/chat/completions", headers=_headers(), json=body)
-        resp.raise_for_status()
-        result = resp.json()
-        return result["choices"][0]["message"]["content"]
+
+async def _complete(kind: str, body: dict, timeout: float) -> str:
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            result = await _post(client, kind, body)
+        text = result["choices"][0]["message"]["content"]
+    except BaseException:
+        _record(kind, started, "error", body["messages"])
+        raise
+    _record(kind, started, "ok", body["messages"], text, result.get("usage"))
+    return text
 
 
 async def chat_once_json(system_prompt: str, user_prompt: str) -> dict:
-    """调用 Gemini API 并解析 JSON 响应。"""
-    import json as _json
-    full_system = system_prompt + "\n\n你必须返回且仅返回一个合法的 JSON 对象，不要包含 markdown 代码块标记。"
+    """调用 Gemini API 并解析 JSON 响应（容错修复代码块标记、多余逗号等格式问题）。"""
+    full_system = system_prompt + JSON_ONLY_INSTRUCTION
     text = await chat_once([{"role": "user", "content": user_prompt}], full_system)
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        cleaned = cleaned.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-    return _json.loads(cleaned)
+    return parse_json(text)
+
+
+async def chat_stream_json(system_prompt: str, user_prompt: str) -> AsyncIterator[tuple]:
+    """流式调用 Gemini API 并增量解析 JSON，逐个 yield 解析事件（见 app.utils.json_stream）：
+
+    - ("delta", path, text)：字符串值新到达的片段
+    - ("value", path, value)：值完整结束；path 以整数结尾时即一个完整的数组元素
+
+    最后一个事件总是 ("value", (), 根值)；输出被截断时根值是修复后的部分结果。
+    输出里没有任何 JSON 时抛出 ValueError。
+    """
+    parser = JsonStreamParser()
+    full_system = system_prompt + JSON_ONLY_INSTRUCTION
+    stream = chat_stream([{"role": "user", "content": user_prompt}], full_system)
+    try:
+        async for chunk in stream:
+            for event in parser.feed(chunk):
+                yield event
+            if parser.done:
+                # 根值已完整，不再等模型输出剩余内容
+                return
+    finally:
+        await stream.aclose()
+    for event in parser.finish():
+        yield event
+    if parser.value is None:
+        raise ValueError("no JSON value in model output")
 
 
 async def judge_answer(question_content: str, reference_answer: str, student_answer: str) -> dict:
@@ -122,11 +270,7 @@ async def judge_answer(question_content: str, reference_answer: str, student_ans
     ]
     try:
         text = await chat_once(messages, system_prompt)
-        import json as _json
-        cleaned = text.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-        result = _json.loads(cleaned)
+        result = parse_json(text)
         return {
             "is_correct": bool(result.get("is_correct", False)),
             "correct_answer": str(result.get("correct_answer", "")),
@@ -0,0 +1,317 @@
+"""进程内指标 — 计数器 / 直方图 / 仪表，按 Prometheus 文本格式输出（GET /metrics）。
+
+不依赖 prometheus_client，也不需要外部服务；每个 worker 进程各自统计，
+多 worker 部署时由抓取端按实例汇总。
+
+请求级计时：MetricsMiddleware 为每个请求建立一个 RequestTimings，放在 contextvar 里，
+数据库游标执行（instrument_engine）和 LLM 调用（app.services.llm）把耗时累加进去；
+请求内创建的后台任务继承同一个对象，所以流式响应里的 LLM 耗时也会计入。
+"""
+
+import asyncio
+import contextvars
+import logging
+import math
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from app.services import prompts
+
+logger = logging.getLogger(__name__)
+
+# 请求与数据库/LLM 耗时的分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 事件循环延迟分桶（秒）
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+LOOP_LAG_INTERVAL = 0.5
+# 单个请求最多记录的 SQL / LLM 事件数
+EVENT_LIMIT = 1000
+
+
+_INF_LABEL = 'le="+Inf"'
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict) -> tuple:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[_label_key(self.labelnames, labels)] = value
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # 标签组合 -> [各桶计数（不累计）..., 总数, 总和]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        row = self._values.get(key)
+        if row is None:
+            row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+                break
+        row[-2] += 1
+        row[-1] += value
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, row in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, _INF_LABEL)} {row[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {row[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_number(row[-1])}")
+        return lines
+
+
+_registry: list[_Metric] = []
+# 抓取时才计算的指标：返回 Prometheus 文本行
+_collectors: list[Callable[[], list[str]]] = []
+
+
+def register_collector(collector: Callable[[], list[str]]):
+    _collectors.append(collector)
+
+
+def render() -> str:
+    # collector 先运行，它们可能顺带更新已注册的指标
+    collected: list[str] = []
+    for collector in _collectors:
+        try:
+            collected.extend(collector())
+        except Exception:
+            logger.exception("metrics collector failed")
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.header())
+        lines.extend(metric.render())
+    lines.extend(collected)
+    return "\n".join(lines) + "\n"
+
+
+# ── 指标定义 ──
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds", "Total request time including streamed body", ("method", "route"))
+HTTP_DB = Histogram("http_request_db_seconds", "Database time per request", ("method", "route"))
+HTTP_LLM = Histogram("http_request_llm_seconds", "LLM call time per request", ("method", "route"))
+HTTP_QUEUE = Histogram(
+    "http_request_queue_seconds", "Time between the proxy X-Request-Start stamp and the app", ("method", "route"),
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+
+LLM_REQUESTS = Counter("llm_requests_total", "LLM API calls", ("kind", "outcome"))
+LLM_DURATION = Histogram("llm_request_duration_seconds", "LLM call duration", ("kind",))
+LLM_TTFT = Histogram("llm_time_to_first_token_seconds", "Time to first streamed token", ("kind",))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens (provider usage when reported, else local estimate)", ("kind", "direction"))
+LLM_PROMPT_TOKENS = Histogram("llm_prompt_tokens", "Prompt tokens per call", ("kind",), buckets=TOKEN_BUCKETS)
+LLM_CACHED_TOKENS = Counter("llm_cached_prompt_tokens_total", "Prompt tokens served from the provider prefix cache", ("kind",))
+LLM_RETRIES = Counter("llm_retries_total", "LLM calls retried after a transient error", ("kind",))
+LLM_CACHE = Counter("llm_cache_total", "Application-level LLM result caches", ("cache", "result"))
+
+LOOP_LAG = Histogram("event_loop_lag_seconds", "Event loop scheduling delay", buckets=LAG_BUCKETS)
+LOOP_LAG_MAX = Gauge("event_loop_lag_max_seconds", "Largest event loop delay since the last scrape")
+
+
+# ── 请求级计时 ──
+
+@dataclass
+class RequestTimings:
+    db: float = 0.0
+    llm: float = 0.0
+    # 慢请求采集（app.services.profiler）开启时逐条记录 SQL / LLM 调用
+    events: list[dict] | None = None
+
+    def record(self, event: dict):
+        if self.events is not None and len(self.events) < EVENT_LIMIT:
+            self.events.append(event)
+
+
+_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _timings.set(timings)
+    return timings
+
+
+def add_llm_time(seconds: float, **details):
+    timings = _timings.get()
+    if timings is not None:
+        timings.llm += seconds
+        timings.record({"type": "llm", "at": time.perf_counter() - seconds, "seconds": seconds, **details})
+
+
+def instrument_engine(engine):
+    """给 AsyncEngine 挂游标事件，统计 SQL 条数并把执行耗时计入当前请求。"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        DB_QUERIES.inc()
+        timings = _timings.get()
+        if timings is not None:
+            timings.db += elapsed
+            timings.record({
+                "type": "sql", "at": started, "seconds": elapsed,
+                "statement": statement, "executemany": executemany,
+            })
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("query_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+# ── 提示词模板 ──
+
+def _collect_prompt_templates() -> list[str]:
+    rows = prompts.stats()
+    lines = [
+        "# HELP prompt_template_calls_total Prompt template renders",
+        "# TYPE prompt_template_calls_total counter",
+    ]
+    lines += [f'prompt_template_calls_total{{template="{r["name"]}"}} {r["calls"]}' for r in rows]
+    lines += [
+        "# HELP prompt_template_tokens_total Estimated prompt tokens by static prefix / dynamic suffix",
+        "# TYPE prompt_template_tokens_total counter",
+    ]
+    for r in rows:
+        lines.append(f'prompt_template_tokens_total{{template="{r["name"]}",part="static"}} {r["static_tokens"]}')
+        lines.append(f'prompt_template_tokens_total{{template="{r["name"]}",part="dynamic"}} {r["dynamic_tokens"]}')
+    return lines
+
+
+register_collector(_collect_prompt_templates)
+
+
+# ── 事件循环延迟 ──
+
+_lag_task: asyncio.Task | None = None
+_lag_max = 0.0
+
+
+async def _watch_loop_lag(interval: float):
+    global _lag_max
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - expected, 0.0)
+        LOOP_LAG.observe(lag)
+        _lag_max = max(_lag_max, lag)
+
+
+def _collect_lag_max() -> list[str]:
+    global _lag_max
+    LOOP_LAG_MAX.set(_lag_max)
+    _lag_max = 0.0
+    return []
+
+
+register_collector(_collect_lag_max)
+
+
+def start_loop_monitor(interval: float = LOOP_LAG_INTERVAL):
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.create_task(_watch_loop_lag(interval))
+
+
+async def stop_loop_monitor():
+    global _lag_task
+    if _lag_task is not None:
+        _lag_task.cancel()
+        try:
+            await _lag_task
+        except asyncio.CancelledError:
+            pass
+        _lag_task = None
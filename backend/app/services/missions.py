@@ -5,8 +5,8 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.gamification import DailyMission
 from app.models.learning import LearningRecord
-from app.models.vocabulary import UserVocabulary
 from app.models.writing import WritingSubmission
+from app.services.spaced_repetition import count_due_words
 
 
 async def get_or_generate_missions(user_id: int, db: AsyncSession) -> list[DailyMission]:
@@ -46,16 +46,7 @@ async def _generate_missions(user_id: int, today: str, db: AsyncSession) -> list
     ))
 
     # Mission 2: Vocabulary review (if there are words to review)
-    now = datetime.datetime.now(datetime.timezone.utc)
-    result = await db.execute(
-        select(func.count()).select_from(UserVocabulary)
-        .where(
-            UserVocabulary.user_id == user_id,
-            (UserVocabulary.next_review_at <= now) | (UserVocabulary.next_review_at.is_(None)),
-            UserVocabulary.status != "mastered",
-        )
-    )
-    due_count = result.scalar() or 0
+    due_count = await count_due_words(user_id, db)
     if due_count > 0:
         review_target = min(due_count, 10)
         missions.append(DailyMission(
@@ -112,8 +103,10 @@ async def _generate_missions(user_id: int, today: str, db: AsyncSession) -> list
     return missions
 
 
-async def update_mission_progress(user_id: int, mission_type: str, db: AsyncSession) -> dict | None:
-    """Increment progress for a mission type. Returns mission info if completed."""
+async def update_mission_progress(
+    user_id: int, mission_type: str, db: AsyncSession, amount: int = 1
+) -> dict | None:
+    """Increment progress for a mission type by `amount`. Returns mission info if completed."""
     today = datetime.date.today().isoformat()
     result = await db.execute(
         select(DailyMission)
@@ -128,7 +121,7 @@ async def update_mission_progress(user_id: int, mission_type: str, db: AsyncSess
     if not mission:
         return None
 
-    mission.progress = min(mission.progress + 1, mission.target)
+    mission.progress = min(mission.progress + amount, mission.target)
     if mission.progress >= mission.target:
         mission.completed = True
         await db.flush()
@@ -1,7 +1,13 @@
-"""新手引导服务：水平测评 + 学习路径推荐。"""
+"""新手引导服务：水平测评（IRT 自适应分级测评）+ 学习路径推荐。"""
 
-import json
-from app.services.llm import chat_once_json
+import math
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.exam import ExamQuestion
+from app.services import irt
+from app.services.adaptive import ItemBank, MC_GUESSING, get_placement_item_bank
+from app.utils import json_codec
 
 
 ASSESSMENT_QUESTIONS = [
@@ -134,6 +140,197 @@ def evaluate_assessment(answers: list[dict]) -> dict:
     }
 
 
+# ── 自适应分级测评（CAT）──
+# 每题在当前能力估计处选信息量最大的题；CEFR 等级直接由能力值换算，不需要调用 LLM。
+# 停止规则按题库实际信息量设定：a≈1、c=0.25 的选择题单题信息量最多约 0.155，
+# 从先验 N(0, 1) 出发约 6 题后标准误才到 0.75，再往下每题收益很小。因此标准误
+# 降到 PLACEMENT_SE_TARGET，或下一题预计只能让标准误再降不到 PLACEMENT_MIN_SE_GAIN
+# 时停止；最多 PLACEMENT_MAX_ITEMS 题，少于原先的 10 题固定测评。
+
+PLACEMENT_SE_TARGET = 0.75
+PLACEMENT_MIN_SE_GAIN = 0.02
+PLACEMENT_MIN_ITEMS = 5
+PLACEMENT_MAX_ITEMS = 8
+# 考试题库中可用题目少于该数量时，退回内置的 ASSESSMENT_QUESTIONS
+PLACEMENT_MIN_BANK = 20
+
+_CEFR_B = {"A1": -1.6, "A2": -0.8, "B1": 0.0, "B2": 0.8, "C1": 1.6}
+_CEFR_CUTS = [(-1.0, "A1"), (0.0, "A2"), (1.0, "B1")]
+_builtin_bank: ItemBank | None = None
+
+
+def theta_to_cefr(theta: float) -> str:
+    for cut, level in _CEFR_CUTS:
+        if theta < cut:
+            return level
+    return "B2"
+
+
+def _get_builtin_bank() -> ItemBank:
+    global _builtin_bank
+    if _builtin_bank is None:
+        n = len(ASSESSMENT_QUESTIONS)
+        _builtin_bank = ItemBank(
+            ids=np.array([q["index"] for q in ASSESSMENT_QUESTIONS], dtype=np.int64),
+            a=np.ones(n),
+            b=np.array([_CEFR_B[q["difficulty"]] for q in ASSESSMENT_QUESTIONS]),
+            c=np.full(n, MC_GUESSING),
+            groups=np.full(n, -1, dtype=np.int64),
+        )
+    return _builtin_bank
+
+
+async def _placement_bank(source: str | None, db: AsyncSession) -> tuple[str, ItemBank]:
+    if source != "builtin":
+        bank = await get_placement_item_bank(db)
+        if source == "exam" or len(bank) >= PLACEMENT_MIN_BANK:
+            return "exam", bank
+    return "builtin", _get_builtin_bank()
+
+
+async def _load_item(source: str, item_id: int, db: AsyncSession) -> dict | None:
+    """取题目内容和答案（答案只在服务端使用）。"""
+    if source == "builtin":
+        if not 0 <= item_id < len(ASSESSMENT_QUESTIONS):
+            return None
+        q = ASSESSMENT_QUESTIONS[item_id]
+        return {"content": q["content"], "options": q["options"], "answer": q["answer"]}
+    result = await db.execute(
+        select(ExamQuestion.content, ExamQuestion.options_json, ExamQuestion.answer)
+        .where(ExamQuestion.id == item_id)
+    )
+    row = result.first()
+    if not row:
+        return None
+    return {
+        "content": row[0],
+        "options": json_codec.loads(row[1]) if row[1] else [],
+        "answer": row[2] or "",
+    }
+
+
+async def _next_question(source: str, bank: ItemBank, theta: float, seen: list[int], db: AsyncSession) -> dict | None:
+    picked = bank.select(theta, k=1, exclude_ids=seen)
+    if not picked:
+        return None
+    item = await _load_item(source, picked[0], db)
+    if not item:
+        return None
+    params = bank.params(picked[0])
+    return {
+        "item_id": picked[0],
+        "difficulty": theta_to_cefr(params[1]),
+        "content": item["content"],
+        "options": item["options"],
+    }
+
+
+def _next_se_gain(bank: ItemBank, theta: float, se: float, seen: list[int]) -> float:
+    """再答一道信息量最大的题，标准误预计能降多少（后验精度 = 先验精度 + 题目信息量）。"""
+    info = bank.max_information(theta, exclude_ids=seen)
+    return se - 1.0 / math.sqrt(1.0 / se ** 2 + info)
+
+
+def _progress(answered: int, se: float) -> dict:
+    return {
+        "answered": answered,
+        "max_items": PLACEMENT_MAX_ITEMS,
+        "se": round(se, 3),
+        "se_target": PLACEMENT_SE_TARGET,
+    }
+
+
+async def start_placement(db: AsyncSession) -> tuple[dict, dict]:
+    """开始分级测评，返回 (测评状态, 响应)。状态由调用方保存到 OnboardingProfile。"""
+    source, bank = await _placement_bank(None, db)
+    question = await _next_question(source, bank, 0.0, [], db)
+    state = {
+        "status": "in_progress",
+        "source": source,
+        "theta": 0.0,
+        "se": 1.0,
+        "items": [],
+        "pending_item_id": question["item_id"] if question else None,
+    }
+    return state, {"finished": False, "question": question, "progress": _progress(0, 1.0)}
+
+
+async def answer_placement(state: dict, item_id: int, answer: str, db: AsyncSession) -> tuple[dict, dict]:
+    """提交一题，更新能力估计并决定继续出题还是结束。返回 (新状态, 响应)。"""
+    if not state or state.get("status") != "in_progress":
+        return state, {"error": "测评未开始或已结束"}
+    if state.get("pending_item_id") != item_id:
+        return state, {"error": "题目与当前测评进度不一致"}
+
+    source, bank = await _placement_bank(state.get("source"), db)
+    item = await _load_item(source, item_id, db)
+    params = bank.params(item_id)
+    if not item or not params:
+        return state, {"error": "题目不存在"}
+
+    is_correct = answer.strip().upper()[:1] == item["answer"].strip().upper()[:1]
+    items = state["items"] + [{
+        "item_id": item_id, "is_correct": is_correct,
+        "a": params[0], "b": params[1], "c": params[2],
+    }]
+    arr = np.array([[i["a"], i["b"], i["c"]] for i in items])
+    theta, se = irt.estimate_eap(arr[:, 0], arr[:, 1], arr[:, 2], np.array([i["is_correct"] for i in items]))
+
+    seen = [i["item_id"] for i in items]
+    question = None
+    finished = len(items) >= PLACEMENT_MAX_ITEMS or (
+        len(items) >= PLACEMENT_MIN_ITEMS
+        and (se <= PLACEMENT_SE_TARGET or _next_se_gain(bank, theta, se, seen) < PLACEMENT_MIN_SE_GAIN)
+    )
+    if not finished:
+        question = await _next_question(source, bank, theta, seen, db)
+        finished = question is None
+
+    if finished:
+        result = _placement_result(source, items, theta, se)
+        return result, {"finished": True, "is_correct": is_correct, "result": result}
+
+    new_state = {
+        **state,
+        "theta": theta,
+        "se": se,
+        "items": items,
+        "pending_item_id": question["item_id"],
+    }
+    return new_state, {
+        "finished": False,
+        "is_correct": is_correct,
+        "question": question,
+        "progress": _progress(len(items), se),
+    }
+
+
+def _placement_result(source: str, items: list[dict], theta: float, se: float) -> dict:
+    correct = sum(1 for i in items if i["is_correct"])
+    # 分数取能力值在常模中的百分位
+    score = round(50 * (1 + math.erf(theta / math.sqrt(2))))
+    return {
+        "status": "completed",
+        "method": "cat",
+        "source": source,
+        "score": score,
+        "correct": correct,
+        "total": len(items),
+        "cefr_level": theta_to_cefr(theta),
+        "theta": round(theta, 3),
+        "se": round(se, 3),
+        "details": [
+            {
+                "item_id": i["item_id"],
+                "difficulty": theta_to_cefr(i["b"]),
+                "is_correct": i["is_correct"],
+                "a": i["a"], "b": i["b"], "c": i["c"],
+            }
+            for i in items
+        ],
+    }
+
+
 def recommend_learning_path(cefr_level: str, target_exam: str | None) -> str:
     """根据 CEFR 等级和目标考试推荐学习路径。"""
     if target_exam == "zhongkao":
@@ -0,0 +1,244 @@
+"""慢请求采集 — 超过 settings.slow_request_ms 的请求保存一份栈采样剖析和 SQL / LLM 调用记录，
+在管理后台（/admin/slow-requests）下载。
+
+采样：后台线程每 slow_request_sample_ms 读一次事件循环线程的栈（sys._current_frames），
+按当时正在运行的 asyncio 任务归属到请求。请求内创建的任务（BaseHTTPMiddleware、gather、
+create_task）由任务工厂登记到同一个请求；线程池里执行的同步代码不计入。
+事件循环在等数据库 / LLM 返回时没有栈可采，这部分时间看 SQL / LLM 记录，
+以及 ticks（请求存活期间的采样周期数）与 samples（采到本请求栈的次数）之差。
+
+所有请求都会采样并逐条记录 SQL / LLM，结束时未超过阈值或是 SSE 流式响应就丢弃；
+慢请求写成 JSON 文件（多 worker 共用同一目录），只保留最近 slow_request_keep 份。
+"""
+
+import asyncio
+import contextvars
+import datetime
+import functools
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.config import settings
+from app.services.metrics import RequestTimings
+from app.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+SQL_TEXT_LIMIT = 2000
+STACK_DEPTH_LIMIT = 128
+
+_ROOT = str(Path(__file__).resolve().parents[2]) + os.sep
+_ID_RE = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{6}$")
+
+
+@dataclass(eq=False)
+class Capture:
+    method: str
+    path: str
+    query: str
+    timings: RequestTimings
+    started: float = field(default_factory=time.perf_counter)
+    started_at: datetime.datetime = field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc))
+    # 折叠栈（根在前，";" 分隔）-> 采样次数，可直接喂给火焰图工具
+    stacks: Counter = field(default_factory=Counter)
+    ticks: int = 0
+    active: bool = True
+
+
+_capture: contextvars.ContextVar[Capture | None] = contextvars.ContextVar("slow_request_capture", default=None)
+_active: set[Capture] = set()
+_task_captures: "weakref.WeakKeyDictionary[asyncio.Task, Capture]" = weakref.WeakKeyDictionary()
+_sampler: "_Sampler | None" = None
+_previous_factory = None
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    if filename.startswith(_ROOT):
+        return filename[len(_ROOT):]
+    _, sep, tail = filename.rpartition("site-packages" + os.sep)
+    return tail if sep else filename
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float):
+        super().__init__(name="slow-request-sampler", daemon=True)
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if _active:
+                try:
+                    self.sample()
+                except Exception:
+                    logger.debug("profiler sample failed", exc_info=True)
+
+    def sample(self):
+        for capture in list(_active):
+            capture.ticks += 1
+        # current_task(loop) 可以从其他线程读取指定事件循环当前运行的任务
+        task = asyncio.current_task(self.loop)
+        capture = _task_captures.get(task) if task is not None else None
+        if capture is None or not capture.active:
+            return
+        # 栈只取到任务的根协程为止，下面是事件循环本身（asyncio 或 uvloop）
+        root = getattr(task.get_coro(), "cr_frame", None)
+        frame = sys._current_frames().get(self.loop_thread)
+        stack = []
+        while frame is not None and len(stack) < STACK_DEPTH_LIMIT:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{frame.f_lineno})")
+            if frame is root:
+                break
+            frame = frame.f_back
+        if stack:
+            capture.stacks[";".join(reversed(stack))] += 1
+
+
+def start():
+    """在事件循环里调用（lifespan 启动时）：装任务工厂并启动采样线程。"""
+    global _sampler, _previous_factory
+    if settings.slow_request_ms <= 0 or _sampler is not None:
+        return
+    loop = asyncio.get_running_loop()
+    previous = _previous_factory = loop.get_task_factory()
+
+    def task_factory(loop, coro, **kwargs):
+        task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        capture = context.get(_capture) if context is not None else _capture.get()
+        if capture is not None and capture.active:
+            _task_captures[task] = capture
+        return task
+
+    loop.set_task_factory(task_factory)
+    _sampler = _Sampler(loop, settings.slow_request_sample_ms / 1000)
+    _sampler.start()
+
+
+def stop():
+    global _sampler
+    if _sampler is None:
+        return
+    _sampler.stopped.set()
+    _sampler.join(timeout=1)
+    _sampler.loop.set_task_factory(_previous_factory)
+    _sampler = None
+    _active.clear()
+
+
+def begin(scope: dict, timings: RequestTimings) -> Capture | None:
+    """请求开始时由 MetricsMiddleware 调用；采集未开启时返回 None。"""
+    if _sampler is None:
+        return None
+    capture = Capture(
+        method=scope["method"], path=scope["path"],
+        query=scope.get("query_string", b"").decode("latin-1"), timings=timings,
+    )
+    timings.events = []
+    _capture.set(capture)
+    task = asyncio.current_task()
+    if task is not None:
+        _task_captures[task] = capture
+    _active.add(capture)
+    return capture
+
+
+async def finish(capture: Capture, route: str, status: int, duration: float, streaming: bool):
+    """请求结束：超过阈值的非流式请求落盘。"""
+    capture.active = False
+    _active.discard(capture)
+    if streaming or duration * 1000 < settings.slow_request_ms:
+        return
+    bundle = _bundle(capture, route, status, duration)
+    try:
+        await asyncio.to_thread(_save, bundle)
+    except OSError:
+        logger.exception("failed to save slow request profile")
+
+
+def _bundle(capture: Capture, route: str, status: int, duration: float) -> dict:
+    sql, llm = [], []
+    for event in capture.timings.events or []:
+        row = {
+            "at_ms": round((event["at"] - capture.started) * 1000, 2),
+            "duration_ms": round(event["seconds"] * 1000, 2),
+        }
+        if event["type"] == "sql":
+            row["statement"] = event["statement"][:SQL_TEXT_LIMIT]
+            row["executemany"] = event["executemany"]
+            sql.append(row)
+        else:
+            row.update({k: v for k, v in event.items() if k not in ("type", "at", "seconds")})
+            llm.append(row)
+    return {
+        "id": f"{capture.started_at:%Y%m%dT%H%M%S}-{secrets.token_hex(3)}",
+        "method": capture.method,
+        "path": capture.path,
+        "query": capture.query,
+        "route": route,
+        "status": status,
+        "started_at": capture.started_at.isoformat(),
+        "duration_ms": round(duration * 1000, 1),
+        "db_ms": round(capture.timings.db * 1000, 1),
+        "llm_ms": round(capture.timings.llm * 1000, 1),
+        "sample_interval_ms": settings.slow_request_sample_ms,
+        "ticks": capture.ticks,
+        "samples": sum(capture.stacks.values()),
+        "stacks": [{"stack": stack, "count": count} for stack, count in capture.stacks.most_common()],
+        "sql": sql,
+        "llm": llm,
+    }
+
+
+def _dir() -> Path:
+    return Path(settings.slow_request_dir)
+
+
+def _save(bundle: dict):
+    directory = _dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{bundle['id']}.json").write_bytes(json_codec.dumpb(bundle))
+    # 文件名以时间开头，按名字排序即按时间排序
+    files = sorted(directory.glob("*.json"))
+    for old in files[:max(len(files) - settings.slow_request_keep, 0)]:
+        old.unlink(missing_ok=True)
+
+
+def list_profiles() -> list[dict]:
+    """最近的慢请求摘要，新的在前。"""
+    directory = _dir()
+    if not directory.is_dir():
+        return []
+    rows = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            bundle = json_codec.loads(path.read_bytes())
+        except (OSError, ValueError):
+            continue
+        rows.append({
+            "id": bundle["id"], "method": bundle["method"], "path": bundle["path"], "route": bundle["route"],
+            "status": bundle["status"], "started_at": bundle["started_at"], "duration_ms": bundle["duration_ms"],
+            "db_ms": bundle["db_ms"], "llm_ms": bundle["llm_ms"],
+            "sql_count": len(bundle["sql"]), "llm_count": len(bundle["llm"]), "samples": bundle["samples"],
+        })
+    return rows
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if not _ID_RE.match(profile_id):
+        return None
+    path = _dir() / f"{profile_id}.json"
+    return path if path.is_file() else None
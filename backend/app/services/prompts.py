@@ -0,0 +1,96 @@
+"""提示词模板注册表 — 静态部分在前、可变部分在后，便于模型服务端的前缀缓存命中。
+
+每个模板分两段：
+- static：与用户和请求无关的长文本（角色设定、规则、JSON 格式说明）。可以带少量低基数参数
+  （如 CEFR 等级），按参数组合缓存渲染结果，同一组合只 format 一次
+- dynamic：每次请求都不同的内容（年级、学生输入、作文正文……），始终拼在最后
+
+两段都按 str.format 渲染，字面量花括号写成 {{ }}。
+模板在使用它的模块里通过 register() 定义；每个模板累计调用次数和 token 估算（见 stats()），
+用来衡量可缓存前缀占输入的比例。
+"""
+
+import re
+import string
+from dataclasses import dataclass, field
+
+# 每个模板最多缓存的静态部分组合数
+STATIC_CACHE_SIZE = 64
+
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """本地估算 token 数：CJK 字符每个约 1 token，其余字符约 4 个 1 token。"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _fields(template: str) -> tuple[str, ...]:
+    names = []
+    for _, name, _, _ in string.Formatter().parse(template):
+        if name and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+@dataclass
+class PromptTemplate:
+    name: str
+    static: str
+    dynamic: str = ""
+    calls: int = 0
+    static_tokens: int = 0
+    dynamic_tokens: int = 0
+    static_fields: tuple[str, ...] = field(init=False)
+    _static_cache: dict[tuple, tuple[str, int]] = field(init=False, default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self.static_fields = _fields(self.static)
+
+    def render(self, **values) -> str:
+        key = tuple(values[f] for f in self.static_fields)
+        cached = self._static_cache.get(key)
+        if cached is None:
+            text = self.static.format(**{f: values[f] for f in self.static_fields})
+            cached = (text, estimate_tokens(text))
+            if len(self._static_cache) >= STATIC_CACHE_SIZE:
+                self._static_cache.clear()
+            self._static_cache[key] = cached
+        static, static_tokens = cached
+        dynamic = self.dynamic.format(**values) if self.dynamic else ""
+
+        self.calls += 1
+        self.static_tokens += static_tokens
+        self.dynamic_tokens += estimate_tokens(dynamic)
+        return static + dynamic
+
+
+_registry: dict[str, PromptTemplate] = {}
+
+
+def register(name: str, static: str, dynamic: str = "") -> PromptTemplate:
+    """注册模板；同名重复注册（如模块重新加载）时覆盖。"""
+    template = PromptTemplate(name, static, dynamic)
+    _registry[name] = template
+    return template
+
+
+def get(name: str) -> PromptTemplate:
+    return _registry[name]
+
+
+def stats() -> list[dict]:
+    """各模板的调用次数和 token 估算；static_ratio 为可被前缀缓存的比例。"""
+    rows = []
+    for t in _registry.values():
+        total = t.static_tokens + t.dynamic_tokens
+        rows.append({
+            "name": t.name,
+            "calls": t.calls,
+            "static_tokens": t.static_tokens,
+            "dynamic_tokens": t.dynamic_tokens,
+            "avg_tokens": round(total / t.calls, 1) if t.calls else 0.0,
+            "static_ratio": round(t.static_tokens / total, 3) if total else 0.0,
+        })
+    return rows
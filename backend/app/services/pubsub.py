@@ -0,0 +1,182 @@
+"""发布订阅通道 — 实时功能（对战竞技场等）的消息路由。
+
+单进程部署用 MemoryBroker；多 worker 部署设置 PUBSUB_BACKEND=redis，
+消息经 Redis pub/sub 在各 worker 之间转发，连接在哪个 worker 上都能收到。
+
+每个订阅有自己的队列和消费任务：同一订阅内消息按发布顺序逐条处理，
+一个处理函数变慢不会阻塞其他订阅。
+
+broker 同时提供带过期时间的计数器（incr_counter），用于需要在各 worker 间共享的
+配额计数（如故事预生成的每日限额）；Redis 后端下重启进程也不会清零。
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable
+from app.config import settings
+from app.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class Subscription:
+    def __init__(self, broker: "MemoryBroker", channel: str, handler: Handler):
+        self.broker = broker
+        self.channel = channel
+        self._handler = handler
+        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def deliver(self, message: dict):
+        self._queue.put_nowait(message)
+
+    async def _run(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._handler(message)
+            except Exception:
+                logger.exception("pubsub handler failed on %s", self.channel)
+
+    async def close(self):
+        await self.broker.unsubscribe(self)
+        self._task.cancel()
+
+
+class MemoryBroker:
+    """进程内实现。"""
+
+    def __init__(self):
+        self._subs: dict[str, set[Subscription]] = defaultdict(set)
+        # key -> (过期时间 monotonic, 计数)
+        self._counters: dict[str, tuple[float, int]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        for subs in list(self._subs.values()):
+            for sub in list(subs):
+                await sub.close()
+
+    async def publish(self, channel: str, message: dict):
+        self._dispatch(channel, message)
+
+    def _dispatch(self, channel: str, message: dict):
+        for sub in list(self._subs.get(channel, ())):
+            sub.deliver(message)
+
+    async def incr_counter(self, key: str, amount: int, ttl_seconds: int) -> int:
+        """计数器加 amount 并返回新值；计数在 ttl_seconds 秒后过期（按日配额时 key 里带日期）。"""
+        now = time.monotonic()
+        for k, (expires, _) in list(self._counters.items()):
+            if expires <= now:
+                del self._counters[k]
+        _, value = self._counters.get(key, (0.0, 0))
+        self._counters[key] = (now + ttl_seconds, value + amount)
+        return value + amount
+
+    async def subscribe(self, channel: str, handler: Handler) -> Subscription:
+        sub = Subscription(self, channel, handler)
+        self._subs[channel].add(sub)
+        return sub
+
+    async def unsubscribe(self, sub: Subscription):
+        subs = self._subs.get(sub.channel)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.channel]
+
+
+class RedisBroker(MemoryBroker):
+    """Redis pub/sub 实现：一个 PubSub 连接承载本进程的全部订阅，收到的消息再分发给本地订阅。"""
+
+    def __init__(self, url: str):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._pubsub = self._redis.pubsub()
+        self._reader: asyncio.Task | None = None
+
+    async def start(self):
+        self._reader = asyncio.create_task(self._read())
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+        await super().stop()
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+    async def publish(self, channel: str, message: dict):
+        await self._redis.publish(channel, json_codec.dumpb(message))
+
+    async def incr_counter(self, key: str, amount: int, ttl_seconds: int) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, amount)
+            pipe.expire(key, ttl_seconds)
+            value, _ = await pipe.execute()
+        return int(value)
+
+    async def subscribe(self, channel: str, handler: Handler) -> Subscription:
+        first = channel not in self._subs
+        sub = await super().subscribe(channel, handler)
+        if first:
+            await self._pubsub.subscribe(channel)
+        return sub
+
+    async def unsubscribe(self, sub: Subscription):
+        await super().unsubscribe(sub)
+        if sub.channel not in self._subs:
+            await self._pubsub.unsubscribe(sub.channel)
+
+    async def _read(self):
+        while True:
+            if not self._pubsub.subscribed:
+                # 还没有任何订阅时 PubSub 连接尚未建立
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("redis pubsub read failed")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            self._dispatch(channel, json_codec.loads(message["data"]))
+
+
+_broker: MemoryBroker | None = None
+
+
+def get_broker() -> MemoryBroker:
+    global _broker
+    if _broker is None:
+        if settings.pubsub_backend == "redis":
+            _broker = RedisBroker(settings.redis_url)
+        else:
+            _broker = MemoryBroker()
+    return _broker
+
+
+async def start_broker():
+    await get_broker().start()
+
+
+async def stop_broker():
+    global _broker
+    if _broker is not None:
+        await _broker.stop()
+        _broker = None
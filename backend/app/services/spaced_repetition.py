@@ -1,72 +1,314 @@
-"""SM-2 spaced repetition algorithm."""
+"""Spaced repetition scheduling based on the FSRS memory model (see app.services.fsrs)."""
 
 import datetime
-from sqlalchemy import select
+import time
+import numpy as np
+from sqlalchemy import select, update, insert, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.vocabulary import UserVocabulary
-
-# Intervals in days based on feedback
-# "known" -> interval * 2.5
-# "fuzzy" -> interval * 1.2
-# "forgot" -> reset to 1 day
-
-def compute_next_review(current_interval_days: float, feedback: str) -> tuple[float, str]:
-    """Returns (new_interval_days, new_status)."""
-    if feedback == "known":
-        new_interval = max(current_interval_days * 2.5, 1)
-        status = "mastered" if new_interval >= 21 else "learning"
-    elif feedback == "fuzzy":
-        new_interval = max(current_interval_days * 1.2, 1)
-        status = "learning"
-    else:  # forgot
-        new_interval = 1
-        status = "new"
-    return new_interval, status
+from app.models.vocabulary import UserVocabulary, VocabReviewLog, VocabSchedulerParams
+from app.services import fsrs
+
+# Review feedback -> FSRS rating
+FEEDBACK_RATING = {
+    "forgot": fsrs.RATING_AGAIN,
+    "fuzzy": fsrs.RATING_HARD,
+    "known": fsrs.RATING_GOOD,
+    "easy": fsrs.RATING_EASY,
+}
+
+# Words whose next interval reaches this many days count as mastered
+MASTERED_INTERVAL_DAYS = 21
+
+# Per-user due counter: user_id -> (expires_at monotonic, next due_at after now, count)
+_DUE_COUNT_TTL_SECONDS = 300
+_due_count_cache: dict[int, tuple[float, datetime.datetime | None, int]] = {}
+
+
+def _as_utc(dt: datetime.datetime | None) -> datetime.datetime | None:
+    """SQLite returns naive datetimes; treat them as UTC."""
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def compute_next_review(
+    stability: float | None,
+    difficulty: float | None,
+    elapsed_days: float,
+    feedback: str,
+    weights: np.ndarray = fsrs.DEFAULT_WEIGHTS,
+    retention: float = fsrs.DESIRED_RETENTION,
+) -> dict:
+    """Returns the new memory state, interval and status for one review.
+
+    stability is None for a word that has never been reviewed.
+    """
+    rating = FEEDBACK_RATING.get(feedback, fsrs.RATING_AGAIN)
+    s, d, r = fsrs.review(
+        np.nan if stability is None else stability,
+        np.nan if difficulty is None else difficulty,
+        elapsed_days, rating, weights,
+    )
+    interval = float(fsrs.next_interval(s, retention))
+    return {
+        "rating": rating,
+        "stability": float(s),
+        "difficulty": float(d),
+        "retrievability": float(r),
+        "interval_days": interval,
+        "status": _status(rating, interval),
+    }
+
+
+def _status(rating: int, interval_days: float) -> str:
+    if rating == fsrs.RATING_AGAIN:
+        return "new"
+    if interval_days >= MASTERED_INTERVAL_DAYS:
+        return "mastered"
+    return "learning"
+
+
+async def get_user_scheduler(user_id: int, db: AsyncSession) -> tuple[np.ndarray, float]:
+    """Per-user FSRS weights and desired retention (defaults until optimized)."""
+    result = await db.execute(
+        select(VocabSchedulerParams.weights_json, VocabSchedulerParams.desired_retention)
+        .where(VocabSchedulerParams.user_id == user_id)
+    )
+    row = result.first()
+    if not row or len(row[0]) != len(fsrs.DEFAULT_WEIGHTS):
+        return fsrs.DEFAULT_WEIGHTS, fsrs.DESIRED_RETENTION
+    return np.asarray(row[0], dtype=np.float64), row[1]
+
+
+async def save_user_scheduler(user_id: int, fitted: fsrs.OptimizeResult, db: AsyncSession) -> VocabSchedulerParams:
+    """Store weights produced by fsrs.optimize for a user."""
+    result = await db.execute(
+        select(VocabSchedulerParams).where(VocabSchedulerParams.user_id == user_id)
+    )
+    params = result.scalar_one_or_none()
+    if not params:
+        params = VocabSchedulerParams(user_id=user_id, desired_retention=fsrs.DESIRED_RETENTION)
+        db.add(params)
+    params.weights_json = [round(float(w), 4) for w in fitted.weights]
+    params.n_reviews = fitted.n_reviews
+    params.log_loss = fitted.loss_after
+    return params
+
+
+def _due_queue(user_id: int):
+    """Conditions matching the partial index ix_user_vocabulary_due."""
+    return (UserVocabulary.user_id == user_id, UserVocabulary.status != "mastered")
 
 
 async def get_due_words(user_id: int, db: AsyncSession, limit: int = 20) -> list[UserVocabulary]:
-    """Get words due for review (next_review_at <= now or is NULL)."""
+    """Get words due for review, never-reviewed words first."""
     now = datetime.datetime.now(datetime.timezone.utc)
     result = await db.execute(
         select(UserVocabulary)
-        .where(UserVocabulary.user_id == user_id)
-        .where(
-            (UserVocabulary.next_review_at <= now) | (UserVocabulary.next_review_at.is_(None))
-        )
-        .where(UserVocabulary.status != "mastered")
-        .order_by(UserVocabulary.next_review_at.asc().nullsfirst())
+        .where(*_due_queue(user_id), UserVocabulary.due_at <= now)
+        .order_by(UserVocabulary.due_at.asc())
         .limit(limit)
     )
     return list(result.scalars().all())
 
 
-async def process_review(word_id: int, user_id: int, feedback: str, db: AsyncSession) -> dict:
-    """Process a review feedback and update the word's schedule."""
+async def count_due_words(user_id: int, db: AsyncSession) -> int:
+    """Number of words due now.
+
+    Cached per user until the next word becomes due (or the TTL passes, so other
+    workers' reviews show up); both queries are index-only on the due queue.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    hit = _due_count_cache.get(user_id)
+    if hit and time.monotonic() < hit[0] and (hit[1] is None or now < hit[1]):
+        return hit[2]
+
     result = await db.execute(
-        select(UserVocabulary)
-        .where(UserVocabulary.id == word_id, UserVocabulary.user_id == user_id)
+        select(func.count()).select_from(UserVocabulary)
+        .where(*_due_queue(user_id), UserVocabulary.due_at <= now)
+    )
+    count = result.scalar() or 0
+    result = await db.execute(
+        select(func.min(UserVocabulary.due_at)).where(*_due_queue(user_id), UserVocabulary.due_at > now)
     )
-    word = result.scalar_one_or_none()
-    if not word:
+    _due_count_cache[user_id] = (time.monotonic() + _DUE_COUNT_TTL_SECONDS, _as_utc(result.scalar()), count)
+    return count
+
+
+def invalidate_due_count(user_id: int):
+    """Call after adding or reviewing words."""
+    _due_count_cache.pop(user_id, None)
+
+
+async def process_reviews(
+    user_id: int, reviews: list[dict], db: AsyncSession, sent_at: datetime.datetime | None = None
+) -> dict:
+    """Apply a whole review session at once.
+
+    reviews: [{"word_id", "feedback", "latency_ms"?, "reviewed_at"?}] in the order they happened.
+    Words are loaded with one query, memory states are updated with vectorized FSRS
+    (a word reviewed twice in the session is handled in a second pass), and the
+    schedule updates and review log rows are written as two bulk statements.
+
+    Clients queue reviews and submit them later, so each review carries the time it
+    happened. sent_at is the client clock at submission and corrects client clock skew;
+    the result is clamped to [last_review_at, now]. Reviews without a time use now.
+    """
+    word_ids = {r["word_id"] for r in reviews}
+    result = await db.execute(
+        select(
+            UserVocabulary.id, UserVocabulary.word, UserVocabulary.stability,
+            UserVocabulary.difficulty, UserVocabulary.last_review_at,
+            UserVocabulary.reps, UserVocabulary.lapses,
+        )
+        .where(UserVocabulary.user_id == user_id, UserVocabulary.id.in_(word_ids))
+    )
+    words = {row.id: dict(row._mapping) for row in result.all()}
+    reviews = [r for r in reviews if r["word_id"] in words]
+    if not reviews:
         return {"error": "Word not found"}
 
-    # Calculate current interval
     now = datetime.datetime.now(datetime.timezone.utc)
-    if word.next_review_at and word.created_at:
-        # Rough estimate of current interval
-        current_interval = max((now - word.created_at).days, 1)
-    else:
-        current_interval = 1
+    skew = now - _as_utc(sent_at) if sent_at else datetime.timedelta(0)
+    weights, retention = await get_user_scheduler(user_id, db)
 
-    new_interval, new_status = compute_next_review(current_interval, feedback)
-    word.status = new_status
-    word.next_review_at = now + datetime.timedelta(days=new_interval)
-    await db.flush()
+    # Pass k holds the k-th review of each word in this session
+    passes: list[list[dict]] = []
+    seen: dict[int, int] = {}
+    for r in reviews:
+        k = seen.get(r["word_id"], 0)
+        seen[r["word_id"]] = k + 1
+        if k == len(passes):
+            passes.append([])
+        passes[k].append(r)
 
-    return {
-        "word_id": word.id,
-        "word": word.word,
-        "new_status": new_status,
-        "next_review_at": word.next_review_at.isoformat(),
-        "interval_days": round(new_interval, 1),
-    }
+    results = []
+    log_rows = []
+    for batch in passes:
+        states = [words[r["word_id"]] for r in batch]
+        last = [_as_utc(w["last_review_at"]) for w in states]
+        at = [_review_time(r.get("reviewed_at"), skew, t, now) for r, t in zip(batch, last)]
+        elapsed = np.array([(a - t).total_seconds() / 86400 if t else 0.0 for a, t in zip(at, last)])
+        rating = np.array([FEEDBACK_RATING.get(r["feedback"], fsrs.RATING_AGAIN) for r in batch])
+        stability = np.array([np.nan if w["stability"] is None else w["stability"] for w in states])
+        difficulty = np.array([np.nan if w["difficulty"] is None else w["difficulty"] for w in states])
+
+        s, d, ret = fsrs.review(stability, difficulty, elapsed, rating, weights)
+        interval = fsrs.next_interval(s, retention)
+
+        for i, (r, w) in enumerate(zip(batch, states)):
+            days = float(interval[i])
+            w["stability"] = float(s[i])
+            w["difficulty"] = float(d[i])
+            w["last_review_at"] = at[i]
+            w["reps"] = (w["reps"] or 0) + 1
+            if rating[i] == fsrs.RATING_AGAIN and last[i]:
+                w["lapses"] = (w["lapses"] or 0) + 1
+            w["status"] = _status(int(rating[i]), days)
+            w["next_review_at"] = at[i] + datetime.timedelta(days=days)
+            w["due_at"] = w["next_review_at"]
+            log_rows.append({
+                "user_id": user_id,
+                "word_id": w["id"],
+                "rating": int(rating[i]),
+                "elapsed_days": round(float(elapsed[i]), 4),
+                "latency_ms": r.get("latency_ms"),
+                "scheduled_days": days,
+                "stability": w["stability"],
+                "reviewed_at": at[i],
+            })
+            results.append({
+                "word_id": w["id"],
+                "word": w["word"],
+                "new_status": w["status"],
+                "next_review_at": w["next_review_at"].isoformat(),
+                "interval_days": round(days, 1),
+                "stability": round(w["stability"], 2),
+                "difficulty": round(w["difficulty"], 2),
+                "retrievability": round(float(ret[i]), 3),
+            })
+
+    await db.execute(
+        update(UserVocabulary),
+        [
+            {
+                "id": w["id"],
+                "stability": w["stability"],
+                "difficulty": w["difficulty"],
+                "last_review_at": w["last_review_at"],
+                "reps": w["reps"],
+                "lapses": w["lapses"],
+                "status": w["status"],
+                "next_review_at": w["next_review_at"],
+                "due_at": w["due_at"],
+            }
+            for w in words.values() if "status" in w
+        ],
+    )
+    await db.execute(insert(VocabReviewLog), log_rows)
+    invalidate_due_count(user_id)
+    return {"results": results}
+
+
+def _review_time(
+    reviewed_at: datetime.datetime | None,
+    skew: datetime.timedelta,
+    last_review_at: datetime.datetime | None,
+    now: datetime.datetime,
+) -> datetime.datetime:
+    """Client review time corrected for clock skew, clamped to [last_review_at, now]."""
+    if reviewed_at is None:
+        return now
+    t = min(_as_utc(reviewed_at) + skew, now)
+    if last_review_at is not None:
+        t = max(t, min(last_review_at, now))
+    return t
+
+
+async def process_review(
+    word_id: int, user_id: int, feedback: str, db: AsyncSession, latency_ms: int | None = None
+) -> dict:
+    """Process a review feedback and update the word's schedule."""
+    result = await process_reviews(
+        user_id, [{"word_id": word_id, "feedback": feedback, "latency_ms": latency_ms}], db
+    )
+    if "error" in result:
+        return result
+    return result["results"][0]
+
+
+async def forecast_due_counts(user_id: int, days: int, db: AsyncSession) -> dict:
+    """Due workload for each of the next `days` calendar days (day 0 = today, including overdue words).
+
+    One range query over the due queue. "scheduled" counts words by their current
+    due date; "projected" also counts repeat reviews of those words inside the
+    window, simulated with the user's FSRS weights.
+    """
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    today_start = datetime.datetime.combine(today, datetime.time.min, tzinfo=datetime.timezone.utc)
+    result = await db.execute(
+        select(
+            UserVocabulary.due_at,
+            UserVocabulary.last_review_at,
+            UserVocabulary.stability,
+            UserVocabulary.difficulty,
+        )
+        .where(*_due_queue(user_id), UserVocabulary.due_at < today_start + datetime.timedelta(days=days))
+    )
+    rows = result.all()
+    if not rows:
+        return {"days": days, "scheduled": [0] * days, "projected": [0] * days}
+
+    def offset(dt):
+        dt = _as_utc(dt)
+        return (dt - today_start).total_seconds() / 86400 if dt else np.nan
+
+    due = np.maximum([offset(r[0]) for r in rows], 0.0)
+    last = np.array([offset(r[1]) for r in rows])
+    stability = np.array([np.nan if r[2] is None else r[2] for r in rows])
+    difficulty = np.array([np.nan if r[3] is None else r[3] for r in rows])
+
+    scheduled = np.bincount(np.minimum(due.astype(np.int64), days - 1), minlength=days)
+    weights, retention = await get_user_scheduler(user_id, db)
+    projected = fsrs.forecast_due(due, stability, difficulty, last, days, weights, retention)
+    return {"days": days, "scheduled": scheduled.tolist(), "projected": projected.tolist()}
@@ -1,11 +1,29 @@
-"""AI剧情引擎服务 — LLM驱动的互动故事。"""
+"""AI剧情引擎服务 — LLM驱动的互动故事。
 
+每章返回给用户后，后台立即为它的每个选项并发预生成下一章，放进以
+(session_id, 章节号, 选项) 为键的进程内缓存；用户做出选择时命中缓存即可直接返回，
+生成未完成时等它完成，未命中（如换了 worker）时照常现场生成。
+预生成按用户每天的章节数限额计费，未被选中的分支同样计入。
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+from collections.abc import AsyncIterator
+import httpx
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.story import StoryTemplate, StorySession, StoryChapter
-from app.services.llm import chat_once_json
+from app.services import metrics, prompts
+from app.services.pubsub import get_broker
+from app.services.llm import chat_once_json, chat_stream_json
+
+logger = logging.getLogger(__name__)
 
-CHAPTER_SYSTEM = """你是一位互动英语故事作家。根据故事设定和之前的剧情，生成下一章节。
+CHAPTER_SYSTEM = prompts.register(
+    "story.chapter",
+    """你是一位互动英语故事作家。根据故事设定和之前的剧情，生成下一章节。
 要求：
 1. 叙事文本用英文，约 150-250 词，适合学生的 CEFR 等级
 2. 在叙事中自然融入 3-5 个值得学习的词汇/短语
@@ -13,26 +31,47 @@ CHAPTER_SYSTEM = """你是一位互动英语故事作家。根据故事设定和
 4. 设计一个英语挑战题（选择/填空/翻译）
 
 返回 JSON：
-{
+{{
   "narrative_text": "英文叙事文本...",
   "choices": [
-    {"label": "A", "description": "选项描述（中英双语）", "next_prompt": "选择后的剧情走向提示"},
-    {"label": "B", "description": "选项描述", "next_prompt": "剧情走向"}
+    {{"label": "A", "description": "选项描述（中英双语）", "next_prompt": "选择后的剧情走向提示"}},
+    {{"label": "B", "description": "选项描述", "next_prompt": "剧情走向"}}
   ],
-  "challenge": {
+  "challenge": {{
     "type": "choice|fill|translate",
     "question": "题目",
     "options": ["A选项", "B选项", "C选项", "D选项"],
     "answer": "正确答案",
     "hint": "提示",
     "explanation": "解析"
-  },
+  }},
   "learning_points": [
-    {"word": "词", "meaning": "释义", "usage": "用法说明"}
+    {{"word": "词", "meaning": "释义", "usage": "用法说明"}}
   ],
   "is_ending": false
+}}
+如果故事应该结束，设 is_ending 为 true，不需要 choices。""",
+    "\n\n目标 CEFR 等级：{cefr}",
+)
+
+_FALLBACK_CHAPTER = {
+    "narrative_text": "The story continues... (AI generation temporarily unavailable)",
+    "choices": [{"label": "A", "description": "Continue", "next_prompt": "continue the story"}],
+    "challenge": None,
+    "learning_points": [],
+    "is_ending": False,
 }
-如果故事应该结束，设 is_ending 为 true，不需要 choices。"""
+# 流式生成时叙事文本之后单独推送的字段
+_STREAMED_FIELDS = ("choices", "challenge", "learning_points")
+
+# 预生成的下一章：(session_id, 章节号, 选项) -> (创建时间 monotonic, 任务)
+_PREFETCH_TTL_SECONDS = 1800
+_prefetched: dict[tuple[int, int, str], tuple[float, asyncio.Task]] = {}
+# 每个用户每天（UTC）最多预生成的章节数，计数在 pubsub broker 里（多 worker 部署用 Redis 时各 worker 共享）
+PREFETCH_DAILY_BUDGET = 30
+# 全局同时进行的预生成调用数，避免挤占现场生成
+PREFETCH_CONCURRENCY = 8
+_prefetch_slots = asyncio.Semaphore(PREFETCH_CONCURRENCY)
 
 
 async def start_story(template_id: int, user_id: int, db: AsyncSession) -> dict:
@@ -68,11 +107,72 @@ async def start_story(template_id: int, user_id: int, db: AsyncSession) -> dict:
     session.total_chapters = 1
     await db.flush()
 
+    await prefetch_choices(session, template, [chapter])
     return _format_session(session, template, chapter)
 
 
 async def make_choice(session_id: int, choice: str, user_id: int, db: AsyncSession) -> dict:
     """提交剧情选择，生成下一章。"""
+    ctx = await _load_choice(session_id, choice, user_id, db)
+    if "error" in ctx:
+        return ctx
+    chapter_data = await _take_prefetched(session_id, ctx["session"].current_chapter, choice)
+    if chapter_data is None:
+        chapter_data = await _generate_chapter(ctx["prompt"], ctx["cefr"])
+    return await _save_next_chapter(ctx, chapter_data, db)
+
+
+async def stream_choice(session_id: int, choice: str, user_id: int, db: AsyncSession) -> AsyncIterator[dict]:
+    """流式版 make_choice，依次 yield：
+
+    - {"type": "narrative", "text"}：叙事文本的新片段，模型一吐出就推送
+    - {"type": "choices" / "challenge" / "learning_points", "data"}：对应字段完整后推送
+    - {"type": "chapter", "session", "chapter"}：章节落库后的完整结果（同 make_choice）
+    - {"type": "error", "error"}：会话不存在等
+    """
+    ctx = await _load_choice(session_id, choice, user_id, db)
+    if "error" in ctx:
+        yield {"type": "error", "error": ctx["error"]}
+        return
+
+    chapter_data = await _take_prefetched(session_id, ctx["session"].current_chapter, choice)
+    if chapter_data is not None:
+        yield {"type": "narrative", "text": chapter_data.get("narrative_text", "")}
+        for field in _STREAMED_FIELDS:
+            yield {"type": field, "data": chapter_data.get(field)}
+    else:
+        chapter_data = {}
+        narrative: list[str] = []
+        try:
+            async for kind, path, value in chat_stream_json(_chapter_system(ctx["cefr"]), ctx["prompt"]):
+                if kind == "delta" and path == ("narrative_text",):
+                    narrative.append(value)
+                    yield {"type": "narrative", "text": value}
+                elif kind == "value" and len(path) == 1:
+                    chapter_data[path[0]] = value
+                    if path[0] in _STREAMED_FIELDS:
+                        yield {"type": path[0], "data": value}
+        except (httpx.HTTPError, ValueError):
+            # 连接/状态码错误、SSE 或 JSON 解析失败：保留已推送的部分，其余用兜底内容
+            logger.exception("story chapter stream failed for session %s", session_id)
+        if narrative:
+            # 流中断时已推送的叙事保留
+            chapter_data["narrative_text"] = "".join(narrative)
+        else:
+            chapter_data = {"narrative_text": _FALLBACK_CHAPTER["narrative_text"]}
+            yield {"type": "narrative", "text": chapter_data["narrative_text"]}
+        # 没生成完整的字段用兜底内容补齐（结局章本就没有选项）
+        for field in _STREAMED_FIELDS:
+            if field not in chapter_data:
+                chapter_data[field] = None if chapter_data.get("is_ending") else _FALLBACK_CHAPTER[field]
+                yield {"type": field, "data": chapter_data[field]}
+
+    result = await _save_next_chapter(ctx, chapter_data, db)
+    yield {"type": "chapter", **result}
+
+
+async def _load_choice(session_id: int, choice: str, user_id: int, db: AsyncSession) -> dict:
+    """校验会话、记录选择，准备生成下一章所需的上下文。"""
     result = await db.execute(
         select(StorySession).where(StorySession.id == session_id, StorySession.user_id == user_id)
     )
@@ -108,20 +208,23 @@ async def make_choice(session_id: int, choice: str, user_id: int, db: AsyncSessi
         select(StoryChapter).where(StoryChapter.session_id == session_id).order_by(StoryChapter.chapter_number)
     )
     prev_chapters = result.scalars().all()
-    recap = "\n".join([f"第{ch.chapter_number}章: {ch.narrative_text[:100]}... (选择了{ch.chosen_option or '?'})" for ch in prev_chapters[-3:]])
-
+    history = [(ch.chapter_number, ch.narrative_text, ch.chosen_option) for ch in prev_chapters]
     new_num = session.current_chapter + 1
-    user_prompt = (
-        f"故事：{template.title if template else ''}\n之前剧情摘要：\n{recap}\n\n"
-        f"玩家选择了 {choice}：{next_prompt}\n\n请生成第 {new_num} 章。"
-        + (" 如果故事已经发展到高潮，可以考虑结局。" if new_num >= 6 else "")
-    )
 
-    cefr = template.cefr_min if template else "A2"
-    chapter_data = await _generate_chapter(user_prompt, cefr)
+    return {
+        "session": session,
+        "template": template,
+        "prev_chapters": prev_chapters,
+        "cefr": template.cefr_min if template else "A2",
+        "prompt": _next_chapter_prompt(template.title if template else "", history, choice, next_prompt, new_num),
+    }
+
 
+async def _save_next_chapter(ctx: dict, chapter_data: dict, db: AsyncSession) -> dict:
+    session, template = ctx["session"], ctx["template"]
+    new_num = session.current_chapter + 1
     chapter = StoryChapter(
-        session_id=session_id,
+        session_id=session.id,
         chapter_number=new_num,
         narrative_text=chapter_data.get("narrative_text", ""),
         choices_json=chapter_data.get("choices"),
@@ -136,6 +239,7 @@ async def make_choice(session_id: int, choice: str, user_id: int, db: AsyncSessi
         session.status = "completed"
 
     await db.flush()
+    await prefetch_choices(session, template, [*ctx["prev_chapters"], chapter])
     return _format_session(session, template, chapter)
 
 
@@ -159,18 +263,98 @@ async def submit_challenge(session_id: int, chapter_id: int, answer: str, user_i
     }
 
 
+def _next_chapter_prompt(title: str, history: list[tuple], choice: str, next_prompt: str, new_num: int) -> str:
+    """history：此前各章的 (章节号, 叙事文本, 所选选项)，最后一章的选项即 choice。"""
+    recap = "\n".join([f"第{num}章: {text[:100]}... (选择了{chosen or '?'})" for num, text, chosen in history[-3:]])
+    return (
+        f"故事：{title}\n之前剧情摘要：\n{recap}\n\n"
+        f"玩家选择了 {choice}：{next_prompt}\n\n请生成第 {new_num} 章。"
+        + (" 如果故事已经发展到高潮，可以考虑结局。" if new_num >= 6 else "")
+    )
+
+
+async def prefetch_choices(session, template, chapters: list) -> int:
+    """为当前章（chapters 最后一章）的每个选项后台预生成下一章，返回本次新启动的数量。
+
+    只拷贝生成所需的纯数据，后台任务不使用数据库会话。
+    """
+    if session.status != "active" or not chapters:
+        return 0
+    current = chapters[-1]
+    pending = [
+        c for c in current.choices_json or []
+        if c.get("label") and (session.id, current.chapter_number, c["label"]) not in _prefetched
+    ]
+    if not pending:
+        return 0
+
+    now = time.monotonic()
+    for key, (created, task) in list(_prefetched.items()):
+        if now - created > _PREFETCH_TTL_SECONDS:
+            task.cancel()
+            del _prefetched[key]
+
+    pending = pending[:await _reserve_prefetch(session.user_id, len(pending))]
+    if not pending:
+        return 0
+
+    title = template.title if template else ""
+    cefr = template.cefr_min if template else "A2"
+    earlier = [(ch.chapter_number, ch.narrative_text, ch.chosen_option) for ch in chapters[:-1]]
+    new_num = current.chapter_number + 1
+    for c in pending:
+        history = [*earlier, (current.chapter_number, current.narrative_text, c["label"])]
+        prompt = _next_chapter_prompt(title, history, c["label"], c.get("next_prompt", ""), new_num)
+        task = asyncio.create_task(_speculative_chapter(prompt, cefr))
+        _prefetched[(session.id, current.chapter_number, c["label"])] = (now, task)
+    return len(pending)
+
+
+async def _reserve_prefetch(user_id: int, wanted: int) -> int:
+    """从用户当天的预生成限额里预占 wanted 章，返回实际可用的数量。"""
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    total = await get_broker().incr_counter(f"story:prefetch:{user_id}:{today.isoformat()}", wanted, 2 * 86400)
+    return max(0, min(wanted, PREFETCH_DAILY_BUDGET - (total - wanted)))
+
+
+async def _take_prefetched(session_id: int, chapter_number: int, choice: str) -> dict | None:
+    """取出所选分支的预生成章节（还没生成完就等它），同时取消其他分支；未命中或生成失败时返回 None。"""
+    entry = None
+    for key in [k for k in _prefetched if k[0] == session_id and k[1] == chapter_number]:
+        created, task = _prefetched.pop(key)
+        if key[2] == choice:
+            entry = task
+        else:
+            task.cancel()
+    if entry is None:
+        metrics.LLM_CACHE.inc(cache="story_prefetch", result="miss")
+        return None
+    try:
+        chapter = await entry
+    except Exception:
+        chapter = None
+    metrics.LLM_CACHE.inc(cache="story_prefetch", result="hit" if chapter is not None else "failed")
+    return chapter
+
+
+async def _speculative_chapter(user_prompt: str, cefr: str) -> dict | None:
+    """预生成失败时返回 None（不缓存兜底章节），交给现场生成重试。"""
+    async with _prefetch_slots:
+        try:
+            return await chat_once_json(_chapter_system(cefr), user_prompt)
+        except Exception:
+            return None
+
+
+def _chapter_system(cefr: str) -> str:
+    return CHAPTER_SYSTEM.render(cefr=cefr)
+
+
 async def _generate_chapter(user_prompt: str, cefr: str) -> dict:
-    system = CHAPTER_SYSTEM + f"\n\n目标 CEFR 等级：{cefr}"
     try:
-        return await chat_once_json(system, user_prompt)
+        return await chat_once_json(_chapter_system(cefr), user_prompt)
     except Exception:
-        return {
-            "narrative_text": "The story continues... (AI generation temporarily unavailable)",
-            "choices": [{"label": "A", "description": "Continue", "next_prompt": "continue the story"}],
-            "challenge": None,
-            "learning_points": [],
-            "is_ending": False,
-        }
+        return dict(_FALLBACK_CHAPTER)
 
 
 def _format_session(session, template, chapter) -> dict:
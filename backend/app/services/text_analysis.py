@@ -0,0 +1,86 @@
+"""认知文本信号 — 反思质量、推理质量、直接要答案意图的启发式打分。
+
+每组特征词合并成一个交替正则，在导入时编译一次：
+- 反思信号（逻辑连接词、自我检查表达）合在一个正则里，一次 findall 同时计数：
+  只有逻辑连接词分支带捕获组，命中自我检查表达时捕获为空串
+- 直接要答案的意图单独一个正则，一次 search 判定
+
+纯计算模块，不访问数据库；批量接口供离线回填（app.utils.tqi_backfill）使用。
+"""
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+LOGIC_CONNECTIVES = ["因为", "所以", "但是", "因此", "if", "because", "therefore", "however"]
+SELF_CHECK_PHRASES = ["我认为", "我不确定", "可能", "I think", "I guess", "not sure", "maybe"]
+DIRECT_ANSWER_PATTERNS = [
+    r"直接告诉我",
+    r"给我答案",
+    r"直接给答案",
+    r"只要答案",
+    r"不要解释",
+    r"不用解释",
+    r"tell me the answer",
+    r"just give me the answer",
+    r"answer only",
+    r"no explanation",
+]
+
+
+def _alternation(words: list[str]) -> str:
+    return "|".join(re.escape(w) for w in words)
+
+
+_SIGNAL_RE = re.compile(
+    f"({_alternation(LOGIC_CONNECTIVES)})|(?:{_alternation(SELF_CHECK_PHRASES)})",
+    re.IGNORECASE,
+)
+_DIRECT_ANSWER_RE = re.compile("|".join(DIRECT_ANSWER_PATTERNS), re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class TextSignals:
+    length: int = 0
+    logic_hits: int = 0
+    self_check_hits: int = 0
+
+
+def analyze(text: str | None) -> TextSignals:
+    """一次扫描统计各组特征词的出现次数（不重叠计数）。"""
+    text = (text or "").strip()
+    if not text:
+        return TextSignals()
+    hits = _SIGNAL_RE.findall(text)
+    self_check = hits.count("")
+    return TextSignals(length=len(text), logic_hits=len(hits) - self_check, self_check_hits=self_check)
+
+
+def wants_direct_answer(text: str | None) -> bool:
+    return _DIRECT_ANSWER_RE.search((text or "").strip()) is not None
+
+
+def reflection_quality(text: str | None) -> float:
+    """反思质量 0~1：长度 + 逻辑连接词 + 自我修正表达。"""
+    signals = analyze(text)
+    if not signals.length:
+        return 0.0
+    length_score = min(signals.length / 120.0, 1.0)
+    logic_score = min(signals.logic_hits / 3.0, 1.0)
+    self_check_score = min(signals.self_check_hits / 2.0, 1.0)
+    return round(length_score * 0.5 + logic_score * 0.3 + self_check_score * 0.2, 3)
+
+
+def reasoning_quality(strategy_choice: str | None, reflection_text: str | None) -> float:
+    """专项训练的推理质量 0~1：选了策略 + 写了反思（长度、逻辑连接词）。"""
+    score = 0.4 if (strategy_choice or "").strip() else 0.0
+    signals = analyze(reflection_text)
+    if signals.length:
+        score += 0.25
+        score += min(signals.length / 120.0, 0.25)
+        score += min(signals.logic_hits * 0.05, 0.10)
+    return round(min(score, 1.0), 3)
+
+
+def reflection_quality_batch(texts: Iterable[str | None]) -> list[float]:
+    return [reflection_quality(text) for text in texts]
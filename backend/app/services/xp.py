@@ -74,9 +74,12 @@ async def get_or_create_xp(user_id: int, db: AsyncSession) -> UserXP:
     return xp
 
 
-async def award_xp(user_id: int, action: str, db: AsyncSession) -> dict:
-    """Award XP for an action. Returns {"xp_gained", "total_xp", "level", "leveled_up", "new_achievements"}."""
-    xp_gained = XP_TABLE.get(action, 0)
+async def award_xp(user_id: int, action: str, db: AsyncSession, count: int = 1) -> dict:
+    """Award XP for an action (repeated `count` times, e.g. a batch of reviews).
+
+    Returns {"xp_gained", "total_xp", "level", "leveled_up", "new_achievements"}.
+    """
+    xp_gained = XP_TABLE.get(action, 0) * count
     xp_record = await get_or_create_xp(user_id, db)
 
     old_level = xp_record.level
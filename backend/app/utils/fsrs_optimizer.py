@@ -0,0 +1,100 @@
+"""FSRS 个人参数优化任务：从 vocab_review_log 为每个用户拟合记忆模型参数。
+
+用法：
+    python -m app.utils.fsrs_optimizer            # 全部用户
+    python -m app.utils.fsrs_optimizer <user_id>  # 单个用户
+
+复习记录按 (用户, 单词, 时间) 顺序流式读取，每个用户的记录攒齐后交给
+app.services.fsrs.optimize；复习次数不足的用户保持默认参数。
+"""
+
+import asyncio
+import sys
+import time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_session
+from app.models.vocabulary import VocabReviewLog
+from app.services import fsrs
+from app.services.spaced_repetition import save_user_scheduler
+
+# 复习次数少于该值的用户不做优化
+MIN_REVIEWS = 200
+
+
+async def _iter_user_logs(db: AsyncSession, user_id: int | None = None):
+    """逐个用户产出 (user_id, word_ids, elapsed_days, ratings)。"""
+    stmt = (
+        select(VocabReviewLog.user_id, VocabReviewLog.word_id, VocabReviewLog.elapsed_days, VocabReviewLog.rating)
+        .order_by(VocabReviewLog.user_id, VocabReviewLog.word_id, VocabReviewLog.reviewed_at, VocabReviewLog.id)
+        .execution_options(yield_per=50_000)
+    )
+    if user_id is not None:
+        stmt = stmt.where(VocabReviewLog.user_id == user_id)
+
+    current, rows = None, []
+    stream = await db.stream(stmt)
+    async for uid, word_id, elapsed, rating in stream:
+        if uid != current and rows:
+            yield current, *_columns(rows)
+            rows = []
+        current = uid
+        rows.append((word_id, elapsed, rating))
+    if rows:
+        yield current, *_columns(rows)
+
+
+def _columns(rows):
+    arr = np.array(rows, dtype=np.float64)
+    return arr[:, 0].astype(np.int64), arr[:, 1], arr[:, 2].astype(np.int64)
+
+
+async def optimize_users(db: AsyncSession, user_id: int | None = None) -> list[dict]:
+    """拟合并保存参数，返回每个用户的统计信息。"""
+    stats, fitted_users = [], []
+    async for uid, word_ids, elapsed, ratings in _iter_user_logs(db, user_id):
+        if len(ratings) < MIN_REVIEWS:
+            stats.append({"user_id": uid, "reviews": len(ratings), "skipped": True})
+            continue
+        started = time.perf_counter()
+        fitted = fsrs.optimize(word_ids, elapsed, ratings)
+        fitted_users.append((uid, fitted))
+        stats.append({
+            "user_id": uid,
+            "reviews": len(ratings),
+            "skipped": False,
+            "loss_before": round(fitted.loss_before, 4),
+            "loss_after": round(fitted.loss_after, 4),
+            "iterations": fitted.iterations,
+            "seconds": round(time.perf_counter() - started, 2),
+        })
+
+    # 流式读取结束后再写入，避免在同一连接上交错读写
+    for uid, fitted in fitted_users:
+        await save_user_scheduler(uid, fitted, db)
+    await db.commit()
+    return stats
+
+
+async def main(user_id: int | None):
+    async with async_session() as db:
+        stats = await optimize_users(db, user_id)
+    if not stats:
+        print("  - 没有复习记录")
+    for s in stats:
+        if s["skipped"]:
+            print(f"  - 用户 {s['user_id']}: {s['reviews']} 次复习，少于 {MIN_REVIEWS}，保持默认参数")
+        else:
+            print(
+                f"  ✓ 用户 {s['user_id']}: {s['reviews']} 次复习，log loss "
+                f"{s['loss_before']} → {s['loss_after']}（{s['iterations']} 轮，{s['seconds']}s）"
+            )
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else None
+    if arg is not None and not arg.isdigit():
+        print("用法: python -m app.utils.fsrs_optimizer [user_id]")
+        sys.exit(1)
+    asyncio.run(main(int(arg) if arg else None))
@@ -0,0 +1,257 @@
+"""星系布局离线任务：为每个 KnowledgeNode 计算 x/y 坐标、聚类 id 和 LOD 层级。
+
+用法：
+    python -m app.utils.galaxy_layout
+
+步骤（全部基于 NumPy，在内存 CSR 图上完成）：
+1. 谱嵌入：对归一化邻接矩阵做子空间迭代，取前若干个非平凡特征向量
+2. 聚类：在嵌入空间做 k-means，每个簇就是星系里的一个“星团”
+3. 星团布局：簇之间按跨簇边数相互吸引、按半径互斥，迭代出簇中心
+4. 簇内布局：簇内嵌入的前两个主成分定方向，半径按秩均匀化后铺满圆盘
+5. LOD：按词频排名、度数排序，分层写入 lod_level（0 层缩到最小也显示）
+
+孤立节点（没有任何边）放在最外圈。结果写回 knowledge_nodes，
+运行中的 API 进程在图谱重载（见 app.services.knowledge_graph）后读到新布局。
+"""
+
+import asyncio
+import time
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_session
+from app.models.knowledge import KnowledgeNode
+from app.services import knowledge_graph
+from app.services.knowledge_graph import KnowledgeGraph, LOD_LEVELS
+
+EMBED_DIMS = 8
+EMBED_ITERATIONS = 60
+# 布局坐标范围约为 ±EXTENT
+EXTENT = 1000.0
+# 各 LOD 层累计节点数：0 层前 200 个，1 层前 1000 个，2 层前 5000 个，其余为 3 层
+LOD_TIER_SIZES = (200, 1000, 5000)
+
+
+def _csr_rows(graph: KnowledgeGraph) -> np.ndarray:
+    return np.repeat(np.arange(len(graph)), np.diff(graph.offsets))
+
+
+def spectral_embedding(graph: KnowledgeGraph, nodes: np.ndarray, dims: int = EMBED_DIMS, seed: int = 0) -> np.ndarray:
+    """nodes（下标）诱导子图的谱嵌入，返回 (len(nodes), dims)。"""
+    n = len(nodes)
+    local = np.full(len(graph), -1, dtype=np.int64)
+    local[nodes] = np.arange(n)
+    rows = local[_csr_rows(graph)]
+    cols = local[graph.neighbors]
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols, w = rows[keep], cols[keep], graph.weights[keep].astype(np.float64)
+
+    deg = np.bincount(rows, weights=w, minlength=n) + 1.0  # 加自环
+    dinv = 1.0 / np.sqrt(deg)
+
+    def matvec(X: np.ndarray) -> np.ndarray:
+        # ((D^-1/2 (A + I) D^-1/2) + I) / 2，特征值落在 [0, 1]
+        Z = X * dinv[:, None]
+        AZ = np.empty_like(Z)
+        for c in range(Z.shape[1]):
+            AZ[:, c] = np.bincount(rows, weights=w * Z[cols, c], minlength=n)
+        return ((AZ + Z) * dinv[:, None] + X) / 2.0
+
+    trivial = np.sqrt(deg)
+    trivial /= np.linalg.norm(trivial)
+    dims = min(dims, max(n - 1, 1))
+    X = np.random.default_rng(seed).standard_normal((n, dims))
+    for _ in range(EMBED_ITERATIONS):
+        X = matvec(X)
+        X -= np.outer(trivial, trivial @ X)
+        X, _ = np.linalg.qr(X)
+    # Rayleigh-Ritz：按特征值从大到小排列
+    _, V = np.linalg.eigh(X.T @ matvec(X))
+    X = X @ V[:, ::-1]
+    return X * dinv[:, None]
+
+
+def kmeans(X: np.ndarray, k: int, iterations: int = 30, seed: int = 0) -> np.ndarray:
+    """k-means++ 初始化 + Lloyd 迭代，返回每行的簇编号。"""
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    k = min(k, n)
+    centers = [X[rng.integers(n)]]
+    d2 = ((X - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        p = d2 / d2.sum() if d2.sum() > 0 else None
+        centers.append(X[rng.choice(n, p=p)])
+        d2 = np.minimum(d2, ((X - centers[-1]) ** 2).sum(axis=1))
+    C = np.array(centers)
+    labels = np.zeros(n, dtype=np.int64)
+    for it in range(iterations):
+        dist = (X ** 2).sum(1)[:, None] - 2 * X @ C.T + (C ** 2).sum(1)[None, :]
+        new_labels = dist.argmin(axis=1)
+        if it > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        for d in range(X.shape[1]):
+            sums = np.bincount(labels, weights=X[:, d], minlength=k)
+            C[:, d] = np.where(counts > 0, sums / np.maximum(counts, 1), C[:, d])
+    # 去掉空簇，编号连续
+    _, labels = np.unique(labels, return_inverse=True)
+    return labels
+
+
+def layout_clusters(sizes: np.ndarray, links: np.ndarray, iterations: int = 300) -> tuple[np.ndarray, np.ndarray]:
+    """簇中心布局：links[i, j] 为簇间边数。返回 (中心坐标 (k, 2), 半径 (k,))。"""
+    k = len(sizes)
+    radius = np.sqrt(sizes / np.pi)
+    angle = np.linspace(0, 2 * np.pi, k, endpoint=False)
+    pos = np.c_[np.cos(angle), np.sin(angle)] * radius.sum() / 2
+    if k == 1:
+        return np.zeros((1, 2)), radius
+    strength = links / max(links.max(), 1.0)
+    for step in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.sqrt((delta ** 2).sum(-1)) + np.eye(k)
+        gap = radius[:, None] + radius[None, :] + 1.0
+        # 重叠时互斥；有边相连时拉向对方，直到两圆相切
+        push = np.where(dist < gap, (gap - dist) / dist, 0.0)
+        pull = strength * np.maximum(dist - gap, 0.0) / dist * 0.1
+        np.fill_diagonal(push, 0.0)
+        move = (delta * (push - pull)[:, :, None]).sum(axis=1) * 0.5
+        move -= pos * 0.01  # 向中心的弱引力
+        pos += move * (1.0 - step / iterations)
+    return pos, radius
+
+
+def disk_layout(embedding: np.ndarray) -> np.ndarray:
+    """簇内坐标：前两个主成分定方向，半径按秩均匀化到单位圆盘。"""
+    m = len(embedding)
+    if m == 1:
+        return np.zeros((1, 2))
+    centered = embedding - embedding.mean(axis=0)
+    _, _, vt = np.linalg.svd(centered, full_matrices=False)
+    plane = centered @ vt[:2].T if vt.shape[0] >= 2 else np.c_[centered @ vt[0], np.zeros(m)]
+    angle = np.arctan2(plane[:, 1], plane[:, 0])
+    r = np.sqrt((plane ** 2).sum(axis=1))
+    rank = np.empty(m)
+    rank[np.argsort(r, kind="stable")] = np.arange(m)
+    radius = np.sqrt((rank + 0.5) / m)
+    return np.c_[np.cos(angle), np.sin(angle)] * radius[:, None]
+
+
+def lod_levels(frequency_rank: np.ndarray, degree: np.ndarray) -> np.ndarray:
+    """按 (词频排名, 度数) 排序分层。"""
+    freq = np.where(np.isnan(frequency_rank), np.inf, frequency_rank)
+    order = np.lexsort((-degree, freq))
+    level = np.full(len(order), LOD_LEVELS - 1, dtype=np.int64)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    for tier, size in reversed(list(enumerate(LOD_TIER_SIZES))):
+        level[rank < size] = tier
+    return level
+
+
+def compute_layout(graph: KnowledgeGraph, frequency_rank: np.ndarray) -> dict[str, np.ndarray]:
+    """返回与 graph.node_ids 对齐的 x、y、cluster_id（孤立节点为 -1）、lod_level。"""
+    graph.compact()
+    n = len(graph)
+    degree = np.diff(graph.offsets).astype(np.int64)
+    x = np.zeros(n)
+    y = np.zeros(n)
+    cluster = np.full(n, -1, dtype=np.int64)
+
+    connected = np.nonzero(degree > 0)[0]
+    if len(connected):
+        emb = spectral_embedding(graph, connected)
+        k = int(np.clip(round(np.sqrt(len(connected) / 20)), 1, 48))
+        norm = np.linalg.norm(emb, axis=1, keepdims=True)
+        labels = kmeans(emb / np.where(norm > 0, norm, 1.0), k)
+        cluster[connected] = labels
+
+        n_clusters = int(labels.max()) + 1
+        sizes = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+        rows = _csr_rows(graph)
+        fwd = graph.forward
+        a, b = cluster[rows[fwd]], cluster[graph.neighbors[fwd]]
+        cross = (a >= 0) & (b >= 0) & (a != b)
+        links = np.zeros((n_clusters, n_clusters))
+        np.add.at(links, (a[cross], b[cross]), 1.0)
+        links += links.T
+
+        centers, radius = layout_clusters(sizes, links)
+        for c in range(n_clusters):
+            members = np.nonzero(labels == c)[0]
+            local = disk_layout(emb[members]) * radius[c] + centers[c]
+            x[connected[members]] = local[:, 0]
+            y[connected[members]] = local[:, 1]
+
+    isolated = np.nonzero(degree == 0)[0]
+    if len(isolated):
+        span = np.sqrt(x[connected] ** 2 + y[connected] ** 2).max() if len(connected) else 0.0
+        ring = span + max(span * 0.1, 5.0)
+        freq = np.where(np.isnan(frequency_rank[isolated]), np.inf, frequency_rank[isolated])
+        angle = np.linspace(0, 2 * np.pi, len(isolated), endpoint=False)[np.argsort(np.argsort(freq, kind="stable"))]
+        x[isolated] = np.cos(angle) * ring
+        y[isolated] = np.sin(angle) * ring
+
+    scale = EXTENT / max(np.abs(x).max(initial=0.0), np.abs(y).max(initial=0.0), 1e-9)
+    return {
+        "x": x * scale,
+        "y": y * scale,
+        "cluster_id": cluster,
+        "lod_level": lod_levels(frequency_rank, degree),
+    }
+
+
+async def run_layout(db: AsyncSession) -> dict:
+    started = time.perf_counter()
+    graph = await knowledge_graph.load_graph(db)
+    if not len(graph):
+        return {"nodes": 0, "seconds": 0.0}
+    result = await db.execute(select(KnowledgeNode.id, KnowledgeNode.frequency_rank))
+    freq_map = {node_id: rank for node_id, rank in result.all()}
+    frequency_rank = np.array(
+        [np.nan if freq_map.get(int(i)) is None else freq_map[int(i)] for i in graph.node_ids]
+    )
+    loaded = time.perf_counter()
+
+    layout = compute_layout(graph, frequency_rank)
+    computed = time.perf_counter()
+
+    rows = [
+        {
+            "id": int(node_id),
+            "x": round(float(layout["x"][i]), 2),
+            "y": round(float(layout["y"][i]), 2),
+            "cluster_id": int(layout["cluster_id"][i]) if layout["cluster_id"][i] >= 0 else None,
+            "lod_level": int(layout["lod_level"][i]),
+        }
+        for i, node_id in enumerate(graph.node_ids)
+    ]
+    for start in range(0, len(rows), 5000):
+        await db.execute(update(KnowledgeNode), rows[start:start + 5000])
+    await db.commit()
+    # 本进程立即使用新布局
+    await knowledge_graph.load_graph(db)
+
+    return {
+        "nodes": len(rows),
+        "clusters": int(layout["cluster_id"].max()) + 1,
+        "compute_seconds": round(computed - loaded, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def main():
+    async with async_session() as db:
+        stats = await run_layout(db)
+    if not stats["nodes"]:
+        print("  - 图谱为空，跳过")
+        return
+    print(
+        f"  ✓ {stats['nodes']} 个节点 / {stats['clusters']} 个星团，"
+        f"计算 {stats['compute_seconds']}s，总计 {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""IRT 离线标定任务：从历史作答批量估计题目参数，写入 irt_item_parameters。
+
+数据来源：
+    practice 题库 ← learning_records（练习作答）
+    exam 题库     ← mock_exams.answers_json（已完成模考的逐题批改结果）
+
+用法：
+    python -m app.utils.irt_calibration [practice|exam|all]
+
+作答记录按块流式读取后拼成 NumPy 数组，标定本身全程向量化；
+运行中的 API 进程会在题库缓存过期（见 app.services.adaptive）后读到新参数。
+"""
+
+import asyncio
+import sys
+import time
+import numpy as np
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_session
+from app.models.exam import MockExam, ExamQuestion
+from app.models.irt import ItemParameter
+from app.models.learning import LearningRecord
+from app.models.question import Question
+from app.services import irt
+from app.services.adaptive import BANK_PRACTICE, BANK_EXAM, invalidate_item_banks
+from app.utils import json_codec
+
+# 作答次数少于该值的题目不写入参数，继续使用先验
+MIN_RESPONSES = 20
+_CHUNK = 100_000
+
+
+def _guessing(options) -> float:
+    """选择题的猜测参数取 1/选项数，主观题为 0。"""
+    if isinstance(options, str):
+        options = json_codec.loads(options) if options else None
+    return 1.0 / len(options) if isinstance(options, list) and len(options) > 1 else 0.0
+
+
+async def load_practice_responses(db: AsyncSession) -> np.ndarray:
+    """返回 (N, 3) 的 int64 数组：user_id, question_id, is_correct。"""
+    chunks = []
+    stream = await db.stream(
+        select(LearningRecord.user_id, LearningRecord.question_id, LearningRecord.is_correct)
+        .execution_options(yield_per=_CHUNK)
+    )
+    async for part in stream.partitions(_CHUNK):
+        chunks.append(np.array([tuple(r) for r in part], dtype=np.int64))
+    return np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+
+
+async def load_exam_responses(db: AsyncSession) -> np.ndarray:
+    """从已完成模考中取出作答过的题目，格式同 load_practice_responses。"""
+    rows: list[tuple[int, int, int]] = []
+    stream = await db.stream(
+        select(MockExam.user_id, MockExam.answers_json)
+        .where(MockExam.status == "completed", MockExam.answers_json.isnot(None))
+        .execution_options(yield_per=1000)
+    )
+    async for user_id, answers_json in stream:
+        for a in json_codec.loads(answers_json):
+            if str(a.get("student_answer", "")).strip():
+                rows.append((user_id, a["question_id"], 1 if a.get("is_correct") else 0))
+    return np.array(rows, dtype=np.int64) if rows else np.empty((0, 3), dtype=np.int64)
+
+
+async def _load_guessing(bank: str, item_ids: np.ndarray, db: AsyncSession) -> np.ndarray:
+    model = Question if bank == BANK_PRACTICE else ExamQuestion
+    guessing: dict[int, float] = {}
+    stream = await db.stream(
+        select(model.id, model.options_json).execution_options(yield_per=_CHUNK)
+    )
+    async for item_id, options in stream:
+        guessing[item_id] = _guessing(options)
+    return np.array([guessing.get(int(i), 0.0) for i in item_ids])
+
+
+async def calibrate_bank(bank: str, db: AsyncSession) -> dict:
+    """标定一个题库并覆盖写入参数表，返回统计信息。"""
+    started = time.perf_counter()
+    if bank == BANK_PRACTICE:
+        responses = await load_practice_responses(db)
+    else:
+        responses = await load_exam_responses(db)
+    if len(responses) == 0:
+        return {"bank": bank, "responses": 0, "items": 0, "seconds": 0.0}
+
+    user_ids, user_idx = np.unique(responses[:, 0], return_inverse=True)
+    item_ids, item_idx = np.unique(responses[:, 1], return_inverse=True)
+    c = await _load_guessing(bank, item_ids, db)
+    loaded = time.perf_counter()
+
+    result = irt.calibrate(
+        user_idx, item_idx, responses[:, 2],
+        n_users=len(user_ids), n_items=len(item_ids), c=c, model="3PL",
+    )
+    fitted = time.perf_counter()
+
+    keep = np.nonzero(result.item_counts >= MIN_RESPONSES)[0]
+    rows = [
+        {
+            "bank": bank,
+            "item_id": int(item_ids[i]),
+            "a": float(result.a[i]),
+            "b": float(result.b[i]),
+            "c": float(result.c[i]),
+            "n_responses": int(result.item_counts[i]),
+        }
+        for i in keep
+    ]
+    await db.execute(delete(ItemParameter).where(ItemParameter.bank == bank))
+    for start in range(0, len(rows), 5000):
+        await db.execute(insert(ItemParameter), rows[start:start + 5000])
+    await db.commit()
+    invalidate_item_banks()
+
+    return {
+        "bank": bank,
+        "responses": int(len(responses)),
+        "users": int(len(user_ids)),
+        "items": len(rows),
+        "iterations": result.iterations,
+        "load_seconds": round(loaded - started, 2),
+        "fit_seconds": round(fitted - loaded, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def main(target: str):
+    banks = [BANK_PRACTICE, BANK_EXAM] if target == "all" else [target]
+    async with async_session() as db:
+        for bank in banks:
+            stats = await calibrate_bank(bank, db)
+            if not stats["responses"]:
+                print(f"  - {bank}: 没有作答记录，跳过")
+                continue
+            print(
+                f"  ✓ {bank}: {stats['responses']} 条作答 / {stats['users']} 名学生 → "
+                f"{stats['items']} 道题已标定（迭代 {stats['iterations']} 轮，"
+                f"读取 {stats['load_seconds']}s，拟合 {stats['fit_seconds']}s）"
+            )
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "all"
+    if target not in (BANK_PRACTICE, BANK_EXAM, "all"):
+        print("用法: python -m app.utils.irt_calibration [practice|exam|all]")
+        sys.exit(1)
+    asyncio.run(main(target))
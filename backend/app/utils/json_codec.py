@@ -0,0 +1,29 @@
+"""JSON 编解码 — 基于 orjson，用于 *_json 列存储、数据库 JSON 列序列化和 WebSocket / pub-sub 消息。
+
+orjson 直接输出 UTF-8（等价于 ensure_ascii=False），比标准库 json 快一个数量级，
+模考试卷这类几百 KB 的载荷在入库时只序列化一次。API 响应由 FastAPI 自带的
+ORJSONResponse 渲染（见 app.main）。
+"""
+
+from typing import Any
+
+import orjson
+
+# 兼容历史代码中以 int 为键的 dict（标准库 json 会自动转成字符串键）
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj: Any) -> str:
+    """序列化为 str，用于 Text 类型的 *_json 列和拼接进 prompt。"""
+    return orjson.dumps(obj, option=_OPTIONS).decode("utf-8")
+
+
+def dumpb(obj: Any) -> bytes:
+    """序列化为 bytes，用于 HTTP 响应体等直接写出的场景。"""
+    return orjson.dumps(obj, option=_OPTIONS)
+
+
+def loads(data: str | bytes | bytearray | memoryview) -> Any:
+    """反序列化，接受 str / bytes。"""
+    return orjson.loads(data)
+
@@ -0,0 +1,230 @@
+"""增量 JSON 解析 — 边接收 LLM 流式输出边解析。
+
+feed() 每次接收一段文本，返回这段文本里新产生的事件：
+- ("delta", path, text)：字符串值新到达的部分（已处理转义），用于逐字推送叙事文本
+- ("value", path, value)：某个值（字符串/数字/对象/数组…）完整结束
+
+path 为从根开始的键/下标元组，如 ("choices", 0, "label")；根对象完整时 path 为 ()。
+path 最后一项为整数的 value 事件即一个完整的数组元素，可以逐个推送给客户端。
+流结束时调用 finish()，补齐被截断的字符串和未闭合的容器。
+
+对模型常见的格式问题做容错修复：
+- 第一个 { 或 [ 之前的内容（```json 代码块标记、说明文字）跳过，根值结束后的内容忽略
+- 末尾多余逗号、漏写逗号、单引号字符串、未加引号的键
+- Python 风格的 True / False / None，以及 NaN / undefined（按 null 处理）
+- 字符串里未转义的换行等控制字符
+"""
+
+from app.utils import json_codec
+
+_WHITESPACE = " \t\r\n"
+_LITERALS = {"True": True, "False": False, "None": None, "NaN": None, "undefined": None}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonStreamParser:
+    def __init__(self):
+        # 每层容器：[容器, path, 当前键（对象）]
+        self._stack: list[list] = []
+        self.value = None
+        self.done = False
+        self._token: str | None = None  # "string" / "literal"
+        self._buf: list[str] = []
+        self._is_key = False
+        self._quote = '"'
+        self._escape: str | None = None  # None / ""（刚读到反斜杠）/ "uXXXX" 的已读部分
+        self._high_surrogate: int | None = None
+        self._pending_delta: list[str] = []
+
+    def feed(self, text: str) -> list[tuple]:
+        events: list[tuple] = []
+        for ch in text:
+            if self.done:
+                break
+            self._char(ch, events)
+        self._flush_delta(events)
+        return events
+
+    def finish(self) -> list[tuple]:
+        """输入结束：截断处的字符串/字面量就地结束，未闭合的容器逐层闭合。
+
+        被截断的容器保留在 value 里，但不再产生 value 事件（它们不完整），只有根值例外。
+        """
+        events: list[tuple] = []
+        if self.done or not self._stack:
+            return events
+        if self._token == "string":
+            if self._is_key:
+                self._token = None
+            else:
+                self._end_string(events)
+        elif self._token == "literal":
+            self._end_literal(events)
+        self._stack = self._stack[:1]
+        self._close(events)
+        return events
+
+    # ── 内部 ──
+
+    def _path(self) -> tuple:
+        """下一个值（或正在读的值）的 path。"""
+        if not self._stack:
+            return ()
+        container, path, key = self._stack[-1]
+        return path + ((len(container),) if isinstance(container, list) else (key,))
+
+    def _flush_delta(self, events: list):
+        if self._pending_delta:
+            events.append(("delta", self._path(), "".join(self._pending_delta)))
+            self._pending_delta = []
+
+    def _char(self, ch: str, events: list):
+        if self._token == "string":
+            self._string_char(ch, events)
+            return
+        if self._token == "literal":
+            if ch not in _WHITESPACE and ch not in ",:]}":
+                self._buf.append(ch)
+                return
+            self._end_literal(events)
+
+        if not self._stack:
+            # 根值开始之前的内容一律跳过
+            if ch in "{[":
+                self._open(ch, events)
+            return
+        if ch in _WHITESPACE or ch in ",:":
+            return
+        if ch in "\"'":
+            self._token = "string"
+            self._quote = ch
+            self._buf = []
+            self._is_key = self._expects_key()
+        elif ch in "{[":
+            self._open(ch, events)
+        elif ch in "}]":
+            self._close(events)
+        else:
+            self._token = "literal"
+            self._buf = [ch]
+
+    def _string_char(self, ch: str, events: list):
+        if self._escape is not None:
+            if self._escape == "":
+                if ch == "u":
+                    self._escape = "u"
+                    return
+                self._append(_ESCAPES.get(ch, ch))
+                self._escape = None
+                return
+            self._escape += ch
+            if len(self._escape) == 5:
+                self._unicode_escape(self._escape[1:])
+                self._escape = None
+            return
+        if ch == "\\":
+            self._escape = ""
+        elif ch == self._quote:
+            self._end_string(events)
+        else:
+            self._append(ch)
+
+    def _unicode_escape(self, digits: str):
+        try:
+            code = int(digits, 16)
+        except ValueError:
+            return
+        if 0xD800 <= code <= 0xDBFF:
+            # 代理对的前半，等后半到达再合成
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._append(chr(code))
+
+    def _append(self, ch: str):
+        self._buf.append(ch)
+        if not self._is_key:
+            self._pending_delta.append(ch)
+
+    def _end_string(self, events: list):
+        text = "".join(self._buf)
+        self._token = None
+        self._buf = []
+        if self._is_key:
+            self._stack[-1][2] = text
+            return
+        self._flush_delta(events)
+        self._set(text, events)
+
+    def _expects_key(self) -> bool:
+        container, _, key = self._stack[-1]
+        return isinstance(container, dict) and key is None
+
+    def _end_literal(self, events: list):
+        raw = "".join(self._buf)
+        self._token = None
+        self._buf = []
+        if self._expects_key():
+            # 未加引号的键
+            self._stack[-1][2] = raw
+            return
+        if raw in _LITERALS:
+            value = _LITERALS[raw]
+        else:
+            try:
+                value = json_codec.loads(raw)
+            except ValueError:
+                value = raw
+        self._set(value, events)
+
+    def _set(self, value, events: list):
+        """把完整的标量值放进当前容器。"""
+        path = self._path()
+        container = self._stack[-1][0]
+        if isinstance(container, list):
+            container.append(value)
+        else:
+            container[self._stack[-1][2]] = value
+            self._stack[-1][2] = None
+        events.append(("value", path, value))
+
+    def _open(self, ch: str, events: list):
+        container = {} if ch == "{" else []
+        path = self._path()
+        if self._stack:
+            parent = self._stack[-1][0]
+            if isinstance(parent, list):
+                parent.append(container)
+            else:
+                parent[self._stack[-1][2] or ""] = container
+        else:
+            self.value = container
+        self._stack.append([container, path, None])
+
+    def _close(self, events: list):
+        container, path, _ = self._stack.pop()
+        if self._stack and isinstance(self._stack[-1][0], dict):
+            self._stack[-1][2] = None
+        events.append(("value", path, container))
+        if not self._stack:
+            self.done = True
+
+
+def parse_json(text: str):
+    """解析模型返回的完整 JSON 文本：合法 JSON 直接解析，否则按容错规则修复后解析。
+
+    找不到任何 { 或 [ 时抛出 ValueError。
+    """
+    cleaned = text.strip()
+    try:
+        return json_codec.loads(cleaned)
+    except ValueError:
+        pass
+    parser = JsonStreamParser()
+    parser.feed(cleaned)
+    parser.finish()
+    if parser.value is None:
+        raise ValueError("no JSON value in model output")
+    return parser.value
@@ -0,0 +1,114 @@
+"""对战评分离线重算：按 Glicko-2 评分周期回放全部已结束的对战，覆盖 player_ratings。
+
+用法：
+    python -m app.utils.rating_recompute
+
+对战按 (创建时间, id) 顺序流式读取，每 glicko2.PERIOD_DAYS 天为一个评分周期，
+AI 对局的对手按固定评分 (arena.AI_RATING, arena.AI_RD) 计算。胜负与在线更新一致
+（arena.battle_score）：winner_id 为 None 记平局 0.5。回放到当前周期为止，
+长期未对战玩家的 rd 会相应增长。结果用一条多行 upsert 批量写回；在线增量更新
+（arena._update_ratings）在两次重算之间维护同一张表。
+"""
+
+import asyncio
+import datetime
+import time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_session, upsert_insert
+from app.models.arena import BattleSession, PlayerRating
+from app.services import glicko2
+from app.services.arena import AI_RATING, AI_RD, battle_score, calculate_tier
+
+WRITE_CHUNK = 5000
+
+
+async def _load_battles(db: AsyncSession):
+    """返回 (秒级时间戳, player1, player2 或 -1, player1 得分) 四个数组。"""
+    stmt = (
+        select(BattleSession.created_at, BattleSession.player1_id, BattleSession.player2_id, BattleSession.winner_id)
+        .where(BattleSession.status == "finished")
+        .order_by(BattleSession.created_at, BattleSession.id)
+        .execution_options(yield_per=50_000)
+    )
+    ts, p1, p2, score = [], [], [], []
+    stream = await db.stream(stmt)
+    async for created_at, player1, player2, winner in stream:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=datetime.timezone.utc)
+        ts.append(created_at.timestamp())
+        p1.append(player1)
+        p2.append(-1 if player2 is None else player2)
+        score.append(battle_score(winner, player1))
+    return np.array(ts), np.array(p1, dtype=np.int64), np.array(p2, dtype=np.int64), np.array(score)
+
+
+async def recompute_ratings(db: AsyncSession, now: datetime.datetime | None = None) -> dict:
+    started = time.perf_counter()
+    ts, p1, p2, score = await _load_battles(db)
+    if not len(ts):
+        return {"battles": 0, "players": 0, "seconds": 0.0}
+    loaded = time.perf_counter()
+
+    # 玩家 id -> 下标；AI 对手（player2 为空）占最后一个下标
+    user_ids, inverse = np.unique(np.concatenate([p1, p2[p2 >= 0]]), return_inverse=True)
+    ai = len(user_ids)
+    a = inverse[:len(p1)]
+    b = np.full(len(p2), ai, dtype=np.int64)
+    b[p2 >= 0] = inverse[len(p1):]
+
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    period_seconds = glicko2.PERIOD_DAYS * 86400
+    period = ((ts - ts[0]) // period_seconds).astype(np.int64)
+    current = int((now.timestamp() - ts[0]) // period_seconds)
+    result = glicko2.recompute(
+        ai + 1, period, a, b, score, fixed_ratings={ai: (AI_RATING, AI_RD)}, last_period=current,
+    )
+    computed = time.perf_counter()
+
+    rows = [
+        {
+            "user_id": int(uid),
+            "rating": max(100, int(round(result.rating[i]))),
+            "rd": round(float(result.rd[i]), 2),
+            "volatility": float(result.volatility[i]),
+            "wins": int(result.wins[i]),
+            "losses": int(result.losses[i]),
+            "tier": calculate_tier(max(100, int(round(result.rating[i])))),
+            "recomputed_at": now,
+        }
+        for i, uid in enumerate(user_ids)
+    ]
+    for start in range(0, len(rows), WRITE_CHUNK):
+        stmt = upsert_insert(db, PlayerRating).values(rows[start:start + WRITE_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={col: stmt.excluded[col] for col in ("rating", "rd", "volatility", "wins", "losses", "tier", "recomputed_at")},
+        )
+        await db.execute(stmt)
+    await db.commit()
+
+    return {
+        "battles": len(ts),
+        "players": len(rows),
+        "periods": result.periods,
+        "compute_seconds": round(computed - loaded, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def main():
+    async with async_session() as db:
+        stats = await recompute_ratings(db)
+    if not stats["battles"]:
+        print("  - 没有已结束的对战")
+        return
+    print(
+        f"  ✓ {stats['battles']} 场对战 / {stats['players']} 名玩家 / {stats['periods']} 个评分周期，"
+        f"计算 {stats['compute_seconds']}s，总计 {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""SSE 流式输出适配 — 把模型的 token 级小块合并后再推给客户端。
+
+- start_pump：后台任务读取上游异步迭代器，块放进队列；任务被取消时立即关闭上游（断开 HTTP 流）
+- coalesce：从队列读取并合并，攒够 max_bytes 字节或距本批第一块超过 interval 秒就输出一次；
+  首块立即输出，不拖慢首字时间
+- 客户端断开按 disconnect_interval 定时检查，而不是每块都检查；断开后取消上游任务
+
+队列协议：文本块依次放入，出错时放异常对象，结束时放 None。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from starlette.requests import Request
+
+FLUSH_INTERVAL = 0.03
+FLUSH_BYTES = 256
+DISCONNECT_INTERVAL = 1.0
+
+
+def start_pump(source: AsyncIterator[str]) -> tuple[asyncio.Task, asyncio.Queue]:
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async with aclosing(source) as chunks:
+                async for chunk in chunks:
+                    queue.put_nowait(chunk)
+        except Exception as exc:
+            queue.put_nowait(exc)
+        finally:
+            queue.put_nowait(None)
+
+    return asyncio.create_task(pump()), queue
+
+
+async def coalesce(
+    task: asyncio.Task,
+    queue: asyncio.Queue,
+    request: Request | None = None,
+    interval: float = FLUSH_INTERVAL,
+    max_bytes: int = FLUSH_BYTES,
+    disconnect_interval: float = DISCONNECT_INTERVAL,
+) -> AsyncIterator[str]:
+    """合并后的文本块。上游出错时抛出其异常；客户端断开或结束时取消 task 并返回。"""
+    loop = asyncio.get_running_loop()
+    parts: list[str] = []
+    size = 0
+    first = True
+    deadline = 0.0
+    next_check = loop.time() + disconnect_interval
+    try:
+        while True:
+            # 队列里已有的块直接取走，只有空队列时才挂起等待
+            if queue.empty():
+                wake = min(deadline, next_check) if parts else next_check
+                try:
+                    async with asyncio.timeout_at(wake):
+                        item = await queue.get()
+                except TimeoutError:
+                    item = ""
+            else:
+                item = queue.get_nowait()
+
+            if item is None or isinstance(item, Exception):
+                if parts:
+                    yield "".join(parts)
+                if item is not None:
+                    raise item
+                return
+            if item:
+                if not parts:
+                    deadline = loop.time() + interval
+                parts.append(item)
+                size += len(item.encode())
+
+            now = loop.time()
+            if parts and (first or size >= max_bytes or now >= deadline):
+                yield "".join(parts)
+                parts, size, first = [], 0, False
+            if request is not None and now >= next_check:
+                if await request.is_disconnected():
+                    return
+                next_check = loop.time() + disconnect_interval
+    finally:
+        task.cancel()
@@ -0,0 +1,66 @@
+"""反思质量离线回填：按当前规则（app.services.text_analysis）重算 reflection_entries.quality_score。
+
+用法：
+    python -m app.utils.tqi_backfill              # 重算全部记录
+    python -m app.utils.tqi_backfill --missing    # 只补 quality_score 为空的记录
+
+按 id 分块读取（键集分页），每块批量打分后只写回分数有变化的行，每块提交一次。
+"""
+
+import asyncio
+import sys
+import time
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_session
+from app.models.cognitive import ReflectionEntry
+from app.services.text_analysis import reflection_quality_batch
+
+CHUNK = 5000
+
+
+async def backfill_reflection_quality(db: AsyncSession, missing_only: bool = False) -> dict:
+    started = time.perf_counter()
+    scanned = updated = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(ReflectionEntry.id, ReflectionEntry.reflection_text, ReflectionEntry.quality_score)
+            .where(ReflectionEntry.id > last_id)
+            .order_by(ReflectionEntry.id)
+            .limit(CHUNK)
+        )
+        if missing_only:
+            stmt = stmt.where(ReflectionEntry.quality_score.is_(None))
+        rows = (await db.execute(stmt)).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+
+        scores = reflection_quality_batch(text for _, text, _ in rows)
+        changes = [
+            {"id": row_id, "quality_score": score}
+            for (row_id, _, old), score in zip(rows, scores)
+            if old is None or abs(old - score) > 1e-9
+        ]
+        if changes:
+            # 按主键的 ORM 批量 UPDATE（executemany）
+            await db.execute(update(ReflectionEntry), changes)
+            updated += len(changes)
+        await db.commit()
+
+    return {"scanned": scanned, "updated": updated, "seconds": round(time.perf_counter() - started, 2)}
+
+
+async def main(missing_only: bool):
+    async with async_session() as db:
+        stats = await backfill_reflection_quality(db, missing_only)
+    if not stats["scanned"]:
+        print("  - 没有需要处理的反思记录")
+        return
+    print(f"  ✓ 扫描 {stats['scanned']} 条反思记录，更新 {stats['updated']} 条，用时 {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main("--missing" in sys.argv[1:]))
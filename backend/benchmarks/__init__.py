@@ -0,0 +1 @@
+"""核心服务函数的基准测试（python -m benchmarks.run），结果对比见 benchmarks.compare。"""
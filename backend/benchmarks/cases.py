@@ -0,0 +1,196 @@
+"""基准用例 — 每个用例是一个 async 函数，只有 `with timer:` 包住的部分计时。
+
+用例里的写操作最后都回滚（或由清理语句删掉），重复执行时数据保持不变。
+每个用例有独立的随机数序列，只跑部分用例（--filter）时选到的用户也不变。
+"""
+
+import contextlib
+import io
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.exam import ExamProfile, ExamQuestion
+from app.models.question import Question
+from app.models.user import User
+from app.routers.stats import learning_report
+from app.services import exam_mock, metrics
+from app.services.exam_prediction import predict_score
+from app.services.exam_training import get_adaptive_questions
+from app.services.exam_weakness import get_weakness_list
+from app.services.knowledge import get_galaxy_view
+from app.services.xp import award_xp
+from app.utils.data_import import import_jsonl
+from app.utils.import_exam_questions import import_exam_questions
+from benchmarks.seed import IMPORT_SOURCE_PREFIX, IMPORT_TOPIC, STRUCTURES
+
+ADAPTIVE_LIMIT = 10
+GALAXY_LIMIT = 50
+GALAXY_VIEWPORT = 400.0
+
+
+class Timer:
+    """计时并记下这段时间里的 SQL 条数、数据库耗时和 LLM 耗时（复用 app.services.metrics 的请求计时）。"""
+
+    elapsed = db = llm = 0.0
+    queries = 0
+
+    def __enter__(self):
+        self._timings = metrics.start_request()
+        self._queries = metrics.DB_QUERIES.value()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._started
+        self.db = self._timings.db
+        self.llm = self._timings.llm
+        self.queries = int(metrics.DB_QUERIES.value() - self._queries)
+
+
+@dataclass
+class Context:
+    session: async_sessionmaker
+    user_ids: list[int]
+    exam_of: dict[int, str]
+    import_dir: Path
+    rng: random.Random
+
+    def user(self) -> tuple[int, str]:
+        user_id = self.rng.choice(self.user_ids)
+        return user_id, self.exam_of[user_id]
+
+    def for_case(self, name: str, seed: int) -> "Context":
+        return Context(self.session, self.user_ids, self.exam_of, self.import_dir, random.Random(f"{seed}:{name}"))
+
+
+async def load_context(session: async_sessionmaker, import_dir: Path) -> Context:
+    async with session() as db:
+        rows = (await db.execute(select(ExamProfile.user_id, ExamProfile.exam_type).order_by(ExamProfile.user_id))).all()
+    exam_of = {user_id: exam_type for user_id, exam_type in rows}
+    return Context(session, list(exam_of), exam_of, import_dir, random.Random(0))
+
+
+Case = Callable[[Context, Timer], Awaitable[None]]
+CASES: dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(fn: Case) -> Case:
+        CASES[name] = fn
+        return fn
+    return register
+
+
+@case("start_mock")
+async def bench_start_mock(ctx: Context, timer: Timer):
+    user_id, exam_type = ctx.user()
+    async with ctx.session() as db:
+        with timer:
+            await exam_mock.start_mock(user_id, exam_type, db)
+        await db.rollback()
+
+
+@case("submit_mock")
+async def bench_submit_mock(ctx: Context, timer: Timer):
+    user_id, exam_type = ctx.user()
+    async with ctx.session() as db:
+        mock = await exam_mock.start_mock(user_id, exam_type, db)
+        answers = [
+            {
+                "question_id": q["id"],
+                "answer": ctx.rng.choice("ABCD") if q["options"] else "went",
+                "time_spent": ctx.rng.randint(10, 90),
+            }
+            for section in mock["sections"]
+            for q in section["questions"]
+        ]
+        with timer:
+            await exam_mock.submit_mock(user_id, mock["mock_id"], answers, db)
+        await db.rollback()
+
+
+@case("get_adaptive_questions")
+async def bench_adaptive_questions(ctx: Context, timer: Timer):
+    user_id, exam_type = ctx.user()
+    section = ctx.rng.choice(list(STRUCTURES[exam_type]))
+    async with ctx.session() as db:
+        with timer:
+            await get_adaptive_questions(user_id, exam_type, section, ADAPTIVE_LIMIT, db)
+        await db.rollback()
+
+
+@case("get_weakness_list")
+async def bench_weakness_list(ctx: Context, timer: Timer):
+    user_id, exam_type = ctx.user()
+    async with ctx.session() as db:
+        with timer:
+            await get_weakness_list(user_id, exam_type, db)
+
+
+@case("predict_score")
+async def bench_predict_score(ctx: Context, timer: Timer):
+    user_id, _ = ctx.user()
+    async with ctx.session() as db:
+        with timer:
+            await predict_score(user_id, db)
+        await db.rollback()
+
+
+@case("learning_report")
+async def bench_learning_report(ctx: Context, timer: Timer):
+    user_id, _ = ctx.user()
+    async with ctx.session() as db:
+        user = await db.get(User, user_id)
+        with timer:
+            await learning_report(user=user, db=db)
+
+
+@case("get_galaxy_view")
+async def bench_galaxy_view(ctx: Context, timer: Timer):
+    user_id, _ = ctx.user()
+    async with ctx.session() as db:
+        with timer:
+            await get_galaxy_view(user_id, db, limit=GALAXY_LIMIT, offset=ctx.rng.randint(0, 20) * GALAXY_LIMIT)
+
+
+@case("get_galaxy_view:bbox")
+async def bench_galaxy_viewport(ctx: Context, timer: Timer):
+    user_id, _ = ctx.user()
+    x, y = ctx.rng.uniform(-1000, 600), ctx.rng.uniform(-1000, 600)
+    async with ctx.session() as db:
+        with timer:
+            await get_galaxy_view(user_id, db, limit=GALAXY_LIMIT, bbox=(x, y, x + GALAXY_VIEWPORT, y + GALAXY_VIEWPORT))
+
+
+@case("award_xp")
+async def bench_award_xp(ctx: Context, timer: Timer):
+    user_id, _ = ctx.user()
+    async with ctx.session() as db:
+        with timer:
+            await award_xp(user_id, "practice_correct", db)
+        await db.rollback()
+
+
+@case("import_jsonl")
+async def bench_import_jsonl(ctx: Context, timer: Timer):
+    async with ctx.session() as db:
+        with timer:
+            await import_jsonl(ctx.import_dir / "bench.jsonl", db)
+        await db.execute(delete(Question).where(Question.topic == IMPORT_TOPIC))
+        await db.commit()
+
+
+@case("import_exam_questions")
+async def bench_import_exam_questions(ctx: Context, timer: Timer):
+    # 导入工具自己开会话并打印统计
+    with contextlib.redirect_stdout(io.StringIO()), timer:
+        await import_exam_questions(ctx.import_dir)
+    async with ctx.session() as db:
+        await db.execute(delete(ExamQuestion).where(ExamQuestion.source_id.like(f"{IMPORT_SOURCE_PREFIX}%")))
+        await db.commit()
@@ -0,0 +1,72 @@
+"""对比两次基准测试结果（python -m benchmarks.run 的 JSON 输出）。
+
+用法：
+    python -m benchmarks.compare benchmarks/results/abc1234-small.json benchmarks/results/def5678-small.json
+    python -m benchmarks.compare base.json head.json --threshold 0.2 --stat p95_ms
+
+按用例打印两次的耗时和变化比例，变慢超过 --threshold（默认 10%）的用例标记为回归，存在回归时退出码为 1。
+"""
+
+import argparse
+import json
+import sys
+
+# 两次结果的这些字段不同时，数字不可直接比较
+COMPARABLE_FIELDS = ("database", "scale", "seed")
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(base: dict, head: dict, stat: str, threshold: float) -> list[dict]:
+    rows = []
+    for name, head_row in head["results"].items():
+        base_row = base["results"].get(name)
+        if base_row is None:
+            rows.append({"case": name, "base": None, "head": head_row[stat], "change": None, "regression": False})
+            continue
+        before, after = base_row[stat], head_row[stat]
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            "case": name, "base": before, "head": after, "change": change,
+            "queries": (base_row.get("queries"), head_row.get("queries")),
+            "regression": change > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--stat", default="median_ms", help="比较的字段，如 median_ms / p95_ms / min_ms")
+    parser.add_argument("--threshold", type=float, default=0.10, help="变慢超过该比例视为回归")
+    args = parser.parse_args()
+
+    base, head = _load(args.base), _load(args.head)
+    for field in COMPARABLE_FIELDS:
+        if base.get(field) != head.get(field):
+            print(f"  ! 两次结果的 {field} 不同：{base.get(field)} / {head.get(field)}")
+    print(f"  base {base.get('commit')}  →  head {head.get('commit')}{' (dirty)' if head.get('dirty') else ''}\n")
+
+    rows = compare(base, head, args.stat, args.threshold)
+    print(f"{'case':28} {'base':>10} {'head':>10} {'change':>8} {'queries':>12}")
+    for row in rows:
+        if row["base"] is None:
+            print(f"{row['case']:28} {'-':>10} {row['head']:>10.1f} {'new':>8}")
+            continue
+        queries = "{} → {}".format(*row["queries"]) if row["queries"][0] != row["queries"][1] else ""
+        mark = "  ✗" if row["regression"] else ""
+        print(f"{row['case']:28} {row['base']:>10.1f} {row['head']:>10.1f} {row['change']:>+8.1%} {queries:>12}{mark}")
+
+    regressions = [row["case"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n  ✗ {len(regressions)} 个用例变慢超过 {args.threshold:.0%}：{', '.join(regressions)}")
+        sys.exit(1)
+    print("\n  ✓ 无回归")
+
+
+if __name__ == "__main__":
+    main()
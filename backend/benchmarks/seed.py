@@ -0,0 +1,360 @@
+"""基准测试数据 — 按规模批量生成用户、练习记录、真题、知识图谱等数据。
+
+全部用 Core 的批量 INSERT 写入（不经过 ORM），1M 条练习记录在 SQLite 上也只需几十秒。
+同一个 --seed 生成的数据完全一致，不同提交之间的结果才能对比。
+"""
+
+import datetime
+import importlib
+import json
+import pkgutil
+import random
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+import app.models
+from app.models import Base
+from app.models.exam import (
+    ExamKnowledgePoint, ExamProfile, ExamQuestion, KnowledgeMastery, MockExam, WeaknessBreakthrough,
+)
+from app.models.gamification import Achievement, UserXP
+from app.models.irt import ItemParameter
+from app.models.knowledge import KnowledgeEdge, KnowledgeNode, UserGalaxyStats, UserNodeStatus
+from app.models.learning import LearningRecord
+from app.models.question import Question
+from app.models.user import User
+from app.services.adaptive import BANK_EXAM
+from app.services.exam_mock import GAOKAO_STRUCTURE, SECTION_LABELS, ZHONGKAO_STRUCTURE
+from app.utils import json_codec
+
+# 注册全部模型，drop_all / create_all 才覆盖所有表
+for _module in pkgutil.iter_modules(app.models.__path__):
+    importlib.import_module(f"app.models.{_module.name}")
+
+BATCH = 5000
+KP_PER_SECTION = 8
+PASSAGE_SIZE = 4
+# 每个用户的附带数据
+MASTERY_RATIO = 0.6
+NODES_PER_USER = 30
+MOCK_USER_RATIO = 0.2
+IRT_CALIBRATED_RATIO = 0.5
+HISTORY_DAYS = 90
+
+STRUCTURES = {"gaokao": GAOKAO_STRUCTURE, "zhongkao": ZHONGKAO_STRUCTURE}
+CHOICE_SECTIONS = {"reading", "seven_choose_five", "cloze", "single_choice"}
+IMPORT_TOPIC = "bench-import"
+IMPORT_SOURCE_PREFIX = "bench-"
+
+
+@dataclass
+class Scale:
+    users: int
+    records: int
+    exam_questions: int
+    practice_questions: int
+    nodes: int
+    import_rows: int
+
+
+SCALES = {
+    "tiny": Scale(users=100, records=20_000, exam_questions=5_000, practice_questions=1_000, nodes=2_000, import_rows=500),
+    "small": Scale(users=1_000, records=100_000, exam_questions=20_000, practice_questions=2_000, nodes=5_000, import_rows=2_000),
+    "full": Scale(users=10_000, records=1_000_000, exam_questions=100_000, practice_questions=5_000, nodes=20_000, import_rows=10_000),
+}
+
+
+async def _insert(conn: AsyncConnection, table, rows: Iterable[dict]) -> int:
+    count = 0
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            await conn.execute(insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        await conn.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+async def _ids(conn: AsyncConnection, column, *where) -> list[int]:
+    result = await conn.execute(select(column).where(*where).order_by(column))
+    return list(result.scalars().all())
+
+
+async def is_seeded(engine: AsyncEngine, scale: Scale) -> bool:
+    """库里已经是这个规模的数据时跳过重建。"""
+    try:
+        async with engine.connect() as conn:
+            users = (await conn.execute(select(func.count()).select_from(User))).scalar()
+            records = (await conn.execute(select(func.count()).select_from(LearningRecord))).scalar()
+            questions = (await conn.execute(select(func.count()).select_from(ExamQuestion))).scalar()
+    except Exception:
+        return False
+    return (users, records, questions) == (scale.users, scale.records, scale.exam_questions)
+
+
+async def seed(engine: AsyncEngine, scale: Scale, seed: int = 0, log=print):
+    """清空并按规模重建全部数据。"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with engine.begin() as conn:
+        n = await _insert(conn, User.__table__, (
+            {
+                "phone": f"177{i:08d}", "hashed_password": "bench", "grade_level": "高中",
+                "grade": rng.choice(["高一", "高二", "高三"]), "cefr_level": rng.choice(["A2", "B1", "B2"]),
+                "is_admin": False,
+            }
+            for i in range(scale.users)
+        ))
+        user_ids = await _ids(conn, User.id)
+        log(f"  ✓ users: {n}")
+
+        exam_of = {uid: "gaokao" if rng.random() < 0.7 else "zhongkao" for uid in user_ids}
+        await _insert(conn, ExamProfile.__table__, (
+            {
+                "user_id": uid, "exam_type": exam_type, "province": "通用",
+                "target_score": 130 if exam_type == "gaokao" else 110, "exam_date": "2027-06-07",
+                "current_estimated_score": 0,
+            }
+            for uid, exam_type in exam_of.items()
+        ))
+
+        # 考点：每种考试每个 section 若干个
+        await _insert(conn, ExamKnowledgePoint.__table__, (
+            {
+                "exam_type": exam_type, "section": section, "category": SECTION_LABELS.get(section, section),
+                "name": f"{section} 考点 {k + 1}", "description": "", "difficulty": rng.randint(1, 5),
+                "frequency": rng.choice(["high", "medium", "low"]),
+            }
+            for exam_type, structure in STRUCTURES.items()
+            for section in structure
+            for k in range(KP_PER_SECTION)
+        ))
+        kp_rows = (await conn.execute(
+            select(ExamKnowledgePoint.id, ExamKnowledgePoint.exam_type, ExamKnowledgePoint.section)
+        )).all()
+        kps_by_section: dict[tuple[str, str], list[int]] = {}
+        kps_by_exam: dict[str, list[int]] = {}
+        for kp_id, exam_type, section in kp_rows:
+            kps_by_section.setdefault((exam_type, section), []).append(kp_id)
+            kps_by_exam.setdefault(exam_type, []).append(kp_id)
+
+        n = await _insert(conn, ExamQuestion.__table__, _exam_questions(rng, scale.exam_questions, kps_by_section))
+        exam_question_ids = await _ids(conn, ExamQuestion.id)
+        log(f"  ✓ exam_questions: {n}")
+
+        await _insert(conn, ItemParameter.__table__, (
+            {"bank": BANK_EXAM, "item_id": qid, "a": rng.uniform(0.6, 2.0), "b": rng.gauss(0, 1),
+             "c": 0.2, "n_responses": rng.randint(50, 500)}
+            for qid in exam_question_ids if rng.random() < IRT_CALIBRATED_RATIO
+        ))
+
+        await _insert(conn, Question.__table__, (
+            {
+                "stage": "高中", "grade": rng.choice(["高一", "高二", "高三"]), "topic": f"topic-{i % 50}",
+                "difficulty": rng.randint(1, 5), "question_type": "单项选择",
+                "content": f"Practice question {i}: Choose the best answer.",
+                "options_json": {"A": "a", "B": "b", "C": "c", "D": "d"}, "answer": rng.choice("ABCD"),
+                "explanation": "", "created_at": now,
+            }
+            for i in range(scale.practice_questions)
+        ))
+        question_ids = await _ids(conn, Question.id)
+
+        n = await _insert(conn, LearningRecord.__table__, (
+            {
+                "user_id": rng.choice(user_ids), "question_id": rng.choice(question_ids),
+                "is_correct": rng.random() < 0.65, "time_spent": rng.randint(5, 120),
+                "created_at": now - datetime.timedelta(seconds=rng.uniform(0, HISTORY_DAYS * 86400)),
+            }
+            for _ in range(scale.records)
+        ))
+        log(f"  ✓ learning_records: {n}")
+
+        def mastery_rows() -> Iterator[dict]:
+            for uid in user_ids:
+                for kp_id in kps_by_exam[exam_of[uid]]:
+                    if rng.random() >= MASTERY_RATIO:
+                        continue
+                    attempts = rng.randint(1, 40)
+                    yield {
+                        "user_id": uid, "knowledge_point_id": kp_id, "mastery_level": rng.random(),
+                        "total_attempts": attempts, "correct_attempts": rng.randint(0, attempts),
+                        "last_practiced_at": now - datetime.timedelta(days=rng.uniform(0, 30)),
+                    }
+
+        n = await _insert(conn, KnowledgeMastery.__table__, mastery_rows())
+        log(f"  ✓ knowledge_masteries: {n}")
+
+        await _insert(conn, WeaknessBreakthrough.__table__, (
+            {
+                "user_id": uid, "knowledge_point_id": kp_id, "status": rng.choice(["pending", "in_progress", "completed"]),
+                "phase": rng.randint(1, 3), "mastery_before": rng.random() * 0.5,
+            }
+            for uid in user_ids
+            for kp_id in rng.sample(kps_by_exam[exam_of[uid]], rng.randint(0, 2))
+        ))
+        await _insert(conn, MockExam.__table__, (
+            _completed_mock(rng, uid, exam_of[uid], now)
+            for uid in user_ids if rng.random() < MOCK_USER_RATIO
+            for _ in range(rng.randint(1, 3))
+        ))
+
+        xp_values = {uid: rng.randint(0, 20000) for uid in user_ids}
+        await _insert(conn, UserXP.__table__, (
+            {
+                "user_id": uid, "total_xp": total, "level": _level(total), "streak_days": rng.randint(0, 30),
+                "last_active_date": (now.date() - datetime.timedelta(days=rng.randint(0, 3))).isoformat(),
+            }
+            for uid, total in xp_values.items()
+        ))
+        await _insert(conn, Achievement.__table__, (
+            {"user_id": uid, "key": key, "name": key, "description": "", "icon": "🏆"}
+            for uid in user_ids
+            for key in ("first_practice", "practice_10", "streak_3")
+            if rng.random() < 0.5
+        ))
+
+        n = await _insert(conn, KnowledgeNode.__table__, (
+            {
+                "word": f"w{i:06d}", "pos": rng.choice(["noun", "verb", "adj", "adv"]), "definition": f"释义 {i}",
+                "cefr_level": rng.choice(["A1", "A2", "B1", "B2", "C1"]), "frequency_rank": i + 1,
+                "x": rng.uniform(-1000, 1000), "y": rng.uniform(-1000, 1000), "cluster_id": i % 40,
+                "lod_level": 0 if i < scale.nodes // 100 else rng.choice([1, 2, 3, 3, 3]),
+            }
+            for i in range(scale.nodes)
+        ))
+        node_ids = await _ids(conn, KnowledgeNode.id)
+        await _insert(conn, KnowledgeEdge.__table__, (
+            {
+                "source_node_id": node_ids[i], "target_node_id": node_ids[(i + offset) % len(node_ids)],
+                "relation_type": relation, "weight": rng.uniform(0.3, 1.0),
+            }
+            for i in range(len(node_ids))
+            for offset, relation in ((1, "synonym"), (7, "collocation"))
+        ))
+        log(f"  ✓ knowledge_nodes: {n}")
+
+        statuses: dict[int, dict[str, int]] = {}
+
+        def node_status_rows() -> Iterator[dict]:
+            for uid in user_ids:
+                counts = statuses.setdefault(uid, {"seen": 0, "familiar": 0, "mastered": 0})
+                for node_id in rng.sample(node_ids, min(NODES_PER_USER, len(node_ids))):
+                    status = rng.choice(["seen", "seen", "familiar", "mastered"])
+                    counts[status] += 1
+                    yield {
+                        "user_id": uid, "node_id": node_id, "status": status,
+                        "encounter_count": rng.randint(1, 10), "last_seen": now,
+                    }
+
+        await _insert(conn, UserNodeStatus.__table__, node_status_rows())
+        await _insert(conn, UserGalaxyStats.__table__, (
+            {"user_id": uid, "seen_count": c["seen"], "familiar_count": c["familiar"], "mastered_count": c["mastered"]}
+            for uid, c in statuses.items()
+        ))
+
+
+def _exam_questions(rng: random.Random, total: int, kps_by_section: dict) -> Iterator[dict]:
+    """按 60% 高考 / 40% 中考分配，篇章类 section 每 PASSAGE_SIZE 题共用一篇短文。"""
+    sections = [
+        (exam_type, section) for exam_type, structure in STRUCTURES.items() for section in structure
+    ]
+    weights = [
+        (0.6 if exam_type == "gaokao" else 0.4) * STRUCTURES[exam_type][section]["count"]
+        for exam_type, section in sections
+    ]
+    group_seq: dict[tuple[str, str], int] = {}
+    open_groups: dict[tuple[str, str], tuple[str, str, int]] = {}
+    for i in range(total):
+        exam_type, section = key = rng.choices(sections, weights)[0]
+        cfg = STRUCTURES[exam_type][section]
+        passage_group, passage_text, passage_index = None, None, 0
+        if "passages" in cfg:
+            group = open_groups.get(key)
+            if group is None or group[2] >= PASSAGE_SIZE:
+                group_seq[key] = group_seq.get(key, 0) + 1
+                text = " ".join(f"Sentence {k} of passage {group_seq[key]}." for k in range(40))
+                group = (f"{exam_type}_{section}_{group_seq[key]:05d}", text, 0)
+            passage_group, passage_text, passage_index = group
+            open_groups[key] = (group[0], group[1], group[2] + 1)
+        has_options = section in CHOICE_SECTIONS
+        yield {
+            "exam_type": exam_type, "section": section,
+            "knowledge_point_id": rng.choice(kps_by_section[key]),
+            "difficulty": rng.randint(1, 5), "year": rng.randint(2015, 2025), "province": "全国",
+            "passage_group": passage_group, "passage_index": passage_index,
+            "content": f"Question {i}: ______ is the best answer.", "passage_text": passage_text,
+            "options_json": json_codec.dumps(["A. one", "B. two", "C. three", "D. four"]) if has_options else None,
+            "answer": rng.choice("ABCD") if has_options else "went",
+            "explanation": "解析略。", "strategy_tip": "",
+        }
+
+
+def _completed_mock(rng: random.Random, user_id: int, exam_type: str, now: datetime.datetime) -> dict:
+    sections = {}
+    for section, cfg in STRUCTURES[exam_type].items():
+        accuracy = rng.uniform(0.3, 0.95)
+        sections[section] = {
+            "label": SECTION_LABELS.get(section, section), "score": round(cfg["score"] * accuracy, 1),
+            "max": cfg["score"], "accuracy": round(accuracy, 2),
+        }
+    score = {
+        "total": round(sum(s["score"] for s in sections.values()), 1),
+        "max": sum(cfg["score"] for cfg in STRUCTURES[exam_type].values()),
+        "sections": sections,
+    }
+    completed = now - datetime.timedelta(days=rng.uniform(0, 60))
+    return {
+        "user_id": user_id, "exam_type": exam_type, "status": "completed", "time_limit_minutes": 120,
+        "sections_json": "[]", "answers_json": "[]", "score_json": json_codec.dumps(score),
+        "started_at": completed - datetime.timedelta(minutes=100), "completed_at": completed,
+    }
+
+
+def _level(total_xp: int) -> int:
+    level = 1
+    while (level + 1) ** 2 * 50 <= total_xp:
+        level += 1
+    return level
+
+
+def write_import_files(directory: Path, rows: int, seed: int = 0) -> Path:
+    """生成 edu-distill 格式的 JSONL（两个导入工具共用），返回文件所在目录。"""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    question_types = ["阅读理解", "完形填空", "语法填空", "单项选择", "七选五", "书面表达"]
+    path = directory / "bench.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(rows):
+            qtype = rng.choice(question_types)
+            content = (
+                f"Read the passage and answer. Passage {i // 4}: " + "Some text here. " * 20
+                + f"\n\n{i}. What is the main idea?\nA. one\nB. two\nC. three\nD. four"
+            )
+            record = {
+                "id": f"{IMPORT_SOURCE_PREFIX}{i}",
+                "conversations": [
+                    {"role": "system", "content": "你是英语老师。"},
+                    {"role": "user", "content": content},
+                    {"role": "assistant", "content": f"<think>分析</think>答案：{rng.choice('ABCD')}"},
+                ],
+                "metadata": {
+                    "subject": "英语", "grade_level": "高中", "grade": "高二", "topic": IMPORT_TOPIC,
+                    "difficulty": rng.choice(["基础", "中等", "较难"]), "question_type": qtype,
+                },
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return directory
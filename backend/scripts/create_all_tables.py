@@ -7,17 +7,18 @@ from app.models.question import Question  # noqa: F401
 from app.models.learning import LearningRecord  # noqa: F401
 from app.models.writing import WritingSubmission  # noqa: F401
 from app.models.reading import ReadingMaterial  # noqa: F401
-from app.models.vocabulary import UserVocabulary  # noqa: F401
+from app.models.vocabulary import UserVocabulary, VocabReviewLog, VocabSchedulerParams  # noqa: F401
 from app.models.gamification import UserXP, Achievement, DailyMission  # noqa: F401
 from app.models.screenshot import ScreenshotLesson  # noqa: F401
 from app.models.clinic import ErrorPattern, TreatmentPlan  # noqa: F401
 from app.models.story import StoryTemplate, StorySession, StoryChapter  # noqa: F401
-from app.models.knowledge import KnowledgeNode, KnowledgeEdge, UserNodeStatus  # noqa: F401
+from app.models.knowledge import KnowledgeNode, KnowledgeEdge, UserNodeStatus, UserGalaxyStats  # noqa: F401
 from app.models.arena import BattleSession, PlayerRating  # noqa: F401
 from app.models.quest import QuestTemplate, UserQuest  # noqa: F401
 from app.models.cognitive import (  # noqa: F401
     CognitiveSession, CognitiveTurn, ReflectionEntry, TeachingQualityMetric, CognitiveGainSnapshot,
 )
+from app.models.irt import ItemParameter, UserAbility  # noqa: F401
 from app.database import engine
 
 
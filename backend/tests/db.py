@@ -0,0 +1,24 @@
+"""测试用内存 SQLite：建全部表后在一个会话里运行协程。"""
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models.arena  # noqa: F401  注册表
+import app.models.irt  # noqa: F401
+import app.models.user  # noqa: F401
+import app.models.vocabulary  # noqa: F401
+from app.models import Base
+
+
+def run_with_db(fn):
+    async def go():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            result = await fn(db)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(go())
@@ -0,0 +1,306 @@
+"""本地 LLM 模拟服务 — OpenAI 兼容的 /chat/completions，压测时替代 Gemini。
+
+用法：
+    python -m tests.load.llm_mock --port 8900 --latency-ms 400 --tokens-per-sec 60 --error-rate 0.02
+    # 后端指向模拟服务
+    LLM_BASE_URL=http://127.0.0.1:8900/v1 uvicorn app.main:app
+
+- 首 token 延迟按对数正态分布抽样（中位数 --latency-ms，离散度 --latency-sigma）
+- 输出按 --tokens-per-sec 的速率吐出（流式逐块推送，非流式等价地整体延后）
+- --error-rate 的请求直接返回 --error-status 中随机一个状态码
+- 按 system prompt 的特征识别提示词家族，返回对应的固定 JSON；
+  识别不出的按普通文本回答（导师聊天、摘要等）。--canned 可用 JSON 文件覆盖/补充各家族的回答
+- GET /stats 返回各家族的请求数和注入的错误数
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# (家族, system prompt 中的特征片段)，按顺序匹配第一个
+FAMILIES = [
+    ("judge_answer", "判题助手"),
+    ("story_chapter", "互动英语故事作家"),
+    ("custom_quiz", "英语出题专家"),
+    ("writing_grading", "写作批改老师"),
+    ("writing_outline", "写作指导老师"),
+    ("writing_revision", "写作修改指导老师"),
+    ("word_detail", "英语词汇专家，请严格按照"),
+    ("knowledge_expand", "关联词网络"),
+    ("arena_respond", "AI 对手兼裁判"),
+    ("arena_judge", "英语对战裁判"),
+    ("clinic_diagnosis", "学习诊断专家"),
+    ("clinic_treatment", "学习治疗师"),
+    ("error_genes", "错误模式分析专家"),
+    ("fix_drill", "练习题生成专家"),
+    ("sprint_plan", "冲刺计划师"),
+    ("time_analysis", "时间管理教练"),
+    ("replay_narrative", "成长记录者"),
+    ("screenshot", "截图中的英文内容"),
+    ("quest_verify", "任务验证官"),
+    ("chat_summary", "滚动摘要"),
+]
+
+CANNED: dict[str, object] = {
+    "judge_answer": {"is_correct": True, "correct_answer": "B", "explanation": "选项 B 与参考解析一致。"},
+    "story_chapter": {
+        "narrative_text": (
+            "The rain stopped as Lily reached the old library. A soft light glowed behind the dusty windows, "
+            "and she could hear pages turning inside. She took a deep breath and pushed the heavy door open."
+        ),
+        "choices": [
+            {"label": "A", "description": "走进图书馆 Walk in", "next_prompt": "Lily explores the library"},
+            {"label": "B", "description": "先在门口观察 Wait and watch", "next_prompt": "Lily waits at the door"},
+        ],
+        "challenge": {
+            "type": "choice", "question": "What does 'glowed' mean?",
+            "options": ["shone softly", "broke", "moved", "fell"], "answer": "shone softly",
+            "hint": "Think about light.", "explanation": "glow 指发出柔和的光。",
+        },
+        "learning_points": [{"word": "glow", "meaning": "发光", "usage": "The lamp glowed in the dark."}],
+        "is_ending": False,
+    },
+    "custom_quiz": {
+        "section": "single_choice",
+        "difficulty": 3,
+        "questions": [
+            {
+                "question": f"Question {i}: She ___ to school every day.",
+                "options": ["A. go", "B. goes", "C. going", "D. gone"],
+                "answer": "B",
+                "explanation": "主语第三人称单数，一般现在时用 goes。",
+            }
+            for i in range(1, 6)
+        ],
+    },
+    "writing_grading": {
+        "score": 82, "summary": "结构清晰，语言基本准确。", "strengths": ["段落层次分明"],
+        "improvements": ["丰富连接词"],
+        "corrected_sentences": [{"original": "He go home.", "corrected": "He goes home.", "reason": "主谓一致"}],
+        "logic_questions": ["你的第二个观点有什么例子支撑？"], "framework_only_tips": [],
+    },
+    "writing_outline": {
+        "title_suggestion": "My Favourite Season",
+        "structure": [{"section": "开头", "key_points": ["点题"], "suggested_sentences": ["I like autumn best."]}],
+        "vocabulary_hints": ["breeze"], "grammar_focus": ["一般现在时"],
+        "clarify_questions": ["为什么喜欢这个季节？"], "word_count_suggestion": 80,
+    },
+    "writing_revision": {
+        "overall_comment": "内容完整。", "paragraph_feedback": [], "language_tips": ["注意时态"],
+        "next_steps": ["补充细节"], "logic_challenge_questions": ["请补充哪条证据支持你的观点？"],
+    },
+    "word_detail": {
+        "phonetic": "/ˈæpl/", "pos": "n.", "definition_en": "a round fruit", "definition_cn": "苹果",
+        "etymology": "Old English æppel", "collocations": ["apple pie"],
+        "example_sentences": [{"en": "I eat an apple every day.", "cn": "我每天吃一个苹果。"}],
+        "synonyms": [], "antonyms": [], "word_family": ["apples"], "memory_tip": "a-p-p-l-e",
+    },
+    "knowledge_expand": {
+        "related": [
+            {"word": "fruit", "pos": "n.", "definition": "水果", "definition_en": "food that grows on plants",
+             "relation": "family", "cefr_level": "A1", "example": "Apples are my favourite fruit."},
+        ],
+    },
+    "arena_respond": {
+        "ai_response": "I think reading is more fun than watching TV.",
+        "p1_score": 7, "p2_score": 6, "p1_feedback": "表达清楚", "p2_feedback": "回应自然",
+    },
+    "arena_judge": {"p1_score": 7, "p2_score": 6, "p1_feedback": "表达清楚", "p2_feedback": "略有语法错误"},
+    "clinic_diagnosis": {
+        "patterns": [{
+            "pattern_type": "grammar", "title": "第三人称单数遗漏", "description": "一般现在时主语为三单时动词未加 s",
+            "severity": "moderate", "evidence": [{"source": "practice", "text": "He like apples."}],
+            "diagnosis": {"root_cause": "主谓一致规则不熟", "l1_interference": "中文动词无形态变化", "knowledge_gaps": ["三单"]},
+        }],
+        "summary": "主要问题是主谓一致。",
+    },
+    "clinic_treatment": {
+        "exercises": [{"type": "fill", "question": "He ___ (like) apples.", "answer": "likes", "explanation": "三单"}],
+    },
+    "error_genes": {
+        "genes": [{
+            "pattern_key": "third_person_s", "pattern_description": "一般现在时第三人称单数漏加 s",
+            "section": "grammar_fill", "example_ids": [0, 1], "severity": "high",
+        }],
+    },
+    "fix_drill": {
+        "exercises": [
+            {"question": "He ___ to school.", "options": ["A. go", "B. goes", "C. going", "D. gone"],
+             "answer": "B", "explanation": "三单形式"},
+        ],
+    },
+    "sprint_plan": {
+        "tasks": [{
+            "type": "training", "section": "reading", "title": "阅读专项", "description": "完成两篇阅读",
+            "estimated_minutes": 20, "xp_reward": 30, "reason": "阅读掌握度最低",
+        }],
+        "motivation": "今天也要加油！",
+    },
+    "time_analysis": {"analysis": "阅读题用时偏长。", "tips": ["先读题干"], "worst_section": "reading", "improvement_rate": 0.3},
+    "replay_narrative": {"narrative": "你的每一次练习都在积累力量。", "highlight": "模考成绩稳步提升"},
+    "screenshot": {
+        "extracted_text": "Game over", "vocabulary": [{"word": "over", "pos": "adj.", "meaning": "结束的", "example": "The game is over."}],
+        "grammar_points": [], "cultural_notes": [], "exercises": [],
+    },
+    "quest_verify": {"passed": True, "feedback": "截图符合任务要求。", "score": 85},
+    "chat_summary": "学生在练习一般现在时，主要问题是第三人称单数漏加 s，导师已提示过主谓一致。",
+    "text": (
+        "好问题！我们先不急着看答案。请你先想一想：这句话的主语是谁？它是第三人称单数吗？"
+        "如果是，动词应该怎么变化呢？你可以先写下你的判断，再告诉我你的理由。"
+    ),
+}
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 400.0
+    latency_sigma: float = 0.5
+    tokens_per_sec: float = 60.0
+    error_rate: float = 0.0
+    error_status: list[int] = field(default_factory=lambda: [429, 500, 503])
+    seed: int | None = None
+
+
+def classify(messages: list[dict]) -> str:
+    system = " ".join(_text(m.get("content")) for m in messages if m.get("role") == "system")
+    for family, marker in FAMILIES:
+        if marker in system:
+            return family
+    return "text"
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _answer(family: str, canned: dict) -> str:
+    value = canned.get(family, canned["text"])
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _pieces(text: str, size: int = 4) -> list[str]:
+    """按约 1 token 切块：CJK 每字一块，其他字符每 size 个一块。"""
+    pieces, buf = [], ""
+    for ch in text:
+        if ord(ch) > 0x2e80:
+            if buf:
+                pieces.append(buf)
+                buf = ""
+            pieces.append(ch)
+        else:
+            buf += ch
+            if len(buf) >= size:
+                pieces.append(buf)
+                buf = ""
+    if buf:
+        pieces.append(buf)
+    return pieces
+
+
+def create_app(config: MockConfig | None = None, canned: dict | None = None) -> FastAPI:
+    config = config or MockConfig()
+    answers = {**CANNED, **(canned or {})}
+    rng = random.Random(config.seed)
+    counts: Counter = Counter()
+    errors: Counter = Counter()
+    app = FastAPI(title="LLM mock")
+
+    def first_token_delay() -> float:
+        return rng.lognormvariate(0.0, config.latency_sigma) * config.latency_ms / 1000 if config.latency_ms > 0 else 0.0
+
+    def token_interval() -> float:
+        return 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": dict(counts), "errors": dict(errors)}
+
+    @app.post("/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        family = classify(body.get("messages", []))
+        counts[family] += 1
+        if config.error_rate > 0 and rng.random() < config.error_rate:
+            status = rng.choice(config.error_status)
+            errors[family] += 1
+            return JSONResponse({"error": {"message": "injected error", "code": status}}, status_code=status)
+
+        text = _answer(family, answers)
+        pieces = _pieces(text)
+        model = body.get("model", "mock")
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token_delay() + len(pieces) * token_interval())
+            return {
+                "id": f"mock-{created}",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"completion_tokens": len(pieces)},
+            }
+
+        async def events():
+            await asyncio.sleep(first_token_delay())
+            interval = token_interval()
+            for piece in pieces:
+                chunk = {
+                    "id": f"mock-{created}",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if interval:
+                    await asyncio.sleep(interval)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地 LLM 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="首 token 延迟中位数")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="对数正态分布的离散度")
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0, help="输出速率，0 表示不限速")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", default="429,500,503", help="注入错误时随机选用的状态码")
+    parser.add_argument("--canned", help="JSON 文件：{家族名: 回答}，覆盖内置回答")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    canned = None
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as f:
+            canned = json.load(f)
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        error_status=[int(s) for s in args.error_status.split(",") if s.strip()],
+        seed=args.seed,
+    )
+
+    import uvicorn
+    uvicorn.run(create_app(config, canned), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
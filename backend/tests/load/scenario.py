@@ -0,0 +1,203 @@
+"""压测场景 — asyncio + httpx 模拟多个学生并发使用后端，统计各接口延迟。
+
+用法（后端先指向 LLM 模拟服务，见 tests/load/llm_mock.py；压测机单 IP，需关闭按 IP 限流）：
+    LLM_BASE_URL=http://127.0.0.1:8900/v1 RATE_LIMIT_PER_MINUTE=0 uvicorn app.main:app --port 8000
+    python -m tests.load.scenario --base-url http://127.0.0.1:8000 --users 50 --duration 60 --json result.json
+
+每个虚拟用户先注册/登录并建立考试档案，之后按权重循环执行动作，动作之间有随机思考时间：
+- chat：/chat/send 流式对话，读完整个 SSE 流，另记首块到达时间（chat:first_chunk）
+- practice：取练习题并提交答案
+- mock：开始一场模考并全部作答提交
+- stats：统计页、学习报告、备考看板
+
+结束后打印每个接口的请求数、错误数、吞吐和 p50/p95/p99 延迟（毫秒）。
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+PASSWORD = "loadtest123"
+# 动作权重
+ACTIONS = {"chat": 3, "practice": 3, "mock": 1, "stats": 3}
+
+CHAT_MESSAGES = [
+    "She don't like apples. 这句话哪里错了？",
+    "现在完成时和一般过去时有什么区别？",
+    "Can you help me practice ordering food in a restaurant?",
+    "我觉得 because 后面要用逗号，对吗？",
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, seconds: float, ok: bool = True):
+        self.samples[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def report(self, elapsed: float) -> dict:
+        rows = {}
+        for name in sorted(self.samples):
+            values = sorted(self.samples[name])
+            rows[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": _percentile(values, 0.50),
+                "p95_ms": _percentile(values, 0.95),
+                "p99_ms": _percentile(values, 0.99),
+                "max_ms": round(values[-1] * 1000, 1),
+            }
+        return rows
+
+
+def _percentile(values: list[float], q: float) -> float:
+    index = min(int(q * len(values)), len(values) - 1)
+    return round(values[index] * 1000, 1)
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, index: int, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.phone = f"199{index:08d}"
+        self.rng = rng
+        self.chat_session: str | None = None
+
+    async def call(self, name: str, method: str, path: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(name, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.add(name, time.perf_counter() - started, ok=resp.status_code < 400)
+        return resp
+
+    async def login(self) -> bool:
+        body = {"phone": self.phone, "password": PASSWORD}
+        resp = await self.call("auth:register", "POST", "/auth/register", json=body)
+        if resp is None or resp.status_code >= 400:
+            resp = await self.call("auth:login", "POST", "/auth/login", json=body)
+        if resp is None or resp.status_code >= 400:
+            return False
+        self.client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+        await self.call("exam:profile", "POST", "/exam/profile", json={
+            "exam_type": "zhongkao", "target_score": 110, "exam_date": "2027-06-20",
+        })
+        return True
+
+    async def chat(self):
+        body = {"message": self.rng.choice(CHAT_MESSAGES), "mode": "free"}
+        if self.chat_session:
+            body["session_id"] = int(self.chat_session)
+        started = time.perf_counter()
+        ok = False
+        try:
+            async with self.client.stream("POST", "/chat/send", json=body) as resp:
+                self.chat_session = resp.headers.get("X-Chat-Session-Id", self.chat_session)
+                first = True
+                async for line in resp.aiter_lines():
+                    if first and line.startswith("data:"):
+                        self.recorder.add("chat:first_chunk", time.perf_counter() - started)
+                        first = False
+                ok = resp.status_code < 400
+        except httpx.HTTPError:
+            pass
+        self.recorder.add("chat:send", time.perf_counter() - started, ok=ok)
+
+    async def practice(self):
+        resp = await self.call("practice:questions", "GET", "/practice/questions", params={"limit": 5})
+        if resp is None or resp.status_code >= 400 or not resp.json():
+            return
+        question = self.rng.choice(resp.json())
+        await self.call("practice:submit", "POST", "/practice/submit", json={
+            "question_id": question["id"], "answer": self.rng.choice("ABCD"), "time_spent": self.rng.randint(5, 60),
+        })
+
+    async def mock(self):
+        resp = await self.call("mock:start", "POST", "/exam/mock/start", json={})
+        if resp is None or resp.status_code >= 400:
+            return
+        data = resp.json()
+        answers = [
+            {"question_id": q["id"], "answer": self.rng.choice("ABCD"), "time_spent": self.rng.randint(10, 90)}
+            for section in data.get("sections", [])
+            for q in section.get("questions", [])
+        ]
+        await self.call("mock:submit", "POST", "/exam/mock/submit", json={"mock_id": data["mock_id"], "answers": answers})
+
+    async def stats(self):
+        for name, path in (
+            ("stats:dashboard", "/stats/dashboard"),
+            ("stats:learning_report", "/stats/learning-report"),
+            ("exam:dashboard", "/exam/dashboard"),
+        ):
+            await self.call(name, "GET", path)
+
+    async def run(self, deadline: float, think: float):
+        if not await self.login():
+            return
+        names = list(ACTIONS)
+        weights = list(ACTIONS.values())
+        while time.monotonic() < deadline:
+            action = self.rng.choices(names, weights)[0]
+            await getattr(self, action)()
+            if think:
+                await asyncio.sleep(self.rng.uniform(0, 2 * think))
+
+
+async def run(base_url: str, users: int, duration: float, think: float, ramp: float, seed: int | None) -> dict:
+    recorder = Recorder()
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    started = time.monotonic()
+    deadline = started + duration
+
+    async def start(i: int):
+        await asyncio.sleep(ramp * i / max(users, 1))
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            await VirtualUser(client, recorder, i, random.Random(rng.random())).run(deadline, think)
+
+    await asyncio.gather(*(start(i) for i in range(users)))
+    return recorder.report(time.monotonic() - started)
+
+
+def _print(report: dict):
+    print(f"{'endpoint':28} {'count':>7} {'err':>5} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, r in report.items():
+        print(
+            f"{name:28} {r['count']:>7} {r['errors']:>5} {r['rps']:>7} "
+            f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后端压测场景")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60.0, help="秒")
+    parser.add_argument("--think", type=float, default=1.0, help="动作之间的平均思考时间（秒）")
+    parser.add_argument("--ramp", type=float, default=10.0, help="所有用户在多少秒内陆续启动")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.base_url, args.users, args.duration, args.think, args.ramp, args.seed))
+    _print(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
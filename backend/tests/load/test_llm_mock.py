@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import httpx
+
+from app.services.exam_custom import _quiz_system
+from app.services.llm import JSON_ONLY_INSTRUCTION
+from app.services.story import _chapter_system
+from tests.load.llm_mock import MockConfig, classify, create_app
+
+FAST = MockConfig(latency_ms=0, tokens_per_sec=0)
+
+
+def _post(app, body: dict) -> httpx.Response:
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://mock") as client:
+            return await client.post("/v1/chat/completions", json=body)
+
+    return asyncio.run(go())
+
+
+def _messages(system: str, user: str = "hi") -> list[dict]:
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def test_classify_prompt_families():
+    assert classify(_messages(_chapter_system("B1") + JSON_ONLY_INSTRUCTION)) == "story_chapter"
+    assert classify(_messages(_quiz_system("gaokao") + JSON_ONLY_INSTRUCTION)) == "custom_quiz"
+    assert classify(_messages("你是一位专业的 AI 英语导师")) == "text"
+
+
+def test_non_stream_returns_canned_json():
+    resp = _post(create_app(FAST), {"messages": _messages(_chapter_system("A2"))})
+    assert resp.status_code == 200
+    content = resp.json()["choices"][0]["message"]["content"]
+    assert json.loads(content)["choices"][0]["label"] == "A"
+
+
+def test_stream_chunks_reassemble():
+    resp = _post(create_app(FAST), {"stream": True, "messages": _messages("tutor")})
+    lines = [line[6:] for line in resp.text.splitlines() if line.startswith("data: ")]
+    assert lines[-1] == "[DONE]"
+    text = "".join(json.loads(line)["choices"][0]["delta"]["content"] for line in lines[:-1])
+    assert text.startswith("好问题")
+    assert len(lines) > 10
+
+
+def test_error_injection():
+    app = create_app(MockConfig(latency_ms=0, tokens_per_sec=0, error_rate=1.0, error_status=[503]))
+    assert _post(app, {"messages": _messages("tutor")}).status_code == 503
+
+
+def test_canned_override():
+    app = create_app(FAST, canned={"text": "override"})
+    resp = _post(app, {"messages": _messages("tutor")})
+    assert resp.json()["choices"][0]["message"]["content"] == "override"
@@ -0,0 +1,61 @@
+from sqlalchemy import select
+
+from app.models.arena import BattleSession, PlayerRating
+from app.services import arena
+from tests.db import run_with_db
+
+
+def _snapshot(rating: PlayerRating) -> tuple:
+    return rating.rating, rating.rd, rating.volatility, rating.wins, rating.losses
+
+
+async def _play_out(db, user_id: int) -> dict:
+    battle = await arena.create_battle("spot_error", user_id, db)
+    assert "error" not in battle
+    result = {}
+    for _ in range(battle["rounds"]["max_rounds"]):
+        result = await arena.process_round(battle["id"], user_id, "no error", db)
+    await db.commit()
+    return result
+
+
+def test_replaying_finished_ai_battle_does_not_rerate():
+    async def scenario(db):
+        result = await _play_out(db, 1)
+        assert result["status"] == "finished"
+        rating = (await db.execute(select(PlayerRating).where(PlayerRating.user_id == 1))).scalar_one()
+        before = _snapshot(rating)
+        winner = result["winner_id"]
+
+        for _ in range(3):
+            assert "error" in await arena.process_round(result["id"], 1, "no error", db)
+        await db.commit()
+        await db.refresh(rating)
+        battle = await db.get(BattleSession, result["id"])
+        return before, _snapshot(rating), winner, battle.winner_id, len(battle.rounds_json["rounds"])
+
+    before, after, winner, stored_winner, n_rounds = run_with_db(scenario)
+    assert after == before
+    assert stored_winner == winner
+    assert n_rounds == arena.BATTLE_MODES["spot_error"]["rounds"]
+
+
+def test_rounds_rejected_for_live_and_foreign_battles():
+    async def scenario(db):
+        live = BattleSession(
+            mode="debate", player1_id=1, player2_id=2, status="finished", winner_id=2,
+            rounds_json={"rounds": [], "current_round": 3, "max_rounds": 3},
+        )
+        db.add(live)
+        own = await arena.create_battle("spot_error", 1, db)
+        await db.flush()
+        return (
+            await arena.process_round(live.id, 1, "x", db),
+            await arena.process_round(own["id"], 2, "x", db),
+            live.winner_id,
+        )
+
+    live_result, foreign_result, live_winner = run_with_db(scenario)
+    assert "error" in live_result
+    assert "error" in foreign_result
+    assert live_winner == 2
@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.services import fsrs
+
+W = fsrs.DEFAULT_WEIGHTS
+
+
+def _replay(reviews: list[tuple[float, int]]) -> list[tuple[float, float, float]]:
+    """按 (距上次复习天数, 评分) 逐次复习一张新卡，返回每次复习后的 (S, D, 间隔)。"""
+    s, d = np.nan, np.nan
+    trace = []
+    for elapsed, rating in reviews:
+        s, d, _ = fsrs.review(s, d, elapsed, rating)
+        trace.append((float(s), float(d), float(fsrs.next_interval(s))))
+    return trace
+
+
+def test_first_review_initial_state():
+    for rating in (1, 2, 3, 4):
+        s, d, r = fsrs.review(np.nan, np.nan, 0.0, rating)
+        assert s == W[rating - 1]
+        assert d == np.clip(W[4] - (rating - 3) * W[5], 1, 10)
+        assert r == 1.0
+
+
+def test_retrievability_is_target_at_stability():
+    # FACTOR 使 R(t=S) 恰为 0.9，于是保持率 0.9 时的间隔等于稳定性
+    assert abs(fsrs.retrievability(7.0, 7.0) - 0.9) < 1e-12
+    assert fsrs.next_interval(7.3) == 7.0
+
+
+def test_good_sequence_matches_reference_schedule():
+    # FSRS-4.5 默认参数下连续“认识”：间隔 4、15、49 天，难度不变
+    trace = _replay([(0, 3), (4, 3), (15, 3)])
+    assert [t[2] for t in trace] == [4.0, 15.0, 49.0]
+    assert abs(trace[1][0] - 14.8081) < 1e-3
+    assert abs(trace[2][0] - 49.4616) < 1e-3
+    assert all(abs(t[1] - W[4]) < 1e-9 for t in trace)
+
+
+def test_lapse_uses_post_forget_stability():
+    trace = _replay([(0, 3), (4, 3), (15, 3), (49, 3), (146, 3), (365, 1)])
+    s_before, d_before, _ = trace[-2]
+    s, d, _ = trace[-1]
+    r = fsrs.retrievability(365, s_before)
+    expected = W[11] * d_before ** -W[12] * ((s_before + 1) ** W[13] - 1) * np.exp(W[14] * (1 - r))
+    assert abs(s - expected) < 1e-9 and s < s_before
+    # 难度 D - w6·(1-3) 后向 D0(认识) 均值回归
+    assert abs(d - (W[7] * W[4] + (1 - W[7]) * (d_before + 2 * W[6]))) < 1e-9
+
+
+def test_batched_weights_match_single():
+    rng = np.random.default_rng(0)
+    w = np.stack([W, W * rng.uniform(0.9, 1.1, size=W.shape)])
+    s = np.array([3.0, 12.0, 40.0])
+    d = np.array([4.0, 6.5, 8.0])
+    elapsed = np.array([2.0, 20.0, 30.0])
+    rating = np.array([1, 3, 4])
+    batched, _, _ = fsrs.review(s, d, elapsed, rating, w)
+    for p in range(2):
+        single, _, _ = fsrs.review(s, d, elapsed, rating, w[p])
+        assert np.allclose(batched[p], single)
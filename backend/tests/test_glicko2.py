@@ -0,0 +1,57 @@
+import numpy as np
+
+from app.services import glicko2
+
+
+def _glickman_example():
+    """Glickman《Example of the Glicko-2 system》：1500/200 对 1400/30 胜、1550/100 负、1700/300 负。"""
+    mu, phi = glicko2.to_glicko2([1500, 1400, 1550, 1700], [200, 30, 100, 300])
+    sigma = np.full(4, 0.06)
+    fixed = np.array([False, True, True, True])
+    return glicko2.rate_period(mu, phi, sigma, [0, 0, 0], [1, 2, 3], [1.0, 0.0, 0.0], tau=0.5, fixed=fixed)
+
+
+def test_glickman_worked_example():
+    mu, phi, sigma = _glickman_example()
+    rating, rd = glicko2.from_glicko2(mu, phi)
+    assert abs(rating[0] - 1464.06) < 0.01
+    assert abs(rd[0] - 151.52) < 0.01
+    assert abs(sigma[0] - 0.05999) < 1e-5
+    # 固定的对手状态不变
+    assert np.allclose(rating[1:], [1400, 1550, 1700])
+
+
+def test_recompute_matches_rate_period():
+    # 同一周期的三局：recompute 与从初始状态直接 rate_period 结果相同
+    fixed = {1: (1400, 30), 2: (1550, 100), 3: (1700, 300)}
+    result = glicko2.recompute(4, period=[0, 0, 0], a=[0, 0, 0], b=[1, 2, 3], score_a=[1.0, 0.0, 0.0], fixed_ratings=fixed)
+
+    mu, phi = glicko2.to_glicko2([glicko2.DEFAULT_RATING, 1400, 1550, 1700], [glicko2.DEFAULT_RD, 30, 100, 300])
+    mu, phi, sigma = glicko2.rate_period(
+        mu, phi, np.full(4, glicko2.DEFAULT_VOLATILITY), [0, 0, 0], [1, 2, 3], [1.0, 0.0, 0.0],
+        fixed=np.array([False, True, True, True]),
+    )
+    rating, rd = glicko2.from_glicko2(mu, phi)
+    assert np.allclose(result.rating, rating) and np.allclose(result.rd, rd)
+    assert np.allclose(result.volatility, sigma)
+    assert result.wins.tolist() == [1, 0, 1, 1]
+    assert result.losses.tolist() == [2, 1, 0, 0]
+
+
+def test_rate_single_direction_and_draws():
+    up = glicko2.rate_single(1000, 200, 0.06, 1000, 50, 1.0)
+    down = glicko2.rate_single(1000, 200, 0.06, 1000, 50, 0.0)
+    draw = glicko2.rate_single(1000, 200, 0.06, 1000, 50, 0.5)
+    assert up[0] > 1000 > down[0]
+    assert abs(draw[0] - 1000) < 1e-6
+    # 赢输平 rd 都缩小
+    assert all(r[1] < 200 for r in (up, down, draw))
+
+
+def test_inactive_rd_grows_until_default():
+    mu, phi = glicko2.to_glicko2([1200], [100])
+    sigma = np.array([0.06])
+    for _ in range(5000):
+        mu, phi, sigma = glicko2.rate_period(mu, phi, sigma, [], [], [])
+    _, rd = glicko2.from_glicko2(mu, phi)
+    assert rd[0] == glicko2.DEFAULT_RD
@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.services import irt
+
+
+def _simulate(theta_true: list[float], seed: int = 0) -> list[tuple[float, float]]:
+    """按真实能力序列逐题作答（题目在当前估计处出题），返回每题后的 (θ, se)。"""
+    rng = np.random.default_rng(seed)
+    theta, se = 0.0, 1.0
+    trace = []
+    for true in theta_true:
+        b = theta + rng.normal(0, 0.3)
+        correct = rng.random() < irt.probability(true, 1.0, b, 0.25)
+        theta, se = irt.update_ability(theta, se, 1.0, b, 0.25, correct)
+        trace.append((theta, se))
+    return trace
+
+
+def test_se_does_not_collapse():
+    trace = _simulate([0.0] * 500)
+    assert trace[-1][1] > 0.3
+
+
+def test_ability_follows_improvement():
+    trace = _simulate([-1.0] * 300 + [1.0] * 80, seed=1)
+    assert abs(trace[299][0] + 1.0) < 0.6
+    assert trace[-1][0] > 0.3
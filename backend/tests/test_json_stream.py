@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JsonStreamParser, parse_json
+
+DOC = {
+    "narrative_text": "She said \"hi\"\nthen left 🚀 café",
+    "choices": [{"label": "A", "score": 1.5}, {"label": "B", "score": -2}],
+    "is_ending": False,
+    "extra": None,
+}
+
+
+def _stream(chunks: list[str]) -> tuple[object, list[tuple]]:
+    parser = JsonStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.finish())
+    return parser.value, events
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_any_chunking_gives_same_value_and_deltas(size):
+    text = json.dumps(DOC)  # ensure_ascii：🚀 写成 \ud83d\ude80 代理对转义
+    value, events = _stream(_chunks(text, size))
+    assert value == DOC
+    narrative = "".join(t for kind, path, t in events if kind == "delta" and path == ("narrative_text",))
+    assert narrative == DOC["narrative_text"]
+    # 数组元素完整时逐个产生 value 事件，根值最后
+    assert ("value", ("choices", 1), DOC["choices"][1]) in events
+    assert events[-1] == ("value", (), DOC)
+
+
+def test_surrogate_pair_split_across_chunks():
+    value, events = _stream(['{"t": "x\\ud83d', '\\ude80y"}'])
+    assert value == {"t": "x🚀y"}
+    assert "".join(e[2] for e in events if e[0] == "delta") == "x🚀y"
+    value, _ = _stream(['{"t": "\\u00', 'e9"}'])
+    assert value == {"t": "é"}
+
+
+def test_code_fence_and_trailing_commas():
+    text = 'Here you go:\n```json\n{"a": [1, 2, 3,], "b": {"c": "d",},}\n```\nDone.'
+    assert parse_json(text) == {"a": [1, 2, 3], "b": {"c": "d"}}
+
+
+def test_model_quirks():
+    text = "{'a': True, b: None, \"c\": NaN, \"d\": \"line1\nline2\" \"e\": undefined}"
+    assert parse_json(text) == {"a": True, "b": None, "c": None, "d": "line1\nline2", "e": None}
+
+
+def test_truncated_output_is_closed():
+    value, events = _stream(['{"narrative_text": "Once upon', ' a time", "choices": [{"label": "A"}, {"lab'])
+    assert value == {"narrative_text": "Once upon a time", "choices": [{"label": "A"}, {}]}
+    # 被截断的元素不产生 value 事件，完整的元素和根值产生
+    assert ("value", ("choices", 0), {"label": "A"}) in events
+    assert not any(kind == "value" and path == ("choices", 1) for kind, path, _ in events)
+    assert events[-1][:2] == ("value", ())
+
+    value, _ = _stream(['{"n": 12'])
+    assert value == {"n": 12}
+
+
+def test_stops_after_root_value():
+    parser = JsonStreamParser()
+    parser.feed('{"a": 1} trailing {"b": 2}')
+    assert parser.done and parser.value == {"a": 1}
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        parse_json("sorry, I can't help with that")
@@ -0,0 +1,116 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from app.services.knowledge_graph import KnowledgeGraph
+
+
+def _random_graph(n: int = 300, m: int = 700, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ids = rng.permutation(np.arange(1000, 1000 + n))
+    src = rng.choice(ids, m)
+    dst = rng.choice(ids, m)
+    # 权重取 1/8 的倍数，float32 与 float 下代价完全一致
+    w = rng.integers(1, 9, m) / 8
+    edges = [(int(a), int(b), float(c)) for a, b, c in zip(src, dst, w) if a != b]
+    sources, targets, weights = zip(*edges)
+    graph = KnowledgeGraph(ids, [f"w{i}" for i in ids], sources, targets, ["related"] * len(edges), weights)
+    return graph, ids, edges, rng
+
+
+def _dijkstra(edges, source: int, target: int) -> float:
+    adj: dict[int, list[tuple[int, float]]] = {}
+    for a, b, w in edges:
+        cost = 1.0 / max(w, 1e-3)
+        adj.setdefault(a, []).append((b, cost))
+        adj.setdefault(b, []).append((a, cost))
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, i = heapq.heappop(heap)
+        if i == target:
+            return d
+        if d > dist[i]:
+            continue
+        for j, c in adj.get(i, ()):
+            if d + c < dist.get(j, np.inf):
+                dist[j] = d + c
+                heapq.heappush(heap, (d + c, j))
+    return np.inf
+
+
+def _bfs(edges, source: int, k: int) -> dict[int, int]:
+    adj: dict[int, set[int]] = {}
+    for a, b, _ in edges:
+        adj.setdefault(a, set()).add(b)
+        adj.setdefault(b, set()).add(a)
+    hops = {source: 0}
+    queue = deque([source])
+    while queue:
+        i = queue.popleft()
+        if hops[i] == k:
+            continue
+        for j in adj.get(i, ()):
+            if j not in hops:
+                hops[j] = hops[i] + 1
+                queue.append(j)
+    return hops
+
+
+def _check_paths(graph, ids, edges, rng, pairs: int = 150):
+    weight = {}
+    for a, b, w in edges:
+        weight[(a, b)] = max(weight.get((a, b), 0.0), w)
+        weight[(b, a)] = max(weight.get((b, a), 0.0), w)
+    for _ in range(pairs):
+        s, t = (int(x) for x in rng.choice(ids, 2))
+        expected = _dijkstra(edges, s, t)
+        result = graph.shortest_path(s, t)
+        if expected == np.inf:
+            assert result is None
+            continue
+        assert abs(result["cost"] - expected) < 1e-4
+        nodes = result["node_ids"]
+        assert nodes[0] == s and nodes[-1] == t
+        # 路径确实由图中的边组成，代价加总一致
+        assert abs(sum(1.0 / weight[(a, b)] for a, b in zip(nodes, nodes[1:])) - expected) < 1e-6
+
+
+def test_shortest_path_matches_dijkstra():
+    graph, ids, edges, rng = _random_graph()
+    _check_paths(graph, ids, edges, rng)
+
+
+def test_shortest_path_with_pending_edges_and_after_compact():
+    graph, ids, edges, rng = _random_graph(seed=1)
+    new_ids = list(range(5000, 5020))
+    for node_id in new_ids:
+        graph.add_node(node_id, f"n{node_id}")
+    all_ids = np.concatenate([ids, new_ids])
+    for _ in range(120):
+        a, b = (int(x) for x in rng.choice(all_ids, 2))
+        if a == b:
+            continue
+        w = float(rng.integers(1, 9) / 8)
+        graph.add_edge(a, b, "synonym", w)
+        edges.append((a, b, w))
+    _check_paths(graph, all_ids, edges, rng)
+
+    count = graph.edge_count
+    graph.compact()
+    assert graph._pending_count == 0 and graph.edge_count == count
+    _check_paths(graph, all_ids, edges, rng)
+
+
+def test_k_hop_matches_bfs():
+    graph, ids, edges, rng = _random_graph(n=400, m=500, seed=2)
+    for source in rng.choice(ids, 20):
+        for k in (1, 2, 3):
+            assert graph.k_hop(int(source), k) == _bfs(edges, int(source), k)
+    graph.add_node(9000, "extra")
+    graph.add_edge(int(ids[0]), 9000, "related")
+    edges.append((int(ids[0]), 9000, 1.0))
+    assert graph.k_hop(int(ids[0]), 2) == _bfs(edges, int(ids[0]), 2)
+    graph.compact()
+    assert graph.k_hop(9000, 3) == _bfs(edges, 9000, 3)
@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.config import settings
+from app.routers import metrics as metrics_router
+
+app = FastAPI()
+app.include_router(metrics_router.router)
+
+
+def _get(client_ip: str, headers: dict | None = None) -> httpx.Response:
+    async def go():
+        transport = httpx.ASGITransport(app=app, client=(client_ip, 40000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            return await client.get("/metrics", headers=headers)
+
+    return asyncio.run(go())
+
+
+def test_metrics_hidden_from_public_clients(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_public", False)
+    monkeypatch.setattr(settings, "metrics_token", "")
+    monkeypatch.setattr(settings, "metrics_allow_ips", ["127.0.0.1", "10.0.0.0/8"])
+
+    assert _get("127.0.0.1").status_code == 200
+    assert _get("10.1.2.3").status_code == 200
+    assert _get("203.0.113.5").status_code == 404
+    # 同机反向代理转发的外部请求不按代理的回环地址放行
+    assert _get("127.0.0.1", {"X-Forwarded-For": "203.0.113.5"}).status_code == 404
+    # 未配置 token 时任何 Authorization 头都无效
+    assert _get("203.0.113.5", {"Authorization": "Bearer "}).status_code == 404
+
+
+def test_metrics_bearer_token(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_public", False)
+    monkeypatch.setattr(settings, "metrics_token", "s3cret")
+    monkeypatch.setattr(settings, "metrics_allow_ips", [])
+
+    assert _get("203.0.113.5", {"Authorization": "Bearer s3cret"}).status_code == 200
+    assert _get("203.0.113.5", {"Authorization": "Bearer wrong"}).status_code == 404
+    assert _get("203.0.113.5").status_code == 404
+
+
+def test_metrics_public_switch(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_public", True)
+    monkeypatch.setattr(settings, "metrics_allow_ips", [])
+
+    resp = _get("203.0.113.5")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
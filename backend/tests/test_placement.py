@@ -0,0 +1,70 @@
+import asyncio
+import statistics
+
+import numpy as np
+
+from app.services import irt, onboarding
+from app.services.adaptive import ItemBank, MC_GUESSING
+
+LEARNERS = 300
+
+
+def _run(true_theta: float, rng: np.random.Generator, source: str = "builtin") -> int:
+    """模拟一名能力为 true_theta 的学生做完分级测评，返回作答题数。"""
+
+    async def go():
+        _, bank = await onboarding._placement_bank(source, None)
+        question = await onboarding._next_question(source, bank, 0.0, [], None)
+        state = {
+            "status": "in_progress", "source": source, "theta": 0.0, "se": 1.0,
+            "items": [], "pending_item_id": question["item_id"],
+        }
+        while True:
+            a, b, c = bank.params(state["pending_item_id"])
+            item = await onboarding._load_item(source, state["pending_item_id"], None)
+            correct = rng.random() < irt.probability(true_theta, a, b, c)
+            answer = item["answer"] if correct else "Z"
+            state, resp = await onboarding.answer_placement(state, state["pending_item_id"], answer, None)
+            if resp["finished"]:
+                return resp["result"]["total"]
+
+    return asyncio.run(go())
+
+
+def _lengths(source: str) -> list[int]:
+    rng = np.random.default_rng(0)
+    return [_run(float(rng.normal()), rng, source) for _ in range(LEARNERS)]
+
+
+def test_builtin_placement_is_shorter_than_fixed_test():
+    lengths = _lengths("builtin")
+    assert max(lengths) <= onboarding.PLACEMENT_MAX_ITEMS < len(onboarding.ASSESSMENT_QUESTIONS)
+    assert 5 <= statistics.median(lengths) <= 8
+    # 不是所有人都顶到上限才停
+    assert sum(n < onboarding.PLACEMENT_MAX_ITEMS for n in lengths) > LEARNERS // 4
+
+
+def test_exam_bank_placement_ends_in_5_to_8_items(monkeypatch):
+    rng = np.random.default_rng(1)
+    n = 300
+    bank = ItemBank(
+        ids=np.arange(1, n + 1, dtype=np.int64),
+        a=np.ones(n),
+        b=rng.choice([-1.6, -0.8, 0.0, 0.8, 1.6], size=n),
+        c=np.full(n, MC_GUESSING),
+        groups=np.full(n, -1, dtype=np.int64),
+    )
+
+    async def fake_bank(db):
+        return bank
+
+    async def fake_item(source, item_id, db):
+        return {"content": f"q{item_id}", "options": ["A. x", "B. y", "C. z", "D. w"], "answer": "A"}
+
+    monkeypatch.setattr(onboarding, "get_placement_item_bank", fake_bank)
+    monkeypatch.setattr(onboarding, "_load_item", fake_item)
+
+    lengths = _lengths("exam")
+    assert max(lengths) <= onboarding.PLACEMENT_MAX_ITEMS
+    assert min(lengths) >= onboarding.PLACEMENT_MIN_ITEMS
+    assert 6 <= statistics.mean(lengths) <= 7.5
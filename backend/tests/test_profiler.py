@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.config import settings
+from app.services import profiler
+from app.services.metrics import RequestTimings
+
+
+def _busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def _handler():
+    _busy(0.3)
+    # 请求内创建的任务归属同一个请求
+    await asyncio.create_task(_child())
+
+
+async def _child():
+    _busy(0.2)
+
+
+def test_sampler_attributes_stacks_to_request(monkeypatch):
+    monkeypatch.setattr(settings, "slow_request_ms", 1)
+    monkeypatch.setattr(settings, "slow_request_sample_ms", 5)
+
+    async def go():
+        profiler.start()
+        try:
+            capture = profiler.begin({"method": "GET", "path": "/x"}, RequestTimings())
+            await _handler()
+            capture.active = False
+            profiler._active.discard(capture)
+            return capture
+        finally:
+            profiler.stop()
+
+    capture = asyncio.run(go())
+    stacks = " ".join(capture.stacks)
+    assert capture.ticks > 0
+    assert sum(capture.stacks.values()) > 0.5 * capture.ticks
+    assert "_handler" in stacks and "_child" in stacks
@@ -0,0 +1,55 @@
+import datetime
+
+from sqlalchemy import select
+
+from app.models.vocabulary import UserVocabulary, VocabReviewLog
+from app.services import spaced_repetition
+from tests.db import run_with_db
+
+UTC = datetime.timezone.utc
+
+
+def _review(word_id: int, at: datetime.datetime | None, feedback: str = "known") -> dict:
+    return {"word_id": word_id, "feedback": feedback, "latency_ms": 1000, "reviewed_at": at}
+
+
+def test_batched_reviews_use_client_times():
+    now = datetime.datetime.now(UTC)
+    last = now - datetime.timedelta(days=3)
+
+    async def scenario(db):
+        word = UserVocabulary(
+            user_id=1, word="apple", stability=2.0, difficulty=5.0, last_review_at=last, reps=1, status="learning",
+        )
+        db.add(word)
+        await db.flush()
+        # 客户端时钟慢 1 小时：同一个词 10 分钟前答错、5 分钟前答对，现在才提交
+        client_now = now - datetime.timedelta(hours=1)
+        reviews = [
+            _review(word.id, client_now - datetime.timedelta(minutes=10), "forgot"),
+            _review(word.id, client_now - datetime.timedelta(minutes=5)),
+        ]
+        await spaced_repetition.process_reviews(1, reviews, db, sent_at=client_now)
+        logs = (await db.execute(select(VocabReviewLog).order_by(VocabReviewLog.id))).scalars().all()
+        await db.refresh(word)
+        return logs, word
+
+    logs, word = run_with_db(scenario)
+    first, second = logs
+    assert abs(first.elapsed_days - (3 - 10 / 1440)) < 1e-3
+    assert abs(second.elapsed_days - 5 / 1440) < 1e-3
+    expected = now - datetime.timedelta(minutes=5)
+    assert abs((spaced_repetition._as_utc(word.last_review_at) - expected).total_seconds()) < 2
+    due = spaced_repetition._as_utc(word.due_at) - spaced_repetition._as_utc(word.last_review_at)
+    assert abs(due.total_seconds() / 86400 - second.scheduled_days) < 1e-3
+
+
+def test_review_time_is_clamped():
+    now = datetime.datetime(2026, 5, 1, 12, tzinfo=UTC)
+    last = now - datetime.timedelta(days=1)
+    zero = datetime.timedelta(0)
+    review_time = spaced_repetition._review_time
+    assert review_time(None, zero, last, now) == now
+    assert review_time(now + datetime.timedelta(hours=2), zero, last, now) == now
+    assert review_time(last - datetime.timedelta(days=5), zero, last, now) == last
+    assert review_time(now - datetime.timedelta(hours=1), zero, None, now) == now - datetime.timedelta(hours=1)
@@ -0,0 +1,18 @@
+import asyncio
+
+from app.services import story
+from app.services.pubsub import MemoryBroker
+
+
+def test_daily_prefetch_budget_is_shared(monkeypatch):
+    # 同一个 broker 即多个 worker 共享的计数
+    broker = MemoryBroker()
+    monkeypatch.setattr(story, "get_broker", lambda: broker)
+    monkeypatch.setattr(story, "PREFETCH_DAILY_BUDGET", 7)
+
+    async def go():
+        return [await story._reserve_prefetch(1, 3) for _ in range(4)], await story._reserve_prefetch(2, 3)
+
+    granted, other_user = asyncio.run(go())
+    assert granted == [3, 3, 1, 0]
+    assert other_user == 3
@@ -15,7 +15,7 @@ interface ExamPage {
   instruction: string;
   perScore: number | undefined;
   sectionScore: number;
-  questions: { id: number; content: string; options: string[]; passage_text?: string; difficulty: number; passage_group?: string; passage_index?: number }[];
+  questions: { id: number; content: string; options: string[]; difficulty: number; passage_group?: string; passage_index?: number }[];
   passageText: string | null;
   globalStart: number;
   type: "choice" | "cloze" | "grammar_fill" | "seven_choose_five" | "writing";
@@ -112,28 +112,31 @@ export default function MockPage() {
         ["writing", "application_writing", "continuation_writing"].includes(sec.section) ? "writing" : "choice";
 
       const hasGroups = sec.passage_groups && sec.passage_groups.length > 0
-        && sec.passage_groups.some(pg => pg.questions.length > 0);
+        && sec.passage_groups.some(pg => (pg.question_ids ?? []).length > 0);
 
       if (hasGroups) {
+        const byId = new Map(sec.questions.map(q => [q.id, q]));
         let firstInPart = isFirstOfPart;
         for (const pg of sec.passage_groups) {
-          if (pg.questions.length === 0) continue;
-          const passageText = pg.questions[0]?.passage_text || null;
+          // 旧版模考数据由服务端转换为 question_ids；缺失时按空组处理，不让页面崩溃
+          const groupQuestions = (pg.question_ids ?? [])
+            .map(id => byId.get(id))
+            .filter((q): q is NonNullable<typeof q> => !!q);
+          if (groupQuestions.length === 0) continue;
           result.push({
             part: partNum, partLabel, sectionKey: sec.section, sectionLabel: sec.label,
             instruction: sec.instruction || "", perScore: sec.per_score,
-            sectionScore: sec.score, questions: pg.questions, passageText,
+            sectionScore: sec.score, questions: groupQuestions, passageText: pg.passage_text || null,
             globalStart: globalQ, type: sectionType, isFirstPageOfPart: firstInPart,
           });
-          globalQ += pg.questions.length;
+          globalQ += groupQuestions.length;
           firstInPart = false;
         }
       } else {
-        const passageText = sec.questions[0]?.passage_text || null;
         result.push({
           part: partNum, partLabel, sectionKey: sec.section, sectionLabel: sec.label,
           instruction: sec.instruction || "", perScore: sec.per_score,
-          sectionScore: sec.score, questions: sec.questions, passageText,
+          sectionScore: sec.score, questions: sec.questions, passageText: null,
           globalStart: globalQ, type: sectionType, isFirstPageOfPart: isFirstOfPart,
         });
         globalQ += sec.questions.length;
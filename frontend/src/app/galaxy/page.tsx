@@ -7,12 +7,18 @@ import NodeDetailPanel from "@/components/galaxy/node-detail-panel";
 import GalaxyStats from "@/components/galaxy/galaxy-stats";
 
 export default function GalaxyPage() {
-  const { nodes, edges, selectedNode, stats, loading, fetchView, fetchStats } = useGalaxyStore();
+  const {
+    nodes, edges, selectedNode, stats, bounds, loading,
+    fetchBounds, fetchView, fetchViewport, fetchStats,
+  } = useGalaxyStore();
 
   useEffect(() => {
-    fetchView();
+    // 已有离线布局时由画布按视口/LOD 拉取节点，否则退回按词频分页
+    fetchBounds()
+      .then((b) => { if (b.placed_nodes === 0) fetchView(); })
+      .catch(() => fetchView());
     fetchStats();
-  }, [fetchView, fetchStats]);
+  }, [fetchBounds, fetchView, fetchStats]);
 
   return (
     <div className="h-[calc(100vh-4rem)] flex flex-col">
@@ -28,12 +34,12 @@ export default function GalaxyPage() {
 
       <div className="flex-1 flex overflow-hidden">
         <div className="flex-1 relative">
-          {loading && nodes.length === 0 ? (
+          {loading && nodes.length === 0 && !bounds?.placed_nodes ? (
             <div className="absolute inset-0 flex items-center justify-center" style={{ color: "var(--color-text-secondary)" }}>
               加载中...
             </div>
           ) : (
-            <GalaxyCanvas nodes={nodes} edges={edges} />
+            <GalaxyCanvas nodes={nodes} edges={edges} bounds={bounds} onViewportChange={fetchViewport} />
           )}
         </div>
 
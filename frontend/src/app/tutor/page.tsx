@@ -94,15 +94,18 @@ export default function TutorPage() {
   const [demoLoading, setDemoLoading] = useState(false);
   const [demoResult, setDemoResult] = useState<CognitiveDemoResult | null>(null);
   const [streaming, setStreaming] = useState(false);
+  // 服务端会话 id：历史和滚动摘要保存在服务端，后续每轮只需带上它
+  const [chatSessionId, setChatSessionId] = useState<number | null>(null);
   const bottomRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages]);
 
-  /** 切换模式时重置欢迎语和当前实验结果。 */
+  /** 切换模式时重置欢迎语和当前实验结果，并开启新的服务端会话（旧会话的历史和摘要不再带入）。 */
   const handleModeChange = (newMode: string) => {
     setMode(newMode);
+    setChatSessionId(null);
     setDemoResult(null);
     setSendError("");
     setDemoError("");
@@ -112,6 +115,7 @@ export default function TutorPage() {
   /** 将文档里定义的认知增强样例快速载入到输入区，便于直接演示。 */
   const applyPreset = (preset: DemoPreset) => {
     setMode(preset.mode);
+    setChatSessionId(null);
     setInput(preset.prompt);
     setReflection(preset.reflection);
     setDemoResult(null);
@@ -168,7 +172,6 @@ export default function TutorPage() {
     const userMsg: Message = { role: "user", content: text };
     setMessages((prev) => [...prev, userMsg]);
 
-    const history = messages.map((m) => ({ role: m.role, content: m.content }));
     setStreaming(true);
     setMessages((prev) => [...prev, { role: "assistant", content: "" }]);
 
@@ -182,7 +185,7 @@ export default function TutorPage() {
         },
         body: JSON.stringify({
           message: text,
-          history,
+          session_id: chatSessionId,
           mode,
           reflection_text: reflection,
           guidance_level: guidanceLevel,
@@ -190,6 +193,8 @@ export default function TutorPage() {
           allow_direct_answer: false,
         }),
       });
+      const sessionHeader = res.headers.get("X-Chat-Session-Id");
+      if (sessionHeader) setChatSessionId(Number(sessionHeader));
       const reader = res.body?.getReader();
       if (!reader) return;
       const decoder = new TextDecoder();
@@ -13,6 +13,7 @@ export default function BattleRoom() {
   const currentRound = currentBattle.rounds?.current_round || 0;
   const maxRounds = currentBattle.rounds?.max_rounds || 5;
   const isFinished = currentBattle.status === "finished";
+  const challenge = currentBattle.rounds?.challenge;
 
   const handleSubmit = async () => {
     if (!input.trim() || loading) return;
@@ -72,6 +73,17 @@ export default function BattleRoom() {
         ))}
       </div>
 
+      {/* Current round prompt */}
+      {!isFinished && challenge && (challenge.p1_anchor || challenge.sentence) && (
+        <div className="rounded-xl p-4 text-sm" style={{ background: "var(--color-primary-light)", color: "var(--color-text)" }}>
+          {challenge.p1_anchor ? (
+            <p>接龙：<span className="font-bold">{challenge.p1_anchor}</span>，请输入以字母 <span className="font-bold">{challenge.p1_anchor.slice(-1)}</span> 开头的单词</p>
+          ) : (
+            <p>找错：<span className="font-medium">{challenge.sentence}</span></p>
+          )}
+        </div>
+      )}
+
       {/* Input or result */}
       {!isFinished ? (
         <div className="flex gap-3">
@@ -1,11 +1,11 @@
 "use client";
 
 import { useEffect, useRef, useCallback } from "react";
-import { useGalaxyStore } from "@/stores/galaxy";
+import { useGalaxyStore, type GalaxyBounds, type GalaxyViewport } from "@/stores/galaxy";
 
 interface Node {
   id: number; word: string; pos: string; cefr_level: string; status: string;
-  x?: number; y?: number; vx?: number; vy?: number;
+  x?: number | null; y?: number | null; vx?: number; vy?: number;
 }
 
 interface Edge {
@@ -15,8 +15,14 @@ interface Edge {
 interface Props {
   nodes: Node[];
   edges: Edge[];
+  // 有离线布局时按布局坐标绘制并支持平移/缩放，否则退回力导向模拟
+  bounds?: GalaxyBounds | null;
+  onViewportChange?: (viewport: GalaxyViewport, lod: number) => void;
 }
 
+// 相机：视口中心的布局坐标与缩放（每布局单位的像素数）
+interface Camera { cx: number; cy: number; scale: number }
+
 const STATUS_COLORS: Record<string, string> = {
   undiscovered: "#6b7280", seen: "#60a5fa", familiar: "#fbbf24", mastered: "#34d399",
 };
@@ -25,12 +31,59 @@ const CEFR_SIZES: Record<string, number> = {
   A1: 8, A2: 10, B1: 12, B2: 14, C1: 16, C2: 18,
 };
 
-export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
+const VIEWPORT_DEBOUNCE_MS = 250;
+// 视口外多取一圈，小幅平移不必等待新数据
+const VIEWPORT_MARGIN = 0.25;
+const MAX_ZOOM = 64;
+
+// 缩放倍数（相对全景）每翻一倍多显示一层 LOD
+function lodForZoom(zoom: number, levels: number): number {
+  return Math.max(0, Math.min(levels - 1, Math.floor(Math.log2(Math.max(zoom, 1)))));
+}
+
+export default function GalaxyCanvas({ nodes: rawNodes, edges, bounds, onViewportChange }: Props) {
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const nodesRef = useRef<Node[]>([]);
   const animRef = useRef<number>(0);
   const dragRef = useRef<{ node: Node | null; offsetX: number; offsetY: number }>({ node: null, offsetX: 0, offsetY: 0 });
+  const panRef = useRef<{ x: number; y: number; moved: boolean } | null>(null);
+  const cameraRef = useRef<Camera | null>(null);
+  const fitScaleRef = useRef(1);
+  const viewportTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
   const selectNode = useGalaxyStore((s) => s.selectNode);
+  const layout = !!bounds && bounds.placed_nodes > 0;
+
+  // 把当前相机（加边距）换算成布局坐标视口，防抖后交给上层请求
+  const emitViewport = useCallback(() => {
+    if (viewportTimer.current) clearTimeout(viewportTimer.current);
+    viewportTimer.current = setTimeout(() => {
+      const canvas = canvasRef.current;
+      const cam = cameraRef.current;
+      if (!canvas || !cam || !bounds || !onViewportChange) return;
+      const halfW = (canvas.offsetWidth / 2 / cam.scale) * (1 + VIEWPORT_MARGIN);
+      const halfH = (canvas.offsetHeight / 2 / cam.scale) * (1 + VIEWPORT_MARGIN);
+      onViewportChange(
+        { min_x: cam.cx - halfW, min_y: cam.cy - halfH, max_x: cam.cx + halfW, max_y: cam.cy + halfH },
+        lodForZoom(cam.scale / fitScaleRef.current, bounds.lod_levels),
+      );
+    }, VIEWPORT_DEBOUNCE_MS);
+  }, [bounds, onViewportChange]);
+
+  useEffect(() => () => {
+    if (viewportTimer.current) clearTimeout(viewportTimer.current);
+  }, []);
+
+  // 布局模式：初始相机为整张星图的全景
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    if (!canvas || !layout || !bounds) return;
+    const spanX = Math.max(bounds.max_x - bounds.min_x, 1);
+    const spanY = Math.max(bounds.max_y - bounds.min_y, 1);
+    const scale = Math.min(canvas.offsetWidth / spanX, canvas.offsetHeight / spanY) * 0.9;
+    fitScaleRef.current = scale;
+    cameraRef.current = { cx: (bounds.min_x + bounds.max_x) / 2, cy: (bounds.min_y + bounds.max_y) / 2, scale };
+    emitViewport();
+  }, [layout, bounds, emitViewport]);
 
   // Initialize node positions
   useEffect(() => {
@@ -39,13 +92,28 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
     const w = canvas.offsetWidth;
     const h = canvas.offsetHeight;
 
+    if (layout) {
+      nodesRef.current = rawNodes.filter((n) => n.x != null && n.y != null);
+      return;
+    }
     nodesRef.current = rawNodes.map((n, i) => ({
       ...n,
       x: n.x ?? w / 2 + (Math.cos(i * 0.618 * Math.PI * 2) * (100 + Math.random() * 200)),
       y: n.y ?? h / 2 + (Math.sin(i * 0.618 * Math.PI * 2) * (100 + Math.random() * 200)),
       vx: 0, vy: 0,
     }));
-  }, [rawNodes]);
+  }, [rawNodes, layout]);
+
+  // 节点在屏幕上的位置；力导向模式下节点坐标本身就是屏幕坐标
+  const toScreen = useCallback((n: Node): [number, number] => {
+    const cam = cameraRef.current;
+    const canvas = canvasRef.current;
+    if (!layout || !cam || !canvas) return [n.x ?? 0, n.y ?? 0];
+    return [
+      ((n.x ?? 0) - cam.cx) * cam.scale + canvas.offsetWidth / 2,
+      ((n.y ?? 0) - cam.cy) * cam.scale + canvas.offsetHeight / 2,
+    ];
+  }, [layout]);
 
   const draw = useCallback(() => {
     const canvas = canvasRef.current;
@@ -64,7 +132,7 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
     const nodeMap = new Map(nodes.map((n) => [n.id, n]));
 
     // Simple force simulation step
-    for (let iter = 0; iter < 3; iter++) {
+    for (let iter = 0; iter < (layout ? 0 : 3); iter++) {
       // Repulsion between nodes
       for (let i = 0; i < nodes.length; i++) {
         for (let j = i + 1; j < nodes.length; j++) {
@@ -129,8 +197,8 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
       const b = nodeMap.get(e.target_id);
       if (!a || !b) continue;
       ctx.beginPath();
-      ctx.moveTo(a.x ?? 0, a.y ?? 0);
-      ctx.lineTo(b.x ?? 0, b.y ?? 0);
+      ctx.moveTo(...toScreen(a));
+      ctx.lineTo(...toScreen(b));
       ctx.stroke();
     }
 
@@ -138,9 +206,11 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
     for (const n of nodes) {
       const r = CEFR_SIZES[n.cefr_level] || 10;
       const color = STATUS_COLORS[n.status] || STATUS_COLORS.undiscovered;
+      const [sx, sy] = toScreen(n);
+      if (sx < -r || sy < -r || sx > w + r || sy > h + r) continue;
 
       ctx.beginPath();
-      ctx.arc(n.x ?? 0, n.y ?? 0, r, 0, Math.PI * 2);
+      ctx.arc(sx, sy, r, 0, Math.PI * 2);
       ctx.fillStyle = color;
       ctx.globalAlpha = n.status === "undiscovered" ? 0.4 : 0.9;
       ctx.fill();
@@ -150,11 +220,11 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
       ctx.fillStyle = color;
       ctx.font = `${Math.max(9, r - 2)}px system-ui, sans-serif`;
       ctx.textAlign = "center";
-      ctx.fillText(n.word, n.x ?? 0, (n.y ?? 0) + r + 12);
+      ctx.fillText(n.word, sx, sy + r + 12);
     }
 
     animRef.current = requestAnimationFrame(draw);
-  }, [edges]);
+  }, [edges, layout, toScreen]);
 
   useEffect(() => {
     animRef.current = requestAnimationFrame(draw);
@@ -165,25 +235,67 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
   const findNode = useCallback((mx: number, my: number): Node | null => {
     for (const n of nodesRef.current) {
       const r = CEFR_SIZES[n.cefr_level] || 10;
-      const dx = (n.x ?? 0) - mx;
-      const dy = (n.y ?? 0) - my;
+      const [sx, sy] = toScreen(n);
+      const dx = sx - mx;
+      const dy = sy - my;
       if (dx * dx + dy * dy < (r + 4) * (r + 4)) return n;
     }
     return null;
-  }, []);
+  }, [toScreen]);
+
+  // 布局模式：滚轮以光标为中心缩放（需要非 passive 监听才能阻止页面滚动）
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    if (!canvas || !layout) return;
+    const onWheel = (e: WheelEvent) => {
+      const cam = cameraRef.current;
+      if (!cam) return;
+      e.preventDefault();
+      const rect = canvas.getBoundingClientRect();
+      const mx = e.clientX - rect.left - canvas.offsetWidth / 2;
+      const my = e.clientY - rect.top - canvas.offsetHeight / 2;
+      const fit = fitScaleRef.current;
+      const scale = Math.max(fit / 2, Math.min(fit * MAX_ZOOM, cam.scale * Math.exp(-e.deltaY * 0.0015)));
+      // 保持光标下的布局坐标不动
+      cameraRef.current = {
+        cx: cam.cx + mx / cam.scale - mx / scale,
+        cy: cam.cy + my / cam.scale - my / scale,
+        scale,
+      };
+      emitViewport();
+    };
+    canvas.addEventListener("wheel", onWheel, { passive: false });
+    return () => canvas.removeEventListener("wheel", onWheel);
+  }, [layout, emitViewport]);
 
   const handleMouseDown = useCallback((e: React.MouseEvent) => {
     const rect = canvasRef.current?.getBoundingClientRect();
     if (!rect) return;
+    if (layout) {
+      panRef.current = { x: e.clientX, y: e.clientY, moved: false };
+      return;
+    }
     const mx = e.clientX - rect.left;
     const my = e.clientY - rect.top;
     const node = findNode(mx, my);
     if (node) {
       dragRef.current = { node, offsetX: mx - (node.x ?? 0), offsetY: my - (node.y ?? 0) };
     }
-  }, [findNode]);
+  }, [findNode, layout]);
 
   const handleMouseMove = useCallback((e: React.MouseEvent) => {
+    const pan = panRef.current;
+    const cam = cameraRef.current;
+    if (pan && e.buttons === 0) panRef.current = null;
+    else if (pan && cam) {
+      const dx = e.clientX - pan.x;
+      const dy = e.clientY - pan.y;
+      if (!pan.moved && dx * dx + dy * dy < 9) return;
+      cameraRef.current = { ...cam, cx: cam.cx - dx / cam.scale, cy: cam.cy - dy / cam.scale };
+      panRef.current = { x: e.clientX, y: e.clientY, moved: true };
+      emitViewport();
+      return;
+    }
     const { node, offsetX, offsetY } = dragRef.current;
     if (!node) return;
     const rect = canvasRef.current?.getBoundingClientRect();
@@ -192,13 +304,17 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
     node.y = e.clientY - rect.top - offsetY;
     node.vx = 0;
     node.vy = 0;
-  }, []);
+  }, [emitViewport]);
 
   const handleMouseUp = useCallback(() => {
     dragRef.current = { node: null, offsetX: 0, offsetY: 0 };
   }, []);
 
   const handleClick = useCallback((e: React.MouseEvent) => {
+    // 拖动平移结束时不当作点击
+    const panned = panRef.current?.moved;
+    panRef.current = null;
+    if (panned) return;
     const rect = canvasRef.current?.getBoundingClientRect();
     if (!rect) return;
     const node = findNode(e.clientX - rect.left, e.clientY - rect.top);
@@ -213,6 +329,7 @@ export default function GalaxyCanvas({ nodes: rawNodes, edges }: Props) {
       onMouseDown={handleMouseDown}
       onMouseMove={handleMouseMove}
       onMouseUp={handleMouseUp}
+      onMouseLeave={() => { panRef.current = null; }}
       onClick={handleClick}
     />
   );
@@ -4,45 +4,71 @@ import { useState } from "react";
 import { api } from "@/lib/api";
 
 interface Question {
-  index: number;
+  item_id: number;
   difficulty: string;
   content: string;
   options: string[];
 }
 
+interface Progress {
+  answered: number;
+  max_items: number;
+}
+
+interface AssessmentResult {
+  score: number;
+  correct: number;
+  total: number;
+  cefr_level: string;
+}
+
+interface PlacementResponse {
+  finished: boolean;
+  question?: Question;
+  progress?: Progress;
+  result?: AssessmentResult;
+}
+
 interface AssessmentStepProps {
-  onComplete: (result: { score: number; correct: number; total: number; cefr_level: string }) => void;
+  onComplete: (result: AssessmentResult) => void;
 }
 
 export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
-  const [questions, setQuestions] = useState<Question[]>([]);
-  const [current, setCurrent] = useState(0);
-  const [answers, setAnswers] = useState<Record<number, string>>({});
+  const [question, setQuestion] = useState<Question | null>(null);
+  const [progress, setProgress] = useState<Progress>({ answered: 0, max_items: 8 });
+  const [answer, setAnswer] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [started, setStarted] = useState(false);
 
-  const startAssessment = async () => {
-    const data = await api.get<{ questions: Question[] }>("/onboarding/assessment");
-    setQuestions(data.questions);
-    setStarted(true);
+  const handleResponse = (data: PlacementResponse) => {
+    if (data.finished && data.result) {
+      onComplete(data.result);
+      return;
+    }
+    setQuestion(data.question ?? null);
+    if (data.progress) setProgress(data.progress);
+    setAnswer(null);
   };
 
-  const selectAnswer = (answer: string) => {
-    setAnswers({ ...answers, [current]: answer });
+  const startAssessment = async () => {
+    setLoading(true);
+    try {
+      const data = await api.post<PlacementResponse>("/onboarding/assessment/start", {});
+      handleResponse(data);
+      setStarted(true);
+    } catch { /* ignore */ }
+    setLoading(false);
   };
 
   const handleSubmit = async () => {
+    if (!question || !answer) return;
     setLoading(true);
-    const answerList = Object.entries(answers).map(([idx, ans]) => ({
-      question_index: Number(idx),
-      answer: ans.charAt(0), // Extract letter from "A. xxx"
-    }));
     try {
-      const result = await api.post<{ score: number; correct: number; total: number; cefr_level: string }>(
-        "/onboarding/assessment",
-        { answers: answerList }
-      );
-      onComplete(result);
+      const data = await api.post<PlacementResponse>("/onboarding/assessment/answer", {
+        item_id: question.item_id,
+        answer: answer.charAt(0), // Extract letter from "A. xxx"
+      });
+      handleResponse(data);
     } catch { /* ignore */ }
     setLoading(false);
   };
@@ -53,10 +79,11 @@ export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
         <div className="text-4xl mb-4">📝</div>
         <h3 className="text-lg font-semibold mb-2" style={{ color: "var(--color-text)" }}>英语水平快速测评</h3>
         <p className="text-sm mb-6" style={{ color: "var(--color-text-secondary)" }}>
-          10 道题，约 3 分钟，帮助我们了解你的英语水平
+          根据作答自动调整难度，约 3 分钟，帮助我们了解你的英语水平
         </p>
         <button
           onClick={startAssessment}
+          disabled={loading}
           className="px-6 py-2.5 rounded-lg text-sm font-medium text-white"
           style={{ background: "var(--color-primary)" }}
         >
@@ -66,7 +93,7 @@ export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
     );
   }
 
-  const q = questions[current];
+  const q = question;
   if (!q) return null;
 
   return (
@@ -74,7 +101,7 @@ export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
       {/* Progress */}
       <div className="flex items-center justify-between mb-4">
         <span className="text-xs" style={{ color: "var(--color-text-secondary)" }}>
-          {current + 1} / {questions.length}
+          第 {progress.answered + 1} 题 · 最多 {progress.max_items} 题
         </span>
         <span className="text-xs px-2 py-0.5 rounded" style={{ background: "var(--color-primary-light, #dbeafe)", color: "var(--color-primary)" }}>
           {q.difficulty}
@@ -83,7 +110,7 @@ export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
       <div className="h-1.5 rounded-full mb-6" style={{ background: "var(--color-border)" }}>
         <div
           className="h-full rounded-full transition-all"
-          style={{ width: `${((current + 1) / questions.length) * 100}%`, background: "var(--color-primary)" }}
+          style={{ width: `${((progress.answered + 1) / progress.max_items) * 100}%`, background: "var(--color-primary)" }}
         />
       </div>
 
@@ -95,13 +122,13 @@ export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
         {q.options.map((opt) => (
           <button
             key={opt}
-            onClick={() => selectAnswer(opt)}
+            onClick={() => setAnswer(opt)}
             className={`w-full text-left text-sm px-4 py-3 rounded-lg border transition-all ${
-              answers[current] === opt ? "border-2 font-medium" : ""
+              answer === opt ? "border-2 font-medium" : ""
             }`}
             style={{
-              borderColor: answers[current] === opt ? "var(--color-primary)" : "var(--color-border)",
-              background: answers[current] === opt ? "var(--color-primary-light, #dbeafe)" : "var(--color-surface)",
+              borderColor: answer === opt ? "var(--color-primary)" : "var(--color-border)",
+              background: answer === opt ? "var(--color-primary-light, #dbeafe)" : "var(--color-surface)",
               color: "var(--color-text)",
             }}
           >
@@ -111,34 +138,15 @@ export default function AssessmentStep({ onComplete }: AssessmentStepProps) {
       </div>
 
       {/* Navigation */}
-      <div className="flex justify-between">
+      <div className="flex justify-end">
         <button
-          onClick={() => setCurrent(Math.max(0, current - 1))}
-          disabled={current === 0}
-          className="text-sm px-4 py-2 rounded-lg border disabled:opacity-30"
-          style={{ borderColor: "var(--color-border)", color: "var(--color-text-secondary)" }}
+          onClick={handleSubmit}
+          disabled={loading || !answer}
+          className="text-sm px-6 py-2 rounded-lg text-white disabled:opacity-30"
+          style={{ background: "var(--color-primary)" }}
         >
-          上一题
+          {loading ? "评估中..." : "下一题"}
         </button>
-        {current < questions.length - 1 ? (
-          <button
-            onClick={() => setCurrent(current + 1)}
-            disabled={!answers[current]}
-            className="text-sm px-4 py-2 rounded-lg text-white disabled:opacity-30"
-            style={{ background: "var(--color-primary)" }}
-          >
-            下一题
-          </button>
-        ) : (
-          <button
-            onClick={handleSubmit}
-            disabled={loading || Object.keys(answers).length < questions.length}
-            className="text-sm px-6 py-2 rounded-lg text-white disabled:opacity-30"
-            style={{ background: "var(--color-primary)" }}
-          >
-            {loading ? "评估中..." : "提交测评"}
-          </button>
-        )}
       </div>
     </div>
   );
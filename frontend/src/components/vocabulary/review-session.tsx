@@ -1,6 +1,6 @@
 "use client";
 
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import ReviewCard from "./review-card";
 import XPToast from "@/components/ui/xp-toast";
 import { api } from "@/lib/api";
@@ -12,6 +12,20 @@ interface DueWord {
   status: string;
 }
 
+interface ReviewItem {
+  word_id: number;
+  feedback: string;
+  latency_ms: number;
+  reviewed_at: string; // 作答时间；提交可能晚于作答，后端按它计算间隔
+}
+
+// 每答 FLUSH_EVERY 个词提交一批；页面隐藏、组件卸载和本轮结束时也会提交剩余的
+const FLUSH_EVERY = 10;
+// 后端单批上限
+const MAX_BATCH = 200;
+// 提交失败后的重试间隔（毫秒），用完后等下一次触发再试
+const RETRY_DELAYS = [2_000, 5_000, 15_000];
+
 interface ReviewSessionProps {
   words: DueWord[];
   onComplete: () => void;
@@ -23,27 +37,87 @@ export default function ReviewSession({ words, onComplete }: ReviewSessionProps)
   const [xpTrigger, setXpTrigger] = useState(0);
   const [stats, setStats] = useState({ known: 0, fuzzy: 0, forgot: 0 });
 
+  // 尚未成功提交的复习记录（按作答顺序）；提交中的那一批先移出，失败再放回队首
+  const pending = useRef<ReviewItem[]>([]);
+  const inflight = useRef<Promise<boolean> | null>(null);
+  const retryTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const retryCount = useRef(0);
+  const mounted = useRef(true);
+  const shownAt = useRef(Date.now());
+
+  /** 提交一批复习记录，成功返回 true；失败时记录放回队列并安排重试。 */
+  const flush = (keepalive = false): Promise<boolean> => {
+    // 页面要关了：等当前这批结束后把剩下的也发出去
+    if (inflight.current) return keepalive ? inflight.current.then(() => flush(true)) : inflight.current;
+    if (pending.current.length === 0) return Promise.resolve(true);
+    if (retryTimer.current) {
+      clearTimeout(retryTimer.current);
+      retryTimer.current = null;
+    }
+
+    const batch = pending.current.splice(0, MAX_BATCH);
+    // sent_at 让后端校正本机时钟偏差
+    const body = { reviews: batch, sent_at: new Date().toISOString() };
+    const send = keepalive
+      ? api.postKeepalive<{ xp?: { xp_gained: number } }>("/vocabulary/review/batch", body)
+      : api.post<{ xp?: { xp_gained: number } }>("/vocabulary/review/batch", body);
+
+    inflight.current = send
+      .then((res) => {
+        retryCount.current = 0;
+        if (res.xp?.xp_gained && mounted.current) {
+          setXpGained(res.xp.xp_gained);
+          setXpTrigger((t) => t + 1);
+        }
+        return true;
+      })
+      .catch(() => {
+        pending.current.unshift(...batch);
+        const delay = RETRY_DELAYS[retryCount.current];
+        if (delay !== undefined && mounted.current) {
+          retryCount.current += 1;
+          retryTimer.current = setTimeout(() => void flush(), delay);
+        }
+        return false;
+      })
+      .finally(() => {
+        inflight.current = null;
+      });
+    return inflight.current;
+  };
+
+  // 切到后台（含关闭标签页前）和离开页面时把剩余记录用 keepalive 请求发出去
+  useEffect(() => {
+    mounted.current = true;
+    const onVisibilityChange = () => {
+      if (document.visibilityState === "hidden") void flush(true);
+    };
+    document.addEventListener("visibilitychange", onVisibilityChange);
+    return () => {
+      mounted.current = false;
+      document.removeEventListener("visibilitychange", onVisibilityChange);
+      if (retryTimer.current) clearTimeout(retryTimer.current);
+      void flush(true);
+    };
+  }, []);
+
   const handleFeedback = async (feedback: "known" | "fuzzy" | "forgot") => {
     const word = words[current];
-    try {
-      const res = await api.post<{ xp?: { xp_gained: number } }>("/vocabulary/review", {
-        word_id: word.id,
-        feedback,
-      });
-      if (res.xp?.xp_gained) {
-        setXpGained(res.xp.xp_gained);
-        setXpTrigger((t) => t + 1);
-      }
-    } catch {
-      // continue anyway
-    }
+    pending.current.push({
+      word_id: word.id, feedback, latency_ms: Date.now() - shownAt.current, reviewed_at: new Date().toISOString(),
+    });
+    shownAt.current = Date.now();
 
     setStats((s) => ({ ...s, [feedback]: s[feedback] + 1 }));
 
     if (current < words.length - 1) {
       setCurrent((c) => c + 1);
+      if (pending.current.length >= FLUSH_EVERY) void flush();
     } else {
-      // Session complete
+      // 本轮结束：等正在提交的一批完成，再提交剩余记录（失败的留给重试和卸载时的 keepalive 提交）
+      await inflight.current;
+      let ok = true;
+      while (ok && pending.current.length > 0) ok = await flush();
       onComplete();
     }
   };
@@ -5,9 +5,13 @@ interface BattleMode {
   mode: string; name: string; description: string; rounds: number;
 }
 
+interface BattleChallenge {
+  p1_anchor?: string; sentence?: string;
+}
+
 interface Battle {
   id: number; mode: string; player1_id: number; player2_id: number | null;
-  status: string; rounds: { rounds: { round: number; p1_input: string; p2_input: string; p1_score: number; p2_score: number; p1_feedback?: string; p2_feedback?: string }[]; current_round: number; max_rounds: number } | null;
+  status: string; rounds: { rounds: { round: number; p1_input: string; p2_input: string; p1_score: number; p2_score: number; p1_feedback?: string; p2_feedback?: string }[]; current_round: number; max_rounds: number; challenge?: BattleChallenge | null } | null;
   winner_id: number | null; created_at: string;
 }
 
@@ -32,7 +32,6 @@ interface MockQuestion {
   id: number;
   content: string;
   options: string[];
-  passage_text?: string;
   difficulty: number;
   passage_group?: string;
   passage_index?: number;
@@ -40,7 +39,8 @@ interface MockQuestion {
 
 interface PassageGroup {
   group_id: string | null;
-  questions: MockQuestion[];
+  passage_text: string | null;
+  question_ids: number[];
 }
 
 interface MockSection {
@@ -4,6 +4,7 @@ import { api } from "@/lib/api";
 interface GalaxyNode {
   id: number; word: string; pos: string; definition: string; definition_en?: string;
   cefr_level: string; frequency_rank?: number; example_sentence?: string; status: string;
+  x?: number | null; y?: number | null; lod_level?: number | null;
 }
 
 interface GalaxyEdge {
@@ -15,6 +16,14 @@ interface GalaxyStats {
   total_nodes: number; undiscovered: number; seen: number; familiar: number; mastered: number; progress_pct: number;
 }
 
+export interface GalaxyBounds {
+  min_x: number; min_y: number; max_x: number; max_y: number; lod_levels: number; placed_nodes: number;
+}
+
+export interface GalaxyViewport {
+  min_x: number; min_y: number; max_x: number; max_y: number;
+}
+
 interface GalaxyState {
   nodes: GalaxyNode[];
   edges: GalaxyEdge[];
@@ -22,16 +31,28 @@ interface GalaxyState {
   selectedNode: GalaxyNode | null;
   relatedNodes: GalaxyNode[];
   relatedEdges: GalaxyEdge[];
+  bounds: GalaxyBounds | null;
   loading: boolean;
+  fetchBounds: () => Promise<GalaxyBounds>;
   fetchView: (limit?: number, offset?: number) => Promise<void>;
+  fetchViewport: (viewport: GalaxyViewport, lod: number, limit?: number) => Promise<void>;
   fetchStats: () => Promise<void>;
   selectNode: (nodeId: number) => Promise<void>;
   exploreNode: (nodeId: number) => Promise<void>;
   learnNode: (nodeId: number, status: string) => Promise<void>;
 }
 
+// 平移/缩放时请求会连续发出，只采用最后一次的结果
+let viewportSeq = 0;
+
 export const useGalaxyStore = create<GalaxyState>((set, get) => ({
-  nodes: [], edges: [], stats: null, selectedNode: null, relatedNodes: [], relatedEdges: [], loading: false,
+  nodes: [], edges: [], stats: null, selectedNode: null, relatedNodes: [], relatedEdges: [], bounds: null, loading: false,
+
+  fetchBounds: async () => {
+    const data = await api.get<GalaxyBounds>("/galaxy/bounds");
+    set({ bounds: data });
+    return data;
+  },
 
   fetchView: async (limit = 50, offset = 0) => {
     set({ loading: true });
@@ -39,6 +60,22 @@ export const useGalaxyStore = create<GalaxyState>((set, get) => ({
     set({ nodes: data.nodes, edges: data.edges, loading: false });
   },
 
+  fetchViewport: async (viewport, lod, limit = 400) => {
+    const seq = ++viewportSeq;
+    set({ loading: true });
+    const q = new URLSearchParams({
+      min_x: String(viewport.min_x), min_y: String(viewport.min_y),
+      max_x: String(viewport.max_x), max_y: String(viewport.max_y),
+      lod: String(lod), limit: String(limit),
+    });
+    try {
+      const data = await api.get<{ nodes: GalaxyNode[]; edges: GalaxyEdge[] }>(`/galaxy/view?${q}`);
+      if (seq === viewportSeq) set({ nodes: data.nodes, edges: data.edges });
+    } finally {
+      if (seq === viewportSeq) set({ loading: false });
+    }
+  },
+
   fetchStats: async () => {
     const data = await api.get<GalaxyStats>("/galaxy/stats");
     set({ stats: data });
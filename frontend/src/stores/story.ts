@@ -1,5 +1,5 @@
 import { create } from "zustand";
-import { api } from "@/lib/api";
+import { api, streamEvents } from "@/lib/api";
 
 interface StoryTemplate {
   id: number; title: string; genre: string; cefr_min: string; cefr_max: string;
@@ -60,13 +60,42 @@ export const useStoryStore = create<StoryState>((set, get) => ({
 
   makeChoice: async (choice) => {
     const session = get().currentSession;
-    if (!session) return;
+    const previous = get().currentChapter;
+    if (!session || !previous) return;
     set({ loading: true });
-    const data = await api.post<{ session: StorySession; chapter: StoryChapter }>("/story/choice", { session_id: session.id, choice });
-    set((s) => ({
-      currentSession: data.session, currentChapter: data.chapter,
-      allChapters: [...s.allChapters, data.chapter], loading: false,
-    }));
+    // 叙事文本边生成边显示；选项和挑战等章节落库后再出现
+    const draft: StoryChapter = {
+      id: 0, chapter_number: previous.chapter_number + 1, narrative_text: "",
+      choices: null, challenge: null, chosen_option: null, learning_points: null,
+    };
+    const chosen = { ...previous, chosen_option: choice };
+    set((s) => ({ currentChapter: draft, allChapters: [...s.allChapters.slice(0, -1), chosen, draft] }));
+    const update = (patch: Partial<StoryChapter>) => {
+      Object.assign(draft, patch);
+      set((s) => ({ currentChapter: { ...draft }, allChapters: [...s.allChapters.slice(0, -1), { ...draft }] }));
+    };
+    try {
+      await streamEvents("/story/choice/stream", { session_id: session.id, choice }, (event, data) => {
+        if (event === "narrative") {
+          update({ narrative_text: draft.narrative_text + (data.text as string) });
+        } else if (event === "learning_points") {
+          update({ learning_points: data.data as StoryChapter["learning_points"] });
+        } else if (event === "chapter") {
+          const chapter = data.chapter as StoryChapter;
+          set((s) => ({
+            currentSession: data.session as StorySession, currentChapter: chapter,
+            allChapters: [...s.allChapters.slice(0, -1), chapter],
+          }));
+        } else if (event === "error") {
+          throw new Error(data.error as string);
+        }
+      });
+    } catch (e) {
+      set((s) => ({ currentChapter: previous, allChapters: [...s.allChapters.slice(0, -2), previous] }));
+      throw e;
+    } finally {
+      set({ loading: false });
+    }
   },
 
   submitChallenge: async (chapterId, answer) => {
@@ -87,6 +87,9 @@ export default function ExamMockScreen() {
   const activeSection = mockData?.sections[activeSectionIdx];
   const allSectionQuestions = activeSection?.questions ?? [];
   const currentQuestion = allSectionQuestions[questionIdx];
+  const currentPassageText = currentQuestion
+    ? activeSection?.passage_groups.find((g) => g.question_ids?.includes(currentQuestion.id))?.passage_text
+    : null;
 
   const totalQuestions = mockData?.sections.reduce(
     (sum, s) => sum + s.questions.length,
@@ -304,9 +307,9 @@ export default function ExamMockScreen() {
           第 {globalIdx} 题 / 共 {totalQuestions} 题
         </Text>
 
-        {currentQuestion.passage_text && (
+        {currentPassageText && (
           <View style={styles.passageCard}>
-            <Text style={styles.passageText}>{currentQuestion.passage_text}</Text>
+            <Text style={styles.passageText}>{currentPassageText}</Text>
           </View>
         )}
 
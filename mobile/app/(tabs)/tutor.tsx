@@ -34,8 +34,18 @@ export default function TutorScreen() {
   const [reflection, setReflection] = useState("");
   const [sendError, setSendError] = useState("");
   const [streaming, setStreaming] = useState(false);
+  const sessionIdRef = useRef<number | null>(null);
   const listRef = useRef<FlatList>(null);
 
+  // 开始新对话：丢弃服务端会话，下一条消息不再带入旧的历史和摘要
+  function handleNewChat() {
+    if (streaming) return;
+    sessionIdRef.current = null;
+    setMessages([]);
+    setReflection("");
+    setSendError("");
+  }
+
   async function handleSend() {
     const text = input.trim();
     if (!text || streaming) return;
@@ -65,6 +75,10 @@ export default function TutorScreen() {
         },
         {
           mode: "free",
+          sessionId: sessionIdRef.current,
+          onSession: (id) => {
+            sessionIdRef.current = id;
+          },
           reflectionText: reflection,
           guidanceLevel: "socratic",
           hintBudget: 2,
@@ -125,6 +139,13 @@ export default function TutorScreen() {
       </View>
 
       <View style={styles.inputBar}>
+        <TouchableOpacity
+          style={[styles.newChatBtn, (messages.length === 0 || streaming) && styles.sendBtnDisabled]}
+          onPress={handleNewChat}
+          disabled={messages.length === 0 || streaming}
+        >
+          <Feather name="plus" size={20} color="#3B82F6" />
+        </TouchableOpacity>
         <TextInput
           style={styles.input}
           placeholder="输入消息..."
@@ -216,4 +237,12 @@ const styles = StyleSheet.create({
     justifyContent: "center",
   },
   sendBtnDisabled: { opacity: 0.5 },
+  newChatBtn: {
+    width: 40,
+    height: 40,
+    borderRadius: 20,
+    backgroundColor: "#EFF6FF",
+    alignItems: "center",
+    justifyContent: "center",
+  },
 });
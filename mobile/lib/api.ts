@@ -60,6 +60,8 @@ export function streamChat(
     guidanceLevel?: "socratic" | "mirror" | "hybrid";
     hintBudget?: number;
     allowDirectAnswer?: boolean;
+    /** 服务端会话 id（响应头 X-Chat-Session-Id），下一轮通过 sessionId 传回 */
+    onSession?: (sessionId: number) => void;
   }
 ): Promise<void> {
   return new Promise(async (resolve, reject) => {
@@ -70,6 +72,12 @@ export function streamChat(
     if (token) xhr.setRequestHeader("Authorization", `Bearer ${token}`);
 
     let lastIndex = 0;
+    xhr.onreadystatechange = () => {
+      if (xhr.readyState === XMLHttpRequest.HEADERS_RECEIVED) {
+        const sessionHeader = xhr.getResponseHeader("X-Chat-Session-Id");
+        if (sessionHeader) options?.onSession?.(Number(sessionHeader));
+      }
+    };
     xhr.onprogress = () => {
       const newText = xhr.responseText.slice(lastIndex);
       lastIndex = xhr.responseText.length;
@@ -91,7 +91,6 @@ export interface MockQuestion {
   id: number;
   content: string;
   options: string[];
-  passage_text?: string;
   difficulty: number;
   passage_group?: string;
   passage_index?: number;
@@ -99,7 +98,8 @@ export interface MockQuestion {
 
 export interface PassageGroup {
   group_id: string | null;
-  questions: MockQuestion[];
+  passage_text: string | null;
+  question_ids: number[];
 }
 
 export interface MockSection {